@@ -1,36 +1,22 @@
-import pandas as pd
-import numpy as np
+from modules.data_manager import DataManager
 
-def adicionar_coluna_id(excel_path, sheet_name='Div_CC'):
+def adicionar_coluna_id(excel_path):
     """
-    Verifica se a coluna 'id' existe na aba especificada.
-    Se não existir, adiciona a coluna e a preenche com um ID único para cada linha.
+    Verifica se as abas transacionais (Receitas, Despesas, Vendas, Investimentos e Div_CC)
+    têm a coluna 'id' preenchida. Abas sem a coluna, ou com linhas sem id, recebem
+    um ID único para cada linha; os ids existentes são preservados.
     """
     try:
-        xls = pd.ExcelFile(excel_path)
-        if sheet_name in xls.sheet_names:
-            df = pd.read_excel(xls, sheet_name=sheet_name)
-            
-            if 'id' not in df.columns:
-                print(f"A coluna 'id' não foi encontrada na aba '{sheet_name}'. Adicionando...")
-                
-                # Gera IDs únicos para cada linha existente
-                df['id'] = range(1, len(df) + 1)
-                
-                # Salva a alteração de volta no arquivo Excel
-                with pd.ExcelWriter(excel_path, engine='openpyxl', mode='a', if_sheet_exists='replace') as writer:
-                    df.to_excel(writer, sheet_name=sheet_name, index=False)
-                
-                print("Coluna 'id' adicionada e preenchida com sucesso!")
-            else:
-                print(f"A coluna 'id' já existe na aba '{sheet_name}'. Nenhuma alteração necessária.")
-
+        atualizadas = DataManager(excel_path).ensure_record_ids()
+        
+        if atualizadas:
+            print(f"Coluna 'id' adicionada e preenchida com sucesso nas abas: {', '.join(atualizadas)}")
         else:
-            print(f"A aba '{sheet_name}' não foi encontrada no arquivo Excel.")
+            print("Todas as abas transacionais já possuem 'id'. Nenhuma alteração necessária.")
 
     except Exception as e:
         print(f"Ocorreu um erro: {e}")
 
 if __name__ == "__main__":
     caminho_excel = 'Base_financas.xlsx'
-    adicionar_coluna_id(caminho_excel) 
\ No newline at end of file
+    adicionar_coluna_id(caminho_excel)
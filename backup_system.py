@@ -80,9 +80,9 @@ class BackupSystem:
             return False, f"Erro ao limpar backups: {str(e)}"
 
 # Função para uso no dashboard
-def safe_backup(operation_type="manual"):
+def safe_backup(operation_type="manual", excel_path='Base_financas.xlsx'):
     """Função segura para criar backup"""
-    backup_sys = BackupSystem()
+    backup_sys = BackupSystem(excel_path)
     success, message = backup_sys.create_backup(operation_type)
     if success:
         # Limpa backups antigos automaticamente
@@ -84,6 +84,61 @@ CACHE_CONFIG = {
     "max_entries": 100
 }
 
+# Manutenção incremental do cubo mensal (ver modules.monthly_cube)
+CUBE_CONFIG = {
+    "verify_every": 50,  # Atualizações por deltas entre reconstruções completas de conferência
+    "max_pending_deltas": 500  # Acima disso, os deltas antigos são descartados e o cubo é reconstruído
+}
+
+# Gráfico do fluxo de caixa (ver modules.cash_flow)
+CASH_FLOW_CONFIG = {
+    "max_points": 1000,  # Pontos plotados após o downsampling mínimo/máximo
+    "label_points": 60  # Rótulos de valor só até este número de pontos
+}
+
+# Redução de pontos dos gráficos do ChartsManager (ver modules.chart_reduction)
+CHART_CONFIG = {
+    "max_line_points": 2000,  # Acima disso, as linhas são reduzidas pelo LTTB
+    "webgl_points": 1000,  # Acima disso, as linhas são desenhadas com scattergl
+    "max_bars": 40,  # Barras exibidas, incluindo "Outros"
+    "max_slices": 10  # Fatias das pizzas, incluindo "Outros"
+}
+
+# Cache de figuras do ChartsManager (chave: impressão digital dos dados + parâmetros)
+FIGURE_CACHE_CONFIG = {
+    "enabled": True,
+    "max_entries": 200,
+    "max_mb": 64  # Soma do tamanho do JSON das figuras guardadas
+}
+
+# Configurações do armazenamento ("excel" = Base_financas.xlsx, "sqlite" = banco com tabelas indexadas)
+STORAGE_CONFIG = {
+    "backend": "excel",
+    "sqlite_path": None,  # None = arquivo .db com o mesmo nome da planilha
+    "indexed_columns": ["DATA", "CATEGORIA", "CONTA", "FAVORECIDO", "id"]
+}
+
+# Ids estáveis das linhas das abas transacionais (edição e exclusão por id)
+RECORD_ID_CONFIG = {
+    "column": "id",
+    "sheets": ["Receitas", "Despesas", "Vendas", "Investimentos", "Div_CC"],
+    "counter_dir": None  # None = arquivo '.<planilha>.ids.json' ao lado da planilha (maior id já atribuído)
+}
+
+# Configurações do cache colunar (sidecar Arrow IPC ao lado da planilha)
+SIDECAR_CONFIG = {
+    "enabled": True,
+    "cache_dir": None  # None = diretório '.sidecar' ao lado do arquivo Excel
+}
+
+# Configurações do journal de alterações do CRUD (write-ahead log + compactação)
+JOURNAL_CONFIG = {
+    "enabled": True,
+    "journal_dir": None,  # None = diretório '.journal' ao lado do arquivo Excel
+    "compact_interval_seconds": 30,
+    "compact_batch_size": 20
+}
+
 # Configurações de backup
 BACKUP_CONFIG = {
     "auto_backup": True,
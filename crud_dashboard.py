@@ -2,6 +2,7 @@ import streamlit as st
 import pandas as pd
 from datetime import datetime
 from crud_system import CRUDSystem, format_dataframe_for_display
+from modules.data_manager import data_manager
 from backup_system import safe_backup
 
 def render_crud_forms(crud_system, sheet_name, df_filtrado, contas=None, tipos_recebimento=None):
@@ -12,25 +13,14 @@ def render_crud_forms(crud_system, sheet_name, df_filtrado, contas=None, tipos_r
         st.markdown(f'### ✏️ Editar {sheet_name}')
         
         if not df_filtrado.empty:
-            # Cria opções para seleção
-            if sheet_name == 'Vendas':
-                opcoes = [f"{row['DATA'].strftime('%d/%m/%Y')} - {row['Cliente']} - R$ {row['VALOR']:,.2f}" 
-                         for idx, row in df_filtrado.iterrows()]
-            elif sheet_name == 'Investimentos':
-                opcoes = [f"{row['DATA'].strftime('%d/%m/%Y')} - {row['ATIVO']} - R$ {row['VALOR_APORTE']:,.2f}" 
-                         for idx, row in df_filtrado.iterrows()]
-            elif sheet_name == 'Div_CC':
-                opcoes = [f"{row['Data'].strftime('%d/%m/%Y')} - {row['Descrição']} - R$ {row['valor total da compra']:,.2f}" 
-                         for idx, row in df_filtrado.iterrows()]
-            else:  # Despesas e Receitas
-                opcoes = [f"{row['DATA'].strftime('%d/%m/%Y')} - {row['DESCRIÇÃO']} - R$ {row['VALOR']:,.2f}" 
-                         for idx, row in df_filtrado.iterrows()]
+            # Cria opções para seleção (rótulos vetorizados, em cache por versão da aba)
+            opcoes = data_manager.get_record_options(sheet_name, df_filtrado)
             
-            registro_selecionado = st.selectbox(f"Selecionar {sheet_name.lower()} para editar:", opcoes, key=f"edit_{sheet_name}_select")
+            registro_selecionado = st.selectbox(f"Selecionar {sheet_name.lower()} para editar:", opcoes.labels, key=f"edit_{sheet_name}_select")
             
             if registro_selecionado:
-                idx_selecionado = opcoes.index(registro_selecionado)
-                row_to_edit = df_filtrado.iloc[idx_selecionado]
+                original_idx = opcoes.row_for(registro_selecionado)
+                row_to_edit = df_filtrado.loc[original_idx]
                 
                 with st.form(f"edit_{sheet_name}_form"):
                     st.write(f"**Editar dados da {sheet_name.lower()}:**")
@@ -147,9 +137,8 @@ def render_crud_forms(crud_system, sheet_name, df_filtrado, contas=None, tipos_r
                         st.rerun()
                     
                     if submitted:
-                        # Encontra o índice original no dataframe completo
-                        original_idx = df_filtrado.index[idx_selecionado]
-                        success, message = crud_system.update_record(sheet_name, original_idx, updated_data)
+                        record_id = df_filtrado.at[original_idx, 'id']
+                        success, message = crud_system.update_record_by_id(sheet_name, record_id, updated_data, opcoes.seen_rows([record_id]))
                         
                         if success:
                             st.success(f"{sheet_name} atualizada com sucesso!")
@@ -165,27 +154,16 @@ def render_crud_forms(crud_system, sheet_name, df_filtrado, contas=None, tipos_r
         st.markdown(f'### 🗑️ Excluir {sheet_name}')
         
         if not df_filtrado.empty:
-            # Cria opções para seleção
-            if sheet_name == 'Vendas':
-                opcoes = [f"{row['DATA'].strftime('%d/%m/%Y')} - {row['Cliente']} - R$ {row['VALOR']:,.2f}" 
-                         for idx, row in df_filtrado.iterrows()]
-            elif sheet_name == 'Investimentos':
-                opcoes = [f"{row['DATA'].strftime('%d/%m/%Y')} - {row['ATIVO']} - R$ {row['VALOR_APORTE']:,.2f}" 
-                         for idx, row in df_filtrado.iterrows()]
-            elif sheet_name == 'Div_CC':
-                opcoes = [f"{row['Data'].strftime('%d/%m/%Y')} - {row['Descrição']} - R$ {row['valor total da compra']:,.2f}" 
-                         for idx, row in df_filtrado.iterrows()]
-            else:  # Despesas e Receitas
-                opcoes = [f"{row['DATA'].strftime('%d/%m/%Y')} - {row['DESCRIÇÃO']} - R$ {row['VALOR']:,.2f}" 
-                         for idx, row in df_filtrado.iterrows()]
+            # Cria opções para seleção (rótulos vetorizados, em cache por versão da aba)
+            opcoes = data_manager.get_record_options(sheet_name, df_filtrado)
             
-            registro_selecionado = st.selectbox(f"Selecionar {sheet_name.lower()} para excluir:", opcoes, key=f"delete_{sheet_name}_select")
+            registro_selecionado = st.selectbox(f"Selecionar {sheet_name.lower()} para excluir:", opcoes.labels, key=f"delete_{sheet_name}_select")
             
             if st.button("🗑️ Confirmar Exclusão", key=f"confirm_delete_{sheet_name}"):
                 if registro_selecionado:
-                    idx_selecionado = opcoes.index(registro_selecionado)
-                    original_idx = df_filtrado.index[idx_selecionado]
-                    success, message = crud_system.delete_record(sheet_name, original_idx)
+                    original_idx = opcoes.row_for(registro_selecionado)
+                    record_id = df_filtrado.at[original_idx, 'id']
+                    success, message = crud_system.delete_records_by_id(sheet_name, [record_id], opcoes.seen_rows([record_id]))
                     
                     if success:
                         st.success(f"{sheet_name} excluída com sucesso!")
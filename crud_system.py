@@ -1,107 +1,220 @@
 import pandas as pd
-import openpyxl
-from openpyxl.utils.dataframe import dataframe_to_rows
 import streamlit as st
-from backup_system import safe_backup
 import numpy as np
 
+from config.settings import JOURNAL_CONFIG, RECORD_ID_CONFIG
+from modules.file_lock import get_workbook_lock
+from modules.journal import get_journal, start_compactor
+from modules.record_ids import ID_COLUMN, IdCounter, RowIdIndex, id_counter_path_for
+from modules.storage_backend import get_storage
+
+
+class StaleRecordError(Exception):
+    """O registro foi alterado ou removido por outra sessão desde a leitura"""
+
+
+def find_matching_rows(df, expected):
+    """
+    Retorna os índices das linhas cujos valores coincidem com 'expected'
+    
+    Apenas as colunas presentes na aba são comparadas; datas são comparadas
+    como Timestamp e números com tolerância de ponto flutuante.
+    """
+    if isinstance(expected, pd.Series):
+        expected = expected.to_dict()
+    mask = pd.Series(True, index=df.index)
+    for col, value in expected.items():
+        if col not in df.columns:
+            continue
+        column = df[col]
+        if pd.api.types.is_scalar(value) and pd.isna(value):
+            mask &= column.isna()
+        elif isinstance(value, (pd.Timestamp, np.datetime64)) or pd.api.types.is_datetime64_any_dtype(column):
+            mask &= pd.to_datetime(column, errors='coerce') == pd.Timestamp(value)
+        elif isinstance(value, (int, float, np.number)) and not isinstance(value, (bool, np.bool_)):
+            numeric = pd.to_numeric(column, errors='coerce').to_numpy(dtype=float)
+            mask &= np.isclose(numeric, float(value), equal_nan=False)
+        else:
+            mask &= column.astype(str) == str(value)
+    return df.index[mask.to_numpy()]
+
 class CRUDSystem:
     def __init__(self, excel_path='Base_financas.xlsx'):
         self.excel_path = excel_path
+        self.storage = get_storage(excel_path)
+        # Lock entre processos compartilhado com o DataManager e com o journal
+        self.lock = get_workbook_lock(excel_path)
+        # Journal de alterações: edições e exclusões são gravadas nele e compactadas em segundo plano
+        self.journal = get_journal(excel_path, JOURNAL_CONFIG.get("journal_dir")) if JOURNAL_CONFIG["enabled"] else None
+        if self.journal:
+            start_compactor(
+                self.journal,
+                self.compact_journal,
+                JOURNAL_CONFIG["compact_interval_seconds"],
+                JOURNAL_CONFIG["compact_batch_size"],
+            )
+        # Índice id -> linha por aba, válido para um estado (planilha + journal)
+        self._id_indexes = {}
+        # Maior id já atribuído por aba (compartilhado com o DataManager pelo arquivo)
+        self._id_counter = IdCounter(id_counter_path_for(excel_path, RECORD_ID_CONFIG.get("counter_dir")))
     
     def load_sheet_data(self, sheet_name):
-        """Carrega dados de uma aba específica"""
+        """Carrega dados de uma aba específica (com as alterações pendentes do journal)"""
         try:
-            df = pd.read_excel(self.excel_path, sheet_name=sheet_name)
+            with self.lock:
+                df = self.storage.read_sheet(sheet_name, self.storage.signature())
+                if self.journal:
+                    df = self.journal.overlay(sheet_name, df)
             return df
         except Exception as e:
             st.error(f"Erro ao carregar dados da aba {sheet_name}: {e}")
             return pd.DataFrame()
     
-    def save_sheet_data(self, df, sheet_name):
-        """Salva dados em uma aba específica"""
+    def _save_sheet_data(self, df, sheet_name):
+        """Regrava uma aba (chamado com o lock retido, após as conferências da operação)"""
         try:
             # Cria backup antes de salvar
-            safe_backup(f"before_{sheet_name}_update")
-            
-            # Carrega o workbook
-            workbook = openpyxl.load_workbook(self.excel_path)
-            
-            # Remove a aba existente se existir
-            if sheet_name in workbook.sheetnames:
-                workbook.remove(workbook[sheet_name])
+            self.storage.backup(f"before_{sheet_name}_update")
             
-            # Cria nova aba
-            worksheet = workbook.create_sheet(sheet_name)
-            
-            # Adiciona os dados
-            for r in dataframe_to_rows(df, index=False, header=True):
-                worksheet.append(r)
-            
-            # Salva o workbook
-            workbook.save(self.excel_path)
-            workbook.close()
+            with self.lock:
+                self._write_sheet(df, sheet_name)
+                # A aba foi regravada por inteiro a partir da visão atual: entradas pendentes já estão nela
+                if self.journal:
+                    self.journal.discard(sheet_name)
             
             return True, "Dados salvos com sucesso"
         except Exception as e:
             return False, f"Erro ao salvar dados: {e}"
     
-    def update_record(self, sheet_name, row_index, updated_data):
-        """Atualiza um registro específico"""
-        try:
-            df = self.load_sheet_data(sheet_name)
-            if df.empty:
-                return False, "Não foi possível carregar os dados"
-            
-            # Atualiza a linha específica
-            for col, value in updated_data.items():
-                if col in df.columns:
-                    df.at[row_index, col] = value
-            
-            # Salva os dados atualizados
-            success, message = self.save_sheet_data(df, sheet_name)
-            if success:
-                safe_backup(f"after_{sheet_name}_update")
-            
-            return success, message
-        except Exception as e:
-            return False, f"Erro ao atualizar registro: {e}"
+    def _write_sheet(self, df, sheet_name):
+        """Regrava uma aba inteira no backend de armazenamento"""
+        self.storage.write_sheet(df, sheet_name)
+    
+    def compact_journal(self):
+        """Aplica as alterações pendentes do journal na planilha (um backup por lote)"""
+        if not self.journal:
+            return 0
+        return self.journal.compact(
+            read_sheet=lambda sheet_name: self.storage.read_sheet(sheet_name, self.storage.signature()),
+            write_sheet=self._write_sheet,
+            before_write=lambda: self.storage.backup("before_journal_compaction"),
+        )
+    
+    def _journal_operation(self, sheet_name, op, message, **payload):
+        """Grava uma operação no journal e acorda o compactador se o lote estiver cheio"""
+        self.journal.append(sheet_name, op, **payload)
+        if self.journal.compactor:
+            self.journal.compactor.notify()
+        return True, message
+    
+    def _state_key(self, sheet_name):
+        """Identifica o estado atual de uma aba (arquivo mais entradas pendentes)"""
+        journal_seq = self.journal.last_seq(sheet_name) if self.journal else 0
+        return self.storage.signature(), journal_seq
+    
+    def _load_with_id_index(self, sheet_name):
+        """Carrega a aba junto com o índice id -> linha, reaproveitado enquanto a aba não mudar"""
+        key = self._state_key(sheet_name)
+        cached = self._id_indexes.get(sheet_name)
+        if cached is not None and cached[0] == key:
+            return cached[1], cached[2]
+        df = self.load_sheet_data(sheet_name)
+        id_index = RowIdIndex(df)
+        self._id_indexes[sheet_name] = (key, df, id_index)
+        return df, id_index
     
-    def delete_record(self, sheet_name, row_index):
-        """Exclui um registro específico"""
+    def _check_ids(self, id_index, record_ids):
+        missing = id_index.missing(record_ids)
+        if missing:
+            raise StaleRecordError(
+                "O registro foi removido por outra sessão. Recarregue a página e tente novamente."
+            )
+        if id_index.duplicated(record_ids):
+            raise StaleRecordError(
+                "O id do registro aparece em mais de uma linha da planilha; corrija a planilha antes de alterá-lo."
+            )
+    
+    def _check_unchanged(self, df, id_index, record_ids, expected):
+        """
+        Confere se cada linha ainda tem os valores que o usuário viu
+        
+        'expected' traz as linhas como foram exibidas (RecordOptions.seen_rows),
+        com a coluna de id; uma linha alterada por outra sessão desde então
+        levanta StaleRecordError em vez de ser sobrescrita.
+        """
+        seen = {int(row[ID_COLUMN]): row for row in expected.to_dict("records")}
+        for record_id in record_ids:
+            row = seen.get(int(record_id))
+            if row is None:
+                raise ValueError(f"Linha vista ausente para o id {record_id}")
+            label = id_index.label(record_id)
+            if not len(find_matching_rows(df.loc[[label]], row)):
+                raise StaleRecordError(
+                    "O registro foi alterado por outra sessão. Recarregue a página e tente novamente."
+                )
+    
+    def update_record_by_id(self, sheet_name, record_id, updated_data, expected):
+        """
+        Atualiza o registro com o id informado
+        
+        'expected' é a linha como o usuário a viu (DataFrame com a coluna de
+        id, ver RecordOptions.seen_rows); a gravação é recusada se ela mudou.
+        """
         try:
-            df = self.load_sheet_data(sheet_name)
-            if df.empty:
-                return False, "Não foi possível carregar os dados"
-            
-            # Remove a linha
-            df = df.drop(index=row_index).reset_index(drop=True)
-            
-            # Salva os dados atualizados
-            success, message = self.save_sheet_data(df, sheet_name)
+            with self.lock:
+                df, id_index = self._load_with_id_index(sheet_name)
+                self._check_ids(id_index, [record_id])
+                self._check_unchanged(df, id_index, [record_id], expected)
+                
+                if self.journal:
+                    return self._journal_operation(sheet_name, "update", "Dados salvos com sucesso",
+                                                   id=record_id, data=updated_data)
+                
+                df = df.copy()
+                row = id_index.label(record_id)
+                for col, value in updated_data.items():
+                    if col in df.columns:
+                        df.at[row, col] = value
+                success, message = self._save_sheet_data(df, sheet_name)
             if success:
-                safe_backup(f"after_{sheet_name}_delete")
+                self.storage.backup(f"after_{sheet_name}_update")
             
             return success, message
+        except StaleRecordError as e:
+            return False, str(e)
         except Exception as e:
-            return False, f"Erro ao excluir registro: {e}"
+            return False, f"Erro ao atualizar registro: {e}"
     
-    def delete_multiple_records(self, sheet_name, row_indices):
-        """Exclui múltiplos registros"""
+    def delete_records_by_id(self, sheet_name, record_ids, expected):
+        """
+        Exclui os registros com os ids informados
+        
+        'expected' são as linhas como o usuário as viu (ver update_record_by_id);
+        se alguma mudou, nenhuma é excluída.
+        """
         try:
-            df = self.load_sheet_data(sheet_name)
-            if df.empty:
-                return False, "Não foi possível carregar os dados"
-            
-            # Remove as linhas
-            df = df.drop(index=row_indices).reset_index(drop=True)
-            
-            # Salva os dados atualizados
-            success, message = self.save_sheet_data(df, sheet_name)
+            record_ids = list(record_ids)
+            with self.lock:
+                df, id_index = self._load_with_id_index(sheet_name)
+                self._check_ids(id_index, record_ids)
+                self._check_unchanged(df, id_index, record_ids, expected)
+                # Um id excluído não volta a ser atribuído, nem depois da compactação
+                if record_ids:
+                    self._id_counter.advance(sheet_name, max(int(record_id) for record_id in record_ids))
+                
+                if self.journal:
+                    return self._journal_operation(sheet_name, "delete", "Dados salvos com sucesso",
+                                                   ids=record_ids)
+                
+                df = df.drop(index=id_index.labels(record_ids)).reset_index(drop=True)
+                success, message = self._save_sheet_data(df, sheet_name)
             if success:
-                safe_backup(f"after_{sheet_name}_bulk_delete")
+                operation = "delete" if len(record_ids) == 1 else "bulk_delete"
+                self.storage.backup(f"after_{sheet_name}_{operation}")
             
             return success, message
+        except StaleRecordError as e:
+            return False, str(e)
         except Exception as e:
             return False, f"Erro ao excluir registros: {e}"
 
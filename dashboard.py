@@ -7,7 +7,6 @@ from PIL import Image
 from datetime import datetime, timedelta
 import pytz
 import os
-import streamlit.components.v1 as components
 from numerize import numerize
 from streamlit_option_menu import option_menu
 from reportlab.pdfgen import canvas
@@ -18,6 +17,15 @@ import openpyxl
 # --- IMPORTAÇÕES DOS NOVOS SISTEMAS ---
 from backup_system import BackupSystem, safe_backup
 from crud_system import CRUDSystem, format_dataframe_for_display, create_editable_table
+from config.settings import CASH_FLOW_CONFIG
+from modules.data_manager import data_manager
+from modules.date_dimensions import month_name
+from modules.filter_plan import CompiledFilter, FilterPlan
+from modules.abc_analysis import classify_abc, style_abc_page
+from modules.cash_flow import CASH_FLOW_FREQUENCIES, downsample_minmax, net_flow
+from modules.category_evolution import subcategory_evolution
+from modules.top_n import top_n
+from modules.period_comparison import COMPARISON_MODES, compare_periods, growth, kpi_totals
 
 # --- CONFIGURAÇÃO DA PÁGINA ---
 st.set_page_config(
@@ -31,28 +39,34 @@ st.sidebar.info(f"DEBUG: Arquivo dashboard.py executado em: {datetime.now().strf
 try: # --- BLOCO DE CAPTURA DE ERRO GLOBAL ---
 
     # --- FUNÇÃO PARA VERIFICAR E ADICIONAR COLUNA ---
-    def check_and_add_favorecido_column(excel_path):
+    def check_and_add_favorecido_column(snapshot):
         """Verifica se a coluna 'FAVORECIDO' existe na aba 'Receitas' e a adiciona se não existir."""
         try:
-            workbook = openpyxl.load_workbook(excel_path)
-            if 'Receitas' in workbook.sheetnames:
-                sheet = workbook['Receitas']
-                headers = [cell.value for cell in sheet[1]]
-                if 'FAVORECIDO' not in headers:
-                    new_col_idx = sheet.max_column + 1
-                    sheet.cell(row=1, column=new_col_idx, value='FAVORECIDO')
-                    for row in range(2, sheet.max_row + 1):
-                        sheet.cell(row=row, column=new_col_idx, value='N/A')
-                    workbook.save(excel_path)
+            if 'Receitas' in snapshot:
+                adicionada = []
+
+                def adicionar_favorecido(receitas):
+                    # Relida com o lock retido: outra sessão pode ter adicionado a coluna
+                    if 'FAVORECIDO' not in receitas.columns:
+                        receitas['FAVORECIDO'] = 'N/A'
+                        adicionada.append(True)
+                    return receitas
+
+                if data_manager.modify_sheet('Receitas', adicionar_favorecido) and adicionada:
                     st.toast("Coluna 'FAVORECIDO' adicionada com sucesso à aba 'Receitas'!")
-            workbook.close()
         except Exception as e:
             st.warning(f"Atenção: Não foi possível adicionar a coluna 'FAVORECIDO' automaticamente: {e}")
 
     # --- CAMINHO DO ARQUIVO E CARREGAMENTO INICIAL ---
-    excel_path = 'Base_financas.xlsx'
-    check_and_add_favorecido_column(excel_path) # Executa a verificação no início
-    xls = pd.ExcelFile(excel_path)
+    excel_path = data_manager.excel_file
+    # Snapshot único da planilha: todas as abas são lidas no máximo uma vez por versão do arquivo
+    snapshot = data_manager.get_snapshot()
+    if 'FAVORECIDO' not in snapshot.get('Receitas', copy=False).columns:
+        check_and_add_favorecido_column(snapshot) # Executa a verificação no início
+        snapshot = data_manager.get_snapshot()
+    # Ids estáveis nas abas transacionais: edições e exclusões localizam a linha pelo id
+    if data_manager.ensure_record_ids():
+        snapshot = data_manager.get_snapshot()
 
     # Outras importações úteis
     import plotly.graph_objects as go
@@ -65,17 +79,15 @@ try: # --- BLOCO DE CAPTURA DE ERRO GLOBAL ---
     def carregar_itens_categoria():
         """Carrega os itens de cada categoria da planilha para validação"""
         try:
-            xls = pd.ExcelFile(excel_path)
-            
             # Carregar itens de despesas
-            df_cat_desp = pd.read_excel(xls, sheet_name='Despesas Categoria')
+            df_cat_desp = snapshot.get('Despesas Categoria')
             itens_despesas = {}
             for coluna in df_cat_desp.columns:
                 itens = df_cat_desp[coluna].dropna().tolist()
                 itens_despesas[coluna] = itens
             
             # Carregar itens de receitas
-            df_cat_rec = pd.read_excel(xls, sheet_name='Receitas Categoria')
+            df_cat_rec = snapshot.get('Receitas Categoria')
             itens_receitas = []
             if 'SUBCATEGORIA' in df_cat_rec.columns:
                 itens_receitas = df_cat_rec['SUBCATEGORIA'].dropna().unique().tolist()
@@ -221,10 +233,10 @@ try: # --- BLOCO DE CAPTURA DE ERRO GLOBAL ---
     st.header(f"Aba Selecionada: '{selected}'") # DEBUG PARA VER O VALOR DA ABA
 
     # Lê todas as abas do arquivo Excel
-    abas = xls.sheet_names
+    abas = snapshot.sheet_names
 
     # Exemplo de leitura de uma aba específica:
-    # df_despesas = pd.read_excel(xls, sheet_name='Despesas')
+    # df_despesas = snapshot.get('Despesas')
 
     # --- BARRA LATERAL (SIDEBAR) ---
     with st.sidebar:
@@ -232,7 +244,7 @@ try: # --- BLOCO DE CAPTURA DE ERRO GLOBAL ---
         
         # Obter data atual para filtros padrão
         hoje = datetime.now(pytz.timezone('America/Sao_Paulo'))
-        ano_atual = str(hoje.year)
+        ano_atual = hoje.year
         mes_ingles = hoje.strftime('%b').capitalize()
         # Mapeamento para traduzir os meses
         mapa_meses = {'Feb': 'Fev', 'Apr': 'Abr', 'May': 'Mai', 'Aug': 'Ago', 'Sep': 'Set', 'Oct': 'Out', 'Dec': 'Dez'}
@@ -242,19 +254,15 @@ try: # --- BLOCO DE CAPTURA DE ERRO GLOBAL ---
         st.header("Filtros")
         
         # Carregar anos de todas as fontes de dados, garantindo a conversão para datetime
-        df_r = pd.read_excel(xls, sheet_name='Receitas', decimal=',')
-        df_d = pd.read_excel(xls, sheet_name='Despesas', decimal=',')
-        df_i = pd.read_excel(xls, sheet_name='Investimentos', decimal=',')
-        df_c = pd.read_excel(xls, sheet_name='Div_CC', decimal=',')
-        df_v = pd.read_excel(xls, sheet_name='Vendas', decimal=',')
-
-        anos_r = pd.to_datetime(df_r['DATA'], errors='coerce').dt.year
-        anos_d = pd.to_datetime(df_d['DATA'], errors='coerce').dt.year
-        anos_i = pd.to_datetime(df_i['DATA'], errors='coerce').dt.year
-        anos_c = pd.to_datetime(df_c['Data'], errors='coerce').dt.year # Cuidado com 'Data' vs 'DATA'
-        anos_v = pd.to_datetime(df_v['DATA'], errors='coerce').dt.year
-
-        anos_disponiveis = sorted(pd.concat([anos_r, anos_d, anos_i, anos_c, anos_v]).dropna().unique().astype(int).astype(str))
+        df_r = snapshot.get('Receitas')
+        df_d = snapshot.get('Despesas')
+        df_i = snapshot.get('Investimentos')
+        df_c = snapshot.get('Div_CC')
+        df_v = snapshot.get('Vendas')
+
+        # 'Ano' já vem calculado (inteiro) no snapshot
+        anos = pd.concat([df['Ano'] for df in (df_r, df_d, df_i, df_c, df_v) if 'Ano' in df.columns])
+        anos_disponiveis = sorted(int(ano) for ano in anos.dropna().unique())
         
         # Definir ano_atual como padrão se estiver na lista, senão o último disponível
         default_ano = [ano_atual] if ano_atual in anos_disponiveis else [anos_disponiveis[-1]] if anos_disponiveis else []
@@ -265,9 +273,10 @@ try: # --- BLOCO DE CAPTURA DE ERRO GLOBAL ---
         # Definir mes_atual como padrão se houver anos selecionados
         default_mes = [mes_atual] if anos_selecionados else []
         meses_selecionados = st.multiselect('Mês', meses_ordem, default=default_mes)
+        modo_comparacao = st.selectbox('Comparar com', COMPARISON_MODES, key='comparacao_sidebar')
         
         # Contas
-        df_conta = pd.read_excel(xls, sheet_name='Conta')
+        df_conta = snapshot.get('Conta')
         contas = df_conta['Contas'].dropna().unique().tolist()
 
         # Filtro de tipo de análise com checkboxes para evitar texto cortado
@@ -294,10 +303,10 @@ try: # --- BLOCO DE CAPTURA DE ERRO GLOBAL ---
 
         # Filtro dinâmico de categoria
         if 'Receitas' in tipos_selecionados:
-            df_cat = pd.read_excel(xls, sheet_name='Receitas Categoria')
+            df_cat = snapshot.get('Receitas Categoria')
             categorias = df_cat['SUBCATEGORIA'].dropna().unique().tolist()
         else:
-            df_cat = pd.read_excel(xls, sheet_name='Despesas Categoria')
+            df_cat = snapshot.get('Despesas Categoria')
             categorias = df_cat.columns.tolist()
 
         # Filtro de categoria com opção 'Todas'
@@ -314,11 +323,8 @@ try: # --- BLOCO DE CAPTURA DE ERRO GLOBAL ---
         # Filtros específicos por aba (movidos para dentro do sidebar)
         # Só mostra o expander de investimentos se a aba Investimentos estiver selecionada
         if selected == 'Investimentos':
-            df_investimentos = pd.read_excel(xls, sheet_name='Investimentos', decimal=',')
-            df_investimentos['DATA'] = pd.to_datetime(df_investimentos['DATA'], errors='coerce')
+            df_investimentos = snapshot.get('Investimentos')
             df_investimentos = df_investimentos.dropna(subset=['DATA'])
-            df_investimentos['Ano'] = df_investimentos['DATA'].dt.year.astype(str)
-            df_investimentos['Mês'] = df_investimentos['DATA'].dt.strftime('%b').str.capitalize().replace({'Feb': 'Fev', 'Apr': 'Abr', 'May': 'Mai', 'Aug': 'Ago', 'Sep': 'Set', 'Oct': 'Out', 'Dec': 'Dez'})
             with st.expander('Filtros de Investimentos', expanded=True):
                 anos_invest = df_investimentos['Ano'].dropna().unique().tolist()
                 anos_invest_sel = st.multiselect('Ano (Investimentos)', sorted(anos_invest, reverse=True), default=sorted(anos_invest, reverse=True), key='ano_invest')
@@ -334,11 +340,8 @@ try: # --- BLOCO DE CAPTURA DE ERRO GLOBAL ---
         
         # Só mostra o expander de Cartão de Crédito se a aba estiver selecionada
         if selected == 'Cartão de Crédito':
-            df_cc = pd.read_excel(xls, sheet_name='Div_CC', decimal=',')
-            df_cc['Data'] = pd.to_datetime(df_cc['Data'], errors='coerce')
+            df_cc = snapshot.get('Div_CC')
             df_cc.dropna(subset=['Data'], inplace=True)
-            df_cc['Ano'] = df_cc['Data'].dt.year.astype(str)
-            df_cc['Mês'] = df_cc['Data'].dt.strftime('%b').str.capitalize().replace({'Feb': 'Fev', 'Apr': 'Abr', 'May': 'Mai', 'Aug': 'Ago', 'Sep': 'Set', 'Oct': 'Out', 'Dec': 'Dez'})
             with st.expander('Filtros do Cartão de Crédito', expanded=True):
                 anos_cc = df_cc['Ano'].dropna().unique().tolist()
                 anos_cc_sel = st.multiselect('Ano (Cartão)', sorted(anos_cc, reverse=True), default=sorted(anos_cc, reverse=True), key='ano_cc_sidebar')
@@ -401,51 +404,38 @@ try: # --- BLOCO DE CAPTURA DE ERRO GLOBAL ---
 
     # --- CÁLCULO DOS INDICADORES BÁSICOS ---
 
-    # Filtra receitas
-    receitas = pd.read_excel(xls, sheet_name='Receitas', decimal=',')
-    receitas['DATA'] = pd.to_datetime(receitas['DATA'], errors='coerce')
-    receitas = receitas.dropna(subset=['DATA'])
-    receitas['Ano'] = receitas['DATA'].dt.year.astype(str)
-    receitas['Mês'] = receitas['DATA'].dt.strftime('%b').str.capitalize().replace({'Feb': 'Fev', 'Apr': 'Abr', 'May': 'Mai', 'Aug': 'Ago', 'Sep': 'Set', 'Oct': 'Out', 'Dec': 'Dez'})
-
-    receitas_filtradas = receitas[
-        ((receitas['CONTA'] == conta_selecionada) | (conta_selecionada == 'Todas')) &
-        (receitas['Ano'].isin(anos_selecionados) if anos_selecionados else True) &
-        (receitas['Mês'].isin(meses_selecionados) if meses_selecionados else True)
-    ]
-
-    # Categoria de receitas
-    if 'Receitas' in tipos_selecionados and categoria_selecionada != 'Todas':
-        receitas_filtradas = receitas_filtradas[receitas_filtradas['CATEGORIA'] == categoria_selecionada]
+    # Plano único dos filtros da sidebar; cada aba é filtrada uma vez e o
+    # resultado é compartilhado por todas as seções da página
+    plano_filtros = FilterPlan.from_sidebar(
+        anos_selecionados, meses_selecionados, conta_selecionada, categoria_selecionada, tipos_selecionados
+    )
+    filtro = CompiledFilter(snapshot, plano_filtros)
 
-    # Filtra despesas
+    receitas = snapshot.get('Receitas')
+    receitas = receitas.dropna(subset=['DATA'])
+    receitas_filtradas = filtro.frame('Receitas')
 
-    despesas = pd.read_excel(xls, sheet_name='Despesas', decimal=',')
-    despesas['DATA'] = pd.to_datetime(despesas['DATA'], errors='coerce')
+    despesas = snapshot.get('Despesas')
     despesas = despesas.dropna(subset=['DATA'])
-    despesas['Ano'] = despesas['DATA'].dt.year.astype(str)
-    despesas['Mês'] = despesas['DATA'].dt.strftime('%b').str.capitalize().replace({'Feb': 'Fev', 'Apr': 'Abr', 'May': 'Mai', 'Aug': 'Ago', 'Sep': 'Set', 'Oct': 'Out', 'Dec': 'Dez'})
-
-    despesas_filtradas = despesas[
-        ((despesas['CONTA'] == conta_selecionada) | (conta_selecionada == 'Todas')) &
-        (despesas['Ano'].isin(anos_selecionados) if anos_selecionados else True) &
-        (despesas['Mês'].isin(meses_selecionados) if meses_selecionados else True)
-    ]
-
-    # Categoria de despesas
-    if 'Despesas' in tipos_selecionados and categoria_selecionada != 'Todas':
-        despesas_filtradas = despesas_filtradas[despesas_filtradas['CATEGORIA'] == categoria_selecionada]
+    despesas_filtradas = filtro.frame('Despesas')
+
+    # Cubos mensais (somas por conta, categoria, descrição, favorecido e mês):
+    # KPIs, deltas e rankings consultam as células em vez das transações
+    cubo_receitas = snapshot.monthly_cube('Receitas')
+    cubo_despesas = snapshot.monthly_cube('Despesas')
+
+    # Período de comparação de qualquer seleção (mês, trimestre, acumulado do
+    # ano ou mesmo período do ano anterior), mesma conta, sem categoria
+    comparacao = compare_periods(plano_filtros, modo_comparacao)
+    # Os cards mostram o período atual da comparação, o mesmo dos deltas (no
+    # acumulado do ano, de Janeiro até o último mês selecionado)
+    receitas_atual, receitas_anterior = kpi_totals(cubo_receitas, plano_filtros, comparacao)
+    despesas_atual, despesas_anterior = kpi_totals(cubo_despesas, plano_filtros, comparacao)
+    sufixo_cards = " (acumulado do ano)" if comparacao is not None and comparacao.atual != plano_filtros else ""
 
     # Se o tipo não estiver selecionado, zera os valores
-    if 'Receitas' not in tipos_selecionados:
-        valor_recebidos = 0
-    else:
-        valor_recebidos = receitas_filtradas['VALOR'].sum()
-
-    if 'Despesas' not in tipos_selecionados:
-        valor_despesas = 0
-    else:
-        valor_despesas = despesas_filtradas['VALOR'].sum()
+    valor_recebidos = receitas_atual if 'Receitas' in tipos_selecionados else 0
+    valor_despesas = despesas_atual if 'Despesas' in tipos_selecionados else 0
 
     saldo = valor_recebidos + valor_despesas  # Despesas já são negativas
     # Corrige o cálculo do percentual para evitar divisão por zero
@@ -454,53 +444,15 @@ try: # --- BLOCO DE CAPTURA DE ERRO GLOBAL ---
     else:
         percentual = 0.0
 
-    # --- CÁLCULO DE PERÍODO ANTERIOR E DELTAS ---
+    # --- DELTAS CONTRA O PERÍODO DE COMPARAÇÃO ---
     saldo_anterior = 0
     # Define um valor padrão caso o cálculo não seja possível
     delta_receitas = 0
     delta_despesas = 0
-
-    # A comparação só faz sentido se um único mês e ano forem selecionados
-    if len(meses_selecionados) == 1 and len(anos_selecionados) == 1:
-        ano_atual_num = int(anos_selecionados[0])
-        mes_atual_idx = meses_ordem.index(meses_selecionados[0])
-        
-        if mes_atual_idx > 0:
-            mes_ant_str = meses_ordem[mes_atual_idx - 1]
-            ano_ant_num = ano_atual_num
-        else:
-            # Janeiro -> Dezembro do ano anterior
-            mes_ant_str = 'Dez'
-            ano_ant_num = ano_atual_num - 1
-
-        ano_ant_str = str(ano_ant_num)
-
-        # Filtra dados do período anterior
-        receitas_ant_df = receitas[
-            (receitas['Ano'] == ano_ant_str) & (receitas['Mês'] == mes_ant_str)
-        ]
-        despesas_ant_df = despesas[
-            (despesas['Ano'] == ano_ant_str) & (despesas['Mês'] == mes_ant_str)
-        ]
-        
-        if conta_selecionada != 'Todas':
-            receitas_ant_df = receitas_ant_df[receitas_ant_df['CONTA'] == conta_selecionada]
-            despesas_ant_df = despesas_ant_df[despesas_ant_df['CONTA'] == conta_selecionada]
-
-        receitas_anterior = receitas_ant_df['VALOR'].sum()
-        despesas_anterior = despesas_ant_df['VALOR'].sum()
+    if comparacao is not None:
         saldo_anterior = receitas_anterior + despesas_anterior
-
-        # Calcular deltas
-        if receitas_anterior > 0:
-            delta_receitas = ((valor_recebidos - receitas_anterior) / receitas_anterior) * 100
-        else:
-            delta_receitas = 0.0
-            
-        if abs(despesas_anterior) > 0:
-            delta_despesas = ((abs(valor_despesas) - abs(despesas_anterior)) / abs(despesas_anterior)) * 100
-        else:
-            delta_despesas = 0.0
+        delta_receitas = growth(receitas_atual, receitas_anterior) if receitas_anterior > 0 else 0.0
+        delta_despesas = growth(despesas_atual, despesas_anterior)
 
     def format_brl(valor):
         # Verifica se o valor é NaN ou None
@@ -546,7 +498,7 @@ try: # --- BLOCO DE CAPTURA DE ERRO GLOBAL ---
         with col1:
             st.markdown(f"""
             <div class="metric-card saldo">
-                <h4>Saldo</h4>
+                <h4>Saldo{sufixo_cards}</h4>
                 <h2>{format_brl(saldo)}</h2>
             </div>
             """, unsafe_allow_html=True)
@@ -556,7 +508,7 @@ try: # --- BLOCO DE CAPTURA DE ERRO GLOBAL ---
             st.markdown(f"""
             <div class="metric-card">
                 <div class="title-row">
-                    <h4>Recebimentos</h4>{delta_html}
+                    <h4>Recebimentos{sufixo_cards}</h4>{delta_html}
                 </div>
                 <h2>{format_brl(valor_recebidos)}</h2>
             </div>
@@ -567,17 +519,18 @@ try: # --- BLOCO DE CAPTURA DE ERRO GLOBAL ---
             st.markdown(f"""
             <div class="metric-card">
                 <div class="title-row">
-                    <h4>Despesas</h4>{delta_html}
+                    <h4>Despesas{sufixo_cards}</h4>{delta_html}
                 </div>
                 <h2>{format_brl(abs(valor_despesas))}</h2>
             </div>
             """, unsafe_allow_html=True)
 
         with col4:
-            saldo_ant_text = format_brl(saldo_anterior) if (len(meses_selecionados) == 1 and len(anos_selecionados) == 1) else "N/A"
+            saldo_ant_text = format_brl(saldo_anterior) if comparacao is not None else "N/A"
+            saldo_ant_titulo = f"Saldo ({comparacao.rotulo})" if comparacao is not None else "Saldo Anterior"
             st.markdown(f"""
             <div class="metric-card">
-                <h4>Saldo Anterior</h4>
+                <h4>{saldo_ant_titulo}</h4>
                 <h2>{saldo_ant_text}</h2>
             </div>
             """, unsafe_allow_html=True)
@@ -585,7 +538,7 @@ try: # --- BLOCO DE CAPTURA DE ERRO GLOBAL ---
         with col5:
             st.markdown(f"""
             <div class="metric-card">
-                <h4>Despesas vs Receitas %</h4>
+                <h4>Despesas vs Receitas %{sufixo_cards}</h4>
                 <h2>{percentual:.1f}%</h2>
             </div>
             """, unsafe_allow_html=True)
@@ -648,15 +601,8 @@ try: # --- BLOCO DE CAPTURA DE ERRO GLOBAL ---
 
         with col_g1:
             # Gráfico 1 (Categoria)
-            df_top5 = despesas_filtradas.copy()
-            if not df_top5.empty:
-                top5 = (
-                    df_top5.groupby('CATEGORIA')['VALOR']
-                    .sum()
-                    .abs()
-                    .sort_values(ascending=False)
-                    .head(5)
-                )
+            if not despesas_filtradas.empty:
+                top5 = top_n(cubo_despesas.by('CATEGORIA', plano_filtros), 5, absolute=True)
                 fig = px.pie(
                     names=top5.index,
                     values=top5.values,
@@ -678,15 +624,8 @@ try: # --- BLOCO DE CAPTURA DE ERRO GLOBAL ---
 
         with col_g2:
             # Gráfico 2 (Descrição)
-            df_top5_desc = despesas_filtradas.copy()
-            if not df_top5_desc.empty:
-                top5_desc = (
-                    df_top5_desc.groupby('DESCRIÇÃO')['VALOR']
-                    .sum()
-                    .abs()
-                    .sort_values(ascending=False)
-                    .head(5)
-                )
+            if not despesas_filtradas.empty:
+                top5_desc = top_n(cubo_despesas.by('DESCRIÇÃO', plano_filtros), 5, absolute=True)
                 fig_desc = px.pie(
                     names=top5_desc.index,
                     values=top5_desc.values,
@@ -708,15 +647,8 @@ try: # --- BLOCO DE CAPTURA DE ERRO GLOBAL ---
 
         with col_g3:
             # Gráfico 3 (Favorecido)
-            df_top5_fav = despesas_filtradas.copy()
-            if not df_top5_fav.empty:
-                top5_fav = (
-                    df_top5_fav.groupby('FAVORECIDO')['VALOR']
-                    .sum()
-                    .abs()
-                    .sort_values(ascending=False)
-                    .head(5)
-                )
+            if not despesas_filtradas.empty:
+                top5_fav = top_n(cubo_despesas.by('FAVORECIDO', plano_filtros), 5, absolute=True)
                 fig_fav = px.pie(
                     names=top5_fav.index,
                     values=top5_fav.values,
@@ -769,44 +701,9 @@ try: # --- BLOCO DE CAPTURA DE ERRO GLOBAL ---
     elif selected == "Transações":
         st.markdown('### Transações Detalhadas')
         
-        # Carrega dados originais para CRUD
-        df_despesas_crud = crud_system.load_sheet_data('Despesas')
-        df_receitas_crud = crud_system.load_sheet_data('Receitas')
-        
-        # Aplica filtros aos dados CRUD
-        if not df_despesas_crud.empty:
-            df_despesas_crud['DATA'] = pd.to_datetime(df_despesas_crud['DATA'], errors='coerce')
-            df_despesas_crud = df_despesas_crud.dropna(subset=['DATA'])
-            df_despesas_crud['Ano'] = df_despesas_crud['DATA'].dt.year.astype(str)
-            df_despesas_crud['Mês'] = df_despesas_crud['DATA'].dt.strftime('%b').str.capitalize().replace({'Feb': 'Fev', 'Apr': 'Abr', 'May': 'Mai', 'Aug': 'Ago', 'Sep': 'Set', 'Oct': 'Out', 'Dec': 'Dez'})
-            
-            df_despesas_crud_filtrado = df_despesas_crud[
-                ((df_despesas_crud['CONTA'] == conta_selecionada) | (conta_selecionada == 'Todas')) &
-                (df_despesas_crud['Ano'].isin(anos_selecionados) if anos_selecionados else True) &
-                (df_despesas_crud['Mês'].isin(meses_selecionados) if meses_selecionados else True)
-            ]
-            
-            if 'Despesas' in tipos_selecionados and categoria_selecionada != 'Todas':
-                df_despesas_crud_filtrado = df_despesas_crud_filtrado[df_despesas_crud_filtrado['CATEGORIA'] == categoria_selecionada]
-        else:
-            df_despesas_crud_filtrado = pd.DataFrame()
-        
-        if not df_receitas_crud.empty:
-            df_receitas_crud['DATA'] = pd.to_datetime(df_receitas_crud['DATA'], errors='coerce')
-            df_receitas_crud = df_receitas_crud.dropna(subset=['DATA'])
-            df_receitas_crud['Ano'] = df_receitas_crud['DATA'].dt.year.astype(str)
-            df_receitas_crud['Mês'] = df_receitas_crud['DATA'].dt.strftime('%b').str.capitalize().replace({'Feb': 'Fev', 'Apr': 'Abr', 'May': 'Mai', 'Aug': 'Ago', 'Sep': 'Set', 'Oct': 'Out', 'Dec': 'Dez'})
-            
-            df_receitas_crud_filtrado = df_receitas_crud[
-                ((df_receitas_crud['CONTA'] == conta_selecionada) | (conta_selecionada == 'Todas')) &
-                (df_receitas_crud['Ano'].isin(anos_selecionados) if anos_selecionados else True) &
-                (df_receitas_crud['Mês'].isin(meses_selecionados) if meses_selecionados else True)
-            ]
-            
-            if 'Receitas' in tipos_selecionados and categoria_selecionada != 'Todas':
-                df_receitas_crud_filtrado = df_receitas_crud_filtrado[df_receitas_crud_filtrado['CATEGORIA'] == categoria_selecionada]
-        else:
-            df_receitas_crud_filtrado = pd.DataFrame()
+        # Dados para CRUD: o mesmo resultado filtrado dos indicadores (edições e exclusões são por id)
+        df_despesas_crud_filtrado = despesas_filtradas
+        df_receitas_crud_filtrado = receitas_filtradas
         
         # Combina dados para exibição
         df_trans_crud = pd.concat([
@@ -888,14 +785,13 @@ try: # --- BLOCO DE CAPTURA DE ERRO GLOBAL ---
                 
                 if not df_edit.empty:
                     # Seleção da transação para editar
-                    opcoes_transacao = [f"{row['DATA'].strftime('%d/%m/%Y')} - {row['DESCRIÇÃO']} - {format_brl(row['VALOR'])}" 
-                                       for idx, row in df_edit.iterrows()]
-                    transacao_selecionada = st.selectbox("Selecionar transação para editar:", opcoes_transacao, key="edit_transacao_select")
+                    opcoes_transacao = data_manager.get_record_options(sheet_name, df_edit)
+                    transacao_selecionada = st.selectbox("Selecionar transação para editar:", opcoes_transacao.labels, key="edit_transacao_select")
                     
                     if transacao_selecionada:
                         # Encontra o índice da transação selecionada
-                        idx_selecionado = opcoes_transacao.index(transacao_selecionada)
-                        row_to_edit = df_edit.iloc[idx_selecionado]
+                        original_idx = opcoes_transacao.row_for(transacao_selecionada)
+                        row_to_edit = df_edit.loc[original_idx]
                         
                         with st.form("edit_transacao_form"):
                             st.write("**Editar dados da transação:**")
@@ -930,9 +826,8 @@ try: # --- BLOCO DE CAPTURA DE ERRO GLOBAL ---
                                 if 'FAVORECIDO' in row_to_edit.index:
                                     updated_data['FAVORECIDO'] = novo_favorecido
                                 
-                                # Encontra o índice original no dataframe completo
-                                original_idx = df_edit.index[idx_selecionado]
-                                success, message = crud_system.update_record(sheet_name, original_idx, updated_data)
+                                record_id = df_edit.at[original_idx, 'id']
+                                success, message = crud_system.update_record_by_id(sheet_name, record_id, updated_data, opcoes_transacao.seen_rows([record_id]))
                                 
                                 if success:
                                     st.success("Transação atualizada com sucesso!")
@@ -957,15 +852,14 @@ try: # --- BLOCO DE CAPTURA DE ERRO GLOBAL ---
                     sheet_name = "Despesas"
                 
                 if not df_delete.empty:
-                    opcoes_transacao = [f"{row['DATA'].strftime('%d/%m/%Y')} - {row['DESCRIÇÃO']} - {format_brl(row['VALOR'])}" 
-                                       for idx, row in df_delete.iterrows()]
-                    transacao_selecionada = st.selectbox("Selecionar transação para excluir:", opcoes_transacao, key="delete_transacao_select")
+                    opcoes_transacao = data_manager.get_record_options(sheet_name, df_delete)
+                    transacao_selecionada = st.selectbox("Selecionar transação para excluir:", opcoes_transacao.labels, key="delete_transacao_select")
                     
                     if st.button("🗑️ Confirmar Exclusão", key="confirm_delete_transacao"):
                         if transacao_selecionada:
-                            idx_selecionado = opcoes_transacao.index(transacao_selecionada)
-                            original_idx = df_delete.index[idx_selecionado]
-                            success, message = crud_system.delete_record(sheet_name, original_idx)
+                            original_idx = opcoes_transacao.row_for(transacao_selecionada)
+                            record_id = df_delete.at[original_idx, 'id']
+                            success, message = crud_system.delete_records_by_id(sheet_name, [record_id], opcoes_transacao.seen_rows([record_id]))
                             
                             if success:
                                 st.success("Transação excluída com sucesso!")
@@ -992,10 +886,9 @@ try: # --- BLOCO DE CAPTURA DE ERRO GLOBAL ---
             
             if not df_bulk_delete.empty:
                 # Criar opções para seleção múltipla
-                opcoes_transacao = [f"{row['DATA'].strftime('%d/%m/%Y')} - {row['DESCRIÇÃO']} - {format_brl(row['VALOR'])}" 
-                                   for idx, row in df_bulk_delete.iterrows()]
+                opcoes_transacao = data_manager.get_record_options(sheet_name, df_bulk_delete)
                 
-                transacoes_selecionadas = st.multiselect("Selecionar transações para excluir:", opcoes_transacao, key="bulk_delete_transacao_select")
+                transacoes_selecionadas = st.multiselect("Selecionar transações para excluir:", opcoes_transacao.labels, key="bulk_delete_transacao_select")
                 
                 if transacoes_selecionadas:
                     st.warning(f"⚠️ Você está prestes a excluir {len(transacoes_selecionadas)} transação(ões). Esta ação não pode ser desfeita!")
@@ -1003,23 +896,14 @@ try: # --- BLOCO DE CAPTURA DE ERRO GLOBAL ---
                     col1, col2 = st.columns(2)
                     with col1:
                         if st.button("🗑️ Confirmar Exclusão em Lote", key="confirm_bulk_delete_transacao", type="primary"):
-                            success_count = 0
-                            error_count = 0
-                            
-                            for transacao_selecionada in transacoes_selecionadas:
-                                idx_selecionado = opcoes_transacao.index(transacao_selecionada)
-                                original_idx = df_bulk_delete.index[idx_selecionado]
-                                success, message = crud_system.delete_record(sheet_name, original_idx)
-                                
-                                if success:
-                                    success_count += 1
-                                else:
-                                    error_count += 1
+                            # Uma única exclusão por id: um lock, uma linha no journal, tudo ou nada
+                            ids = opcoes_transacao.ids_for(transacoes_selecionadas)
+                            success, message = crud_system.delete_records_by_id(sheet_name, ids, opcoes_transacao.seen_rows(ids))
                             
-                            if success_count > 0:
-                                st.success(f"✅ {success_count} transação(ões) excluída(s) com sucesso!")
-                            if error_count > 0:
-                                st.error(f"❌ {error_count} transação(ões) não puderam ser excluída(s).")
+                            if success:
+                                st.success(f"✅ {len(transacoes_selecionadas)} transação(ões) excluída(s) com sucesso!")
+                            else:
+                                st.error(f"❌ Erro ao excluir em lote: {message}")
                             
                             st.session_state.show_bulk_delete_transacao = False
                             st.rerun()
@@ -1035,11 +919,9 @@ try: # --- BLOCO DE CAPTURA DE ERRO GLOBAL ---
 
     elif selected == "Para onde vai":
         st.markdown('### Gráfico de Pareto das Despesas por Categoria')
-        df_pareto = despesas_filtradas.copy()
-        if not df_pareto.empty:
+        if not despesas_filtradas.empty:
             pareto = (
-                df_pareto.groupby('CATEGORIA')['VALOR']
-                .sum()
+                cubo_despesas.by('CATEGORIA', plano_filtros)
                 .abs()
                 .sort_values(ascending=False)
                 .reset_index()
@@ -1098,11 +980,9 @@ try: # --- BLOCO DE CAPTURA DE ERRO GLOBAL ---
 
     elif selected == "Pra quem vai":
         st.markdown('### Gráfico de Pareto das Despesas por Descrição')
-        df_pareto = despesas_filtradas.copy()
-        if not df_pareto.empty:
+        if not despesas_filtradas.empty:
             pareto = (
-                df_pareto.groupby('DESCRIÇÃO')['VALOR']
-                .sum()
+                cubo_despesas.by('DESCRIÇÃO', plano_filtros)
                 .abs()
                 .sort_values(ascending=False)
                 .reset_index()
@@ -1161,166 +1041,50 @@ try: # --- BLOCO DE CAPTURA DE ERRO GLOBAL ---
 
     elif selected == "Classificação ABC":
         st.markdown('### Classificação ABC das Despesas por Descrição')
-        df_abc = despesas_filtradas.copy()
-        if not df_abc.empty:
-            # Soma por descrição no mês atual
-            desc_mes_atual = (
-                df_abc.groupby('DESCRIÇÃO')['VALOR']
-                .sum()
-                .abs()
-                .sort_values(ascending=False)
-                .reset_index()
+        # Base da tabela: a seleção da sidebar, como nas demais páginas
+        totais_abc = cubo_despesas.by('DESCRIÇÃO', plano_filtros).abs()
+        if not totais_abc.empty:
+            # Coluna 'Período Anterior': período de comparação sem conta e sem categoria
+            totais_anterior = (
+                cubo_despesas.by('DESCRIÇÃO', comparacao.anterior.without(conta=True)).abs()
+                if comparacao is not None else None
             )
-            desc_mes_atual['%Despesas'] = desc_mes_atual['VALOR'] / desc_mes_atual['VALOR'].sum() * 100
-            desc_mes_atual['Despesa Acumulada'] = desc_mes_atual['VALOR'].cumsum()
-            desc_mes_atual['%Acum'] = desc_mes_atual['Despesa Acumulada'] / desc_mes_atual['VALOR'].sum() * 100
-            desc_mes_atual['Ranking'] = desc_mes_atual['VALOR'].rank(ascending=False, method='min').astype(int)
-            desc_mes_atual['Classe'] = 'C'
-            desc_mes_atual.loc[desc_mes_atual['%Acum'] <= 80, 'Classe'] = 'A'
-            desc_mes_atual.loc[(desc_mes_atual['%Acum'] > 80) & (desc_mes_atual['%Acum'] <= 90), 'Classe'] = 'B'
-            # Soma por descrição no mês anterior
-            if len(meses_selecionados) == 1:
-                idx_mes = meses_ordem.index(meses_selecionados[0])
-                if idx_mes > 0:
-                    mes_ant = meses_ordem[idx_mes-1]
-                    df_ant = despesas[(despesas['Ano'].isin(anos_selecionados)) & (despesas['Mês'] == mes_ant)]
-                    desc_mes_ant = df_ant.groupby('DESCRIÇÃO')['VALOR'].sum().abs().reset_index()
-                    desc_mes_ant = desc_mes_ant.rename(columns={'VALOR': 'Mês Anterior'})
-                else:
-                    desc_mes_ant = desc_mes_atual[['DESCRIÇÃO']].copy()
-                    desc_mes_ant['Mês Anterior'] = 0
-            else:
-                desc_mes_ant = desc_mes_atual[['DESCRIÇÃO']].copy()
-                desc_mes_ant['Mês Anterior'] = 0
-            # Junta mês anterior
-            df_abc = desc_mes_atual.merge(desc_mes_ant, on='DESCRIÇÃO', how='left')
-            df_abc['Mês Anterior'] = df_abc['Mês Anterior'].fillna(0)
-            # MoM e MoM%
-            df_abc['MoM'] = df_abc['VALOR'] - df_abc['Mês Anterior']
-            df_abc['MoM%_num'] = df_abc.apply(lambda x: (x['MoM']/x['Mês Anterior']*100) if x['Mês Anterior'] > 0 else 0, axis=1)
-            # Formatação
-            df_abc['Despesas(R$)'] = df_abc['VALOR'].apply(format_brl)
-            df_abc['Mês Anterior'] = df_abc['Mês Anterior'].apply(format_brl)
-            df_abc['MoM'] = df_abc['MoM'].apply(format_brl)
-            df_abc['%Despesas'] = df_abc['%Despesas'].apply(lambda x: f'{x:.1f}%')
-            df_abc['Despesa Acumulada'] = df_abc['Despesa Acumulada'].apply(format_brl)
-            df_abc['%Acum'] = df_abc['%Acum'].apply(lambda x: f'{x:.1f}%')
-            # MoM% com setas
-            mom_seta = []
-            for val in df_abc['MoM%_num']:
-                if val > 0:
-                    seta = '<span class="seta-verde">▲</span>'
-                elif val < 0:
-                    seta = '<span class="seta-vermelha">▼</span>'
-                else:
-                    seta = '—'
-                mom_seta.append(f'{val:.1f}% {seta}')
-            df_abc['MoM%'] = mom_seta
-            # Classe com ícones
-            classe_icone = []
-            for classe in df_abc['Classe']:
-                if classe == 'A':
-                    icone = '<span class="seta-vermelha">▼</span>'
-                elif classe == 'B':
-                    icone = '<span class="classe-b-icone">●</span>'
-                else:
-                    icone = '<span class="seta-cinza">▼</span>'
-                classe_icone.append(f'{classe} {icone}')
-            df_abc['Classe_Icone'] = classe_icone
-            # Seleção de colunas e renomeação
-            df_abc = df_abc.rename(columns={'DESCRIÇÃO': 'Descrição'})
-            df_abc = df_abc[['Descrição', 'Ranking', 'Despesas(R$)', '%Despesas', 'Despesa Acumulada', '%Acum', 'Classe_Icone', 'Mês Anterior', 'MoM', 'MoM%']]
+            tabela_abc = classify_abc(totais_abc, totais_anterior)
             # Renderização
             st.markdown('#### Tabela ABC detalhada das despesas')
-            # Tabela HTML customizada para colorir Descrição
-            table_html = """
-            <style>
-            .abc-table {
-                width: 100%;
-                border-collapse: collapse;
-                color: #f0f2f6; /* Texto claro para tema escuro */
-                font-family: 'sans-serif';
-            }
-            .abc-table th, .abc-table td {
-                border: 1px solid #3a3f44;
-                padding: 8px 12px;
-                text-align: center;
-            }
-            .abc-table th {
-                background-color: #1a1f24; /* Cabeçalho mais escuro */
-            }
-            .abc-table tr:nth-child(even) {
-                background-color: #262c31; /* Listras para melhor leitura */
-            }
-            .cat-a { color: #ff6961; font-weight: bold; } /* Vermelho para Classe A */
-            .cat-b { color: #fdfd96; font-weight: bold; } /* Amarelo para Classe B */
-            .seta-verde { color: #77dd77; font-weight: bold; } /* Verde suave */
-            .seta-vermelha { color: #ff6961; font-weight: bold; } /* Vermelho suave */
-            .seta-cinza { color: #8390a2; font-weight: bold; } /* Cinza azulado */
-            .classe-b-icone { color: #fdfd96; font-weight: bold; } /* Amarelo para Classe B */
-            </style>
-            <table class='abc-table'>
-                <tr>
-                    <th>Descrição</th>
-                    <th>Ranking</th>
-                    <th>Despesas(R$)</th>
-                    <th>%Despesas</th>
-                    <th>Despesa Acumulada</th>
-                    <th>%Acum</th>
-                    <th>Classe</th>
-                    <th>Mês Anterior</th>
-                    <th>MoM</th>
-                    <th>MoM%</th>
-                </tr>
-            """
-            for _, row in df_abc.iterrows():
-                classe = row['Classe_Icone']
-                if 'A' in classe:
-                    desc_class = 'cat-a'
-                elif 'B' in classe:
-                    desc_class = 'cat-b'
-                else:
-                    desc_class = ''
-                table_html += f"""
-                <tr>
-                    <td class='{desc_class}'>{row['Descrição']}</td>
-                    <td>{row['Ranking']}</td>
-                    <td>{row['Despesas(R$)']}</td>
-                    <td>{row['%Despesas']}</td>
-                    <td>{row['Despesa Acumulada']}</td>
-                    <td>{row['%Acum']}</td>
-                    <td>{row['Classe_Icone']}</td>
-                    <td>{row['Mês Anterior']}</td>
-                    <td>{row['MoM']}</td>
-                    <td>{row['MoM%']}</td>
-                </tr>
-                """
-            table_html += "</table>"
-            components.html(table_html, height=600, scrolling=True)
+            # Tabela paginada: só a página exibida é formatada e colorida
+            tamanho_pagina = 50
+            paginas = max(1, -(-len(tabela_abc) // tamanho_pagina))
+            pagina = st.number_input('Página', min_value=1, max_value=paginas, value=1, step=1, key='abc_pagina') if paginas > 1 else 1
+            inicio = (int(pagina) - 1) * tamanho_pagina
+            st.dataframe(
+                style_abc_page(tabela_abc.iloc[inicio:inicio + tamanho_pagina]),
+                hide_index=True,
+                use_container_width=True,
+                height=600,
+            )
+            st.caption(f"{len(tabela_abc)} descrições · página {int(pagina)} de {paginas}")
         else:
             st.info('Não há despesas suficientes para exibir a tabela ABC com os filtros selecionados.')
 
     elif selected == "Fluxo de Caixa":
         st.markdown('### Fluxo de Caixa')
-        # Junta receitas e despesas filtradas
-        df_fluxo = pd.concat([
-            receitas_filtradas.assign(TIPO='Receita'),
-            despesas_filtradas.assign(TIPO='Despesa')
-        ], ignore_index=True)
-        df_fluxo = df_fluxo.sort_values('DATA')
-        df_fluxo['VALOR'] = df_fluxo.apply(lambda x: x['VALOR'] if x['TIPO']=='Receita' else x['VALOR'], axis=1)
-        df_fluxo['Saldo Acumulado'] = df_fluxo['VALOR'].cumsum()
-        df_fluxo['DATA'] = df_fluxo['DATA'].dt.strftime('%d/%m/%Y')
+        agrupamento = st.radio('Agrupamento', list(CASH_FLOW_FREQUENCIES), horizontal=True, key='fluxo_agrupamento')
+        # Fluxo líquido por período (receitas positivas, despesas já negativas) e saldo acumulado
+        df_fluxo = net_flow(receitas_filtradas, despesas_filtradas, CASH_FLOW_FREQUENCIES[agrupamento])
         # Gráfico de área customizado estilo dark
         if not df_fluxo.empty:
+            saldo_acumulado = df_fluxo['Saldo Acumulado'].to_numpy()
+            pontos = downsample_minmax(saldo_acumulado, CASH_FLOW_CONFIG['max_points'])
+            mostrar_rotulos = len(pontos) <= CASH_FLOW_CONFIG['label_points']
             fig_fluxo = go.Figure()
             fig_fluxo.add_trace(go.Scatter(
-                x=df_fluxo['DATA'],
-                y=df_fluxo['Saldo Acumulado'],
-                mode='lines+markers+text',
-                text=[f"R$ {v:,.0f}".replace(",", ".") for v in df_fluxo['Saldo Acumulado']],
+                x=df_fluxo.index[pontos],
+                y=saldo_acumulado[pontos],
+                mode='lines+markers+text' if mostrar_rotulos else 'lines',
+                text=[f"R$ {v:,.0f}".replace(",", ".") for v in saldo_acumulado[pontos]] if mostrar_rotulos else None,
                 textposition='top center',
-                hovertemplate='Data: %{x}<br>Saldo: R$ %{y:,.2f}<extra></extra>',
+                hovertemplate='Data: %{x|%d/%m/%Y}<br>Saldo: R$ %{y:,.2f}<extra></extra>',
                 name='Saldo Acumulado'
             ))
             fig_fluxo.update_layout(
@@ -1353,51 +1117,24 @@ try: # --- BLOCO DE CAPTURA DE ERRO GLOBAL ---
                 else:
                     df_sub = df_cat[df_cat['DESCRIÇÃO'].isin(subcats_selecionadas)]
                     subcats_plot = subcats_selecionadas
-                # Agrupa por mês e subcategoria
-                df_sub['MÊS_ANO'] = df_sub['DATA'].dt.strftime('%b/%Y').str.capitalize().replace({'Feb': 'Fev', 'Apr': 'Abr', 'May': 'Mai', 'Aug': 'Ago', 'Sep': 'Set', 'Oct': 'Out', 'Dec': 'Dez'})
-                evolucao = df_sub.groupby(['MÊS_ANO', 'DESCRIÇÃO'])['VALOR'].sum().abs().reset_index()
-                # Ordena os meses corretamente
-                meses_ordem = ['Jan', 'Fev', 'Mar', 'Abr', 'Mai', 'Jun', 'Jul', 'Ago', 'Set', 'Out', 'Nov', 'Dez']
-                evolucao['MÊS'] = evolucao['MÊS_ANO'].str[:3]
-                evolucao['ANO'] = evolucao['MÊS_ANO'].str[-4:]
-                evolucao['MÊS_NUM'] = evolucao['MÊS'].apply(lambda x: meses_ordem.index(x) if x in meses_ordem else -1)
-                evolucao['ANO_NUM'] = evolucao['ANO'].astype(int)
-                evolucao = evolucao.sort_values(['ANO_NUM', 'MÊS_NUM'])
-                # Gera lista completa de meses/anos entre o menor e o maior registro
-                if not evolucao.empty:
-                    min_ano = evolucao['ANO_NUM'].min()
-                    max_ano = evolucao['ANO_NUM'].max()
-                    min_mes = evolucao[evolucao['ANO_NUM'] == min_ano]['MÊS_NUM'].min()
-                    max_mes = evolucao[evolucao['ANO_NUM'] == max_ano]['MÊS_NUM'].max()
-                    meses_ordem = ['Jan', 'Fev', 'Mar', 'Abr', 'Mai', 'Jun', 'Jul', 'Ago', 'Set', 'Out', 'Nov', 'Dez']
-                    labels_x = []
-                    for ano in range(min_ano, max_ano+1):
-                        for i, mes in enumerate(meses_ordem):
-                            if (ano == min_ano and i < min_mes) or (ano == max_ano and i > max_mes):
-                                continue
-                            labels_x.append(f'{mes}/{ano}')
-                else:
-                    labels_x = []
+                # Tabela mês × subcategoria com todos os meses do intervalo, montada uma vez
+                evolucao = subcategory_evolution(df_sub, subcats_plot)
+                labels_x = evolucao.rotulos
                 # Gráfico de linha
                 fig = go.Figure()
-                for subcat in subcats_plot:
-                    dados = evolucao[evolucao['DESCRIÇÃO'] == subcat]
-                    # Garante que todos os meses apareçam, mesmo se não houver valor
-                    dados = dados.set_index('MÊS_ANO').reindex(labels_x, fill_value=0).reset_index()
+                for subcat, valores in evolucao.valores.items():
                     fig.add_trace(go.Scatter(
-                        x=dados['MÊS_ANO'],
-                        y=dados['VALOR'],
+                        x=labels_x,
+                        y=valores.to_numpy(),
                         mode='lines+markers',
                         name=subcat,
-                        text=[f"R$ {v:,.2f}".replace(",", ".") for v in dados['VALOR']],
-                        textposition='top center',
+                        hovertemplate='%{x}<br>R$ %{y:,.2f}',
                     ))
                 # Linha de média
-                if not evolucao.empty:
-                    media = evolucao.groupby('MÊS_ANO')['VALOR'].sum().mean()
+                if labels_x:
                     fig.add_trace(go.Scatter(
                         x=labels_x,
-                        y=[media]*len(labels_x),
+                        y=[evolucao.media]*len(labels_x),
                         mode='lines',
                         name='Média',
                     ))
@@ -1425,21 +1162,15 @@ try: # --- BLOCO DE CAPTURA DE ERRO GLOBAL ---
         st.markdown('## 📈 Análise de Vendas')
         
         try:
-            df_vendas = pd.read_excel(xls, sheet_name='Vendas', decimal=',')
-            df_vendas['DATA'] = pd.to_datetime(df_vendas['DATA'], errors='coerce')
+            df_vendas = snapshot.get('Vendas')
             df_vendas = df_vendas.dropna(subset=['DATA'])
-            df_vendas['Ano'] = df_vendas['DATA'].dt.year.astype(str)
-            df_vendas['Mês'] = df_vendas['DATA'].dt.strftime('%b').str.capitalize().replace({'Feb': 'Fev', 'Apr': 'Abr', 'May': 'Mai', 'Aug': 'Ago', 'Sep': 'Set', 'Oct': 'Out', 'Dec': 'Dez'})
             
             # DEBUG Adicional para ver o que foi removido
             if len(df_vendas) == 0 and 'DATA' in df_vendas.columns:
                  st.warning("Nenhuma venda encontrada com data válida. Verifique a coluna 'DATA' na sua planilha 'Vendas'.")
 
-            vendas_filtradas = df_vendas[
-                (df_vendas['Ano'].isin(anos_selecionados) if anos_selecionados else True) &
-                (df_vendas['Mês'].isin(meses_selecionados) if meses_selecionados else True) &
-                ((df_vendas['CONTA'] == conta_selecionada) | (conta_selecionada == 'Todas'))
-            ]
+            vendas_filtradas = filtro.frame('Vendas')
+            cubo_vendas = snapshot.monthly_cube('Vendas')
 
         except Exception as e:
             st.error(f"Ocorreu um erro ao carregar os dados de Vendas: {e}")
@@ -1472,7 +1203,7 @@ try: # --- BLOCO DE CAPTURA DE ERRO GLOBAL ---
         with colg1:
             # Vendas por cliente (top 5 em valor)
             if not vendas_filtradas.empty:
-                top_clientes = vendas_filtradas.groupby('Cliente')['VALOR'].sum().sort_values(ascending=False).head(5)
+                top_clientes = top_n(cubo_vendas.by('Cliente', plano_filtros), 5)
                 fig_cli = px.pie(names=top_clientes.index, values=top_clientes.values, hole=0.5, title='Top 5 Clientes (Valor)')
                 fig_cli.update_traces(textinfo='percent', textposition='outside', pull=[0.05]*5, textfont=dict(family='Arial', size=16, color='white'), textfont_weight='bold')
                 fig_cli.update_layout(
@@ -1481,7 +1212,7 @@ try: # --- BLOCO DE CAPTURA DE ERRO GLOBAL ---
                 )
                 st.plotly_chart(fig_cli, use_container_width=True)
                 # Top 5 clientes em quantidade de vendas
-                top_clientes_qtd = vendas_filtradas['Cliente'].value_counts().head(5)
+                top_clientes_qtd = top_n(cubo_vendas.count_by('Cliente', plano_filtros), 5)
                 fig_cli_qtd = px.pie(names=top_clientes_qtd.index, values=top_clientes_qtd.values, hole=0.5, title='Top 5 Clientes (Qtd. Vendas)')
                 fig_cli_qtd.update_traces(textinfo='percent', textposition='outside', pull=[0.05]*5, textfont=dict(family='Arial', size=16, color='white'), textfont_weight='bold')
                 fig_cli_qtd.update_layout(
@@ -1494,7 +1225,7 @@ try: # --- BLOCO DE CAPTURA DE ERRO GLOBAL ---
         with colg2:
             # Vendas por tipo de recebimento
             if not vendas_filtradas.empty:
-                tipo_receb = vendas_filtradas.groupby('TIPO DE RECEBIMENTO')['VALOR'].sum().sort_values(ascending=False)
+                tipo_receb = cubo_vendas.by('TIPO DE RECEBIMENTO', plano_filtros).sort_values(ascending=False)
                 fig_tipo = px.pie(names=tipo_receb.index, values=tipo_receb.values, hole=0.5, title='Por Tipo de Recebimento')
                 fig_tipo.update_traces(textinfo='percent', textposition='outside', textfont=dict(family='Arial', size=16, color='white'), textfont_weight='bold')
                 fig_tipo.update_layout(
@@ -1509,10 +1240,8 @@ try: # --- BLOCO DE CAPTURA DE ERRO GLOBAL ---
         st.markdown('---')
         st.markdown('#### Evolução Mensal das Vendas')
         if not vendas_filtradas.empty:
-            evol = vendas_filtradas.groupby(['Ano', 'Mês'])['VALOR'].sum().reset_index()
-            evol['MÊS_NUM'] = evol['Mês'].apply(lambda x: meses_ordem.index(x) if x in meses_ordem else -1)
-            evol = evol.sort_values(['Ano', 'MÊS_NUM'])
-            evol['MêsAno'] = evol['Mês'] + '/' + evol['Ano']
+            evol = vendas_filtradas.groupby('PERÍODO')['VALOR'].sum().reset_index()
+            evol['MêsAno'] = evol['PERÍODO'].map(lambda p: f"{month_name(p.month)}/{p.year}")
             fig_evol = px.bar(
                 evol,
                 x='MêsAno',
@@ -1563,14 +1292,11 @@ try: # --- BLOCO DE CAPTURA DE ERRO GLOBAL ---
         st.markdown('## 💰 Análise de Investimentos')
         
         # Carrega dados de investimentos e metas
-        df_investimentos = pd.read_excel(xls, sheet_name='Investimentos', decimal=',')
-        df_metas = pd.read_excel(xls, sheet_name='Metas', decimal=',')
+        df_investimentos = snapshot.get('Investimentos')
+        df_metas = snapshot.get('Metas')
         
         # Processa dados de investimentos
-        df_investimentos['DATA'] = pd.to_datetime(df_investimentos['DATA'], errors='coerce')
         df_investimentos = df_investimentos.dropna(subset=['DATA'])
-        df_investimentos['Ano'] = df_investimentos['DATA'].dt.year.astype(str)
-        df_investimentos['Mês'] = df_investimentos['DATA'].dt.strftime('%b').str.capitalize().replace({'Feb': 'Fev', 'Apr': 'Abr', 'May': 'Mai', 'Aug': 'Ago', 'Sep': 'Set', 'Oct': 'Out', 'Dec': 'Dez'})
         
         # Aplica filtros
         investimentos_filtrados = df_investimentos[
@@ -1672,10 +1398,8 @@ try: # --- BLOCO DE CAPTURA DE ERRO GLOBAL ---
         st.markdown('---')
         st.markdown('### 📈 Evolução Mensal dos Aportes')
         if not investimentos_filtrados.empty:
-            evol_mensal = investimentos_filtrados.groupby(['Ano', 'Mês'])['VALOR_APORTE'].sum().reset_index()
-            evol_mensal['MÊS_NUM'] = evol_mensal['Mês'].apply(lambda x: meses_ordem.index(x) if x in meses_ordem else -1)
-            evol_mensal = evol_mensal.sort_values(['Ano', 'MÊS_NUM'])
-            evol_mensal['MêsAno'] = evol_mensal['Mês'] + '/' + evol_mensal['Ano']
+            evol_mensal = investimentos_filtrados.groupby('PERÍODO')['VALOR_APORTE'].sum().reset_index()
+            evol_mensal['MêsAno'] = evol_mensal['PERÍODO'].map(lambda p: f"{month_name(p.month)}/{p.year}")
             
             fig_evol = px.bar(
                 evol_mensal,
@@ -1699,7 +1423,7 @@ try: # --- BLOCO DE CAPTURA DE ERRO GLOBAL ---
         st.markdown('---')
         st.markdown('### 🏆 Top 10 Ativos Mais Investidos')
         if not investimentos_filtrados.empty:
-            top_ativos = investimentos_filtrados.groupby('ATIVO')['VALOR_APORTE'].sum().sort_values(ascending=False).head(10)
+            top_ativos = top_n(investimentos_filtrados.groupby('ATIVO')['VALOR_APORTE'].sum(), 10)
             fig_top = px.bar(
                 x=top_ativos.values,
                 y=top_ativos.index,
@@ -1768,12 +1492,9 @@ try: # --- BLOCO DE CAPTURA DE ERRO GLOBAL ---
 
         # Carregar e processar dados de CC
         try:
-            df_cc = pd.read_excel(xls, sheet_name='Div_CC', decimal=',')
+            df_cc = snapshot.get('Div_CC')
             if not df_cc.empty:
-                df_cc['Data'] = pd.to_datetime(df_cc['Data'], errors='coerce')
                 df_cc.dropna(subset=['Data'], inplace=True)
-                df_cc['Ano'] = df_cc['Data'].dt.year.astype(str)
-                df_cc['Mês'] = df_cc['Data'].dt.strftime('%b').str.capitalize().replace({'Feb': 'Fev', 'Apr': 'Abr', 'May': 'Mai', 'Aug': 'Ago', 'Sep': 'Set', 'Oct': 'Out', 'Dec': 'Dez'})
 
                 # Aplicar filtros definidos na sidebar
                 df_cc_filtrado = df_cc.copy()
@@ -1861,7 +1582,9 @@ try: # --- BLOCO DE CAPTURA DE ERRO GLOBAL ---
         st.markdown("## 📊 Análise de Orçamento Mensal - Inteligência Financeira")
 
         try:
-            df_orcamento = pd.read_excel(xls, sheet_name='Orcamento', decimal=',')
+            if 'Orcamento' not in snapshot:
+                raise ValueError("Worksheet named 'Orcamento' not found")
+            df_orcamento = snapshot.get('Orcamento')
             if 'Categoria' not in df_orcamento.columns or 'Percentual' not in df_orcamento.columns:
                 st.error("A aba 'Orcamento' deve conter as colunas 'Categoria' e 'Percentual'.")
                 st.stop()
@@ -1875,21 +1598,13 @@ try: # --- BLOCO DE CAPTURA DE ERRO GLOBAL ---
             st.info("👈 Por favor, selecione pelo menos um Ano e um Mês na barra lateral para calcular o orçamento.")
             st.stop()
             
-        # 1. Filtra os dados de receita e despesa para o período selecionado, sem filtro de categoria
-        receitas_periodo = receitas[
-            ((receitas['CONTA'] == conta_selecionada) | (conta_selecionada == 'Todas')) &
-            (receitas['Ano'].isin(anos_selecionados)) &
-            (receitas['Mês'].isin(meses_selecionados))
-        ]
-        despesas_periodo = despesas[
-            ((despesas['CONTA'] == conta_selecionada) | (conta_selecionada == 'Todas')) &
-            (despesas['Ano'].isin(anos_selecionados)) &
-            (despesas['Mês'].isin(meses_selecionados))
-        ]
+        # 1. Período selecionado, sem filtro de categoria (consultado nos cubos mensais)
+        plano_periodo = plano_filtros.without(categoria=True)
 
         # 2. Calcula a Renda Líquida Base para o orçamento
-        total_receitas_periodo = receitas_periodo['VALOR'].sum()
-        custos_negocio = despesas_periodo[despesas_periodo['CATEGORIA'] == 'Confeitaria']['VALOR'].sum()
+        total_receitas_periodo = cubo_receitas.total(plano_periodo)
+        gastos_periodo_cat = cubo_despesas.by('CATEGORIA', plano_periodo)
+        custos_negocio = gastos_periodo_cat.get('Confeitaria', 0.0)
         renda_liquida_base = total_receitas_periodo + custos_negocio # Custos já são negativos
         total_orcado = df_orcamento['Percentual'].sum()
 
@@ -1933,7 +1648,7 @@ try: # --- BLOCO DE CAPTURA DE ERRO GLOBAL ---
 
         if renda_liquida_base > 0:
             # 4. Calcula os gastos reais por categoria (excluindo os custos de negócio)
-            gastos_reais_cat = despesas_periodo[despesas_periodo['CATEGORIA'] != 'Confeitaria'].groupby('CATEGORIA')['VALOR'].sum().abs().reset_index()
+            gastos_reais_cat = gastos_periodo_cat.drop('Confeitaria', errors='ignore').abs().reset_index()
             gastos_reais_cat = gastos_reais_cat.rename(columns={'VALOR': 'Gasto', 'CATEGORIA': 'Categoria'})
 
             # 5. Cria a tabela de análise do orçamento
@@ -2100,16 +1815,16 @@ try: # --- BLOCO DE CAPTURA DE ERRO GLOBAL ---
                 if st.button("💾 Salvar Percentuais", type="primary"):
                     if total_novo == 100:
                         try:
-                            # Atualizar o dataframe
-                            for categoria, percentual in novos_percentuais.items():
-                                df_orcamento.loc[df_orcamento['Categoria'] == categoria, 'Percentual'] = percentual
-                            
-                            # Salvar no Excel
-                            with pd.ExcelWriter(excel_path, engine='openpyxl', mode='a', if_sheet_exists='replace') as writer:
-                                df_orcamento.to_excel(writer, sheet_name='Orcamento', index=False)
+                            # Aplica os percentuais sobre a versão mais recente da aba
+                            def aplicar_percentuais(df_atual):
+                                for categoria, percentual in novos_percentuais.items():
+                                    df_atual.loc[df_atual['Categoria'] == categoria, 'Percentual'] = percentual
+                                return df_atual
                             
-                            st.success("✅ Percentuais salvos com sucesso!")
-                            st.rerun()
+                            # Salvar no armazenamento configurado
+                            if data_manager.modify_sheet('Orcamento', aplicar_percentuais):
+                                st.success("✅ Percentuais salvos com sucesso!")
+                                st.rerun()
                         except Exception as e:
                             st.error(f"❌ Erro ao salvar: {e}")
                     else:
@@ -2151,7 +1866,7 @@ try: # --- BLOCO DE CAPTURA DE ERRO GLOBAL ---
                             'total_receitas': total_receitas_periodo,
                             'custos_confeitaria': abs(custos_negocio),
                             'df_analise': df_analise,
-                            'periodo': f"{', '.join(meses_selecionados)}/{', '.join(anos_selecionados)}"
+                            'periodo': f"{', '.join(meses_selecionados)}/{', '.join(map(str, anos_selecionados))}"
                         }
                         filename = relatorio.generate_orcamento_report(dados_relatorio, "relatorio_orcamento.pdf")
                         st.success("✅ Relatório gerado com sucesso!")
@@ -2170,43 +1885,18 @@ try: # --- BLOCO DE CAPTURA DE ERRO GLOBAL ---
 
     # Função genérica para salvar dados no Excel
     def save_transaction(df_new, sheet_name):
-        try:
-            with st.spinner(f"Salvando em {sheet_name}..."):
-                # Usar um lock para evitar concorrência no futuro
-                from threading import Lock
-                excel_lock = Lock()
-                with excel_lock:
-                    dfs = pd.read_excel(excel_path, sheet_name=None)
-                    
-                    sheet_df = dfs.get(sheet_name)
-                    
-                    # Garante a consistência dos tipos de dados antes de concatenar
-                    for col in sheet_df.columns:
-                        if col in df_new.columns:
-                            if pd.api.types.is_datetime64_any_dtype(sheet_df[col]):
-                                df_new[col] = pd.to_datetime(df_new[col])
-                            else:
-                                df_new[col] = df_new[col].astype(sheet_df[col].dtype, errors='ignore')
-                    
-                    updated_df = pd.concat([sheet_df, df_new], ignore_index=True)
-                    dfs[sheet_name] = updated_df
-
-                    with pd.ExcelWriter(excel_path, engine='openpyxl') as writer:
-                        for name, df_sheet in dfs.items():
-                            df_sheet.to_excel(writer, sheet_name=name, index=False)
-            return True
-        except Exception as e:
-            st.error(f"Erro ao salvar no Excel: {e}")
-            return False
+        # Acrescenta apenas as novas linhas ao final da aba (com backup e coerção de tipos)
+        with st.spinner(f"Salvando em {sheet_name}..."):
+            return data_manager.append_rows(df_new, sheet_name)
 
     # Modal para Nova Despesa
     if st.session_state.get("show_despesa_form", False):
         st.subheader("📝 Lançar Nova Despesa")
         with st.container():
             # Ler dados para os selects
-            df_conta = pd.read_excel(xls, sheet_name='Conta')
+            df_conta = snapshot.get('Conta')
             contas = df_conta['Contas'].dropna().unique().tolist()
-            df_cat_desp = pd.read_excel(xls, sheet_name='Despesas Categoria')
+            df_cat_desp = snapshot.get('Despesas Categoria')
             categorias_desp = df_cat_desp.columns.tolist()
 
             # Categoria fica fora do form para reatividade
@@ -2277,9 +1967,9 @@ try: # --- BLOCO DE CAPTURA DE ERRO GLOBAL ---
         st.subheader("💰 Lançar Nova Receita")
         with st.container():
             # Ler dados para os selects
-            df_conta = pd.read_excel(xls, sheet_name='Conta')
+            df_conta = snapshot.get('Conta')
             contas = df_conta['Contas'].dropna().unique().tolist()
-            df_cat_rec = pd.read_excel(xls, sheet_name='Receitas Categoria')
+            df_cat_rec = snapshot.get('Receitas Categoria')
             categorias_rec = df_cat_rec['SUBCATEGORIA'].dropna().unique().tolist()
             
             # Carregar itens de receitas (que não dependem da categoria)
@@ -2336,9 +2026,9 @@ try: # --- BLOCO DE CAPTURA DE ERRO GLOBAL ---
         st.subheader("🛒 Lançar Nova Venda")
         with st.container():
             # Carregar dados para os selects
-            df_conta = pd.read_excel(xls, sheet_name='Conta')
+            df_conta = snapshot.get('Conta')
             contas = df_conta['Contas'].dropna().unique().tolist()
-            df_vendas_base = pd.read_excel(xls, sheet_name='Vendas', decimal=',')
+            df_vendas_base = snapshot.get('Vendas')
             tipos_recebimento = df_vendas_base['TIPO DE RECEBIMENTO'].dropna().unique().tolist()
             clientes = df_vendas_base['Cliente'].dropna().unique().tolist()
 
@@ -2399,7 +2089,7 @@ try: # --- BLOCO DE CAPTURA DE ERRO GLOBAL ---
         with st.container():
             with st.form("cc_form", clear_on_submit=True):
                 st.subheader("Preencha os dados da compra:")
-                df_cc_base = pd.read_excel(xls, sheet_name='Div_CC', decimal=',')
+                df_cc_base = snapshot.get('Div_CC')
                 cartoes = df_cc_base['Cartão'].dropna().unique().tolist()
                 tipos_compra = df_cc_base['Tipo de Compra'].dropna().unique().tolist()
 
@@ -2449,34 +2139,27 @@ try: # --- BLOCO DE CAPTURA DE ERRO GLOBAL ---
         st.subheader("✏️ Editar Venda")
         with st.container():
             # Carregar dados filtrados de vendas
-            df_vendas = pd.read_excel(xls, sheet_name='Vendas', decimal=',')
-            df_vendas['DATA'] = pd.to_datetime(df_vendas['DATA'], errors='coerce')
+            df_vendas = snapshot.get('Vendas')
             df_vendas = df_vendas.dropna(subset=['DATA'])
-            df_vendas['Ano'] = df_vendas['DATA'].dt.year.astype(str)
-            df_vendas['Mês'] = df_vendas['DATA'].dt.strftime('%b').str.capitalize().replace({'Feb': 'Fev', 'Apr': 'Abr', 'May': 'Mai', 'Aug': 'Ago', 'Sep': 'Set', 'Oct': 'Out', 'Dec': 'Dez'})
             
             # Aplicar filtros
-            vendas_filtradas = df_vendas[
-                (df_vendas['Ano'].isin(anos_selecionados) if anos_selecionados else True) &
-                (df_vendas['Mês'].isin(meses_selecionados) if meses_selecionados else True)
-            ]
+            vendas_filtradas = filtro.frame('Vendas', plano_filtros.without(conta=True))
             
             if not vendas_filtradas.empty:
                 # Carregar dados para os selects
-                df_conta = pd.read_excel(xls, sheet_name='Conta')
+                df_conta = snapshot.get('Conta')
                 contas = df_conta['Contas'].dropna().unique().tolist()
                 tipos_recebimento = df_vendas['TIPO DE RECEBIMENTO'].dropna().unique().tolist()
                 clientes = df_vendas['Cliente'].dropna().unique().tolist()
                 
                 # Criar opções para seleção
-                opcoes_venda = [f"{row['DATA'].strftime('%d/%m/%Y')} - {row['Cliente']} - R$ {row['VALOR']:,.2f}" 
-                               for idx, row in vendas_filtradas.iterrows()]
+                opcoes_venda = data_manager.get_record_options("Vendas", vendas_filtradas)
                 
-                venda_selecionada = st.selectbox("Selecionar venda para editar:", opcoes_venda, key="edit_venda_select")
+                venda_selecionada = st.selectbox("Selecionar venda para editar:", opcoes_venda.labels, key="edit_venda_select")
                 
                 if venda_selecionada:
-                    idx_selecionado = opcoes_venda.index(venda_selecionada)
-                    row_to_edit = vendas_filtradas.iloc[idx_selecionado]
+                    original_idx = opcoes_venda.row_for(venda_selecionada)
+                    row_to_edit = vendas_filtradas.loc[original_idx]
                     
                     with st.form("edit_venda_form"):
                         st.write("**Editar dados da venda:**")
@@ -2514,9 +2197,8 @@ try: # --- BLOCO DE CAPTURA DE ERRO GLOBAL ---
                                 'Status': novo_status
                             }
                             
-                            # Encontra o índice original no dataframe completo
-                            original_idx = vendas_filtradas.index[idx_selecionado]
-                            success, message = crud_system.update_record("Vendas", original_idx, updated_data)
+                            record_id = vendas_filtradas.at[original_idx, 'id']
+                            success, message = crud_system.update_record_by_id("Vendas", record_id, updated_data, opcoes_venda.seen_rows([record_id]))
                             
                             if success:
                                 st.success("Venda atualizada com sucesso!")
@@ -2532,11 +2214,8 @@ try: # --- BLOCO DE CAPTURA DE ERRO GLOBAL ---
         st.subheader("✏️ Editar Investimento")
         with st.container():
             # Carregar dados filtrados de investimentos
-            df_investimentos = pd.read_excel(xls, sheet_name='Investimentos', decimal=',')
-            df_investimentos['DATA'] = pd.to_datetime(df_investimentos['DATA'], errors='coerce')
+            df_investimentos = snapshot.get('Investimentos')
             df_investimentos = df_investimentos.dropna(subset=['DATA'])
-            df_investimentos['Ano'] = df_investimentos['DATA'].dt.year.astype(str)
-            df_investimentos['Mês'] = df_investimentos['DATA'].dt.strftime('%b').str.capitalize().replace({'Feb': 'Fev', 'Apr': 'Abr', 'May': 'Mai', 'Aug': 'Ago', 'Sep': 'Set', 'Oct': 'Out', 'Dec': 'Dez'})
             
             # Aplicar filtros
             investimentos_filtrados = df_investimentos[
@@ -2549,14 +2228,13 @@ try: # --- BLOCO DE CAPTURA DE ERRO GLOBAL ---
             
             if not investimentos_filtrados.empty:
                 # Criar opções para seleção
-                opcoes_invest = [f"{row['DATA'].strftime('%d/%m/%Y')} - {row['ATIVO']} - R$ {row['VALOR_APORTE']:,.2f}" 
-                                for idx, row in investimentos_filtrados.iterrows()]
+                opcoes_invest = data_manager.get_record_options("Investimentos", investimentos_filtrados)
                 
-                invest_selecionado = st.selectbox("Selecionar investimento para editar:", opcoes_invest, key="edit_invest_select")
+                invest_selecionado = st.selectbox("Selecionar investimento para editar:", opcoes_invest.labels, key="edit_invest_select")
                 
                 if invest_selecionado:
-                    idx_selecionado = opcoes_invest.index(invest_selecionado)
-                    row_to_edit = investimentos_filtrados.iloc[idx_selecionado]
+                    original_idx = opcoes_invest.row_for(invest_selecionado)
+                    row_to_edit = investimentos_filtrados.loc[original_idx]
                     
                     with st.form("edit_invest_form"):
                         st.write("**Editar dados do investimento:**")
@@ -2593,9 +2271,8 @@ try: # --- BLOCO DE CAPTURA DE ERRO GLOBAL ---
                                 'OBJETIVO': novo_objetivo
                             }
                             
-                            # Encontra o índice original no dataframe completo
-                            original_idx = investimentos_filtrados.index[idx_selecionado]
-                            success, message = crud_system.update_record("Investimentos", original_idx, updated_data)
+                            record_id = investimentos_filtrados.at[original_idx, 'id']
+                            success, message = crud_system.update_record_by_id("Investimentos", record_id, updated_data, opcoes_invest.seen_rows([record_id]))
                             
                             if success:
                                 st.success("Investimento atualizado com sucesso!")
@@ -2611,11 +2288,8 @@ try: # --- BLOCO DE CAPTURA DE ERRO GLOBAL ---
         st.subheader("✏️ Editar Compra no Cartão")
         with st.container():
             # Carregar dados filtrados de cartão de crédito
-            df_cc = pd.read_excel(xls, sheet_name='Div_CC', decimal=',')
-            df_cc['Data'] = pd.to_datetime(df_cc['Data'], errors='coerce')
+            df_cc = snapshot.get('Div_CC')
             df_cc.dropna(subset=['Data'], inplace=True)
-            df_cc['Ano'] = df_cc['Data'].dt.year.astype(str)
-            df_cc['Mês'] = df_cc['Data'].dt.strftime('%b').str.capitalize().replace({'Feb': 'Fev', 'Apr': 'Abr', 'May': 'Mai', 'Aug': 'Ago', 'Sep': 'Set', 'Oct': 'Out', 'Dec': 'Dez'})
             
             # Aplicar filtros
             cc_filtrado = df_cc[
@@ -2629,14 +2303,13 @@ try: # --- BLOCO DE CAPTURA DE ERRO GLOBAL ---
             
             if not cc_filtrado.empty:
                 # Criar opções para seleção
-                opcoes_cc = [f"{row['Data'].strftime('%d/%m/%Y')} - {row['Descrição']} - R$ {row['valor total da compra']:,.2f}" 
-                            for idx, row in cc_filtrado.iterrows()]
+                opcoes_cc = data_manager.get_record_options("Div_CC", cc_filtrado)
                 
-                cc_selecionado = st.selectbox("Selecionar compra para editar:", opcoes_cc, key="edit_cc_select")
+                cc_selecionado = st.selectbox("Selecionar compra para editar:", opcoes_cc.labels, key="edit_cc_select")
                 
                 if cc_selecionado:
-                    idx_selecionado = opcoes_cc.index(cc_selecionado)
-                    row_to_edit = cc_filtrado.iloc[idx_selecionado]
+                    original_idx = opcoes_cc.row_for(cc_selecionado)
+                    row_to_edit = cc_filtrado.loc[original_idx]
                     
                     with st.form("edit_cc_form"):
                         st.write("**Editar dados da compra:**")
@@ -2673,9 +2346,8 @@ try: # --- BLOCO DE CAPTURA DE ERRO GLOBAL ---
                                 'Situação': nova_situacao
                             }
                             
-                            # Encontra o índice original no dataframe completo
-                            original_idx = cc_filtrado.index[idx_selecionado]
-                            success, message = crud_system.update_record("Div_CC", original_idx, updated_data)
+                            record_id = cc_filtrado.at[original_idx, 'id']
+                            success, message = crud_system.update_record_by_id("Div_CC", record_id, updated_data, opcoes_cc.seen_rows([record_id]))
                             
                             if success:
                                 st.success("Compra atualizada com sucesso!")
@@ -2693,30 +2365,23 @@ try: # --- BLOCO DE CAPTURA DE ERRO GLOBAL ---
         st.subheader("🗑️ Excluir Venda")
         with st.container():
             # Carregar dados filtrados de vendas
-            df_vendas = pd.read_excel(xls, sheet_name='Vendas', decimal=',')
-            df_vendas['DATA'] = pd.to_datetime(df_vendas['DATA'], errors='coerce')
+            df_vendas = snapshot.get('Vendas')
             df_vendas = df_vendas.dropna(subset=['DATA'])
-            df_vendas['Ano'] = df_vendas['DATA'].dt.year.astype(str)
-            df_vendas['Mês'] = df_vendas['DATA'].dt.strftime('%b').str.capitalize().replace({'Feb': 'Fev', 'Apr': 'Abr', 'May': 'Mai', 'Aug': 'Ago', 'Sep': 'Set', 'Oct': 'Out', 'Dec': 'Dez'})
             
             # Aplicar filtros
-            vendas_filtradas = df_vendas[
-                (df_vendas['Ano'].isin(anos_selecionados) if anos_selecionados else True) &
-                (df_vendas['Mês'].isin(meses_selecionados) if meses_selecionados else True)
-            ]
+            vendas_filtradas = filtro.frame('Vendas', plano_filtros.without(conta=True))
             
             if not vendas_filtradas.empty:
                 # Criar opções para seleção
-                opcoes_venda = [f"{row['DATA'].strftime('%d/%m/%Y')} - {row['Cliente']} - R$ {row['VALOR']:,.2f}" 
-                               for idx, row in vendas_filtradas.iterrows()]
+                opcoes_venda = data_manager.get_record_options("Vendas", vendas_filtradas)
                 
-                venda_selecionada = st.selectbox("Selecionar venda para excluir:", opcoes_venda, key="delete_venda_select")
+                venda_selecionada = st.selectbox("Selecionar venda para excluir:", opcoes_venda.labels, key="delete_venda_select")
                 
                 if st.button("🗑️ Confirmar Exclusão", key="confirm_delete_venda"):
                     if venda_selecionada:
-                        idx_selecionado = opcoes_venda.index(venda_selecionada)
-                        original_idx = vendas_filtradas.index[idx_selecionado]
-                        success, message = crud_system.delete_record("Vendas", original_idx)
+                        original_idx = opcoes_venda.row_for(venda_selecionada)
+                        record_id = vendas_filtradas.at[original_idx, 'id']
+                        success, message = crud_system.delete_records_by_id("Vendas", [record_id], opcoes_venda.seen_rows([record_id]))
                         
                         if success:
                             st.success("Venda excluída com sucesso!")
@@ -2732,11 +2397,8 @@ try: # --- BLOCO DE CAPTURA DE ERRO GLOBAL ---
         st.subheader("🗑️ Excluir Investimento")
         with st.container():
             # Carregar dados filtrados de investimentos
-            df_investimentos = pd.read_excel(xls, sheet_name='Investimentos')
-            df_investimentos['DATA'] = pd.to_datetime(df_investimentos['DATA'], errors='coerce')
+            df_investimentos = snapshot.get('Investimentos')
             df_investimentos = df_investimentos.dropna(subset=['DATA'])
-            df_investimentos['Ano'] = df_investimentos['DATA'].dt.year.astype(str)
-            df_investimentos['Mês'] = df_investimentos['DATA'].dt.strftime('%b').str.capitalize().replace({'Feb': 'Fev', 'Apr': 'Abr', 'May': 'Mai', 'Aug': 'Ago', 'Sep': 'Set', 'Oct': 'Out', 'Dec': 'Dez'})
             
             # Aplicar filtros
             investimentos_filtrados = df_investimentos[
@@ -2749,16 +2411,15 @@ try: # --- BLOCO DE CAPTURA DE ERRO GLOBAL ---
             
             if not investimentos_filtrados.empty:
                 # Criar opções para seleção
-                opcoes_invest = [f"{row['DATA'].strftime('%d/%m/%Y')} - {row['ATIVO']} - R$ {row['VALOR_APORTE']:,.2f}" 
-                                for idx, row in investimentos_filtrados.iterrows()]
+                opcoes_invest = data_manager.get_record_options("Investimentos", investimentos_filtrados)
                 
-                invest_selecionado = st.selectbox("Selecionar investimento para excluir:", opcoes_invest, key="delete_invest_select")
+                invest_selecionado = st.selectbox("Selecionar investimento para excluir:", opcoes_invest.labels, key="delete_invest_select")
                 
                 if st.button("🗑️ Confirmar Exclusão", key="confirm_delete_invest"):
                     if invest_selecionado:
-                        idx_selecionado = opcoes_invest.index(invest_selecionado)
-                        original_idx = investimentos_filtrados.index[idx_selecionado]
-                        success, message = crud_system.delete_record("Investimentos", original_idx)
+                        original_idx = opcoes_invest.row_for(invest_selecionado)
+                        record_id = investimentos_filtrados.at[original_idx, 'id']
+                        success, message = crud_system.delete_records_by_id("Investimentos", [record_id], opcoes_invest.seen_rows([record_id]))
                         
                         if success:
                             st.success("Investimento excluído com sucesso!")
@@ -2774,11 +2435,8 @@ try: # --- BLOCO DE CAPTURA DE ERRO GLOBAL ---
         st.subheader("🗑️ Excluir Compra no Cartão")
         with st.container():
             # Carregar dados filtrados de cartão de crédito
-            df_cc = pd.read_excel(xls, sheet_name='Div_CC')
-            df_cc['Data'] = pd.to_datetime(df_cc['Data'], errors='coerce')
+            df_cc = snapshot.get('Div_CC')
             df_cc.dropna(subset=['Data'], inplace=True)
-            df_cc['Ano'] = df_cc['Data'].dt.year.astype(str)
-            df_cc['Mês'] = df_cc['Data'].dt.strftime('%b').str.capitalize().replace({'Feb': 'Fev', 'Apr': 'Abr', 'May': 'Mai', 'Aug': 'Ago', 'Sep': 'Set', 'Oct': 'Out', 'Dec': 'Dez'})
             
             # Aplicar filtros
             cc_filtrado = df_cc[
@@ -2792,16 +2450,15 @@ try: # --- BLOCO DE CAPTURA DE ERRO GLOBAL ---
             
             if not cc_filtrado.empty:
                 # Criar opções para seleção
-                opcoes_cc = [f"{row['Data'].strftime('%d/%m/%Y')} - {row['Descrição']} - R$ {row['valor total da compra']:,.2f}" 
-                            for idx, row in cc_filtrado.iterrows()]
+                opcoes_cc = data_manager.get_record_options("Div_CC", cc_filtrado)
                 
-                cc_selecionado = st.selectbox("Selecionar compra para excluir:", opcoes_cc, key="delete_cc_select")
+                cc_selecionado = st.selectbox("Selecionar compra para excluir:", opcoes_cc.labels, key="delete_cc_select")
                 
                 if st.button("🗑️ Confirmar Exclusão", key="confirm_delete_cc"):
                     if cc_selecionado:
-                        idx_selecionado = opcoes_cc.index(cc_selecionado)
-                        original_idx = cc_filtrado.index[idx_selecionado]
-                        success, message = crud_system.delete_record("Div_CC", original_idx)
+                        original_idx = opcoes_cc.row_for(cc_selecionado)
+                        record_id = cc_filtrado.at[original_idx, 'id']
+                        success, message = crud_system.delete_records_by_id("Div_CC", [record_id], opcoes_cc.seen_rows([record_id]))
                         
                         if success:
                             st.success("Compra excluída com sucesso!")
@@ -2819,24 +2476,17 @@ try: # --- BLOCO DE CAPTURA DE ERRO GLOBAL ---
         st.subheader("🗑️ Exclusão em Lote - Vendas")
         with st.container():
             # Carregar dados filtrados de vendas
-            df_vendas = pd.read_excel(xls, sheet_name='Vendas', decimal=',')
-            df_vendas['DATA'] = pd.to_datetime(df_vendas['DATA'], errors='coerce')
+            df_vendas = snapshot.get('Vendas')
             df_vendas = df_vendas.dropna(subset=['DATA'])
-            df_vendas['Ano'] = df_vendas['DATA'].dt.year.astype(str)
-            df_vendas['Mês'] = df_vendas['DATA'].dt.strftime('%b').str.capitalize().replace({'Feb': 'Fev', 'Apr': 'Abr', 'May': 'Mai', 'Aug': 'Ago', 'Sep': 'Set', 'Oct': 'Out', 'Dec': 'Dez'})
             
             # Aplicar filtros
-            vendas_filtradas = df_vendas[
-                (df_vendas['Ano'].isin(anos_selecionados) if anos_selecionados else True) &
-                (df_vendas['Mês'].isin(meses_selecionados) if meses_selecionados else True)
-            ]
+            vendas_filtradas = filtro.frame('Vendas', plano_filtros.without(conta=True))
             
             if not vendas_filtradas.empty:
                 # Criar opções para seleção múltipla
-                opcoes_venda = [f"{row['DATA'].strftime('%d/%m/%Y')} - {row['Cliente']} - R$ {row['VALOR']:,.2f}" 
-                               for idx, row in vendas_filtradas.iterrows()]
+                opcoes_venda = data_manager.get_record_options("Vendas", vendas_filtradas)
                 
-                vendas_selecionadas = st.multiselect("Selecionar vendas para excluir:", opcoes_venda, key="bulk_delete_venda_select")
+                vendas_selecionadas = st.multiselect("Selecionar vendas para excluir:", opcoes_venda.labels, key="bulk_delete_venda_select")
                 
                 if vendas_selecionadas:
                     st.warning(f"⚠️ Você está prestes a excluir {len(vendas_selecionadas)} venda(s). Esta ação não pode ser desfeita!")
@@ -2844,23 +2494,14 @@ try: # --- BLOCO DE CAPTURA DE ERRO GLOBAL ---
                     col1, col2 = st.columns(2)
                     with col1:
                         if st.button("🗑️ Confirmar Exclusão em Lote", key="confirm_bulk_delete_venda", type="primary"):
-                            success_count = 0
-                            error_count = 0
-                            
-                            for venda_selecionada in vendas_selecionadas:
-                                idx_selecionado = opcoes_venda.index(venda_selecionada)
-                                original_idx = vendas_filtradas.index[idx_selecionado]
-                                success, message = crud_system.delete_record("Vendas", original_idx)
-                                
-                                if success:
-                                    success_count += 1
-                                else:
-                                    error_count += 1
+                            # Uma única exclusão por id: um lock, uma linha no journal, tudo ou nada
+                            ids = opcoes_venda.ids_for(vendas_selecionadas)
+                            success, message = crud_system.delete_records_by_id("Vendas", ids, opcoes_venda.seen_rows(ids))
                             
-                            if success_count > 0:
-                                st.success(f"✅ {success_count} venda(s) excluída(s) com sucesso!")
-                            if error_count > 0:
-                                st.error(f"❌ {error_count} venda(s) não puderam ser excluída(s).")
+                            if success:
+                                st.success(f"✅ {len(vendas_selecionadas)} venda(s) excluída(s) com sucesso!")
+                            else:
+                                st.error(f"❌ Erro ao excluir em lote: {message}")
                             
                             st.session_state.show_bulk_delete_Vendas = False
                             st.rerun()
@@ -2877,11 +2518,8 @@ try: # --- BLOCO DE CAPTURA DE ERRO GLOBAL ---
         st.subheader("🗑️ Exclusão em Lote - Investimentos")
         with st.container():
             # Carregar dados filtrados de investimentos
-            df_investimentos = pd.read_excel(xls, sheet_name='Investimentos')
-            df_investimentos['DATA'] = pd.to_datetime(df_investimentos['DATA'], errors='coerce')
+            df_investimentos = snapshot.get('Investimentos')
             df_investimentos = df_investimentos.dropna(subset=['DATA'])
-            df_investimentos['Ano'] = df_investimentos['DATA'].dt.year.astype(str)
-            df_investimentos['Mês'] = df_investimentos['DATA'].dt.strftime('%b').str.capitalize().replace({'Feb': 'Fev', 'Apr': 'Abr', 'May': 'Mai', 'Aug': 'Ago', 'Sep': 'Set', 'Oct': 'Out', 'Dec': 'Dez'})
             
             # Aplicar filtros
             investimentos_filtrados = df_investimentos[
@@ -2894,10 +2532,9 @@ try: # --- BLOCO DE CAPTURA DE ERRO GLOBAL ---
             
             if not investimentos_filtrados.empty:
                 # Criar opções para seleção múltipla
-                opcoes_invest = [f"{row['DATA'].strftime('%d/%m/%Y')} - {row['ATIVO']} - R$ {row['VALOR_APORTE']:,.2f}" 
-                                for idx, row in investimentos_filtrados.iterrows()]
+                opcoes_invest = data_manager.get_record_options("Investimentos", investimentos_filtrados)
                 
-                investimentos_selecionados = st.multiselect("Selecionar investimentos para excluir:", opcoes_invest, key="bulk_delete_invest_select")
+                investimentos_selecionados = st.multiselect("Selecionar investimentos para excluir:", opcoes_invest.labels, key="bulk_delete_invest_select")
                 
                 if investimentos_selecionados:
                     st.warning(f"⚠️ Você está prestes a excluir {len(investimentos_selecionados)} investimento(s). Esta ação não pode ser desfeita!")
@@ -2905,23 +2542,14 @@ try: # --- BLOCO DE CAPTURA DE ERRO GLOBAL ---
                     col1, col2 = st.columns(2)
                     with col1:
                         if st.button("🗑️ Confirmar Exclusão em Lote", key="confirm_bulk_delete_invest", type="primary"):
-                            success_count = 0
-                            error_count = 0
+                            # Uma única exclusão por id: um lock, uma linha no journal, tudo ou nada
+                            ids = opcoes_invest.ids_for(investimentos_selecionados)
+                            success, message = crud_system.delete_records_by_id("Investimentos", ids, opcoes_invest.seen_rows(ids))
                             
-                            for invest_selecionado in investimentos_selecionados:
-                                idx_selecionado = opcoes_invest.index(invest_selecionado)
-                                original_idx = investimentos_filtrados.index[idx_selecionado]
-                                success, message = crud_system.delete_record("Investimentos", original_idx)
-                                
-                                if success:
-                                    success_count += 1
-                                else:
-                                    error_count += 1
-                            
-                            if success_count > 0:
-                                st.success(f"✅ {success_count} investimento(s) excluído(s) com sucesso!")
-                            if error_count > 0:
-                                st.error(f"❌ {error_count} investimento(s) não puderam ser excluído(s).")
+                            if success:
+                                st.success(f"✅ {len(investimentos_selecionados)} investimento(s) excluído(s) com sucesso!")
+                            else:
+                                st.error(f"❌ Erro ao excluir em lote: {message}")
                             
                             st.session_state.show_bulk_delete_Investimentos = False
                             st.rerun()
@@ -2938,11 +2566,8 @@ try: # --- BLOCO DE CAPTURA DE ERRO GLOBAL ---
         st.subheader("🗑️ Exclusão em Lote - Compras no Cartão")
         with st.container():
             # Carregar dados filtrados de cartão de crédito
-            df_cc = pd.read_excel(xls, sheet_name='Div_CC', decimal=',')
-            df_cc['Data'] = pd.to_datetime(df_cc['Data'], errors='coerce')
+            df_cc = snapshot.get('Div_CC')
             df_cc.dropna(subset=['Data'], inplace=True)
-            df_cc['Ano'] = df_cc['Data'].dt.year.astype(str)
-            df_cc['Mês'] = df_cc['Data'].dt.strftime('%b').str.capitalize().replace({'Feb': 'Fev', 'Apr': 'Abr', 'May': 'Mai', 'Aug': 'Ago', 'Sep': 'Set', 'Oct': 'Out', 'Dec': 'Dez'})
             
             # Aplicar filtros
             cc_filtrado = df_cc[
@@ -2956,10 +2581,9 @@ try: # --- BLOCO DE CAPTURA DE ERRO GLOBAL ---
             
             if not cc_filtrado.empty:
                 # Criar opções para seleção múltipla
-                opcoes_cc = [f"{row['Data'].strftime('%d/%m/%Y')} - {row['Descrição']} - R$ {row['valor total da compra']:,.2f}" 
-                            for idx, row in cc_filtrado.iterrows()]
+                opcoes_cc = data_manager.get_record_options("Div_CC", cc_filtrado)
                 
-                compras_selecionadas = st.multiselect("Selecionar compras para excluir:", opcoes_cc, key="bulk_delete_cc_select")
+                compras_selecionadas = st.multiselect("Selecionar compras para excluir:", opcoes_cc.labels, key="bulk_delete_cc_select")
                 
                 if compras_selecionadas:
                     st.warning(f"⚠️ Você está prestes a excluir {len(compras_selecionadas)} compra(s). Esta ação não pode ser desfeita!")
@@ -2967,23 +2591,14 @@ try: # --- BLOCO DE CAPTURA DE ERRO GLOBAL ---
                     col1, col2 = st.columns(2)
                     with col1:
                         if st.button("🗑️ Confirmar Exclusão em Lote", key="confirm_bulk_delete_cc", type="primary"):
-                            success_count = 0
-                            error_count = 0
+                            # Uma única exclusão por id: um lock, uma linha no journal, tudo ou nada
+                            ids = opcoes_cc.ids_for(compras_selecionadas)
+                            success, message = crud_system.delete_records_by_id("Div_CC", ids, opcoes_cc.seen_rows(ids))
                             
-                            for compra_selecionada in compras_selecionadas:
-                                idx_selecionado = opcoes_cc.index(compra_selecionada)
-                                original_idx = cc_filtrado.index[idx_selecionado]
-                                success, message = crud_system.delete_record("Div_CC", original_idx)
-                                
-                                if success:
-                                    success_count += 1
-                                else:
-                                    error_count += 1
-                            
-                            if success_count > 0:
-                                st.success(f"✅ {success_count} compra(s) excluída(s) com sucesso!")
-                            if error_count > 0:
-                                st.error(f"❌ {error_count} compra(s) não puderam ser excluída(s).")
+                            if success:
+                                st.success(f"✅ {len(compras_selecionadas)} compra(s) excluída(s) com sucesso!")
+                            else:
+                                st.error(f"❌ Erro ao excluir em lote: {message}")
                             
                             st.session_state.show_bulk_delete_Div_CC = False
                             st.rerun()
@@ -3003,7 +2618,7 @@ try: # --- BLOCO DE CAPTURA DE ERRO GLOBAL ---
                 st.subheader("Preencha os dados do investimento:")
                 
                 # Carregar dados existentes para sugestões
-                df_investimentos_base = pd.read_excel(xls, sheet_name='Investimentos', decimal=',')
+                df_investimentos_base = snapshot.get('Investimentos')
                 tipos_investimento = df_investimentos_base['TIPO'].dropna().unique().tolist()
                 ativos = df_investimentos_base['ATIVO'].dropna().unique().tolist()
                 objetivos = df_investimentos_base['OBJETIVO'].dropna().unique().tolist()
@@ -15,12 +15,15 @@ warnings.filterwarnings('ignore')
 # Importar módulos
 from modules.data_manager import data_manager
 from modules.filters_manager import filters_manager
+from modules.filter_plan import FilterPlan
+from modules.top_n import top_n, top_n_frame
 from modules.charts_manager import charts_manager
 from modules.forms_manager import forms_manager, FormsManager, consultar_despesas
 from utils.formatters import format_currency, format_percentage, safe_divide
 from utils.metrics_manager import render_metric_card
 # KpiManager para calculos de Kpis de Vendas
-from utils.kpi_manager import calculate_sales_kpis, get_top_five, calculate_sales_by_weekday, calculate_new_customers
+from utils.kpi_manager import (calculate_sales_kpis, get_top_five, calculate_sales_by_weekday, calculate_sales_by_hour,
+                               calculate_weekday_month_heatmap, calculate_new_customers)
 
 # Importar sistemas CRUD e Backup
 from crud_system import CRUDSystem, create_editable_table, format_dataframe_for_display
@@ -83,12 +86,11 @@ def main():
     backup_system = BackupSystem(EXCEL_PATH)
     crud_system = CRUDSystem(EXCEL_PATH)
 
-    # Carrega os dados uma vez
-    df_receitas = data_manager.load_excel_data("Receitas")
-    df_despesas = data_manager.load_excel_data("Despesas")
-    df_cartao = data_manager.load_excel_data("Div_CC")
-    df_vendas = data_manager.load_excel_data("Vendas")
-    df_investimentos = data_manager.load_excel_data("Investimentos")
+    # Ids estáveis nas abas transacionais (migração única; edições e exclusões são por id)
+    data_manager.ensure_record_ids()
+
+    # Carrega os dados uma vez (snapshot único por versão da planilha)
+    snapshot = data_manager.get_snapshot()
     
     # Renderiza a sidebar e obtém os filtros
     filters = filters_manager.setup_sidebar_filters()
@@ -107,19 +109,19 @@ def main():
     selected = st.sidebar.selectbox("Navegação", options=menu_options, index=0)
     
     # Carregar dados
-    receitas = data_manager.load_excel_data("Receitas")
-    despesas = data_manager.load_excel_data("Despesas")
-    cc_data = data_manager.load_excel_data("Div_CC")
-    vendas = data_manager.load_excel_data("Vendas")
-    investimentos = data_manager.load_excel_data("Investimentos")
-    orcamento = data_manager.load_excel_data("Orcamento")
+    receitas = snapshot.get("Receitas")
+    despesas = snapshot.get("Despesas")
+    cc_data = snapshot.get("Div_CC")
+    vendas = snapshot.get("Vendas")
+    investimentos = snapshot.get("Investimentos")
+    orcamento = snapshot.get("Orcamento")
     
-    # Aplicar filtros
-    receitas_filtradas = filters_manager.apply_filters_to_data(receitas, filters)
-    despesas_filtradas = filters_manager.apply_filters_to_data(despesas, filters)
-    cc_filtrado = filters_manager.apply_filters_to_data(cc_data, filters)
-    vendas_filtradas = filters_manager.apply_filters_to_data(vendas, filters)
-    investimentos_filtrados = filters_manager.apply_filters_to_data(investimentos, filters)
+    # Aplicar filtros (resultados em cache por versão da aba e filtros da sidebar)
+    receitas_filtradas = filters_manager.filter_sheet(snapshot, "Receitas", filters)
+    despesas_filtradas = filters_manager.filter_sheet(snapshot, "Despesas", filters)
+    cc_filtrado = filters_manager.filter_sheet(snapshot, "Div_CC", filters)
+    vendas_filtradas = filters_manager.filter_sheet(snapshot, "Vendas", filters)
+    investimentos_filtrados = filters_manager.filter_sheet(snapshot, "Investimentos", filters)
     
     st.sidebar.markdown("---")
     
@@ -162,11 +164,20 @@ def main():
                 else:
                     st.sidebar.error(f"Erro: {message}")
     
+    # Estatísticas do cache de abas
+    cache_stats = data_manager.get_cache_stats()
+    st.sidebar.caption(
+        f"Cache: {cache_stats['hits']} acertos / {cache_stats['misses']} falhas "
+        f"({cache_stats['hit_rate']:.0%})"
+    )
+    
     st.sidebar.markdown("---")
     
     # Navegação
     if selected == "📊 Visão Geral":
-        show_overview(receitas_filtradas, despesas_filtradas, vendas_filtradas, vendas)
+        show_overview(receitas_filtradas, despesas_filtradas, vendas_filtradas, vendas,
+                      snapshot.first_purchases("Vendas"),
+                      (snapshot.version("Vendas"), filters_manager.normalize_filters(filters)))
     elif selected == "💸 Despesas":
         show_expenses(despesas_filtradas, crud_system, forms_manager)
     elif selected == "💰 Receitas":
@@ -180,9 +191,9 @@ def main():
     elif selected == "📋 Orçamento":
         show_budget(receitas_filtradas, despesas_filtradas, orcamento, filters)
     elif selected == "📈 Análises":
-        show_analytics(receitas_filtradas, despesas_filtradas)
+        show_analytics(receitas_filtradas, despesas_filtradas, filters, snapshot.monthly_cube("Despesas"))
 
-def show_overview(receitas, despesas, vendas, all_vendas):
+def show_overview(receitas, despesas, vendas, all_vendas, first_purchases=None, sales_key=None):
     st.markdown("## 📊 Visão Geral")
     
     st.markdown("#### **Resumo Financeiro**")
@@ -219,7 +230,7 @@ def show_overview(receitas, despesas, vendas, all_vendas):
     
     # KPIs de Vendas
     sales_kpis = calculate_sales_kpis(vendas)
-    new_customers = calculate_new_customers(all_vendas, vendas)
+    new_customers = calculate_new_customers(all_vendas, vendas, first_purchases)
     
     col_vendas1, col_vendas2, col_vendas3, col_vendas4 = st.columns(4)
     with col_vendas1:
@@ -318,7 +329,7 @@ def show_overview(receitas, despesas, vendas, all_vendas):
             st.info("Dados de forma de pagamento não encontrados.")
 
     with col_dias:
-        vendas_por_dia = calculate_sales_by_weekday(vendas)
+        vendas_por_dia = calculate_sales_by_weekday(vendas, cache_key=sales_key)
         valor_col = get_col(vendas, 'VALOR')
 
         if not vendas_por_dia.empty:
@@ -332,6 +343,37 @@ def show_overview(receitas, despesas, vendas, all_vendas):
         else:
             st.info("Sem dados de vendas para analisar por dia da semana.")
 
+    # Dia da semana × mês em um único agrupamento (memorizado por versão e filtros)
+    heatmap_vendas = calculate_weekday_month_heatmap(vendas, cache_key=sales_key)
+    if not heatmap_vendas.empty:
+        st.plotly_chart(
+            charts_manager.create_heatmap(heatmap_vendas, title="Vendas por Dia da Semana e Mês"),
+            use_container_width=True
+        )
+
+    # Vendas por hora só fazem sentido quando a planilha registra horários
+    vendas_por_hora = calculate_sales_by_hour(vendas, cache_key=sales_key)
+    if len(vendas_por_hora) > 1:
+        fig_horas = charts_manager.create_bar_chart(
+            vendas_por_hora,
+            x_col='Hora',
+            y_col=get_col(vendas, 'VALOR', 'Valor'),
+            title="Vendas por Hora do Dia"
+        )
+        st.plotly_chart(fig_horas, use_container_width=True)
+
+    # Novos clientes em todos os meses, direto do índice de primeira compra
+    if first_purchases is not None and len(first_purchases):
+        novos_por_mes = first_purchases.monthly_counts().reset_index()
+        novos_por_mes["Mes"] = novos_por_mes["PERÍODO"].astype(str)
+        fig_novos = charts_manager.create_line_chart(
+            novos_por_mes,
+            x_col="Mes",
+            y_col="Novos Clientes",
+            title="Novos Clientes por Mês"
+        )
+        st.plotly_chart(fig_novos, use_container_width=True)
+
 def show_expenses(despesas_filtradas, crud_system, forms_manager):
     st.markdown("## 💸 Despesas Detalhadas")
     
@@ -414,7 +456,7 @@ def show_expenses(despesas_filtradas, crud_system, forms_manager):
                 df_cat = despesas_filtradas.dropna(subset=['CATEGORIA'])
                 df_cat = df_cat[df_cat['CATEGORIA'].str.strip() != '']
                 if not df_cat.empty:
-                    top_categorias = df_cat.groupby('CATEGORIA')["VALOR"].sum().abs().sort_values(ascending=False).head(5).reset_index()
+                    top_categorias = top_n_frame(df_cat.groupby('CATEGORIA')["VALOR"].sum(), 5, absolute=True)
                     fig_categorias = charts_manager.create_pie_chart(
                         top_categorias, "VALOR", 'CATEGORIA', "Top 5 Categorias", hole=0.5, showlegend=True
                     )
@@ -425,7 +467,7 @@ def show_expenses(despesas_filtradas, crud_system, forms_manager):
                 df_desc = despesas_filtradas.dropna(subset=['DESCRIÇÃO'])
                 df_desc = df_desc[df_desc['DESCRIÇÃO'].str.strip() != '']
                 if not df_desc.empty:
-                    top_descricoes = df_desc.groupby('DESCRIÇÃO')["VALOR"].sum().abs().sort_values(ascending=False).head(5).reset_index()
+                    top_descricoes = top_n_frame(df_desc.groupby('DESCRIÇÃO')["VALOR"].sum(), 5, absolute=True)
                     fig_descricoes = charts_manager.create_pie_chart(
                         top_descricoes, "VALOR", 'DESCRIÇÃO', "Top 5 Descrições", hole=0.5, showlegend=True
                     )
@@ -436,7 +478,7 @@ def show_expenses(despesas_filtradas, crud_system, forms_manager):
                 df_fav = despesas_filtradas.dropna(subset=['FAVORECIDO'])
                 df_fav = df_fav[df_fav['FAVORECIDO'].str.strip() != '']
                 if not df_fav.empty:
-                    top_favorecidos = df_fav.groupby('FAVORECIDO')["VALOR"].sum().abs().sort_values(ascending=False).head(5).reset_index()
+                    top_favorecidos = top_n_frame(df_fav.groupby('FAVORECIDO')["VALOR"].sum(), 5, absolute=True)
                     fig_favorecidos = charts_manager.create_pie_chart(
                         top_favorecidos, "VALOR", 'FAVORECIDO', "Top 5 Favorecidos", hole=0.5, showlegend=True
                     )
@@ -459,7 +501,7 @@ def show_expenses(despesas_filtradas, crud_system, forms_manager):
                     chart_title = "Evolução Diária das Despesas"
                 else:
                     # Agrupamento mensal para períodos longos
-                    despesas_copy["Mes"] = despesas_copy["DATA"].dt.strftime("%Y-%m")
+                    despesas_copy["Mes"] = despesas_copy["PERÍODO"].astype(str)
                     despesas_temporais = despesas_copy.groupby("Mes")["VALOR"].sum().sort_index().reset_index()
                     x_axis_col = "Mes"
                     chart_title = "Evolução Mensal das Despesas"
@@ -638,7 +680,7 @@ def show_revenues(receitas, filters, crud_system, forms_manager):
                 df_cat = df_cat[df_cat['CATEGORIA'].str.strip() != '']
                 
                 if not df_cat.empty:
-                    top_categorias = df_cat.groupby('CATEGORIA')["VALOR"].sum().sort_values(ascending=False).head(5).reset_index()
+                    top_categorias = top_n_frame(df_cat.groupby('CATEGORIA')["VALOR"].sum(), 5)
                     fig_categorias = charts_manager.create_pie_chart(
                         top_categorias, "VALOR", 'CATEGORIA', "Top 5 Categorias", hole=0.5, showlegend=True
                     )
@@ -652,7 +694,7 @@ def show_revenues(receitas, filters, crud_system, forms_manager):
                 df_desc = df_desc[df_desc['DESCRIÇÃO'].str.strip() != '']
                 
                 if not df_desc.empty:
-                    top_descricoes = df_desc.groupby('DESCRIÇÃO')["VALOR"].sum().sort_values(ascending=False).head(5).reset_index()
+                    top_descricoes = top_n_frame(df_desc.groupby('DESCRIÇÃO')["VALOR"].sum(), 5)
                     fig_descricoes = charts_manager.create_pie_chart(
                         top_descricoes, "VALOR", 'DESCRIÇÃO', "Top 5 Descrições", hole=0.5, showlegend=True
                     )
@@ -666,7 +708,7 @@ def show_revenues(receitas, filters, crud_system, forms_manager):
                 df_rec = df_rec[df_rec['FORMA_RECEBIMENTO'].str.strip() != '']
                 
                 if not df_rec.empty:
-                    top_recebimentos = df_rec.groupby('FORMA_RECEBIMENTO')["VALOR"].sum().sort_values(ascending=False).head(5).reset_index()
+                    top_recebimentos = top_n_frame(df_rec.groupby('FORMA_RECEBIMENTO')["VALOR"].sum(), 5)
                     fig_recebimentos = charts_manager.create_pie_chart(
                         top_recebimentos, "VALOR", 'FORMA_RECEBIMENTO', "Top 5 Formas de Recebimento", hole=0.5, showlegend=True
                     )
@@ -689,7 +731,7 @@ def show_revenues(receitas, filters, crud_system, forms_manager):
                     chart_title = "Evolução Diária das Receitas"
                 else:
                     # Agrupamento mensal para períodos longos
-                    receitas_copy["Mes"] = receitas_copy["DATA"].dt.strftime("%Y-%m")
+                    receitas_copy["Mes"] = receitas_copy["PERÍODO"].astype(str)
                     receitas_temporais = receitas_copy.groupby("Mes")["VALOR"].sum().sort_index().reset_index()
                     x_axis_col = "Mes"
                     chart_title = "Evolução Mensal das Receitas"
@@ -805,7 +847,7 @@ def show_credit_card(cc_data, filters, crud_system, forms_manager):
                 df_cat = df_cat[df_cat['CATEGORIA'].str.strip() != '']
                 
                 if not df_cat.empty:
-                    top_categorias = df_cat.groupby('CATEGORIA')["VALOR"].sum().sort_values(ascending=False).head(5).reset_index()
+                    top_categorias = top_n_frame(df_cat.groupby('CATEGORIA')["VALOR"].sum(), 5)
                     fig_categorias = charts_manager.create_pie_chart(
                         top_categorias, "VALOR", 'CATEGORIA', "Top 5 Categorias", hole=0.5, showlegend=True
                     )
@@ -819,7 +861,7 @@ def show_credit_card(cc_data, filters, crud_system, forms_manager):
                 df_desc = df_desc[df_desc['DESCRIÇÃO'].str.strip() != '']
                 
                 if not df_desc.empty:
-                    top_descricoes = df_desc.groupby('DESCRIÇÃO')["VALOR"].sum().sort_values(ascending=False).head(5).reset_index()
+                    top_descricoes = top_n_frame(df_desc.groupby('DESCRIÇÃO')["VALOR"].sum(), 5)
                     fig_descricoes = charts_manager.create_pie_chart(
                         top_descricoes, "VALOR", 'DESCRIÇÃO', "Top 5 Descrições", hole=0.5, showlegend=True
                     )
@@ -833,7 +875,7 @@ def show_credit_card(cc_data, filters, crud_system, forms_manager):
                 df_cartao = df_cartao[df_cartao['CARTAO'].str.strip() != '']
                 
                 if not df_cartao.empty:
-                    top_cartoes = df_cartao.groupby('CARTAO')["VALOR"].sum().sort_values(ascending=False).head(5).reset_index()
+                    top_cartoes = top_n_frame(df_cartao.groupby('CARTAO')["VALOR"].sum(), 5)
                     fig_cartoes = charts_manager.create_pie_chart(
                         top_cartoes, "VALOR", 'CARTAO', "Top 5 Cartões", hole=0.5, showlegend=True
                     )
@@ -856,7 +898,7 @@ def show_credit_card(cc_data, filters, crud_system, forms_manager):
                     chart_title = "Evolução Diária do Cartão"
                 else:
                     # Agrupamento mensal para períodos longos
-                    cc_copy["Mes"] = cc_copy["DATA"].dt.strftime("%Y-%m")
+                    cc_copy["Mes"] = cc_copy["PERÍODO"].astype(str)
                     cc_temporais = cc_copy.groupby("Mes")["VALOR"].sum().sort_index().reset_index()
                     x_axis_col = "Mes"
                     chart_title = "Evolução Mensal do Cartão"
@@ -1007,7 +1049,7 @@ def show_investments(investimentos, filters, crud_system, forms_manager):
                 df_ativo = df_ativo[df_ativo['ATIVO'].str.strip() != '']
                 
                 if not df_ativo.empty:
-                    top_ativos = df_ativo.groupby('ATIVO')["VALOR_APORTE"].sum().sort_values(ascending=False).head(5).reset_index()
+                    top_ativos = top_n_frame(df_ativo.groupby('ATIVO')["VALOR_APORTE"].sum(), 5)
                     fig_ativos = charts_manager.create_pie_chart(
                         top_ativos, "VALOR_APORTE", 'ATIVO', "Top 5 Ativos", hole=0.5, showlegend=True
                     )
@@ -1021,7 +1063,7 @@ def show_investments(investimentos, filters, crud_system, forms_manager):
                 df_tipo = df_tipo[df_tipo['TIPO_INVESTIMENTO'].str.strip() != '']
                 
                 if not df_tipo.empty:
-                    top_tipos = df_tipo.groupby('TIPO_INVESTIMENTO')["VALOR_APORTE"].sum().sort_values(ascending=False).head(5).reset_index()
+                    top_tipos = top_n_frame(df_tipo.groupby('TIPO_INVESTIMENTO')["VALOR_APORTE"].sum(), 5)
                     fig_tipos = charts_manager.create_pie_chart(
                         top_tipos, "VALOR_APORTE", 'TIPO_INVESTIMENTO', "Top 5 Tipos", hole=0.5, showlegend=True
                     )
@@ -1035,7 +1077,7 @@ def show_investments(investimentos, filters, crud_system, forms_manager):
                 df_obs = df_obs[df_obs['OBSERVACOES'].str.strip() != '']
                 
                 if not df_obs.empty and len(df_obs['OBSERVACOES'].unique()) > 1:
-                    top_obs = df_obs.groupby('OBSERVACOES')["VALOR_APORTE"].sum().sort_values(ascending=False).head(5).reset_index()
+                    top_obs = top_n_frame(df_obs.groupby('OBSERVACOES')["VALOR_APORTE"].sum(), 5)
                     fig_obs = charts_manager.create_pie_chart(
                         top_obs, "VALOR_APORTE", 'OBSERVACOES', "Top 5 Observações", hole=0.5, showlegend=True
                     )
@@ -1058,7 +1100,7 @@ def show_investments(investimentos, filters, crud_system, forms_manager):
                     chart_title = "Evolução Diária dos Investimentos"
                 else:
                     # Agrupamento mensal para períodos longos
-                    inv_copy["Mes"] = inv_copy["DATA"].dt.strftime("%Y-%m")
+                    inv_copy["Mes"] = inv_copy["PERÍODO"].astype(str)
                     inv_temporais = inv_copy.groupby("Mes")["VALOR_APORTE"].sum().sort_index().reset_index()
                     x_axis_col = "Mes"
                     chart_title = "Evolução Mensal dos Investimentos"
@@ -1323,7 +1365,7 @@ def show_sales(vendas, filters, crud_system, forms_manager):
                 df_cliente = df_cliente[df_cliente['Cliente'].str.strip() != '']
                 
                 if not df_cliente.empty:
-                    top_clientes = df_cliente.groupby('Cliente')["VALOR"].sum().sort_values(ascending=False).head(5).reset_index()
+                    top_clientes = top_n_frame(df_cliente.groupby('Cliente')["VALOR"].sum(), 5)
                     fig_clientes = charts_manager.create_pie_chart(
                         top_clientes, "VALOR", 'Cliente', "Top 5 Clientes", hole=0.5, showlegend=True
                     )
@@ -1337,7 +1379,7 @@ def show_sales(vendas, filters, crud_system, forms_manager):
                 df_produto = df_produto[df_produto['Produto'].str.strip() != '']
                 
                 if not df_produto.empty:
-                    top_produtos = df_produto.groupby('Produto')["VALOR"].sum().sort_values(ascending=False).head(5).reset_index()
+                    top_produtos = top_n_frame(df_produto.groupby('Produto')["VALOR"].sum(), 5)
                     fig_produtos = charts_manager.create_pie_chart(
                         top_produtos, "VALOR", 'Produto', "Top 5 Produtos", hole=0.5, showlegend=True
                     )
@@ -1351,7 +1393,7 @@ def show_sales(vendas, filters, crud_system, forms_manager):
                 df_pagamento = df_pagamento[df_pagamento['Forma_Pagamento'].str.strip() != '']
                 
                 if not df_pagamento.empty:
-                    top_pagamentos = df_pagamento.groupby('Forma_Pagamento')["VALOR"].sum().sort_values(ascending=False).head(5).reset_index()
+                    top_pagamentos = top_n_frame(df_pagamento.groupby('Forma_Pagamento')["VALOR"].sum(), 5)
                     fig_pagamentos = charts_manager.create_pie_chart(
                         top_pagamentos, "VALOR", 'Forma_Pagamento', "Top 5 Formas de Pagamento", hole=0.5, showlegend=True
                     )
@@ -1374,7 +1416,7 @@ def show_sales(vendas, filters, crud_system, forms_manager):
                     chart_title = "Evolução Diária das Vendas"
                 else:
                     # Agrupamento mensal para períodos longos
-                    vendas_copy["Mes"] = vendas_copy["DATA"].dt.strftime("%Y-%m")
+                    vendas_copy["Mes"] = vendas_copy["PERÍODO"].astype(str)
                     vendas_temporais = vendas_copy.groupby("Mes")["VALOR"].sum().sort_index().reset_index()
                     x_axis_col = "Mes"
                     chart_title = "Evolução Mensal das Vendas"
@@ -1412,7 +1454,7 @@ def show_sales(vendas, filters, crud_system, forms_manager):
     if st.session_state.get("show_bulk_delete_Vendas", False):
         forms_manager.render_bulk_delete_sale_form(vendas, crud_system)
 
-def show_analytics(receitas, despesas, filters):
+def show_analytics(receitas, despesas, filters, cubo_despesas=None):
     st.markdown("## 📈 Análises Avançadas")
     
     # Métricas principais
@@ -1448,11 +1490,20 @@ def show_analytics(receitas, despesas, filters):
             icon="📊"
         )
     
+    # Sem recorte de datas, as somas por mês e por categoria vêm prontas do cubo mensal
+    plano_cubo = None
+    if cubo_despesas is not None and filters.get("periodo") == "Todos":
+        plano_cubo = FilterPlan(categoria=filters.get("categoria", "Todas"), categoria_sheets=frozenset(["Despesas"]))
+    
     st.markdown("### 📅 Análise Temporal")
     if not despesas.empty and "VALOR" in despesas.columns and "DATA" in despesas.columns:
-        despesas_copy = despesas.copy()
-        despesas_copy["Mes"] = pd.to_datetime(despesas_copy["DATA"], errors='coerce').dt.strftime("%Y-%m")
-        despesas_mensais = despesas_copy.groupby("Mes")["VALOR"].sum().reset_index()
+        if plano_cubo is not None:
+            mensal = cubo_despesas.by_period(plano_cubo)
+            despesas_mensais = pd.DataFrame({"Mes": mensal.index.astype(str), "VALOR": mensal.to_numpy()})
+        else:
+            despesas_copy = despesas.copy()
+            despesas_copy["Mes"] = despesas_copy["PERÍODO"].astype(str)
+            despesas_mensais = despesas_copy.dropna(subset=["PERÍODO"]).groupby("Mes")["VALOR"].sum().reset_index()
         fig_temporal = charts_manager.create_line_chart(
             despesas_mensais, "Mes", "VALOR", "Evolução das Despesas por Mês"
         )
@@ -1460,7 +1511,10 @@ def show_analytics(receitas, despesas, filters):
     
     st.markdown("### 📂 Análise de Categorias")
     if not despesas.empty and "VALOR" in despesas.columns:
-        top_categorias = despesas.groupby("CATEGORIA")["VALOR"].sum().sort_values(ascending=False).head(10)
+        if plano_cubo is not None:
+            top_categorias = top_n(cubo_despesas.by("CATEGORIA", plano_cubo), 10)
+        else:
+            top_categorias = top_n(despesas.groupby("CATEGORIA")["VALOR"].sum(), 10)
         fig_top = charts_manager.create_bar_chart(
             top_categorias.reset_index(), "CATEGORIA", "VALOR", "Top 10 Categorias de Despesas", orientation="h"
         )
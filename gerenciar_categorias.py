@@ -2,6 +2,8 @@ import pandas as pd
 import openpyxl
 from openpyxl import load_workbook
 
+from modules.file_lock import get_workbook_lock
+
 def adicionar_item_categoria(categoria, novo_item):
     """
     Adiciona um novo item a uma categoria específica na planilha
@@ -11,34 +13,36 @@ def adicionar_item_categoria(categoria, novo_item):
         novo_item (str): Novo item a ser adicionado
     """
     try:
-        # Carregar a planilha
-        wb = load_workbook('Base_financas.xlsx')
+        # Lock da planilha: evita sobrescrever gravações de outras sessões
+        with get_workbook_lock('Base_financas.xlsx'):
+            # Carregar a planilha
+            wb = load_workbook('Base_financas.xlsx')
         
-        # Acessar a aba 'Despesas Categoria'
-        ws = wb['Despesas Categoria']
+            # Acessar a aba 'Despesas Categoria'
+            ws = wb['Despesas Categoria']
         
-        # Encontrar a coluna da categoria
-        categoria_col = None
-        for col in range(1, ws.max_column + 1):
-            if ws.cell(row=1, column=col).value == categoria:
-                categoria_col = col
-                break
+            # Encontrar a coluna da categoria
+            categoria_col = None
+            for col in range(1, ws.max_column + 1):
+                if ws.cell(row=1, column=col).value == categoria:
+                    categoria_col = col
+                    break
         
-        if categoria_col is None:
-            print(f"❌ Categoria '{categoria}' não encontrada!")
-            return False
+            if categoria_col is None:
+                print(f"❌ Categoria '{categoria}' não encontrada!")
+                return False
         
-        # Encontrar a primeira célula vazia na coluna
-        row = 2  # Começar da linha 2 (após o cabeçalho)
-        while ws.cell(row=row, column=categoria_col).value is not None:
-            row += 1
+            # Encontrar a primeira célula vazia na coluna
+            row = 2  # Começar da linha 2 (após o cabeçalho)
+            while ws.cell(row=row, column=categoria_col).value is not None:
+                row += 1
         
-        # Adicionar o novo item
-        ws.cell(row=row, column=categoria_col, value=novo_item)
+            # Adicionar o novo item
+            ws.cell(row=row, column=categoria_col, value=novo_item)
         
-        # Salvar a planilha
-        wb.save('Base_financas.xlsx')
-        wb.close()
+            # Salvar a planilha
+            wb.save('Base_financas.xlsx')
+            wb.close()
         
         print(f"✅ Item '{novo_item}' adicionado à categoria '{categoria}' com sucesso!")
         return True
@@ -0,0 +1,116 @@
+"""
+Classificação ABC das despesas por descrição
+
+A partir dos totais por descrição (consulta ao cubo mensal), calcula em uma
+única passada NumPy a participação, o acumulado, o ranking, a classe (A até
+80% do acumulado, B até 90%, C no restante) e a variação contra o período de
+comparação. O resultado tem colunas numéricas, formatadas e coloridas só na
+página exibida (style_abc_page), em vez de montar HTML linha a linha.
+"""
+
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from utils.formatters import format_currency
+
+ABC_LIMITS = (80.0, 90.0)
+
+# Cores da tabela ABC (tema escuro)
+ABC_COLORS = {"A": "#ff6961", "B": "#fdfd96", "C": "#8390a2"}
+MOM_COLORS = {"up": "#77dd77", "down": "#ff6961"}
+ABC_ICONS = {"A": "A ▼", "B": "B ●", "C": "C ▼"}
+
+ABC_COLUMNS = ["Descrição", "Ranking", "Despesas(R$)", "%Despesas", "Despesa Acumulada", "%Acum",
+               "Classe", "Período Anterior", "MoM", "MoM%"]
+
+
+def classify_abc(atual: pd.Series, anterior: Optional[pd.Series] = None) -> pd.DataFrame:
+    """
+    Monta a tabela ABC
+
+    Args:
+        atual: Total (positivo) por descrição no período selecionado
+        anterior: Total (positivo) por descrição no período de comparação
+
+    Returns:
+        DataFrame com as colunas de ABC_COLUMNS (numéricas, exceto Descrição e
+        Classe), em ordem decrescente de despesa
+    """
+    atual = atual.dropna()
+    values = atual.to_numpy(dtype=float)
+    order = np.argsort(-values, kind="stable")
+    values = values[order]
+    labels = atual.index.to_numpy()[order]
+
+    total = values.sum()
+    share = values / total * 100 if total else np.zeros_like(values)
+    cumulative = np.cumsum(values)
+    cumulative_share = cumulative / total * 100 if total else np.zeros_like(values)
+    # Ranking 'min': empates recebem a posição do primeiro valor igual
+    ranking = np.searchsorted(-values, -values, side="left") + 1
+    classes = np.select([cumulative_share <= ABC_LIMITS[0], cumulative_share <= ABC_LIMITS[1]], ["A", "B"], "C")
+
+    if anterior is None:
+        previous = np.zeros_like(values)
+    else:
+        previous = anterior.reindex(labels).fillna(0).to_numpy(dtype=float)
+    mom = values - previous
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mom_pct = np.where(previous > 0, mom / previous * 100, 0.0)
+
+    return pd.DataFrame({
+        "Descrição": labels,
+        "Ranking": ranking,
+        "Despesas(R$)": values,
+        "%Despesas": share,
+        "Despesa Acumulada": cumulative,
+        "%Acum": cumulative_share,
+        "Classe": classes,
+        "Período Anterior": previous,
+        "MoM": mom,
+        "MoM%": mom_pct,
+    })
+
+
+def _format_mom_pct(value: float) -> str:
+    arrow = "▲" if value > 0 else "▼" if value < 0 else "—"
+    return f"{value:.1f}% {arrow}"
+
+
+def style_abc_page(page: pd.DataFrame):
+    """
+    Formatação e cores de uma página da tabela ABC
+
+    Valores em reais e percentuais, descrição e classe coloridas pela classe,
+    MoM% com seta e cor pelo sinal. Os valores continuam numéricos (a ordenação
+    da tabela não depende do texto), e a formatação é feita só para a página.
+
+    Args:
+        page: Fatia de classify_abc a exibir
+
+    Returns:
+        pandas Styler da página
+    """
+    class_css = {classe: f"color: {color}; font-weight: bold" for classe, color in ABC_COLORS.items()}
+
+    def colors(df: pd.DataFrame) -> pd.DataFrame:
+        css = pd.DataFrame("", index=df.index, columns=df.columns)
+        css["Classe"] = df["Classe"].map(class_css)
+        css["Descrição"] = css["Classe"].where(df["Classe"] != "C", "")
+        css["MoM%"] = np.select([df["MoM%"] > 0, df["MoM%"] < 0],
+                                [f"color: {MOM_COLORS['up']}", f"color: {MOM_COLORS['down']}"], "")
+        return css
+
+    percent = "{:.1f}%".format
+    return page.style.apply(colors, axis=None).format({
+        "Despesas(R$)": format_currency,
+        "Despesa Acumulada": format_currency,
+        "Período Anterior": format_currency,
+        "MoM": format_currency,
+        "%Despesas": percent,
+        "%Acum": percent,
+        "MoM%": _format_mom_pct,
+        "Classe": ABC_ICONS.get,
+    })
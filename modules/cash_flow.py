@@ -0,0 +1,80 @@
+"""
+Fluxo de caixa: entradas, saídas e saldo acumulado por dia, semana ou mês
+
+As receitas e despesas filtradas são reduzidas às colunas DATA e VALOR e
+reamostradas para o fluxo líquido de cada período; o saldo acumulado é uma
+soma cumulativa sobre esses períodos. Para o gráfico, downsample_minmax limita
+o número de pontos preservando o mínimo e o máximo de cada faixa, de modo que
+históricos de vários anos não geram um gráfico com um ponto por transação.
+"""
+
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+# Agrupamentos oferecidos na página (rótulo -> regra do resample)
+CASH_FLOW_FREQUENCIES = {"Diário": "D", "Semanal": "W", "Mensal": "ME"}
+
+
+def _amounts(df: Optional[pd.DataFrame]) -> pd.Series:
+    """Valores indexados pela data (linhas sem data ou valor descartadas)"""
+    if df is None or df.empty or "DATA" not in df.columns or "VALOR" not in df.columns:
+        return pd.Series(dtype=float, index=pd.DatetimeIndex([], name="DATA"))
+    values = pd.Series(pd.to_numeric(df["VALOR"], errors="coerce").to_numpy(),
+                       index=pd.DatetimeIndex(df["DATA"], name="DATA"))
+    return values[values.index.notna() & values.notna()]
+
+
+def net_flow(receitas: pd.DataFrame, despesas: pd.DataFrame, freq: str = "D") -> pd.DataFrame:
+    """
+    Fluxo líquido e saldo acumulado por período
+
+    Args:
+        receitas: Receitas filtradas (VALOR positivo)
+        despesas: Despesas filtradas (VALOR negativo)
+        freq: Regra do resample ('D', 'W' ou 'ME'; ver CASH_FLOW_FREQUENCIES)
+
+    Returns:
+        DataFrame indexado pela data do período, com Receitas, Despesas, Fluxo
+        e Saldo Acumulado (períodos sem lançamentos entram com fluxo zero)
+    """
+    entradas, saidas = _amounts(receitas), _amounts(despesas)
+    if entradas.empty and saidas.empty:
+        return pd.DataFrame(columns=["Receitas", "Despesas", "Fluxo", "Saldo Acumulado"],
+                            index=pd.DatetimeIndex([], name="DATA"))
+
+    # Lançamentos empilhados (vários no mesmo dia) e somados por período
+    flow = pd.concat([entradas.to_frame("Receitas"), saidas.to_frame("Despesas")]).fillna(0.0)
+    flow = flow.resample(freq).sum()
+    flow["Fluxo"] = flow["Receitas"] + flow["Despesas"]
+    flow["Saldo Acumulado"] = flow["Fluxo"].cumsum()
+    return flow
+
+
+def downsample_minmax(values: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Posições dos pontos a plotar, preservando mínimo e máximo de cada faixa
+
+    A série é dividida em (max_points - 2) // 2 faixas consecutivas; de cada
+    uma ficam o ponto mínimo e o máximo, além do primeiro e do último ponto da
+    série.
+
+    Args:
+        values: Valores da série (ex.: saldo acumulado)
+        max_points: Limite de pontos
+
+    Returns:
+        Array ordenado com as posições escolhidas (todas, se já couberem)
+    """
+    n = len(values)
+    if n <= max_points or max_points < 4:
+        return np.arange(n)
+    buckets = (max_points - 2) // 2
+    bucket = np.arange(n) * buckets // n
+    # Dentro de cada faixa, ordena pelo valor: o primeiro é o mínimo e o último o máximo
+    order = np.lexsort((values, bucket))
+    starts = np.searchsorted(bucket[order], np.arange(buckets), side="left")
+    ends = np.append(starts[1:], n) - 1
+    chosen = np.concatenate([order[starts], order[ends], [0, n - 1]])
+    return np.unique(chosen)
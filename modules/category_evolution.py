@@ -0,0 +1,60 @@
+"""
+Evolução mensal das subcategorias de uma categoria de despesa
+
+Os lançamentos da categoria são agregados uma única vez em uma tabela mês ×
+subcategoria (groupby + unstack), com todos os meses entre o primeiro e o
+último lançamento (PeriodIndex completo, meses vazios com zero). As curvas do
+gráfico, os rótulos do eixo e a linha de média saem dessa mesma tabela, em vez
+de filtrar e reindexar os lançamentos uma vez por subcategoria.
+"""
+
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+import pandas as pd
+
+from modules.date_dimensions import month_name
+
+
+@dataclass(frozen=True)
+class SubcategoryEvolution:
+    """Tabela mês × subcategoria, rótulos 'Jan/2024' das linhas e média mensal"""
+
+    valores: pd.DataFrame
+    rotulos: List[str]
+    media: float
+
+
+def period_labels(periods: pd.PeriodIndex) -> List[str]:
+    """Rótulos 'Jan/2024' (mesmo formato de MÊS_ANO) para períodos mensais"""
+    return [f"{month_name(month)}/{year}" for year, month in zip(periods.year, periods.month)]
+
+
+def subcategory_evolution(df: pd.DataFrame, subcategories: Optional[Sequence[str]] = None,
+                          column: str = "DESCRIÇÃO") -> SubcategoryEvolution:
+    """
+    Totais mensais (absolutos) por subcategoria
+
+    Args:
+        df: Despesas da categoria, com PERÍODO e VALOR (ver date_dimensions)
+        subcategories: Subcategorias (colunas) na ordem do gráfico; por padrão,
+            as presentes em df, em ordem alfabética
+        column: Coluna da subcategoria
+
+    Returns:
+        SubcategoryEvolution; a média é a do total mensal somado sobre os meses
+        com lançamentos
+    """
+    grouped = (df.dropna(subset=["PERÍODO", column])
+               .groupby(["PERÍODO", column], observed=True)["VALOR"].sum().abs()
+               .unstack(column, fill_value=0.0))
+    if subcategories is None:
+        subcategories = sorted(grouped.columns)
+    if grouped.empty:
+        empty = pd.DataFrame(0.0, index=pd.PeriodIndex([], freq="M", name="PERÍODO"), columns=list(subcategories))
+        return SubcategoryEvolution(empty, [], 0.0)
+
+    media = float(grouped.sum(axis=1).mean())
+    periods = pd.period_range(grouped.index.min(), grouped.index.max(), freq="M", name="PERÍODO")
+    valores = grouped.reindex(index=periods, columns=list(subcategories), fill_value=0.0)
+    return SubcategoryEvolution(valores, period_labels(periods), media)
@@ -0,0 +1,126 @@
+"""
+Redução de pontos dos gráficos do ChartsManager
+
+Séries longas são reduzidas antes de virar figura, para que o tamanho do JSON
+enviado ao navegador e o tempo de montagem da figura não cresçam com o
+histórico:
+
+- linhas: Largest-Triangle-Three-Buckets (LTTB), que mantém o primeiro e o
+  último ponto e, em cada faixa, o ponto que forma o maior triângulo com o
+  escolhido na faixa anterior e a média da faixa seguinte (preserva picos e
+  vales, ao contrário de uma amostragem a cada k pontos);
+- barras e pizzas: os maiores grupos (top_n) e um grupo "Outros" com a soma
+  do restante.
+"""
+
+from typing import Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from modules.top_n import top_n
+
+OUTROS = "Outros"
+
+
+def _axis_values(x: pd.Series) -> np.ndarray:
+    """Eixo x numérico para o LTTB (datas em ns; categorias pela posição)"""
+    if pd.api.types.is_datetime64_any_dtype(x):
+        values = x.to_numpy(dtype="datetime64[ns]").astype(np.int64).astype(float)
+    elif pd.api.types.is_numeric_dtype(x):
+        values = x.to_numpy(dtype=float, na_value=np.nan)
+    else:
+        return np.arange(len(x), dtype=float)
+    # Eixo fora de ordem ou com nulos: as posições representam melhor a linha desenhada
+    if np.isnan(values).any() or (np.diff(values) < 0).any():
+        return np.arange(len(x), dtype=float)
+    return values
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Posições escolhidas pelo Largest-Triangle-Three-Buckets
+
+    Args:
+        x: Eixo x numérico, em ordem
+        y: Valores (sem nulos)
+        n_out: Número de pontos desejado
+
+    Returns:
+        Array ordenado com n_out posições (todas, se já couberem)
+    """
+    n = len(y)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+
+    # Faixas internas (o primeiro e o último ponto ficam fora delas)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    chosen = np.empty(n_out, dtype=np.int64)
+    chosen[0], chosen[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(n_out - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        # Média da faixa seguinte (na última faixa, o último ponto)
+        next_start, next_end = end, edges[bucket + 2] if bucket + 2 < len(edges) else n
+        mean_x = x[next_start:next_end].mean()
+        mean_y = y[next_start:next_end].mean()
+        # Dobro da área do triângulo (anterior, candidato, média seguinte)
+        area = np.abs((x[previous] - mean_x) * (y[start:end] - y[previous])
+                      - (x[previous] - x[start:end]) * (mean_y - y[previous]))
+        previous = start + int(np.argmax(area))
+        chosen[bucket + 1] = previous
+    return chosen
+
+
+def reduce_line(data: pd.DataFrame, x_col: str, y_col: str, max_points: int) -> pd.DataFrame:
+    """
+    Linhas do gráfico de linha após o LTTB
+
+    Args:
+        data: Dados do gráfico, na ordem do eixo x
+        x_col: Coluna do eixo x
+        y_col: Coluna dos valores
+        max_points: Limite de pontos
+
+    Returns:
+        O próprio DataFrame, se couber no limite; senão, as linhas escolhidas
+        (linhas com valor nulo são descartadas antes da redução)
+    """
+    if len(data) <= max_points:
+        return data
+    data = data[data[y_col].notna()]
+    x = _axis_values(data[x_col])
+    y = data[y_col].to_numpy(dtype=float)
+    return data.iloc[lttb_indices(x, y, max_points)]
+
+
+def group_others(data: pd.DataFrame, names_col: str, value_cols: Union[str, Sequence[str]],
+                 max_groups: int, keep_order: bool = False) -> pd.DataFrame:
+    """
+    Os maiores grupos e um grupo "Outros" com a soma do restante
+
+    Args:
+        data: Dados do gráfico de barras ou pizza
+        names_col: Coluna dos grupos (nomes das fatias ou eixo das barras)
+        value_cols: Coluna (ou colunas, no gráfico de comparação) dos valores
+        max_groups: Limite de grupos, incluindo "Outros"
+        keep_order: Se True, os grupos mantidos ficam na ordem original (eixo
+            temporal); senão, em ordem decrescente
+
+    Returns:
+        O próprio DataFrame, se os grupos couberem no limite; senão, um grupo
+        por linha com as colunas names_col e value_cols. Os grupos são
+        comparados pelo valor absoluto (somado entre as colunas)
+    """
+    value_cols = [value_cols] if isinstance(value_cols, str) else list(value_cols)
+    totals = data.groupby(names_col, sort=False, observed=True)[value_cols].sum()
+    if len(totals) <= max_groups or max_groups < 2:
+        return data
+
+    kept = top_n(totals.abs().sum(axis=1), max_groups - 1).index
+    mask = totals.index.isin(kept)
+    head = totals[mask] if keep_order else totals.loc[kept]
+    others = totals[~mask].sum().to_frame(OUTROS).T
+    result = pd.concat([head, others])
+    result.index = pd.Index(result.index.astype(object), name=names_col)
+    return result.reset_index()
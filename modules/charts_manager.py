@@ -2,18 +2,86 @@
 """
 Módulo de Gerenciamento de Gráficos
 Responsável por criar e configurar gráficos no dashboard
+
+Acima dos limites de CHART_CONFIG, as linhas são reduzidas pelo LTTB e
+desenhadas com scattergl, e barras e pizzas ficam com os maiores grupos mais
+"Outros" (ver modules.chart_reduction).
+
+As figuras montadas ficam em um cache LRU limitado em entradas e em tamanho
+(FIGURE_CACHE_CONFIG), com chave na impressão digital dos dados (conteúdo,
+índice, colunas e tipos) e nos parâmetros da chamada: um rerun com os mesmos
+filtros devolve a figura já montada. A figura devolvida é compartilhada com o
+cache e não deve ser alterada por quem chama.
 """
 
+import hashlib
+from functools import wraps
+from typing import Optional
+
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import pandas as pd
 import streamlit as st
 
+from config.settings import CHART_CONFIG, FIGURE_CACHE_CONFIG
+from modules.chart_reduction import group_others, reduce_line
+from modules.lru_cache import LRUCache
+
+
+def frame_fingerprint(data: pd.DataFrame) -> Optional[str]:
+    """
+    Impressão digital de um DataFrame (conteúdo, índice, colunas e tipos)
+
+    Returns:
+        Hash hexadecimal, ou None se alguma coluna não for hasheável (ex.: listas)
+    """
+    try:
+        rows = pd.util.hash_pandas_object(data, index=True).to_numpy()
+    except TypeError:
+        return None
+    digest = hashlib.blake2b(rows.tobytes(), digest_size=16)
+    digest.update(repr([(str(col), str(dtype)) for col, dtype in data.dtypes.items()]).encode())
+    return digest.hexdigest()
+
+
+def _cached_figure(build):
+    """Guarda no cache de figuras o resultado de um método create_* (dados no primeiro argumento)"""
+    @wraps(build)
+    def create(self, data, *args, **kwargs):
+        if self._figure_cache is None:
+            return build(self, data, *args, **kwargs)
+        fingerprint = frame_fingerprint(data)
+        if fingerprint is None:
+            return build(self, data, *args, **kwargs)
+        key = (build.__name__, fingerprint, repr(args), repr(sorted(kwargs.items())))
+        fig = self._figure_cache.get(key)
+        if fig is None:
+            fig = build(self, data, *args, **kwargs)
+            self._figure_cache.set(key, fig, size=len(fig.to_json()))
+        return fig
+    return create
+
+
 class ChartsManager:
-    def __init__(self):
+    def __init__(self, config=None, cache_config=None):
         self.colors = px.colors.qualitative.Set3
+        self.config = CHART_CONFIG if config is None else config
+        cache_config = FIGURE_CACHE_CONFIG if cache_config is None else cache_config
+        self._figure_cache = LRUCache(
+            cache_config["max_entries"], max_bytes=int(cache_config["max_mb"] * 1024 * 1024)
+        ) if cache_config["enabled"] else None
+
+    def figure_cache_stats(self):
+        """Acertos, falhas, descartes e tamanho do cache de figuras"""
+        return self._figure_cache.stats() if self._figure_cache is not None else {}
+
+    def clear_figure_cache(self):
+        """Descarta as figuras guardadas"""
+        if self._figure_cache is not None:
+            self._figure_cache.clear()
     
+    @_cached_figure
     def create_pie_chart(self, data, values_col, names_col, title, height=400, hole: float = 0.5, color_sequence=None, showlegend=True):
         """Gráfico de rosca/pizza customizado com rótulos externos e cores suaves."""
         if data.empty:
@@ -23,6 +91,7 @@ class ChartsManager:
         if color_sequence is None:
             color_sequence = px.colors.qualitative.Pastel
         
+        data = group_others(data, names_col, values_col, self.config["max_slices"])
         fig = px.pie(
             data,
             values=values_col,
@@ -58,11 +127,13 @@ class ChartsManager:
         )
         return fig
     
+    @_cached_figure
     def create_bar_chart(self, data, x_col, y_col, title, orientation="v", height=400):
         """Cria um gráfico de barras"""
         if data.empty:
             return go.Figure().add_annotation(text="Sem dados para exibir", x=0.5, y=0.5, showarrow=False)
         
+        data = group_others(data, x_col, y_col, self.config["max_bars"], keep_order=True)
         if orientation == "h":
             fig = px.bar(
                 data, 
@@ -93,18 +164,22 @@ class ChartsManager:
         
         return fig
     
+    @_cached_figure
     def create_line_chart(self, data, x_col, y_col, title, height=400):
         """Cria um gráfico de linha"""
         if data.empty:
             return go.Figure().add_annotation(text="Sem dados para exibir", x=0.5, y=0.5, showarrow=False)
         
+        if isinstance(y_col, str):
+            data = reduce_line(data, x_col, y_col, self.config["max_line_points"])
         fig = px.line(
             data, 
             x=x_col, 
             y=y_col,
             title=title,
             height=height,
-            color_discrete_sequence=self.colors
+            color_discrete_sequence=self.colors,
+            render_mode="webgl" if len(data) > self.config["webgl_points"] else "svg"
         )
         
         fig.update_layout(
@@ -117,11 +192,36 @@ class ChartsManager:
         
         return fig
     
+    @_cached_figure
+    def create_heatmap(self, data, title, height=400, colorscale="Blues"):
+        """Cria um mapa de calor (linhas e colunas do DataFrame como eixos)"""
+        if data.empty:
+            return go.Figure().add_annotation(text="Sem dados para exibir", x=0.5, y=0.5, showarrow=False)
+        
+        fig = go.Figure(go.Heatmap(
+            z=data.to_numpy(),
+            x=[str(col) for col in data.columns],
+            y=[str(idx) for idx in data.index],
+            colorscale=colorscale
+        ))
+        
+        fig.update_layout(
+            title=title,
+            title_x=0.5,
+            title_font_size=16,
+            height=height,
+            yaxis=dict(autorange="reversed")
+        )
+        
+        return fig
+    
+    @_cached_figure
     def create_comparison_chart(self, data, x_col, y_cols, title, height=400):
         """Cria um gráfico de comparação (barras agrupadas)"""
         if data.empty:
             return go.Figure().add_annotation(text="Sem dados para exibir", x=0.5, y=0.5, showarrow=False)
         
+        data = group_others(data, x_col, y_cols, self.config["max_bars"], keep_order=True)
         fig = go.Figure()
         
         for i, col in enumerate(y_cols):
@@ -166,6 +266,7 @@ class ChartsManager:
         
         return fig
 
+    @_cached_figure
     def create_top_products_chart(self, data, x_col, y_col, title, height=400):
         """Cria um gráfico de barras horizontais para Top 5 Produtos/Serviços."""
         if data.empty:
@@ -7,10 +7,21 @@ import numpy as np
 import streamlit as st
 from pathlib import Path
 import logging
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Callable, Dict, List, Optional, Tuple, Any
 import warnings
 warnings.filterwarnings('ignore')
 
+from config.settings import BACKUP_CONFIG, CUBE_CONFIG, JOURNAL_CONFIG, RECORD_ID_CONFIG
+from modules.storage_backend import get_storage
+from modules.workbook_snapshot import WorkbookSnapshot
+from modules.journal import get_journal, apply_entries, max_entry_id
+from modules.file_lock import get_workbook_lock
+from modules.date_dimensions import strip_date_dimensions
+from modules.record_ids import (ID_COLUMN, IdCounter, RowIdIndex, assign_new_ids, ensure_ids, has_record_ids,
+                                id_counter_path_for, max_id)
+from modules.record_options import RecordOptions, build_labels
+from modules.vocabulary import VocabularyService
+
 # Configurar logging
 logging.basicConfig(
     level=logging.INFO,
@@ -30,49 +41,175 @@ class DataManager:
         """
         self.excel_file = excel_file
         self._data_cache = {}
-        self._last_modified = None
+        # Controle de validade por aba: assinatura do arquivo, hash do conteúdo e versão
+        self._sheet_stamps = {}
+        self._sheet_hashes = {}
+        self._sheet_versions = {}
+        self._cache_stats = {"hits": 0, "misses": 0, "unchanged_reloads": 0}
+        self._sheet_names = []
+        self._snapshot = None
+        # Backend de armazenamento (Excel ou SQLite, conforme STORAGE_CONFIG)
+        self._storage = get_storage(excel_file)
+        # Lock entre processos compartilhado por todas as escritas na planilha
+        self._lock = get_workbook_lock(excel_file)
+        self._journal = get_journal(excel_file, JOURNAL_CONFIG.get("journal_dir")) if JOURNAL_CONFIG["enabled"] else None
+        self._overlays = {}
+        # Maior id já atribuído por aba: ids excluídos não são reutilizados
+        self._id_counter = IdCounter(id_counter_path_for(excel_file, RECORD_ID_CONFIG.get("counter_dir")))
+        self._id_indexes = {}
+        self._option_labels = {}
+        self._ids_checked_signature = None
+        # Valores distintos das colunas categóricas (opções dos formulários e filtros)
+        self._vocabulary = VocabularyService()
+        # Linhas alteradas por escrita, por aba, ainda não incorporadas a um snapshot
+        self._pending_deltas: Dict[str, List[Tuple]] = {}
         
     def _check_file_exists(self) -> bool:
         """Verifica se o arquivo Excel existe"""
-        if not Path(self.excel_file).exists():
+        if not self._storage.exists():
             logger.error(f"Arquivo Excel não encontrado: {self.excel_file}")
             return False
         return True
     
+    def _file_signature(self) -> Optional[Tuple]:
+        """Retorna a assinatura do armazenamento (muda a cada escrita)"""
+        return self._storage.signature()
+    
+    @staticmethod
+    def _content_hash(df: pd.DataFrame) -> Optional[int]:
+        """Calcula um hash do conteúdo da aba (colunas e valores)"""
+        try:
+            values_hash = int(pd.util.hash_pandas_object(df, index=False).sum())
+            return hash((tuple(map(str, df.columns)), values_hash))
+        except Exception:
+            return None
+    
+    def _store_sheet(self, sheet_name: str, df: pd.DataFrame, signature: Tuple[int, int]) -> pd.DataFrame:
+        """
+        Registra uma aba recém-carregada no cache
+        
+        A versão da aba só avança quando o conteúdo muda; uma releitura causada
+        por escrita em outra aba mantém o DataFrame e a versão anteriores.
+        """
+        content_hash = self._content_hash(df)
+        previous_hash = self._sheet_hashes.get(sheet_name)
+        
+        if content_hash is not None and content_hash == previous_hash and sheet_name in self._data_cache:
+            self._cache_stats["unchanged_reloads"] += 1
+            df = self._data_cache[sheet_name]
+        else:
+            self._data_cache[sheet_name] = df
+            self._sheet_hashes[sheet_name] = content_hash
+            self._sheet_versions[sheet_name] = self._sheet_versions.get(sheet_name, 0) + 1
+        
+        self._sheet_stamps[sheet_name] = signature
+        return df
+    
     def load_excel_data(self, sheet_name: str = None) -> pd.DataFrame:
         """
         Carrega dados do Excel com cache e validação
         
+        Alterações do CRUD ainda não compactadas no journal são aplicadas
+        sobre os dados da planilha.
+        
         Args:
             sheet_name: Nome da aba (se None, carrega todas)
             
         Returns:
             DataFrame ou dict de DataFrames
         """
+        # O lock impede ver a planilha já compactada junto com as entradas antigas do journal
+        with self._lock:
+            data = self._load_base(sheet_name)
+            if self._journal is None:
+                return data
+            if isinstance(data, dict):
+                return {sheet: self._overlay(sheet, df) for sheet, df in data.items()}
+            return self._overlay(sheet_name, data) if sheet_name else data
+    
+    def _overlay(self, sheet_name: str, df: pd.DataFrame) -> pd.DataFrame:
+        """Aplica as entradas pendentes do journal, reaproveitando o último resultado"""
+        entries = self._journal.pending(sheet_name)
+        if not entries:
+            return df
+        
+        key = (self._sheet_hashes.get(sheet_name), entries[-1]["seq"])
+        cached = self._overlays.get(sheet_name)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        
+        overlaid = apply_entries(df, entries)
+        self._overlays[sheet_name] = (key, overlaid)
+        version = self._sheet_versions.get(sheet_name, 0)
+        self._sheet_versions[sheet_name] = version + 1
+        
+        # Mesma base: a visão anterior é o overlay anterior (ou a própria base, sem entradas)
+        if cached is not None and cached[0][0] == key[0]:
+            previous, new_entries = cached[1], [entry for entry in entries if entry["seq"] > cached[0][1]]
+        else:
+            previous, new_entries = df, entries
+        self._delta_from_entries(sheet_name, version, previous, overlaid, new_entries)
+        return overlaid
+    
+    def _delta_from_entries(self, sheet_name: str, version: int, previous: pd.DataFrame,
+                            current: pd.DataFrame, entries: List[Dict]):
+        """Registra como delta só as linhas tocadas por entradas do journal por id"""
+        touched = []
+        for entry in entries:
+            if "id" in entry:
+                touched.append(entry["id"])
+            elif "ids" in entry:
+                touched.extend(entry["ids"])
+            else:
+                return  # Entradas posicionais: vocabulário e cubo são reconstruídos
+        if ID_COLUMN not in previous.columns:
+            return
+        removed = previous[previous[ID_COLUMN].isin(touched)]
+        added = current[current[ID_COLUMN].isin(touched)]
+        self._record_delta(sheet_name, version, version + 1, added=added, removed=removed)
+    
+    def _record_delta(self, sheet_name: str, from_version: int, to_version: int,
+                      added: Optional[pd.DataFrame] = None, removed: Optional[pd.DataFrame] = None):
+        """
+        Registra as linhas inseridas e removidas entre duas versões de uma aba
+        
+        O vocabulário é atualizado na hora; o cubo mensal recebe os passos
+        pendentes na criação do próximo snapshot (ver WorkbookSnapshot).
+        """
+        self._vocabulary.advance(sheet_name, from_version, to_version, added=added, removed=removed)
+        steps = self._pending_deltas.setdefault(sheet_name, [])
+        steps.append((from_version, to_version, added, removed))
+        if len(steps) > CUBE_CONFIG["max_pending_deltas"]:
+            del steps[:-CUBE_CONFIG["max_pending_deltas"]]
+    
+    def _load_base(self, sheet_name: str = None) -> pd.DataFrame:
+        """Carrega os dados como estão na planilha (cache, sidecar ou Excel)"""
         try:
             if not self._check_file_exists():
                 return pd.DataFrame()
             
-            # Verificar se precisa recarregar (cache expirado ou arquivo modificado)
-            current_modified = Path(self.excel_file).stat().st_mtime
+            # Verificar se precisa recarregar (aba fora do cache ou arquivo modificado)
+            signature = self._file_signature()
             
-            if (sheet_name in self._data_cache and 
-                self._last_modified == current_modified):
+            if sheet_name is None and self._all_sheets_valid(signature):
+                self._cache_stats["hits"] += 1
+                return {sheet: self._data_cache[sheet] for sheet in self._sheet_names}
+            
+            if (sheet_name in self._data_cache and
+                self._sheet_stamps.get(sheet_name) == signature):
+                self._cache_stats["hits"] += 1
                 logger.info(f"Retornando dados em cache para aba: {sheet_name}")
                 return self._data_cache[sheet_name]
             
-            # Carregar dados, especificando a vírgula como separador decimal
+            self._cache_stats["misses"] += 1
+            
             if sheet_name:
-                df = pd.read_excel(self.excel_file, sheet_name=sheet_name, decimal=',')
-                self._data_cache[sheet_name] = df
+                df = self._storage.read_sheet(sheet_name, signature)
+                df = self._store_sheet(sheet_name, df, signature)
             else:
                 # Carregar todas as abas
-                excel_data = pd.read_excel(self.excel_file, sheet_name=None, decimal=',')
-                for sheet, df in excel_data.items():
-                    self._data_cache[sheet] = df
-                df = excel_data
+                df = self._load_all_sheets(signature)
             
-            self._last_modified = current_modified
             logger.info(f"Dados carregados com sucesso: {sheet_name or 'todas as abas'}")
             return df
             
@@ -81,25 +218,100 @@ class DataManager:
             st.error(f"Erro ao carregar dados: {e}")
             return pd.DataFrame()
     
-    def save_data(self, df: pd.DataFrame, sheet_name: str) -> bool:
+    def _all_sheets_valid(self, signature: Optional[Tuple[int, int]]) -> bool:
+        """Indica se todas as abas conhecidas estão em cache para a assinatura"""
+        return bool(self._sheet_names) and all(
+            sheet in self._data_cache and self._sheet_stamps.get(sheet) == signature
+            for sheet in self._sheet_names
+        )
+    
+    def _load_all_sheets(self, signature: Optional[Tuple[int, int]]) -> Dict[str, pd.DataFrame]:
+        """
+        Carrega todas as abas abrindo a planilha no máximo uma vez
+        
+        Abas válidas no cache são reaproveitadas; as restantes são lidas
+        juntas pelo backend (no Excel, em uma única chamada ao read_excel).
+        """
+        missing = [
+            sheet for sheet in self._sheet_names
+            if not (sheet in self._data_cache and self._sheet_stamps.get(sheet) == signature)
+        ]
+        
+        if missing or not self._sheet_names:
+            try:
+                sheets = self._storage.read_sheets(missing or None, signature)
+            except ValueError:
+                # Aba removida ou renomeada fora do dashboard: redescobrir a lista de abas
+                missing = []
+                sheets = self._storage.read_sheets(None, signature)
+            if not missing:
+                self._sheet_names = list(sheets.keys())
+            for sheet, sheet_df in sheets.items():
+                self._store_sheet(sheet, sheet_df, signature)
+        
+        return {sheet: self._data_cache[sheet] for sheet in self._sheet_names}
+    
+    def _state_signature(self) -> Tuple:
+        """Assinatura do estado visível: arquivo Excel mais a última entrada do journal"""
+        journal_seq = self._journal.last_seq() if self._journal else 0
+        return self._file_signature(), journal_seq
+    
+    def get_snapshot(self) -> WorkbookSnapshot:
+        """
+        Retorna o snapshot de todas as abas da versão atual da planilha
+        
+        O snapshot é reconstruído apenas quando o arquivo muda, e somente as
+        abas alteradas são lidas novamente do Excel.
+        
+        Returns:
+            WorkbookSnapshot com as abas tipadas
+        """
+        with self._lock:
+            signature = self._state_signature()
+            if self._snapshot is not None and self._snapshot.signature == signature:
+                self._cache_stats["hits"] += 1
+                return self._snapshot
+            
+            sheets = self.load_excel_data()
+            if not isinstance(sheets, dict):
+                sheets = {}
+            deltas, self._pending_deltas = self._pending_deltas, {}
+            self._snapshot = WorkbookSnapshot(sheets, signature, versions=dict(self._sheet_versions),
+                                              previous=self._snapshot, deltas=deltas)
+            return self._snapshot
+    
+    def save_data(self, df: pd.DataFrame, sheet_name: str, expected_version: int) -> bool:
         """
         Salva dados em uma aba específica
         
+        Para ler, alterar e gravar uma aba, prefira modify_sheet, que obtém a
+        versão com o lock retido.
+        
         Args:
             df: DataFrame para salvar
             sheet_name: Nome da aba
+            expected_version: Versão da aba (get_sheet_version) sobre a qual df foi
+                construído; se a aba mudou desde então, a gravação é recusada
             
         Returns:
             True se salvou com sucesso
         """
         try:
-            # Carregar todas as abas existentes
-            with pd.ExcelWriter(self.excel_file, engine='openpyxl', mode='a', if_sheet_exists='replace') as writer:
-                df.to_excel(writer, sheet_name=sheet_name, index=False)
-            
-            # Limpar cache
-            self._data_cache.pop(sheet_name, None)
-            self._last_modified = None
+            with self._lock:
+                if self.get_sheet_version(sheet_name) != expected_version:
+                    logger.warning(f"Gravação recusada: a aba {sheet_name} foi alterada por outra sessão")
+                    st.warning(f"A aba {sheet_name} foi alterada por outra sessão. Recarregue a página e tente novamente.")
+                    return False
+                
+                signature_before = self._file_signature()
+                
+                # Colunas derivadas do snapshot (Ano, Mês...) não pertencem à planilha
+                self._storage.write_sheet(strip_date_dimensions(df), sheet_name)
+                
+                # O DataFrame salvo já contém as alterações pendentes da aba
+                if self._journal:
+                    self._journal.discard(sheet_name)
+                self._after_write(sheet_name, signature_before)
             
             logger.info(f"Dados salvos com sucesso na aba: {sheet_name}")
             return True
@@ -109,6 +321,154 @@ class DataManager:
             st.error(f"Erro ao salvar dados: {e}")
             return False
     
+    def modify_sheet(self, sheet_name: str, modifier: Callable[[pd.DataFrame], pd.DataFrame]) -> bool:
+        """
+        Lê, altera e grava uma aba como uma única operação atômica
+        
+        O modificador recebe sempre a versão mais recente da aba, com o lock
+        da planilha retido, de modo que alterações concorrentes de outras
+        sessões são preservadas em vez de sobrescritas.
+        
+        Args:
+            sheet_name: Nome da aba
+            modifier: Função que recebe uma cópia da aba e retorna a nova versão
+            
+        Returns:
+            True se salvou com sucesso
+        """
+        with self._lock:
+            version = self.get_sheet_version(sheet_name)
+            df = self.load_excel_data(sheet_name)
+            return self.save_data(modifier(df.copy()), sheet_name, version)
+    
+    def _after_write(self, sheet_name: str, signature_before: Optional[Tuple[int, int]]):
+        """
+        Atualiza o cache após uma escrita feita por este gerenciador
+        
+        Apenas a aba escrita é invalidada. As demais abas que estavam válidas
+        para a versão anterior do arquivo passam a valer para a nova versão,
+        já que a escrita não alterou o conteúdo delas.
+        """
+        signature_after = self._file_signature()
+        
+        self._data_cache.pop(sheet_name, None)
+        self._sheet_stamps.pop(sheet_name, None)
+        
+        if signature_before is None:
+            return
+        for sheet, stamp in self._sheet_stamps.items():
+            if stamp == signature_before:
+                self._sheet_stamps[sheet] = signature_after
+    
+    def get_id_index(self, sheet_name: str) -> RowIdIndex:
+        """
+        Retorna o índice id -> linha de uma aba transacional
+        
+        O índice é reconstruído apenas quando a versão da aba muda.
+        
+        Args:
+            sheet_name: Nome da aba
+            
+        Returns:
+            RowIdIndex sobre o DataFrame atual da aba
+        """
+        with self._lock:
+            version = self.get_sheet_version(sheet_name)
+            cached = self._id_indexes.get(sheet_name)
+            if cached is not None and cached[0] == version:
+                return cached[1]
+            id_index = RowIdIndex(self.load_excel_data(sheet_name))
+            self._id_indexes[sheet_name] = (version, id_index)
+            return id_index
+    
+    def get_record_options(self, sheet_name: str, df: Optional[pd.DataFrame] = None) -> RecordOptions:
+        """
+        Retorna as opções de seleção de registros de uma aba transacional
+        
+        Os rótulos da aba inteira são montados uma vez por versão da aba; as
+        opções seguem as linhas (e a ordem) do DataFrame informado.
+        
+        Args:
+            sheet_name: Nome da aba
+            df: DataFrame filtrado a partir da aba (se None, a aba inteira)
+            
+        Returns:
+            RecordOptions com os rótulos, o mapeamento rótulo -> id e as linhas
+            como esta sessão as viu (RecordOptions.seen_rows)
+        """
+        with self._lock:
+            version = self.get_sheet_version(sheet_name)
+            cached = self._option_labels.get(sheet_name)
+            if cached is None or cached[0] != version:
+                cached = (version, build_labels(self.load_excel_data(sheet_name), sheet_name))
+                self._option_labels[sheet_name] = cached
+            sheet_df = self.load_excel_data(sheet_name) if df is None else df
+        seen = st.session_state.setdefault("_linhas_vistas", {}).setdefault((self.excel_file, sheet_name), {})
+        return RecordOptions(cached[1], sheet_df, seen)
+    
+    def _id_floor(self, sheet_name: str) -> int:
+        """Maior id já usado na aba: contador em disco e ids citados no journal pendente"""
+        journal_max = max_entry_id(self._journal.pending(sheet_name)) if self._journal else 0
+        return max(self._id_counter.last(sheet_name), journal_max)
+    
+    def ensure_record_ids(self) -> List[str]:
+        """
+        Atribui ids estáveis às linhas das abas transacionais que não os têm
+        
+        Migração única: abas sem a coluna de id (ou com linhas incluídas
+        diretamente no Excel, sem id) são regravadas com os ids preenchidos.
+        
+        Returns:
+            Lista das abas alteradas
+        """
+        updated = []
+        with self._lock:
+            signature = self._state_signature()
+            if signature == self._ids_checked_signature:
+                return updated
+            sheets = self.load_excel_data()
+            if not isinstance(sheets, dict):
+                return updated
+            for sheet_name, df in sheets.items():
+                if not has_record_ids(sheet_name):
+                    continue
+                version = self.get_sheet_version(sheet_name)
+                df_ids, changed = ensure_ids(df, self._id_floor(sheet_name))
+                # O contador passa a cobrir os ids já existentes (planilhas anteriores a ele)
+                self._id_counter.advance(sheet_name, max(max_id(df_ids), self._id_floor(sheet_name)))
+                if not changed:
+                    continue
+                if not updated and BACKUP_CONFIG.get("backup_before_changes", True):
+                    self._storage.backup("before_record_ids")
+                if self.save_data(df_ids, sheet_name, version):
+                    updated.append(sheet_name)
+                    logger.info(f"Ids atribuídos às linhas da aba: {sheet_name}")
+            self._ids_checked_signature = self._state_signature()
+        return updated
+    
+    def invalidate(self, sheet_name: str):
+        """Força a releitura de uma aba na próxima carga"""
+        self._sheet_stamps.pop(sheet_name, None)
+    
+    def get_sheet_version(self, sheet_name: str) -> int:
+        """
+        Retorna a versão atual do conteúdo de uma aba
+        
+        A versão avança somente quando o conteúdo da aba muda, servindo de
+        chave para caches derivados (filtros, agregações, rótulos).
+        """
+        self.load_excel_data(sheet_name)
+        return self._sheet_versions.get(sheet_name, 0)
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Retorna os contadores de acerto/falha do cache por aba"""
+        total = self._cache_stats["hits"] + self._cache_stats["misses"]
+        return {
+            **self._cache_stats,
+            "hit_rate": self._cache_stats["hits"] / total if total else 0.0,
+            "versions": dict(self._sheet_versions),
+        }
+    
     def get_filtered_data(self, sheet_name: str, filters: Dict = None) -> pd.DataFrame:
         """
         Obtém dados filtrados de uma aba específica
@@ -120,6 +480,14 @@ class DataManager:
         Returns:
             DataFrame filtrado
         """
+        if filters and self._storage.supports_pushdown and not (
+                self._journal and self._journal.pending(sheet_name)):
+            # Filtros aplicados no próprio banco (SQL), sem carregar a aba inteira
+            try:
+                return self._storage.query(sheet_name, filters)
+            except Exception as e:
+                logger.error(f"Erro ao aplicar filtros no armazenamento: {e}")
+        
         df = self.load_excel_data(sheet_name)
         
         if df.empty or not filters:
@@ -151,19 +519,96 @@ class DataManager:
         Returns:
             Lista de valores únicos
         """
-        df = self.load_excel_data(sheet_name)
-        
-        if df.empty or column not in df.columns:
-            return []
-        
         try:
-            values = df[column].dropna().unique().tolist()
-            return sorted(values)
+            return list(self.get_vocabulary(sheet_name, column))
             
         except Exception as e:
             logger.error(f"Erro ao obter valores únicos: {e}")
             return []
     
+    def get_vocabulary(self, sheet_name: str, column: str) -> Tuple:
+        """
+        Retorna os valores distintos e ordenados de uma coluna
+        
+        O vocabulário é montado uma vez por versão da aba e atualizado apenas
+        com as linhas inseridas ou alteradas pelo DataManager e pelo journal.
+        
+        Args:
+            sheet_name: Nome da aba
+            column: Nome da coluna
+            
+        Returns:
+            Tupla ordenada (compartilhada; não deve ser alterada)
+        """
+        with self._lock:
+            df = self.load_excel_data(sheet_name)
+            if not isinstance(df, pd.DataFrame) or column not in df.columns:
+                return ()
+            version = self._sheet_versions.get(sheet_name, 0)
+        return self._vocabulary.values(sheet_name, column, version, lambda: df)
+    
+    @staticmethod
+    def _coerce_new_rows(df_new: pd.DataFrame, sheet_df: pd.DataFrame) -> pd.DataFrame:
+        """Alinha os tipos das novas linhas aos tipos das colunas existentes na aba"""
+        df_new = df_new.copy()
+        for col in sheet_df.columns:
+            if col not in df_new.columns:
+                continue
+            try:
+                if pd.api.types.is_datetime64_any_dtype(sheet_df[col]):
+                    df_new[col] = pd.to_datetime(df_new[col])
+                else:
+                    df_new[col] = df_new[col].astype(sheet_df[col].dtype)
+            except (TypeError, ValueError):
+                pass
+        return df_new
+    
+    def append_rows(self, df_new: pd.DataFrame, sheet_name: str) -> bool:
+        """
+        Acrescenta novas linhas ao final de uma aba
+        
+        No Excel, apenas o XML da aba de destino é reescrito; as demais abas
+        não são lidas nem regravadas. No SQLite, as linhas são inseridas na tabela.
+        
+        Args:
+            df_new: DataFrame com as novas linhas
+            sheet_name: Nome da aba
+            
+        Returns:
+            True se salvou com sucesso
+        """
+        try:
+            if df_new.empty:
+                return True
+            
+            if BACKUP_CONFIG.get("backup_before_changes", True):
+                self._storage.backup(f"before_{sheet_name}_append")
+            
+            # Colunas e tipos lidos com o lock retido: refletem a última versão da aba
+            with self._lock:
+                sheet_df = self.load_excel_data(sheet_name)
+                df_new = self._coerce_new_rows(df_new, sheet_df)
+                if ID_COLUMN in sheet_df.columns and has_record_ids(sheet_name):
+                    df_new = assign_new_ids(df_new, sheet_df, self._id_floor(sheet_name))
+                    # Reservado antes da gravação: uma falha só deixa uma lacuna na sequência
+                    self._id_counter.advance(sheet_name, max_id(df_new))
+                version_before = self._sheet_versions.get(sheet_name, 0)
+                signature_before = self._file_signature()
+                self._storage.append_rows(df_new, sheet_name, list(sheet_df.columns))
+                self._after_write(sheet_name, signature_before)
+                # Releitura com o lock retido: a nova versão contém apenas estas linhas a mais
+                self.load_excel_data(sheet_name)
+                self._record_delta(sheet_name, version_before, self._sheet_versions.get(sheet_name, 0),
+                                   added=df_new)
+            
+            logger.info(f"{len(df_new)} linha(s) adicionada(s) à aba: {sheet_name}")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Erro ao adicionar linhas: {e}")
+            st.error(f"Erro ao salvar dados: {e}")
+            return False
+    
     def add_row(self, sheet_name: str, data: Dict) -> bool:
         """
         Adiciona uma nova linha aos dados
@@ -176,14 +621,7 @@ class DataManager:
             True se adicionou com sucesso
         """
         try:
-            df = self.load_excel_data(sheet_name)
-            
-            # Adicionar nova linha
-            new_row = pd.DataFrame([data])
-            df = pd.concat([df, new_row], ignore_index=True)
-            
-            # Salvar dados atualizados
-            return self.save_data(df, sheet_name)
+            return self.append_rows(pd.DataFrame([data]), sheet_name)
             
         except Exception as e:
             logger.error(f"Erro ao adicionar linha: {e}")
@@ -192,7 +630,9 @@ class DataManager:
     def clear_cache(self):
         """Limpa o cache de dados"""
         self._data_cache.clear()
-        self._last_modified = None
+        self._sheet_stamps.clear()
+        self._snapshot = None
+        self._pending_deltas.clear()
         logger.info("Cache limpo")
 
 # Instância global do DataManager
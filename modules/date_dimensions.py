@@ -0,0 +1,62 @@
+"""
+Colunas de dimensão de data das abas transacionais
+
+As datas são interpretadas uma única vez, na criação do snapshot, e cada aba
+com coluna de data ganha colunas derivadas tipadas:
+
+- Ano: inteiro (Int16, nulo quando a data é inválida)
+- Mês: categórico ordenado com os meses em português (Jan ... Dez)
+- MÊS_ANO: rótulo "Jan/2024"
+- PERÍODO: período mensal (Period[M]), ordenável e usado em agrupamentos
+
+Os filtros das páginas comparam inteiros e códigos de categoria em vez de
+strings. As colunas derivadas não pertencem à planilha e são removidas antes
+de qualquer gravação (strip_date_dimensions).
+"""
+
+import numpy as np
+import pandas as pd
+
+MESES_ORDEM = ['Jan', 'Fev', 'Mar', 'Abr', 'Mai', 'Jun', 'Jul', 'Ago', 'Set', 'Out', 'Nov', 'Dez']
+MONTH_DTYPE = pd.CategoricalDtype(MESES_ORDEM, ordered=True)
+
+DATE_DIMENSION_COLUMNS = ("Ano", "Mês", "MÊS_ANO", "PERÍODO")
+
+
+def month_name(month: int) -> str:
+    """Abreviação em português do mês (1 = Jan)"""
+    return MESES_ORDEM[month - 1]
+
+
+def add_date_dimensions(df: pd.DataFrame, date_col: str) -> pd.DataFrame:
+    """
+    Acrescenta as colunas Ano, Mês, MÊS_ANO e PERÍODO a partir de uma coluna de data
+
+    Args:
+        df: DataFrame com a coluna de data já convertida para datetime
+        date_col: Nome da coluna de data
+
+    Returns:
+        O próprio DataFrame, com as colunas derivadas
+    """
+    dates = df[date_col]
+    periods = dates.dt.to_period("M")
+    months = dates.dt.month
+
+    df["Ano"] = dates.dt.year.astype("Int16")
+    codes = months.fillna(0).to_numpy(dtype=np.int64) - 1
+    df["Mês"] = pd.Categorical.from_codes(codes, dtype=MONTH_DTYPE)
+
+    # Rótulo montado apenas para os meses distintos
+    period_codes, unique_periods = pd.factorize(periods)
+    labels = np.array([f"{month_name(p.month)}/{p.year}" for p in unique_periods] + [None], dtype=object)
+    df["MÊS_ANO"] = pd.Series(labels[period_codes], index=df.index, dtype="str")
+    df["PERÍODO"] = periods
+    return df
+
+
+def strip_date_dimensions(df: pd.DataFrame) -> pd.DataFrame:
+    """Remove as colunas derivadas antes de gravar a aba"""
+    derived = [col for col in DATE_DIMENSION_COLUMNS if col in df.columns]
+    return df.drop(columns=derived) if derived else df
+
@@ -0,0 +1,100 @@
+"""
+Visão ordenada por data de uma aba, para filtros por intervalo
+
+A aba é ordenada uma única vez pela coluna de data (linhas sem data são
+descartadas) e guarda o array de datas e os códigos da coluna CATEGORIA.
+Um intervalo de datas vira um par de buscas binárias (searchsorted) e o
+resultado é uma fatia posicional da visão, sem máscara sobre a aba inteira
+nem cópia: O(log n + k) em vez de O(n).
+"""
+
+from typing import Optional, Tuple
+
+import pandas as pd
+
+CATEGORY_COLUMN = "CATEGORIA"
+
+
+class DateSortedView:
+    """Aba ordenada por data com filtros por intervalo e por categoria"""
+
+    def __init__(self, df: pd.DataFrame, date_col: str = "DATA"):
+        """
+        Constrói a visão
+
+        Args:
+            df: DataFrame da aba
+            date_col: Coluna de data usada na ordenação
+        """
+        self.date_col = date_col
+        self.has_dates = date_col in df.columns
+        if not self.has_dates:
+            self.frame = df
+            self.dates = None
+            self._codes = None
+            self._category_codes = {}
+            return
+
+        dates = df[date_col]
+        if not pd.api.types.is_datetime64_any_dtype(dates):
+            df = df.assign(**{date_col: pd.to_datetime(dates, errors="coerce")})
+        df = df[df[date_col].notna()]
+        # Ordenação estável: linhas do mesmo dia mantêm a ordem da planilha
+        self.frame = df.sort_values(date_col, kind="mergesort")
+        self.dates = self.frame[date_col].array
+
+        self._codes = None
+        self._category_codes = {}
+        if CATEGORY_COLUMN in self.frame.columns:
+            codes, categories = pd.factorize(self.frame[CATEGORY_COLUMN])
+            self._codes = codes
+            self._category_codes = {category: code for code, category in enumerate(categories)}
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    @property
+    def max_date(self) -> Optional[pd.Timestamp]:
+        """Data mais recente da aba (None se não houver datas)"""
+        return self.dates[-1] if self.dates is not None and len(self.dates) else None
+
+    def bounds(self, start=None, end=None) -> Tuple[int, int]:
+        """
+        Posições [início, fim) das linhas com start <= data <= end
+
+        Args:
+            start: Data inicial (inclusiva); None para não limitar
+            end: Data final (inclusiva); None para não limitar
+
+        Returns:
+            Tupla (início, fim) de posições na visão
+        """
+        lo, hi = 0, len(self.frame)
+        if self.dates is None:
+            return lo, hi
+        if start is not None:
+            lo = int(self.dates.searchsorted(pd.Timestamp(start), side="left"))
+        if end is not None:
+            hi = int(self.dates.searchsorted(pd.Timestamp(end), side="right"))
+        return lo, max(lo, hi)
+
+    def select(self, start=None, end=None, categoria: Optional[str] = None) -> pd.DataFrame:
+        """
+        Linhas no intervalo de datas e, opcionalmente, de uma categoria
+
+        Args:
+            start: Data inicial (inclusiva)
+            end: Data final (inclusiva)
+            categoria: Valor de CATEGORIA; None para todas
+
+        Returns:
+            Fatia da visão ordenada por data
+        """
+        lo, hi = self.bounds(start, end)
+        window = self.frame.iloc[lo:hi]
+        if categoria is None or self._codes is None:
+            return window
+        code = self._category_codes.get(categoria)
+        if code is None:
+            return window.iloc[:0]
+        return window[self._codes[lo:hi] == code]
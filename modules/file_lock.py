@@ -0,0 +1,115 @@
+"""
+Lock entre processos para as escritas na planilha
+
+Várias sessões do Streamlit (e processos diferentes) podem gravar no mesmo
+arquivo. O WorkbookLock combina um RLock, que serializa as threads do
+processo, com um lock de sistema operacional em um arquivo '.lock' ao lado da
+planilha (fcntl no Linux/macOS, msvcrt no Windows). É reentrante: chamadas
+aninhadas na mesma thread não bloqueiam.
+"""
+
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+_locks: Dict[str, "WorkbookLock"] = {}
+_locks_lock = threading.Lock()
+
+
+class LockTimeout(Exception):
+    """Não foi possível obter o lock da planilha dentro do tempo limite"""
+
+
+class WorkbookLock:
+    """Lock reentrante válido entre threads e entre processos"""
+
+    def __init__(self, lock_path: str, timeout: float = 30.0):
+        """
+        Inicializa o lock
+
+        Args:
+            lock_path: Caminho do arquivo de lock
+            timeout: Tempo máximo de espera pelo lock de outro processo (segundos)
+        """
+        self.lock_path = Path(lock_path)
+        self.timeout = timeout
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+
+    def _acquire_os_lock(self):
+        self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(str(self.lock_path), os.O_RDWR | os.O_CREAT, 0o644)
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                if fcntl:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                else:
+                    msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+                self._fd = fd
+                return
+            except OSError:
+                if time.monotonic() >= deadline:
+                    os.close(fd)
+                    raise LockTimeout(f"Planilha bloqueada por outro processo: {self.lock_path}")
+                time.sleep(0.05)
+
+    def _release_os_lock(self):
+        fd, self._fd = self._fd, None
+        try:
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(fd)
+
+    def acquire(self):
+        self._thread_lock.acquire()
+        try:
+            if self._depth == 0:
+                self._acquire_os_lock()
+        except Exception:
+            self._thread_lock.release()
+            raise
+        self._depth += 1
+
+    def release(self):
+        self._depth -= 1
+        try:
+            if self._depth == 0:
+                self._release_os_lock()
+        finally:
+            self._thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+def lock_path_for(excel_file: str) -> Path:
+    """Arquivo de lock padrão: '.<planilha>.lock' no diretório da planilha"""
+    excel_path = Path(excel_file)
+    return excel_path.with_name(f".{excel_path.name}.lock")
+
+
+def get_workbook_lock(excel_file: str) -> WorkbookLock:
+    """Retorna o lock compartilhado de uma planilha (um por processo)"""
+    path = str(lock_path_for(excel_file).resolve())
+    with _locks_lock:
+        if path not in _locks:
+            _locks[path] = WorkbookLock(path)
+        return _locks[path]
@@ -0,0 +1,207 @@
+"""
+Plano de filtros da sidebar do dashboard (Ano, Mês, Conta e Categoria)
+
+O estado da sidebar vira um FilterPlan imutável. O CompiledFilter avalia o
+plano sobre as colunas da aba já convertidas em códigos inteiros
+(CodedColumns, guardadas no snapshot) e memoriza cada máscara e cada
+resultado, de modo que Visão Geral, CRUD, Orçamento, ABC e o período anterior
+compartilham o mesmo DataFrame filtrado em vez de refazer as comparações de
+strings a cada seção.
+"""
+
+from dataclasses import dataclass, replace
+from typing import Callable, Dict, FrozenSet, Hashable, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from modules.date_dimensions import MESES_ORDEM
+
+TODAS = "Todas"
+
+
+class CodedColumns:
+    """Colunas de filtro de uma aba convertidas em arrays de códigos inteiros"""
+
+    def __init__(self, df: pd.DataFrame):
+        """
+        Constrói os códigos
+
+        Args:
+            df: DataFrame da aba vindo do snapshot (com Ano e Mês calculados)
+        """
+        n = len(df)
+        # Linhas sem data (Ano nulo) nunca passam pelos filtros da sidebar
+        if "Ano" in df.columns:
+            self.ano = df["Ano"].fillna(-1).to_numpy(dtype=np.int32)
+        else:
+            self.ano = np.full(n, -1, dtype=np.int32)
+        if "Mês" in df.columns and isinstance(df["Mês"].dtype, pd.CategoricalDtype):
+            self.mes = df["Mês"].cat.codes.to_numpy()
+        else:
+            self.mes = np.full(n, -1, dtype=np.int8)
+        self.valid = self.ano >= 0
+        self._labels: Dict[str, Tuple[np.ndarray, Dict[Hashable, int]]] = {}
+        for column in ("CONTA", "CATEGORIA"):
+            if column in df.columns:
+                codes, uniques = pd.factorize(df[column])
+                self._labels[column] = (codes, {value: code for code, value in enumerate(uniques)})
+
+    def __len__(self) -> int:
+        return len(self.ano)
+
+    def equals(self, column: str, value: Hashable) -> np.ndarray:
+        """Máscara column == value comparando códigos (tudo falso se a coluna não existir)"""
+        if column not in self._labels:
+            return np.zeros(len(self), dtype=bool)
+        codes, index = self._labels[column]
+        code = index.get(value)
+        return codes == code if code is not None else np.zeros(len(self), dtype=bool)
+
+
+@dataclass(frozen=True)
+class FilterPlan:
+    """Estado dos filtros da sidebar; tuplas vazias significam 'sem filtro'"""
+
+    anos: Tuple[int, ...] = ()
+    meses: Tuple[str, ...] = ()
+    conta: str = TODAS
+    categoria: str = TODAS
+    # Abas em que o filtro de categoria vale (os tipos de análise marcados)
+    categoria_sheets: FrozenSet[str] = frozenset()
+    # Meses absolutos (ano * 12 + índice do mês) para intervalos que não são
+    # um produto Ano × Mês, como os períodos de comparação (ver period_comparison)
+    periodos: Tuple[int, ...] = ()
+
+    @classmethod
+    def from_sidebar(cls, anos: Iterable, meses: Iterable[str], conta: str = TODAS,
+                     categoria: str = TODAS, tipos: Iterable[str] = ()) -> "FilterPlan":
+        """Monta o plano a partir dos valores dos widgets da sidebar"""
+        return cls(
+            anos=tuple(sorted(int(ano) for ano in anos)),
+            meses=tuple(sorted(meses, key=MESES_ORDEM.index)),
+            conta=conta or TODAS,
+            categoria=categoria or TODAS,
+            categoria_sheets=frozenset(tipos),
+        )
+
+    def without(self, conta: bool = False, categoria: bool = False) -> "FilterPlan":
+        """Cópia do plano sem o filtro de conta e/ou de categoria"""
+        return replace(self, conta=TODAS if conta else self.conta, categoria=TODAS if categoria else self.categoria)
+
+    def with_months(self, meses: Iterable[str]) -> "FilterPlan":
+        """Cópia do plano com outros meses selecionados"""
+        return replace(self, meses=tuple(sorted(meses, key=MESES_ORDEM.index)))
+
+    def previous_period(self) -> Optional["FilterPlan"]:
+        """
+        Plano do mês anterior, quando um único mês e um único ano estão selecionados
+
+        Mantém a conta e ignora a categoria, como a comparação de período anterior.
+        """
+        if len(self.anos) != 1 or len(self.meses) != 1:
+            return None
+        ano, mes = self.anos[0], MESES_ORDEM.index(self.meses[0])
+        if mes == 0:
+            ano, mes = ano - 1, 12
+        return replace(self, anos=(ano,), meses=(MESES_ORDEM[mes - 1],), categoria=TODAS)
+
+
+def plan_predicates(plan: FilterPlan, sheet_name: str) -> List[Tuple[str, Hashable, Callable[[CodedColumns], np.ndarray]]]:
+    """
+    Predicados do plano para uma aba, como (nome, valor, função sobre CodedColumns)
+
+    O primeiro predicado (linhas com data) está sempre presente; os demais só
+    quando o filtro correspondente está ativo.
+    """
+    predicates = [("valid", None, lambda coded: coded.valid)]
+    if plan.anos:
+        predicates.append(("anos", plan.anos, lambda coded: np.isin(coded.ano, plan.anos)))
+    if plan.meses:
+        codes = [MESES_ORDEM.index(mes) for mes in plan.meses]
+        predicates.append(("meses", plan.meses, lambda coded: np.isin(coded.mes, codes)))
+    if plan.periodos:
+        predicates.append(("periodos", plan.periodos,
+                           lambda coded: np.isin(coded.ano.astype(np.int64) * 12 + coded.mes, plan.periodos)))
+    if plan.conta != TODAS:
+        predicates.append(("conta", plan.conta, lambda coded: coded.equals("CONTA", plan.conta)))
+    if plan.categoria != TODAS and sheet_name in plan.categoria_sheets:
+        predicates.append(("categoria", plan.categoria, lambda coded: coded.equals("CATEGORIA", plan.categoria)))
+    return predicates
+
+
+def evaluate_plan(coded: CodedColumns, plan: FilterPlan, sheet_name: str) -> np.ndarray:
+    """Máscara do plano sobre colunas codificadas, sem memorização"""
+    mask = None
+    for _, _, build in plan_predicates(plan, sheet_name):
+        predicate = build(coded)
+        mask = predicate if mask is None else mask & predicate
+    return mask
+
+
+class CompiledFilter:
+    """Avalia planos de filtro sobre as abas de um snapshot, memorizando os resultados"""
+
+    def __init__(self, snapshot, plan: FilterPlan):
+        """
+        Inicializa o filtro
+
+        Args:
+            snapshot: WorkbookSnapshot da versão atual da planilha
+            plan: Plano de filtros da sidebar
+        """
+        self.snapshot = snapshot
+        self.plan = plan
+        self._masks: Dict[Tuple, np.ndarray] = {}
+        self._frames: Dict[Tuple[str, FilterPlan], pd.DataFrame] = {}
+
+    def _predicate(self, sheet_name: str, name: str, value, build) -> np.ndarray:
+        """Máscara de um único predicado, calculada uma vez por aba e valor"""
+        key = (sheet_name, name, value)
+        mask = self._masks.get(key)
+        if mask is None:
+            mask = build(self.snapshot.coded_columns(sheet_name))
+            self._masks[key] = mask
+        return mask
+
+    def mask(self, sheet_name: str, plan: Optional[FilterPlan] = None) -> np.ndarray:
+        """
+        Máscara booleana das linhas da aba que atendem ao plano
+
+        Args:
+            sheet_name: Nome da aba
+            plan: Plano a avaliar (padrão: o plano da sidebar)
+
+        Returns:
+            Array booleano alinhado às linhas da aba no snapshot
+        """
+        mask = None
+        for name, value, build in plan_predicates(plan or self.plan, sheet_name):
+            predicate = self._predicate(sheet_name, name, value, build)
+            mask = predicate if mask is None else mask & predicate
+        return mask
+
+    def frame(self, sheet_name: str, plan: Optional[FilterPlan] = None) -> pd.DataFrame:
+        """
+        Linhas da aba que atendem ao plano (mesmo objeto em chamadas repetidas)
+
+        Args:
+            sheet_name: Nome da aba
+            plan: Plano a avaliar (padrão: o plano da sidebar)
+
+        Returns:
+            DataFrame filtrado, com os rótulos de linha originais
+        """
+        plan = plan or self.plan
+        key = (sheet_name, plan)
+        result = self._frames.get(key)
+        if result is None:
+            df = self.snapshot.get(sheet_name, copy=False)
+            result = df[self.mask(sheet_name, plan)] if not df.empty else df.copy()
+            self._frames[key] = result
+        return result
+
+    def previous(self, sheet_name: str) -> Optional[pd.DataFrame]:
+        """Linhas do mês anterior ao selecionado (None se a comparação não se aplica)"""
+        previous_plan = self.plan.previous_period()
+        return self.frame(sheet_name, previous_plan) if previous_plan else None
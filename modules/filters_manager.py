@@ -8,10 +8,15 @@ import streamlit as st
 import pandas as pd
 from datetime import datetime, date
 from modules.data_manager import data_manager  # Importação local para evitar dependência circular
+from modules.date_index import DateSortedView
+from modules.lru_cache import LRUCache
+from config.settings import CACHE_CONFIG
 
 class FiltersManager:
     def __init__(self):
         self.excel_file = "Base_financas.xlsx"
+        # Resultados filtrados por (aba, versão da aba, filtros normalizados)
+        self._filter_cache = LRUCache(CACHE_CONFIG["max_entries"], CACHE_CONFIG["ttl"])
     
     def setup_sidebar_filters(self):
         """Configura os filtros na sidebar e gerencia o estado usando st.session_state."""
@@ -81,66 +86,53 @@ class FiltersManager:
     def get_available_categories(self):
         """Obtém as categorias disponíveis no arquivo Excel"""
         try:
-            # Carregar dados usando o data_manager para consistência
-            receitas = data_manager.load_excel_data("Receitas")
-            despesas = data_manager.load_excel_data("Despesas")
-            
-            categorias_receitas = receitas["CATEGORIA"].dropna().unique().tolist() if not receitas.empty and "CATEGORIA" in receitas.columns else []
-            categorias_despesas = despesas["CATEGORIA"].dropna().unique().tolist() if not despesas.empty and "CATEGORIA" in despesas.columns else []
+            # Vocabulário mantido pelo data_manager (sem varrer as abas a cada execução)
+            categorias_receitas = data_manager.get_vocabulary("Receitas", "CATEGORIA")
+            categorias_despesas = data_manager.get_vocabulary("Despesas", "CATEGORIA")
             
             # Combinar, remover duplicatas e ordenar
-            todas_categorias = sorted(list(set(categorias_receitas + categorias_despesas)))
+            todas_categorias = sorted(set(categorias_receitas) | set(categorias_despesas))
             return todas_categorias
         except Exception as e:
             st.error(f"Erro ao carregar categorias: {e}")
             return []
     
+    # Meses recuados a partir da data mais recente em cada opção de período
+    PERIODO_MESES = {"Último mês": 1, "Últimos 3 meses": 3, "Últimos 6 meses": 6, "Último ano": 12}
+
     def apply_filters_to_data(self, data, filters):
-        """Aplica os filtros aos dados"""
-        if data.empty:
-            return data
-        
-        filtered_data = data.copy()
-        
-        if "DATA" not in filtered_data.columns:
-            return filtered_data 
-            
-        filtered_data["DATA"] = pd.to_datetime(filtered_data["DATA"], errors='coerce')
-        filtered_data.dropna(subset=["DATA"], inplace=True)
+        """
+        Aplica os filtros aos dados
 
-        if filtered_data.empty:
-            return filtered_data
+        Args:
+            data: DataFrame da aba ou, preferencialmente, a visão ordenada por data
+                do snapshot (snapshot.date_view), que responde aos intervalos com
+                busca binária em vez de varrer e copiar a aba a cada execução
+            filters: Filtros retornados por setup_sidebar_filters
 
-        # Define a data de referência como a data mais recente nos dados, com fallback para hoje
-        today = filtered_data["DATA"].max() if not filtered_data.empty else datetime.now()
+        Returns:
+            DataFrame filtrado, ordenado por DATA
+        """
+        view = data if isinstance(data, DateSortedView) else DateSortedView(data)
+        if not view.has_dates or view.frame.empty:
+            return view.frame.copy()
+
+        # Define a data de referência como a data mais recente nos dados
+        today = view.max_date
 
         # Filtro de período
-        if filters["periodo"] != "Todos":
-            if filters["periodo"] == "Último mês":
-                data_limite = today - pd.DateOffset(months=1)
-                filtered_data = filtered_data[filtered_data["DATA"] >= data_limite]
-            elif filters["periodo"] == "Últimos 3 meses":
-                data_limite = today - pd.DateOffset(months=3)
-                filtered_data = filtered_data[filtered_data["DATA"] >= data_limite]
-            elif filters["periodo"] == "Últimos 6 meses":
-                data_limite = today - pd.DateOffset(months=6)
-                filtered_data = filtered_data[filtered_data["DATA"] >= data_limite]
-            elif filters["periodo"] == "Último ano":
-                data_limite = today - pd.DateOffset(years=1)
-                filtered_data = filtered_data[filtered_data["DATA"] >= data_limite]
-            elif filters["periodo"] == "Personalizado":
-                data_inicio = pd.to_datetime(filters.get("data_inicio"))
-                data_fim = pd.to_datetime(filters.get("data_fim"))
-                if data_inicio and data_fim:
-                    filtered_data = filtered_data[
-                        (filtered_data["DATA"] >= data_inicio) &
-                        (filtered_data["DATA"] <= data_fim)
-                    ]
-        
+        data_inicio, data_fim = None, None
+        if filters["periodo"] in self.PERIODO_MESES:
+            data_inicio = today - pd.DateOffset(months=self.PERIODO_MESES[filters["periodo"]])
+        elif filters["periodo"] == "Personalizado":
+            data_inicio = pd.to_datetime(filters.get("data_inicio"))
+            data_fim = pd.to_datetime(filters.get("data_fim"))
+            if not (data_inicio and data_fim):
+                data_inicio, data_fim = None, None
+
         # Filtro de categoria
-        if filters["categoria"] != "Todas" and "CATEGORIA" in filtered_data.columns:
-            filtered_data = filtered_data[filtered_data["CATEGORIA"] == filters["categoria"]]
-        
+        categoria = filters["categoria"] if filters["categoria"] != "Todas" else None
+
         # Filtro de valor
         # if filters.get("valor_min") is not None and filters.get("valor_max") is not None:
         #     if "VALOR" in filtered_data.columns:
@@ -148,8 +140,41 @@ class FiltersManager:
         #             (filtered_data["VALOR"] >= filters["valor_min"]) &
         #             (filtered_data["VALOR"] <= filters["valor_max"])
         #         ]
-        
-        return filtered_data
+
+        return view.select(data_inicio, data_fim, categoria)
+
+    def normalize_filters(self, filters):
+        """
+        Reduz os filtros aos valores que alteram o resultado de apply_filters_to_data
+
+        As datas só contam no período "Personalizado"; valor_min/valor_max não
+        são aplicados. Assim, filtros equivalentes compartilham a mesma chave.
+        """
+        periodo = filters.get("periodo", "Todos")
+        datas = (str(filters.get("data_inicio")), str(filters.get("data_fim"))) if periodo == "Personalizado" else None
+        return (periodo, datas, filters.get("categoria", "Todas"))
+
+    def filter_sheet(self, snapshot, sheet_name, filters):
+        """
+        Aplica os filtros a uma aba do snapshot, reaproveitando resultados anteriores
+
+        Trocar de página ou interagir com outros widgets sem mudar a aba nem a
+        sidebar devolve o resultado já calculado. O cache é limitado por
+        CACHE_CONFIG (max_entries e ttl).
+
+        Args:
+            snapshot: WorkbookSnapshot da versão atual da planilha
+            sheet_name: Nome da aba
+            filters: Filtros retornados por setup_sidebar_filters
+
+        Returns:
+            DataFrame filtrado (cópia rasa; alterações não afetam o cache)
+        """
+        key = (sheet_name, snapshot.version(sheet_name), self.normalize_filters(filters))
+        result = self._filter_cache.get_or_compute(
+            key, lambda: self.apply_filters_to_data(snapshot.date_view(sheet_name), filters)
+        )
+        return result.copy(deep=False)
 
 # Instância global
 filters_manager = FiltersManager() 
\ No newline at end of file
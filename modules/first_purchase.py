@@ -0,0 +1,105 @@
+"""
+Índice da primeira compra de cada cliente (aba Vendas)
+
+Guarda a data da primeira compra por cliente e essas datas ordenadas, de modo
+que a contagem de novos clientes de qualquer janela é uma busca binária, e a
+série de novos clientes por mês sai do índice inteiro de uma só vez. O índice
+é montado uma vez por versão da aba (o snapshot o guarda) e, quando a nova
+versão só tem vendas inseridas, é derivado do anterior (apply) sem reler o
+histórico.
+"""
+
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+CLIENT_COLUMNS = ("CLIENTE", "Cliente")
+DATE_COLUMNS = ("DATA", "Data")
+
+
+def _first_column(df: pd.DataFrame, names) -> Optional[str]:
+    return next((name for name in names if name in df.columns), None)
+
+
+def _to_datetime64(value) -> np.datetime64:
+    return pd.Timestamp(value).to_datetime64()
+
+
+class FirstPurchaseIndex:
+    """Data da primeira compra por cliente, com as datas ordenadas para buscas por janela"""
+
+    def __init__(self, df: pd.DataFrame):
+        """
+        Monta o índice
+
+        Args:
+            df: DataFrame de vendas (colunas CLIENTE/Cliente e DATA/Data)
+        """
+        self.client_col = _first_column(df, CLIENT_COLUMNS)
+        self.date_col = _first_column(df, DATE_COLUMNS)
+        self._set(self._first_dates(df))
+
+    def _first_dates(self, df: Optional[pd.DataFrame]) -> pd.Series:
+        """Menor data por cliente (clientes sem data válida ficam de fora)"""
+        if df is None or df.empty or not self.client_col or not self.date_col:
+            return pd.Series(dtype="datetime64[ns]")
+        dates = pd.to_datetime(df[self.date_col], errors="coerce")
+        return dates.groupby(df[self.client_col]).min().dropna()
+
+    def _set(self, first: pd.Series):
+        self.first = first
+        self._sorted = np.sort(first.to_numpy(dtype="datetime64[ns]"))
+
+    def __len__(self) -> int:
+        return len(self.first)
+
+    def apply(self, added: pd.DataFrame) -> "FirstPurchaseIndex":
+        """
+        Índice da versão seguinte da aba, com vendas inseridas
+
+        O índice atual não é alterado (pode estar em uso por outro snapshot).
+
+        Args:
+            added: Linhas inseridas na aba
+
+        Returns:
+            Novo FirstPurchaseIndex
+        """
+        index = object.__new__(FirstPurchaseIndex)
+        index.client_col, index.date_col = self.client_col, self.date_col
+        new_first = self._first_dates(added)
+        if new_first.empty:
+            index._set(self.first)
+        else:
+            index._set(pd.concat([self.first, new_first]).groupby(level=0).min())
+        return index
+
+    def count_between(self, start, end) -> int:
+        """Número de clientes cuja primeira compra está em [start, end]"""
+        lo = np.searchsorted(self._sorted, _to_datetime64(start), side="left")
+        hi = np.searchsorted(self._sorted, _to_datetime64(end), side="right")
+        return int(max(hi - lo, 0))
+
+    def new_customers(self, clients: Iterable, start, end) -> int:
+        """
+        Número de clientes da lista cuja primeira compra está em [start, end]
+
+        Args:
+            clients: Clientes das vendas do período (com repetições)
+            start: Início da janela
+            end: Fim da janela (inclusive)
+
+        Returns:
+            Quantidade de novos clientes
+        """
+        first = self.first.reindex(pd.Series(clients).dropna().unique())
+        return int(first.between(pd.Timestamp(start), pd.Timestamp(end)).sum())
+
+    def monthly_counts(self) -> pd.Series:
+        """Novos clientes por mês (índice PERÍODO, em ordem cronológica)"""
+        if self.first.empty:
+            return pd.Series(dtype="int64", name="Novos Clientes")
+        counts = self.first.dt.to_period("M").value_counts().sort_index()
+        counts.index.name = "PERÍODO"
+        return counts.rename("Novos Clientes")
@@ -8,6 +8,7 @@ import streamlit as st
 import pandas as pd
 from datetime import datetime, date
 from modules.data_manager import data_manager
+from modules.record_options import format_brl_series
 from utils.formatters import format_currency, format_date
 import uuid
 
@@ -18,12 +19,9 @@ class FormsManager:
         self.excel_file = "Base_financas.xlsx"
     
     def _get_dynamic_options(self, sheet_name, column_name):
-        """Carrega opções dinamicamente de uma aba específica da planilha."""
+        """Carrega opções dinamicamente de uma aba específica da planilha (vocabulário do DataManager)."""
         try:
-            df = data_manager.load_excel_data(sheet_name)
-            if df is not None and column_name in df.columns:
-                return [""] + sorted(df[column_name].dropna().unique().tolist())
-            return [""]
+            return [""] + list(data_manager.get_vocabulary(sheet_name, column_name))
         except Exception:
             return [""]
 
@@ -40,20 +38,14 @@ class FormsManager:
         if not category:
             return ["--- Selecione uma Categoria ---"]
         try:
-            df = data_manager.load_excel_data("Despesas Categoria")
-            if category in df.columns:
-                return [""] + sorted(df[category].dropna().unique().tolist())
-            return [""]
+            return [""] + list(data_manager.get_vocabulary("Despesas Categoria", category))
         except Exception:
             return [""]
 
     def _get_dynamic_descriptions(self, categoria):
         """Carrega descrições da aba 'Despesas Categoria' para a categoria selecionada."""
         try:
-            df = pd.read_excel(self.excel_file, sheet_name="Despesas Categoria")
-            if categoria in df.columns:
-                return [d for d in df[categoria].dropna().unique() if str(d).strip() != ""]
-            return []
+            return [d for d in data_manager.get_vocabulary("Despesas Categoria", categoria) if str(d).strip() != ""]
         except Exception:
             return []
 
@@ -74,9 +66,7 @@ class FormsManager:
         descricoes_teste = []
         if (selected_categoria and selected_categoria.strip() and selected_categoria != "--- Digitar Nova Categoria ---"):
             try:
-                df_cat = pd.read_excel(self.excel_file, sheet_name="Despesas Categoria")
-                if selected_categoria in df_cat.columns:
-                    descricoes_teste = [d for d in df_cat[selected_categoria].dropna().unique() if str(d).strip() != ""]
+                descricoes_teste = self._get_dynamic_descriptions(selected_categoria)
             except Exception as e:
                 st.warning(f"Erro ao carregar descrições da planilha: {e}")
         if not descricoes_teste:
@@ -254,11 +244,8 @@ class FormsManager:
     def _get_categories(self, sheet_name):
         """Obtém categorias disponíveis de uma aba"""
         try:
-            df = data_manager.load_excel_data(sheet_name)
-            if not df.empty and "CATEGORIA" in df.columns:
-                categorias = df["CATEGORIA"].dropna().unique().tolist()
-                return sorted(categorias) if categorias else ["Outros"]
-            return ["Outros"]
+            categorias = list(data_manager.get_vocabulary(sheet_name, "CATEGORIA"))
+            return categorias if categorias else ["Outros"]
         except:
             return ["Outros"]
     
@@ -289,18 +276,9 @@ class FormsManager:
             if not all([data_dict["DESCRIÇÃO"], data_dict["CATEGORIA"], data_dict["VALOR"] != 0]):
                 return False
                 
-            df = data_manager.load_excel_data("Despesas")
-            
-            # Garante que todas as colunas do dicionário existam no DataFrame
-            for col in data_dict.keys():
-                if col not in df.columns:
-                    # Adiciona a coluna com um valor padrão se não existir
-                    df[col] = pd.NA 
-
+            # Colunas do dicionário que ainda não existem na aba são criadas pelo append
             new_row = pd.DataFrame([data_dict])
-            df = pd.concat([df, new_row], ignore_index=True)
-            
-            return data_manager.save_data(df, "Despesas")
+            return data_manager.append_rows(new_row, "Despesas")
             
         except Exception as e:
             st.error(f"Erro técnico ao salvar despesa: {e}")
@@ -309,8 +287,6 @@ class FormsManager:
     def _save_revenue(self, data, descricao, categoria, valor):
         """Salva nova receita"""
         try:
-            df = data_manager.load_excel_data("Receitas")
-            
             nova_receita = {
                 "DATA": data,
                 "DESCRICAO": descricao,
@@ -318,8 +294,7 @@ class FormsManager:
                 "VALOR": abs(valor)
             }
             
-            df = pd.concat([df, pd.DataFrame([nova_receita])], ignore_index=True)
-            return data_manager.save_data(df, "Receitas")
+            return data_manager.append_rows(pd.DataFrame([nova_receita]), "Receitas")
             
         except Exception as e:
             st.error(f"Erro ao salvar receita: {e}")
@@ -328,8 +303,6 @@ class FormsManager:
     def _save_sale(self, data, cliente, produto, valor, forma_pagamento, observacoes):
         """Salva nova venda"""
         try:
-            df = data_manager.load_excel_data("Vendas")
-            
             nova_venda = {
                 "DATA": data,
                 "Cliente": cliente,
@@ -339,8 +312,7 @@ class FormsManager:
                 "OBSERVACOES": observacoes
             }
             
-            df = pd.concat([df, pd.DataFrame([nova_venda])], ignore_index=True)
-            return data_manager.save_data(df, "Vendas")
+            return data_manager.append_rows(pd.DataFrame([nova_venda]), "Vendas")
             
         except Exception as e:
             st.error(f"Erro ao salvar venda: {e}")
@@ -349,8 +321,6 @@ class FormsManager:
     def _save_investment(self, data, ativo, valor_aporte, tipo_investimento, observacoes):
         """Salva novo investimento"""
         try:
-            df = data_manager.load_excel_data("Investimentos")
-            
             novo_investimento = {
                 "DATA": data,
                 "ATIVO": ativo,
@@ -359,8 +329,7 @@ class FormsManager:
                 "OBSERVACOES": observacoes
             }
             
-            df = pd.concat([df, pd.DataFrame([novo_investimento])], ignore_index=True)
-            return data_manager.save_data(df, "Investimentos")
+            return data_manager.append_rows(pd.DataFrame([novo_investimento]), "Investimentos")
             
         except Exception as e:
             st.error(f"Erro ao salvar investimento: {e}")
@@ -369,8 +338,6 @@ class FormsManager:
     def _save_credit_card(self, data, descricao, categoria, valor, cartao, parcelas, observacoes):
         """Salva nova despesa no cartão de crédito"""
         try:
-            df = data_manager.load_excel_data("Div_CC")
-            
             nova_despesa_cc = {
                 "DATA": data,
                 "DESCRICAO": descricao,
@@ -381,8 +348,7 @@ class FormsManager:
                 "OBSERVACOES": observacoes
             }
             
-            df = pd.concat([df, pd.DataFrame([nova_despesa_cc])], ignore_index=True)
-            return data_manager.save_data(df, "Div_CC")
+            return data_manager.append_rows(pd.DataFrame([nova_despesa_cc]), "Div_CC")
             
         except Exception as e:
             st.error(f"Erro ao salvar despesa no cartão: {e}")
@@ -395,16 +361,13 @@ class FormsManager:
             st.warning("Não há despesas para editar.")
             return
 
-        # Criar uma representação legível para cada despesa no selectbox
-        df_despesas['display'] = df_despesas.apply(
-            lambda row: f"{row['DATA'].strftime('%d/%m/%y')} - {row['DESCRIÇÃO']} - R$ {-row['VALOR']:.2f}",
-            axis=1
-        )
-        options = ["Selecione uma despesa para editar"] + df_despesas['display'].tolist()
+        # Criar uma representação legível para cada despesa no selectbox (rótulos em cache por versão)
+        opcoes = data_manager.get_record_options("Despesas", df_despesas)
+        options = ["Selecione uma despesa para editar"] + opcoes.labels
         selected_display = st.selectbox("Selecione a Despesa", options=options, index=0)
 
         if selected_display != "Selecione uma despesa para editar":
-            selected_index = df_despesas[df_despesas['display'] == selected_display].index[0]
+            selected_index = opcoes.row_for(selected_display)
             record_to_edit = df_despesas.loc[selected_index]
 
             # Destaque visual na tabela (ajustado para tema escuro)
@@ -450,7 +413,9 @@ class FormsManager:
                             "FAVORECIDO": favorecido, "CONTA": conta, "FORMA DE PAGAMENTO": forma_pagamento,
                             "VALOR": -abs(valor), "PAGO": 1 if pago else 0
                         }
-                        success, message = crud_system.update_record("Despesas", selected_index, updated_data)
+                        record_id = df_despesas.at[selected_index, "id"]
+                        success, message = crud_system.update_record_by_id("Despesas", record_id, updated_data,
+                                                                             opcoes.seen_rows([record_id]))
                         if success:
                             st.success("✅ Despesa atualizada com sucesso!")
                             st.session_state['show_edit_Despesas'] = False
@@ -471,21 +436,19 @@ class FormsManager:
             st.warning("Não há despesas para excluir.")
             return
 
-        df_despesas['display'] = df_despesas.apply(
-            lambda row: f"{row['DATA'].strftime('%d/%m/%y')} - {row['DESCRIÇÃO']} - R$ {-row['VALOR']:.2f}",
-            axis=1
-        )
-        options = ["Selecione uma despesa para excluir"] + df_despesas['display'].tolist()
+        opcoes = data_manager.get_record_options("Despesas", df_despesas)
+        options = ["Selecione uma despesa para excluir"] + opcoes.labels
         
         selected_display = st.selectbox("Selecione a Despesa para Excluir", options=options, index=0)
 
         if selected_display != "Selecione uma despesa para excluir":
-            selected_index = df_despesas[df_despesas['display'] == selected_display].index[0]
+            selected_index = opcoes.row_for(selected_display)
             
             st.warning(f"**Atenção!** Você tem certeza que deseja excluir permanentemente a despesa **'{selected_display}'**?")
             
             if st.button("🗑️ Sim, Excluir Permanentemente", type="primary"):
-                success, message = crud_system.delete_record("Despesas", selected_index)
+                record_id = df_despesas.at[selected_index, "id"]
+                success, message = crud_system.delete_records_by_id("Despesas", [record_id], opcoes.seen_rows([record_id]))
                 if success:
                     st.success("✅ Despesa excluída com sucesso!")
                     st.session_state['show_delete_Despesas'] = False
@@ -506,10 +469,11 @@ class FormsManager:
             st.warning("Não há despesas para excluir.")
             return
 
+        opcoes = data_manager.get_record_options("Despesas", df_despesas)
         with st.form("bulk_delete_form"):
             df_display = df_despesas.copy()
             df_display["DATA"] = pd.to_datetime(df_display["DATA"]).dt.strftime('%d/%m/%Y')
-            df_display["VALOR"] = df_display["VALOR"].apply(lambda x: f"R$ {-x:,.2f}")
+            df_display["VALOR"] = format_brl_series(df_display["VALOR"], absolute=True)
             
             # Usando st.data_editor para adicionar checkboxes
             df_display['Selecionar'] = False
@@ -529,7 +493,8 @@ class FormsManager:
                     st.warning("Nenhuma despesa foi selecionada.")
                     return
 
-                success, message = crud_system.delete_multiple_records("Despesas", indices_to_delete)
+                ids = df_despesas.loc[indices_to_delete, "id"].tolist()
+                success, message = crud_system.delete_records_by_id("Despesas", ids, opcoes.seen_rows(ids))
 
                 if success:
                     st.success(f"✅ {len(indices_to_delete)} despesa(s) excluída(s) com sucesso!")
@@ -550,7 +515,8 @@ class FormsManager:
             return
         
         df_vendas = df_vendas.reset_index(drop=True)
-        idx = st.selectbox("Selecione a venda para editar:", df_vendas.index, format_func=lambda i: f"{df_vendas.at[i, 'DATA']} - {df_vendas.at[i, 'Cliente']} - {format_currency(df_vendas.at[i, 'VALOR'])}")
+        opcoes = data_manager.get_record_options("Vendas", df_vendas)
+        idx = opcoes.row_for(st.selectbox("Selecione a venda para editar:", opcoes.labels))
         venda = df_vendas.loc[idx]
         
         with st.form("edit_sale_form", clear_on_submit=True):
@@ -570,7 +536,8 @@ class FormsManager:
                     "Forma_Pagamento": forma_pagamento,
                     "Observações": observacoes
                 }
-                sucesso = crud_system.update_record("Vendas", idx, novos_dados)
+                sucesso, _ = crud_system.update_record_by_id("Vendas", df_vendas.at[idx, "id"], novos_dados,
+                                                              opcoes.seen_rows([df_vendas.at[idx, "id"]]))
                 if sucesso:
                     st.success("Venda atualizada com sucesso!")
                     data_manager.clear_cache()
@@ -585,13 +552,14 @@ class FormsManager:
             return
         
         df_vendas = df_vendas.reset_index(drop=True)
-        idx = st.selectbox("Selecione a venda para excluir:", df_vendas.index, format_func=lambda i: f"{df_vendas.at[i, 'DATA']} - {df_vendas.at[i, 'Cliente']} - {format_currency(df_vendas.at[i, 'VALOR'])}")
+        opcoes = data_manager.get_record_options("Vendas", df_vendas)
+        idx = opcoes.row_for(st.selectbox("Selecione a venda para excluir:", opcoes.labels))
         venda = df_vendas.loc[idx]
         st.write(f"**Cliente:** {venda.get('Cliente', '')}")
         st.write(f"**Produto:** {venda.get('Produto', '')}")
         st.write(f"**Valor:** {format_currency(venda.get('VALOR', 0))}")
         if st.button("Confirmar Exclusão", type="primary"):
-            sucesso = crud_system.delete_record("Vendas", idx)
+            sucesso, _ = crud_system.delete_records_by_id("Vendas", [df_vendas.at[idx, "id"]], opcoes.seen_rows([df_vendas.at[idx, "id"]]))
             if sucesso:
                 st.success("Venda excluída com sucesso!")
                 data_manager.clear_cache()
@@ -606,12 +574,11 @@ class FormsManager:
             return
         
         df_vendas = df_vendas.reset_index(drop=True)
-        indices = st.multiselect("Selecione as vendas para excluir:", df_vendas.index, format_func=lambda i: f"{df_vendas.at[i, 'DATA']} - {df_vendas.at[i, 'Cliente']} - {format_currency(df_vendas.at[i, 'VALOR'])}")
-        if st.button("Excluir Selecionadas", type="primary") and indices:
-            sucesso = True
-            for idx in sorted(indices, reverse=True):
-                if not crud_system.delete_record("Vendas", idx):
-                    sucesso = False
+        opcoes = data_manager.get_record_options("Vendas", df_vendas)
+        selecionados = st.multiselect("Selecione as vendas para excluir:", opcoes.labels)
+        if st.button("Excluir Selecionadas", type="primary") and selecionados:
+            ids = opcoes.ids_for(selecionados)
+            sucesso, _ = crud_system.delete_records_by_id("Vendas", ids, opcoes.seen_rows(ids))
             if sucesso:
                 st.success("Vendas excluídas com sucesso!")
                 data_manager.clear_cache()
@@ -626,7 +593,8 @@ class FormsManager:
             return
         
         df_receitas = df_receitas.reset_index(drop=True)
-        idx = st.selectbox("Selecione a receita para editar:", df_receitas.index, format_func=lambda i: f"{df_receitas.at[i, 'DATA']} - {df_receitas.at[i, 'DESCRIÇÃO']} - {format_currency(df_receitas.at[i, 'VALOR'])}")
+        opcoes = data_manager.get_record_options("Receitas", df_receitas)
+        idx = opcoes.row_for(st.selectbox("Selecione a receita para editar:", opcoes.labels))
         receita = df_receitas.loc[idx]
         
         with st.form("edit_revenue_form", clear_on_submit=True):
@@ -642,7 +610,8 @@ class FormsManager:
                     "CATEGORIA": categoria,
                     "VALOR": valor
                 }
-                sucesso = crud_system.update_record("Receitas", idx, novos_dados)
+                sucesso, _ = crud_system.update_record_by_id("Receitas", df_receitas.at[idx, "id"], novos_dados,
+                                                              opcoes.seen_rows([df_receitas.at[idx, "id"]]))
                 if sucesso:
                     st.success("Receita atualizada com sucesso!")
                     data_manager.clear_cache()
@@ -657,13 +626,14 @@ class FormsManager:
             return
         
         df_receitas = df_receitas.reset_index(drop=True)
-        idx = st.selectbox("Selecione a receita para excluir:", df_receitas.index, format_func=lambda i: f"{df_receitas.at[i, 'DATA']} - {df_receitas.at[i, 'DESCRIÇÃO']} - {format_currency(df_receitas.at[i, 'VALOR'])}")
+        opcoes = data_manager.get_record_options("Receitas", df_receitas)
+        idx = opcoes.row_for(st.selectbox("Selecione a receita para excluir:", opcoes.labels))
         receita = df_receitas.loc[idx]
         st.write(f"**Descrição:** {receita.get('DESCRIÇÃO', '')}")
         st.write(f"**Categoria:** {receita.get('CATEGORIA', '')}")
         st.write(f"**Valor:** {format_currency(receita.get('VALOR', 0))}")
         if st.button("Confirmar Exclusão", type="primary"):
-            sucesso = crud_system.delete_record("Receitas", idx)
+            sucesso, _ = crud_system.delete_records_by_id("Receitas", [df_receitas.at[idx, "id"]], opcoes.seen_rows([df_receitas.at[idx, "id"]]))
             if sucesso:
                 st.success("Receita excluída com sucesso!")
                 data_manager.clear_cache()
@@ -678,12 +648,11 @@ class FormsManager:
             return
         
         df_receitas = df_receitas.reset_index(drop=True)
-        indices = st.multiselect("Selecione as receitas para excluir:", df_receitas.index, format_func=lambda i: f"{df_receitas.at[i, 'DATA']} - {df_receitas.at[i, 'DESCRIÇÃO']} - {format_currency(df_receitas.at[i, 'VALOR'])}")
-        if st.button("Excluir Selecionadas", type="primary") and indices:
-            sucesso = True
-            for idx in sorted(indices, reverse=True):
-                if not crud_system.delete_record("Receitas", idx):
-                    sucesso = False
+        opcoes = data_manager.get_record_options("Receitas", df_receitas)
+        selecionados = st.multiselect("Selecione as receitas para excluir:", opcoes.labels)
+        if st.button("Excluir Selecionadas", type="primary") and selecionados:
+            ids = opcoes.ids_for(selecionados)
+            sucesso, _ = crud_system.delete_records_by_id("Receitas", ids, opcoes.seen_rows(ids))
             if sucesso:
                 st.success("Receitas excluídas com sucesso!")
                 data_manager.clear_cache()
@@ -698,7 +667,8 @@ class FormsManager:
             return
         
         df_cc = df_cc.reset_index(drop=True)
-        idx = st.selectbox("Selecione a despesa para editar:", df_cc.index, format_func=lambda i: f"{df_cc.at[i, 'DATA']} - {df_cc.at[i, 'DESCRIÇÃO']} - {format_currency(df_cc.at[i, 'VALOR'])}")
+        opcoes = data_manager.get_record_options("Div_CC", df_cc)
+        idx = opcoes.row_for(st.selectbox("Selecione a despesa para editar:", opcoes.labels))
         cc_item = df_cc.loc[idx]
         
         with st.form("edit_credit_card_form", clear_on_submit=True):
@@ -716,7 +686,8 @@ class FormsManager:
                     "VALOR": valor,
                     "CARTAO": cartao
                 }
-                sucesso = crud_system.update_record("Div_CC", idx, novos_dados)
+                sucesso, _ = crud_system.update_record_by_id("Div_CC", df_cc.at[idx, "id"], novos_dados,
+                                                              opcoes.seen_rows([df_cc.at[idx, "id"]]))
                 if sucesso:
                     st.success("Despesa no cartão atualizada com sucesso!")
                     data_manager.clear_cache()
@@ -731,14 +702,15 @@ class FormsManager:
             return
         
         df_cc = df_cc.reset_index(drop=True)
-        idx = st.selectbox("Selecione a despesa para excluir:", df_cc.index, format_func=lambda i: f"{df_cc.at[i, 'DATA']} - {df_cc.at[i, 'DESCRIÇÃO']} - {format_currency(df_cc.at[i, 'VALOR'])}")
+        opcoes = data_manager.get_record_options("Div_CC", df_cc)
+        idx = opcoes.row_for(st.selectbox("Selecione a despesa para excluir:", opcoes.labels))
         cc_item = df_cc.loc[idx]
         st.write(f"**Descrição:** {cc_item.get('DESCRIÇÃO', '')}")
         st.write(f"**Categoria:** {cc_item.get('CATEGORIA', '')}")
         st.write(f"**Cartão:** {cc_item.get('CARTAO', '')}")
         st.write(f"**Valor:** {format_currency(cc_item.get('VALOR', 0))}")
         if st.button("Confirmar Exclusão", type="primary"):
-            sucesso = crud_system.delete_record("Div_CC", idx)
+            sucesso, _ = crud_system.delete_records_by_id("Div_CC", [df_cc.at[idx, "id"]], opcoes.seen_rows([df_cc.at[idx, "id"]]))
             if sucesso:
                 st.success("Despesa no cartão excluída com sucesso!")
                 data_manager.clear_cache()
@@ -753,12 +725,11 @@ class FormsManager:
             return
         
         df_cc = df_cc.reset_index(drop=True)
-        indices = st.multiselect("Selecione as despesas para excluir:", df_cc.index, format_func=lambda i: f"{df_cc.at[i, 'DATA']} - {df_cc.at[i, 'DESCRIÇÃO']} - {format_currency(df_cc.at[i, 'VALOR'])}")
-        if st.button("Excluir Selecionadas", type="primary") and indices:
-            sucesso = True
-            for idx in sorted(indices, reverse=True):
-                if not crud_system.delete_record("Div_CC", idx):
-                    sucesso = False
+        opcoes = data_manager.get_record_options("Div_CC", df_cc)
+        selecionados = st.multiselect("Selecione as despesas para excluir:", opcoes.labels)
+        if st.button("Excluir Selecionadas", type="primary") and selecionados:
+            ids = opcoes.ids_for(selecionados)
+            sucesso, _ = crud_system.delete_records_by_id("Div_CC", ids, opcoes.seen_rows(ids))
             if sucesso:
                 st.success("Despesas no cartão excluídas com sucesso!")
                 data_manager.clear_cache()
@@ -773,7 +744,8 @@ class FormsManager:
             return
         
         df_investimentos = df_investimentos.reset_index(drop=True)
-        idx = st.selectbox("Selecione o investimento para editar:", df_investimentos.index, format_func=lambda i: f"{df_investimentos.at[i, 'DATA']} - {df_investimentos.at[i, 'ATIVO']} - {format_currency(df_investimentos.at[i, 'VALOR_APORTE'])}")
+        opcoes = data_manager.get_record_options("Investimentos", df_investimentos)
+        idx = opcoes.row_for(st.selectbox("Selecione o investimento para editar:", opcoes.labels))
         investimento = df_investimentos.loc[idx]
         
         with st.form("edit_investment_form", clear_on_submit=True):
@@ -791,7 +763,8 @@ class FormsManager:
                     "TIPO_INVESTIMENTO": tipo_investimento,
                     "OBSERVACOES": observacoes
                 }
-                sucesso = crud_system.update_record("Investimentos", idx, novos_dados)
+                sucesso, _ = crud_system.update_record_by_id("Investimentos", df_investimentos.at[idx, "id"], novos_dados,
+                                                              opcoes.seen_rows([df_investimentos.at[idx, "id"]]))
                 if sucesso:
                     st.success("Investimento atualizado com sucesso!")
                     data_manager.clear_cache()
@@ -806,13 +779,14 @@ class FormsManager:
             return
         
         df_investimentos = df_investimentos.reset_index(drop=True)
-        idx = st.selectbox("Selecione o investimento para excluir:", df_investimentos.index, format_func=lambda i: f"{df_investimentos.at[i, 'DATA']} - {df_investimentos.at[i, 'ATIVO']} - {format_currency(df_investimentos.at[i, 'VALOR_APORTE'])}")
+        opcoes = data_manager.get_record_options("Investimentos", df_investimentos)
+        idx = opcoes.row_for(st.selectbox("Selecione o investimento para excluir:", opcoes.labels))
         investimento = df_investimentos.loc[idx]
         st.write(f"**Ativo:** {investimento.get('ATIVO', '')}")
         st.write(f"**Tipo:** {investimento.get('TIPO_INVESTIMENTO', '')}")
         st.write(f"**Valor:** {format_currency(investimento.get('VALOR_APORTE', 0))}")
         if st.button("Confirmar Exclusão", type="primary"):
-            sucesso = crud_system.delete_record("Investimentos", idx)
+            sucesso, _ = crud_system.delete_records_by_id("Investimentos", [df_investimentos.at[idx, "id"]], opcoes.seen_rows([df_investimentos.at[idx, "id"]]))
             if sucesso:
                 st.success("Investimento excluído com sucesso!")
                 data_manager.clear_cache()
@@ -827,12 +801,11 @@ class FormsManager:
             return
         
         df_investimentos = df_investimentos.reset_index(drop=True)
-        indices = st.multiselect("Selecione os investimentos para excluir:", df_investimentos.index, format_func=lambda i: f"{df_investimentos.at[i, 'DATA']} - {df_investimentos.at[i, 'ATIVO']} - {format_currency(df_investimentos.at[i, 'VALOR_APORTE'])}")
-        if st.button("Excluir Selecionados", type="primary") and indices:
-            sucesso = True
-            for idx in sorted(indices, reverse=True):
-                if not crud_system.delete_record("Investimentos", idx):
-                    sucesso = False
+        opcoes = data_manager.get_record_options("Investimentos", df_investimentos)
+        selecionados = st.multiselect("Selecione os investimentos para excluir:", opcoes.labels)
+        if st.button("Excluir Selecionados", type="primary") and selecionados:
+            ids = opcoes.ids_for(selecionados)
+            sucesso, _ = crud_system.delete_records_by_id("Investimentos", ids, opcoes.seen_rows(ids))
             if sucesso:
                 st.success("Investimentos excluídos com sucesso!")
                 data_manager.clear_cache()
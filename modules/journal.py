@@ -0,0 +1,339 @@
+"""
+Journal de alterações (write-ahead log) para as operações de CRUD
+
+Edições e exclusões são gravadas primeiro como linhas JSON em um arquivo
+append-only, com fsync, o que é rápido e sobrevive a quedas do processo. Um
+compactador em segundo plano aplica os lotes pendentes na planilha e trunca o
+journal. Enquanto isso, as leituras aplicam as entradas pendentes sobre os
+dados da planilha (overlay), de modo que a interface enxerga o estado final.
+
+As operações identificam as linhas pelo id estável da aba. Entradas antigas,
+sem id, são posicionais: cada uma é relativa à visão da aba já com as
+entradas anteriores aplicadas.
+"""
+
+import json
+import logging
+import os
+import threading
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from modules.file_lock import get_workbook_lock
+from modules.record_ids import RowIdIndex
+
+logger = logging.getLogger(__name__)
+
+_journals: Dict[str, "ChangeJournal"] = {}
+_journals_lock = threading.Lock()
+
+
+def _encode(value: Any) -> Any:
+    """Converte um valor para uma forma serializável em JSON"""
+    if isinstance(value, (pd.Timestamp, datetime, date)):
+        return {"__datetime__": pd.Timestamp(value).isoformat()}
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    if value is pd.NaT or value is pd.NA:
+        return None
+    return value
+
+
+def _decode(value: Any) -> Any:
+    if isinstance(value, dict) and "__datetime__" in value:
+        return pd.Timestamp(value["__datetime__"])
+    return value
+
+
+def apply_entries(df: pd.DataFrame, entries: List[Dict]) -> pd.DataFrame:
+    """
+    Aplica entradas do journal sobre os dados de uma aba
+
+    Entradas com 'id'/'ids' localizam as linhas pelo id estável; entradas
+    antigas com 'row'/'rows' usam a posição na visão da aba.
+
+    Args:
+        df: DataFrame da aba como está na planilha
+        entries: Entradas pendentes da aba, em ordem
+
+    Returns:
+        Novo DataFrame com as alterações aplicadas
+
+    Raises:
+        DuplicateRecordIdError: Uma entrada aponta para um id repetido na aba
+            (a entrada não é aplicada em nenhuma das linhas)
+    """
+    if not entries:
+        return df
+    df = df.reset_index(drop=True)
+    id_index = None
+    for entry in entries:
+        op = entry["op"]
+        if "id" in entry or "ids" in entry:
+            if id_index is None:
+                id_index = RowIdIndex(df)
+            record_ids = [entry["id"]] if "id" in entry else entry["ids"]
+            rows = [id_index.label(record_id) for record_id in record_ids if record_id in id_index]
+            if len(rows) < len(record_ids):
+                logger.warning(f"Entrada {entry['seq']}: id(s) {id_index.missing(record_ids)} inexistente(s)")
+        else:
+            # Entradas posicionais: a posição é relativa à visão renumerada
+            if id_index is not None:
+                df, id_index = df.reset_index(drop=True), None
+            rows = [entry["row"]] if "row" in entry else entry["rows"]
+            rows = [row for row in rows if row in df.index]
+            if op == "update" and not rows:
+                logger.warning(f"Entrada {entry['seq']} ignorada: linha {entry['row']} inexistente")
+        if op == "update":
+            for row in rows:
+                for col, value in entry["data"].items():
+                    if col in df.columns:
+                        df.at[row, col] = _decode(value)
+        elif op == "delete":
+            # Os rótulos das linhas restantes não mudam, então o índice de ids continua válido
+            df = df.drop(index=rows)
+            if id_index is not None:
+                for record_id in record_ids:
+                    id_index.discard(record_id)
+            else:
+                df = df.reset_index(drop=True)
+    return df.reset_index(drop=True)
+
+
+def max_entry_id(entries: List[Dict]) -> int:
+    """Maior id citado pelas entradas (0 se nenhuma usar ids)"""
+    ids = [entry["id"] for entry in entries if "id" in entry]
+    ids += [record_id for entry in entries for record_id in entry.get("ids", [])]
+    return max(ids, default=0)
+
+
+class ChangeJournal:
+    """Journal append-only em JSON lines, compartilhado por planilha"""
+
+    def __init__(self, path: str, lock=None):
+        """
+        Inicializa o journal
+
+        Args:
+            path: Caminho do arquivo .jsonl
+            lock: Lock reentrante compartilhado com as escritas na planilha
+        """
+        self.path = Path(path)
+        self.lock = lock or threading.RLock()
+        self._entries: List[Dict] = []
+        self._last_seq = 0
+        self._offset = 0
+        self._file_id = None
+        self.compactor: Optional["JournalCompactor"] = None
+
+    def _refresh(self):
+        """Relê o arquivo se outro processo o alterou (leitura incremental)"""
+        try:
+            stat = self.path.stat()
+        except OSError:
+            self._entries, self._offset, self._file_id = [], 0, None
+            return
+        file_id = (stat.st_ino, stat.st_dev)
+        if file_id != self._file_id or stat.st_size < self._offset:
+            self._entries, self._offset, self._file_id = [], 0, file_id
+        if stat.st_size == self._offset:
+            return
+
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            chunk = f.read()
+        # Uma linha sem '\n' final é uma escrita interrompida e é ignorada
+        complete = chunk[:chunk.rfind(b"\n") + 1]
+        for line in complete.splitlines():
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                logger.warning("Linha corrompida no journal ignorada")
+                continue
+            self._last_seq = max(self._last_seq, entry.get("seq", 0))
+            if entry.get("op") != "checkpoint":
+                self._entries.append(entry)
+        self._offset += len(complete)
+
+    def _write_line(self, entry: Dict):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "ab+") as f:
+            # Fecha uma linha interrompida por uma queda anterior; ela será ignorada na leitura
+            if f.tell() > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    f.write(b"\n")
+            f.write(json.dumps(entry, ensure_ascii=False, default=str).encode("utf-8") + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def append(self, sheet_name: str, op: str, **payload) -> int:
+        """
+        Grava uma operação no journal
+
+        Args:
+            sheet_name: Nome da aba
+            op: 'update' (payload: id ou row, data) ou 'delete' (payload: ids ou rows)
+
+        Returns:
+            Número de sequência da entrada
+        """
+        with self.lock:
+            self._refresh()
+            if "data" in payload:
+                payload["data"] = {col: _encode(value) for col, value in payload["data"].items()}
+            for key in ("rows", "ids"):
+                if key in payload:
+                    payload[key] = [int(value) for value in payload[key]]
+            for key in ("row", "id"):
+                if key in payload:
+                    payload[key] = int(payload[key])
+            entry = {
+                "seq": self._last_seq + 1,
+                "ts": datetime.now().isoformat(timespec="seconds"),
+                "sheet": sheet_name,
+                "op": op,
+                **payload,
+            }
+            self._write_line(entry)
+            self._refresh()
+            return entry["seq"]
+
+    def pending(self, sheet_name: Optional[str] = None) -> List[Dict]:
+        """Retorna as entradas ainda não compactadas (de uma aba ou de todas)"""
+        with self.lock:
+            self._refresh()
+            if sheet_name is None:
+                return list(self._entries)
+            return [entry for entry in self._entries if entry["sheet"] == sheet_name]
+
+    def last_seq(self, sheet_name: Optional[str] = None) -> int:
+        """Sequência da última entrada pendente (0 se não houver)"""
+        entries = self.pending(sheet_name)
+        return entries[-1]["seq"] if entries else 0
+
+    def overlay(self, sheet_name: str, df: pd.DataFrame) -> pd.DataFrame:
+        """Aplica as entradas pendentes da aba sobre o DataFrame"""
+        return apply_entries(df, self.pending(sheet_name))
+
+    def _rewrite(self, entries: List[Dict]):
+        """Substitui o conteúdo do journal mantendo a sequência monotônica"""
+        tmp_path = self.path.with_suffix(".tmp")
+        lines = [{"seq": self._last_seq, "op": "checkpoint"}] + entries
+        with open(tmp_path, "wb") as f:
+            for entry in lines:
+                f.write(json.dumps(entry, ensure_ascii=False, default=str).encode("utf-8") + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+        tmp_path.replace(self.path)
+        self._entries, self._offset, self._file_id = [], 0, None
+        self._refresh()
+
+    def discard(self, sheet_name: str):
+        """Descarta as entradas de uma aba que foi regravada por inteiro"""
+        with self.lock:
+            self._refresh()
+            if any(entry["sheet"] == sheet_name for entry in self._entries):
+                self._rewrite([entry for entry in self._entries if entry["sheet"] != sheet_name])
+
+    def compact(self, read_sheet: Callable[[str], pd.DataFrame],
+                write_sheet: Callable[[pd.DataFrame, str], Any],
+                before_write: Optional[Callable[[], Any]] = None) -> int:
+        """
+        Aplica as entradas pendentes na planilha e trunca o journal
+
+        O lock fica retido durante toda a compactação para que nenhuma leitura
+        veja a planilha já atualizada junto com as entradas ainda no journal.
+
+        Args:
+            read_sheet: Função que lê uma aba da planilha
+            write_sheet: Função que grava uma aba na planilha
+            before_write: Função chamada uma vez antes de gravar (ex.: backup)
+
+        Returns:
+            Número de entradas compactadas
+        """
+        with self.lock:
+            entries = self.pending()
+            if not entries:
+                return 0
+            if before_write:
+                before_write()
+
+            by_sheet: Dict[str, List[Dict]] = {}
+            for entry in entries:
+                by_sheet.setdefault(entry["sheet"], []).append(entry)
+            for sheet_name, sheet_entries in by_sheet.items():
+                write_sheet(apply_entries(read_sheet(sheet_name), sheet_entries), sheet_name)
+
+            self._rewrite([])
+            logger.info(f"Journal compactado: {len(entries)} entrada(s) em {len(by_sheet)} aba(s)")
+            return len(entries)
+
+
+class JournalCompactor(threading.Thread):
+    """Thread em segundo plano que compacta o journal periodicamente"""
+
+    def __init__(self, journal: ChangeJournal, compact: Callable[[], int],
+                 interval_seconds: float = 30, batch_size: int = 20):
+        """
+        Inicializa o compactador
+
+        Args:
+            journal: Journal a ser compactado
+            compact: Função que executa a compactação
+            interval_seconds: Intervalo máximo entre compactações
+            batch_size: Número de entradas pendentes que antecipa a compactação
+        """
+        super().__init__(name="journal-compactor", daemon=True)
+        self.journal = journal
+        self._compact = compact
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self._wake = threading.Event()
+
+    def notify(self):
+        """Acorda o compactador se o lote pendente atingiu o tamanho configurado"""
+        if len(self.journal.pending()) >= self.batch_size:
+            self._wake.set()
+
+    def run(self):
+        while True:
+            self._wake.wait(self.interval_seconds)
+            self._wake.clear()
+            try:
+                self._compact()
+            except Exception as e:
+                logger.error(f"Erro ao compactar o journal: {e}")
+
+
+def journal_path_for(excel_file: str, journal_dir: Optional[str] = None) -> Path:
+    """Caminho padrão do journal: '.journal/<planilha>.jsonl' ao lado do arquivo"""
+    excel_path = Path(excel_file)
+    base_dir = Path(journal_dir) if journal_dir else excel_path.parent / ".journal"
+    return base_dir / f"{excel_path.stem}.jsonl"
+
+
+def get_journal(excel_file: str, journal_dir: Optional[str] = None) -> ChangeJournal:
+    """Retorna o journal compartilhado de uma planilha (um por processo)"""
+    path = journal_path_for(excel_file, journal_dir).resolve()
+    with _journals_lock:
+        if str(path) not in _journals:
+            _journals[str(path)] = ChangeJournal(str(path), get_workbook_lock(excel_file))
+        return _journals[str(path)]
+
+
+def start_compactor(journal: ChangeJournal, compact: Callable[[], int],
+                    interval_seconds: float = 30, batch_size: int = 20) -> "JournalCompactor":
+    """Inicia o compactador do journal, se ainda não houver um em execução"""
+    with _journals_lock:
+        if journal.compactor is None or not journal.compactor.is_alive():
+            journal.compactor = JournalCompactor(journal, compact, interval_seconds, batch_size)
+            journal.compactor.start()
+        return journal.compactor
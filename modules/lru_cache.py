@@ -0,0 +1,105 @@
+"""
+Cache LRU limitado, com expiração por tempo
+
+Usado para resultados derivados das abas (filtros, agregações) cujas chaves
+incluem a versão da aba: entradas de versões antigas deixam de ser pedidas e
+saem pelo limite de tamanho ou pelo ttl. Com max_bytes, cada entrada informa
+o próprio tamanho em set() e o total também é limitado (figuras do
+ChartsManager).
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class LRUCache:
+    """Mapa com no máximo max_entries itens; o menos usado recentemente sai primeiro"""
+
+    def __init__(self, max_entries: int = 100, ttl: Optional[float] = None, max_bytes: Optional[int] = None):
+        """
+        Inicializa o cache
+
+        Args:
+            max_entries: Número máximo de entradas
+            ttl: Tempo de vida de cada entrada em segundos (None = sem expiração)
+            max_bytes: Soma máxima dos tamanhos informados em set() (None = sem limite)
+        """
+        self.max_entries = max(1, int(max_entries))
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _expired(self, stored_at: float) -> bool:
+        return self.ttl is not None and time.monotonic() - stored_at > self.ttl
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Retorna o valor da chave (ou default) e a marca como usada recentemente"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or self._expired(entry[1]):
+                if entry is not None:
+                    del self._entries[key]
+                    self._bytes -= entry[2]
+                self._stats["misses"] += 1
+                return default
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry[0]
+
+    def _over_limit(self) -> bool:
+        return len(self._entries) > self.max_entries or (
+            self.max_bytes is not None and self._bytes > self.max_bytes)
+
+    def set(self, key: Hashable, value: Any, size: int = 0):
+        """
+        Guarda um valor, descartando as entradas mais antigas acima dos limites
+
+        Args:
+            key: Chave
+            value: Valor
+            size: Tamanho aproximado do valor em bytes (usado com max_bytes; um
+                valor maior que max_bytes sozinho não fica no cache)
+        """
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[2]
+            self._entries[key] = (value, time.monotonic(), size)
+            self._bytes += size
+            while self._entries and self._over_limit():
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted[2]
+                self._stats["evictions"] += 1
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Retorna o valor em cache ou calcula, guarda e retorna"""
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = compute()
+            self.set(key, value)
+        return value
+
+    def clear(self):
+        """Remove todas as entradas"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores de acerto, falha e descarte"""
+        total = self._stats["hits"] + self._stats["misses"]
+        return {
+            **self._stats,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hit_rate": self._stats["hits"] / total if total else 0.0,
+        }
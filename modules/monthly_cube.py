@@ -0,0 +1,185 @@
+"""
+Cubo mensal materializado das abas transacionais
+
+Soma e contagem de valores por CONTA × CATEGORIA × DESCRIÇÃO × FAVORECIDO ×
+mês (e as dimensões próprias de Vendas e Investimentos), montadas uma vez
+por versão da planilha (o snapshot guarda o cubo de cada aba). KPIs,
+comparações com o mês anterior, top 5, Pareto e evoluções mensais consultam
+as células do cubo com o mesmo FilterPlan da sidebar, em vez de agrupar as
+transações a cada interação: o custo depende do número de células
+(combinações distintas por mês), e não do tamanho do histórico.
+
+Quando uma escrita do DataManager produz a versão seguinte da aba, o cubo
+novo é derivado do anterior somando as linhas inseridas e subtraindo as
+removidas (apply), sem reagrupar o histórico; a cada
+CUBE_CONFIG["verify_every"] atualizações incrementais o snapshot reconstrói o
+cubo do zero e confere o resultado (ver WorkbookSnapshot.monthly_cube).
+"""
+
+import math
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from modules.date_dimensions import MONTH_DTYPE
+from modules.filter_plan import CodedColumns, FilterPlan, evaluate_plan
+
+# Cada aba usa as dimensões que possui (Vendas: Cliente e tipo de recebimento; Investimentos: ATIVO)
+CUBE_DIMENSIONS = ("CONTA", "CATEGORIA", "DESCRIÇÃO", "FAVORECIDO", "Cliente", "TIPO DE RECEBIMENTO", "ATIVO")
+
+# Coluna de valor de cada aba (as demais usam 'VALOR')
+VALUE_COLUMNS = {"Investimentos": "VALOR_APORTE", "Div_CC": "valor total da compra"}
+
+
+class MonthlyCube:
+    """Somas e contagens de uma aba por dimensões e mês"""
+
+    def __init__(self, df: pd.DataFrame, sheet_name: str):
+        """
+        Materializa o cubo
+
+        Args:
+            df: DataFrame da aba vindo do snapshot (com a coluna PERÍODO)
+            sheet_name: Nome da aba (define a coluna de valor e o filtro de categoria)
+        """
+        self.sheet_name = sheet_name
+        self.value_col = VALUE_COLUMNS.get(sheet_name, "VALOR")
+        self.dimensions = [col for col in CUBE_DIMENSIONS if col in df.columns]
+        # Atualizações incrementais acumuladas desde a última construção completa
+        self.generation = 0
+        self._index(self._aggregate(df))
+
+    @property
+    def _keys(self) -> list:
+        return ["PERÍODO", *self.dimensions]
+
+    def _aggregate(self, df: Optional[pd.DataFrame], sign: int = 1) -> pd.DataFrame:
+        """Agrupa linhas da aba em células (soma e contagem, negativas se sign=-1)"""
+        columns = [*self._keys, self.value_col, "n"]
+        if df is None or df.empty or self.value_col not in df.columns or "PERÍODO" not in df.columns:
+            return pd.DataFrame(columns=columns)
+        rows = df[df["PERÍODO"].notna()]
+        values = pd.to_numeric(rows[self.value_col], errors="coerce") * sign
+        # Linhas sem alguma dimensão (formulário que não preenche a coluna) caem no grupo nulo
+        keys = [rows[col] if col in rows.columns else pd.Series(None, index=rows.index, dtype=object)
+                for col in self._keys]
+        grouped = values.groupby(keys, dropna=False, sort=False)
+        cells = pd.DataFrame({self.value_col: grouped.sum(), "n": grouped.size() * sign}).reset_index()
+        cells.columns = columns
+        return cells
+
+    def _index(self, cells: pd.DataFrame):
+        """Prepara as células para as consultas (Ano/Mês, códigos e valores)"""
+        self.cells = cells
+        periods = self.cells["PERÍODO"]
+        if len(periods):
+            self.cells["Ano"] = periods.dt.year.astype("Int16")
+            self.cells["Mês"] = pd.Categorical.from_codes(periods.dt.month.to_numpy() - 1, dtype=MONTH_DTYPE)
+        self._coded = CodedColumns(self.cells)
+        self._values = self.cells[self.value_col].to_numpy(dtype=float) if len(self.cells) else np.zeros(0)
+        # Códigos ordenados de cada dimensão (e do mês): as consultas somam com bincount
+        self._codes = {
+            col: pd.factorize(self.cells[col], sort=True)
+            for col in (*self.dimensions, "PERÍODO") if len(self.cells)
+        }
+
+    def apply(self, added: Optional[pd.DataFrame] = None,
+              removed: Optional[pd.DataFrame] = None) -> "MonthlyCube":
+        """
+        Cubo da versão seguinte da aba, somando as linhas inseridas e subtraindo as removidas
+
+        O cubo atual não é alterado (pode estar em uso por outro snapshot).
+        Uma edição é a remoção da linha antiga seguida da inserção da nova; as
+        células que ficam sem transações são descartadas. O custo depende do
+        número de células e de linhas alteradas, não do tamanho do histórico.
+
+        Args:
+            added: Linhas inseridas, tipadas como no snapshot (com PERÍODO)
+            removed: Linhas removidas, tipadas como no snapshot
+
+        Returns:
+            Novo MonthlyCube
+        """
+        parts = [self.cells[[*self._keys, self.value_col, "n"]],
+                 self._aggregate(added), self._aggregate(removed, sign=-1)]
+        parts = [part for part in parts if len(part)]
+        cube = object.__new__(MonthlyCube)
+        cube.sheet_name, cube.value_col, cube.dimensions = self.sheet_name, self.value_col, self.dimensions
+        cube.generation = self.generation + 1
+        if not parts:
+            cube._index(self._aggregate(None))
+            return cube
+        merged = pd.concat(parts, ignore_index=True)
+        grouped = merged.groupby(self._keys, dropna=False, sort=False)[[self.value_col, "n"]].sum().reset_index()
+        cube._index(grouped[grouped["n"] != 0].reset_index(drop=True))
+        return cube
+
+    def _cell_map(self) -> Dict[Tuple, Tuple[float, int]]:
+        keys = self.cells[self._keys].astype(object)
+        keys = keys.where(keys.notna(), None)
+        return dict(zip(map(tuple, keys.to_numpy()), zip(self._values.tolist(), self.cells["n"].tolist())))
+
+    def matches(self, other: "MonthlyCube") -> bool:
+        """Indica se os dois cubos têm as mesmas células (valores com tolerância de centavos)"""
+        mine, theirs = self._cell_map(), other._cell_map()
+        if mine.keys() != theirs.keys():
+            return False
+        return all(
+            n == theirs[key][1] and math.isclose(value, theirs[key][0], abs_tol=1e-6)
+            for key, (value, n) in mine.items()
+        )
+
+    def __len__(self) -> int:
+        return len(self.cells)
+
+    def _mask(self, plan: Optional[FilterPlan]) -> np.ndarray:
+        return evaluate_plan(self._coded, plan or FilterPlan(), self.sheet_name)
+
+    def total(self, plan: Optional[FilterPlan] = None) -> float:
+        """Soma dos valores das transações que atendem ao plano"""
+        return float(self._values[self._mask(plan)].sum())
+
+    def totals(self, plans: Iterable[Optional[FilterPlan]]) -> np.ndarray:
+        """Somas de vários planos (ex.: período atual e anterior) em uma única passada"""
+        masks = np.vstack([self._mask(plan) for plan in plans])
+        return masks.astype(float) @ self._values
+
+    def count(self, plan: Optional[FilterPlan] = None) -> int:
+        """Número de transações que atendem ao plano"""
+        return int(self.cells["n"].to_numpy()[self._mask(plan)].sum())
+
+    def _sum_by(self, column: str, plan: Optional[FilterPlan], counts: bool = False) -> pd.Series:
+        """Soma (ou contagem) das células selecionadas por código da coluna (grupos vazios e nulos descartados)"""
+        name = "n" if counts else self.value_col
+        if column not in self._codes:
+            return pd.Series(dtype="int64" if counts else float, name=name)
+        codes, uniques = self._codes[column]
+        selected = self._mask(plan) & (codes >= 0)
+        weights = self.cells["n"].to_numpy(dtype=float) if counts else self._values
+        sums = np.bincount(codes[selected], weights=weights[selected], minlength=len(uniques))
+        present = np.bincount(codes[selected], minlength=len(uniques)) > 0
+        index = pd.Index(uniques[present], name=column)
+        values = sums[present].astype("int64") if counts else sums[present]
+        return pd.Series(values, index=index, name=name)
+
+    def by(self, dimension: str, plan: Optional[FilterPlan] = None) -> pd.Series:
+        """
+        Soma por valor de uma dimensão (equivale a groupby(dimension)[valor].sum())
+
+        Args:
+            dimension: Uma das dimensões do cubo (CONTA, CATEGORIA, DESCRIÇÃO, FAVORECIDO)
+            plan: Filtros a aplicar (padrão: nenhum)
+
+        Returns:
+            Série indexada pelos valores da dimensão, em ordem (nulos descartados)
+        """
+        return self._sum_by(dimension, plan)
+
+    def count_by(self, dimension: str, plan: Optional[FilterPlan] = None) -> pd.Series:
+        """Número de transações por valor de uma dimensão (equivale a value_counts, sem ordenar)"""
+        return self._sum_by(dimension, plan, counts=True)
+
+    def by_period(self, plan: Optional[FilterPlan] = None) -> pd.Series:
+        """Soma por mês (índice PERÍODO, em ordem cronológica)"""
+        return self._sum_by("PERÍODO", plan)
@@ -0,0 +1,135 @@
+"""
+Comparação com período anterior para qualquer seleção de Ano e Mês
+
+A seleção da sidebar (anos × meses) vira um conjunto de meses absolutos
+(ano * 12 + índice do mês), e o período de comparação é obtido deslocando
+esse conjunto:
+
+- "Período anterior": o mesmo número de meses imediatamente antes (um mês ->
+  mês anterior, um trimestre -> trimestre anterior, o ano -> ano anterior);
+- "Mesmo período do ano anterior": os mesmos meses, doze meses antes;
+- "Acumulado do ano": de Janeiro até o último mês selecionado, contra o mesmo
+  acumulado do ano anterior.
+
+Os dois períodos são FilterPlan com o campo 'periodos', avaliados pelo cubo
+mensal em uma única passada (MonthlyCube.totals) para todos os cards de KPI.
+"""
+
+from dataclasses import dataclass, replace
+from typing import Optional, Tuple
+
+import numpy as np
+
+from modules.date_dimensions import MESES_ORDEM
+from modules.filter_plan import TODAS, FilterPlan
+
+COMPARISON_MODES = ("Período anterior", "Mesmo período do ano anterior", "Acumulado do ano")
+
+
+@dataclass(frozen=True)
+class PeriodComparison:
+    """Plano do período atual, plano do período de comparação e rótulo da comparação"""
+
+    atual: FilterPlan
+    anterior: FilterPlan
+    rotulo: str
+
+
+def selected_periods(plan: FilterPlan) -> Optional[np.ndarray]:
+    """
+    Meses absolutos selecionados pelo plano, em ordem
+
+    Returns:
+        Array de ano * 12 + índice do mês, ou None se nenhum ano estiver
+        selecionado (todo o histórico não tem período anterior)
+    """
+    if plan.periodos:
+        return np.unique(np.asarray(plan.periodos, dtype=np.int64))
+    if not plan.anos:
+        return None
+    meses = [MESES_ORDEM.index(mes) for mes in plan.meses] or range(12)
+    return np.unique(np.add.outer(np.asarray(plan.anos, dtype=np.int64) * 12, np.asarray(meses)).ravel())
+
+
+def _previous_label(periods: np.ndarray) -> str:
+    """Rótulo do período imediatamente anterior a um intervalo de meses"""
+    span = int(periods[-1] - periods[0] + 1)
+    contiguous = len(periods) == span
+    if span == 1:
+        return "mês anterior"
+    if contiguous and span == 3 and periods[0] % 3 == 0:
+        return "trimestre anterior"
+    if contiguous and span == 12 and periods[0] % 12 == 0:
+        return "ano anterior"
+    return f"{span} meses anteriores"
+
+
+def _with_periods(plan: FilterPlan, periods: np.ndarray, categoria: Optional[str] = None) -> FilterPlan:
+    return replace(plan, anos=(), meses=(), periodos=tuple(int(p) for p in periods),
+                   categoria=plan.categoria if categoria is None else categoria)
+
+
+def compare_periods(plan: FilterPlan, mode: str = COMPARISON_MODES[0]) -> Optional[PeriodComparison]:
+    """
+    Monta os planos do período atual e do período de comparação
+
+    Como na comparação original com o mês anterior, o período de comparação
+    mantém a conta e ignora a categoria.
+
+    Args:
+        plan: Plano dos filtros da sidebar
+        mode: Um de COMPARISON_MODES
+
+    Returns:
+        PeriodComparison, ou None se a seleção não tiver período anterior
+    """
+    periods = selected_periods(plan)
+    if periods is None or not len(periods):
+        return None
+
+    if mode == "Mesmo período do ano anterior":
+        return PeriodComparison(plan, _with_periods(plan, periods - 12, TODAS), "mesmo período do ano anterior")
+
+    if mode == "Acumulado do ano":
+        ultimo = int(periods[-1])
+        acumulado = np.arange(ultimo - ultimo % 12, ultimo + 1)
+        return PeriodComparison(_with_periods(plan, acumulado), _with_periods(plan, acumulado - 12, TODAS),
+                                f"acumulado de {ultimo // 12 - 1}")
+
+    if mode != "Período anterior":
+        raise ValueError(f"Modo de comparação desconhecido: {mode}")
+    span = periods[-1] - periods[0] + 1
+    return PeriodComparison(plan, _with_periods(plan, periods - span, TODAS), _previous_label(periods))
+
+
+def growth(atual: float, anterior: float) -> float:
+    """Variação percentual entre os valores absolutos (0 quando não há base de comparação)"""
+    if abs(anterior) > 0:
+        return (abs(atual) - abs(anterior)) / abs(anterior) * 100
+    return 0.0
+
+
+def comparison_totals(cube, comparison: PeriodComparison) -> Tuple[float, float]:
+    """Totais do período atual e do anterior em uma única passada sobre o cubo"""
+    atual, anterior = cube.totals([comparison.atual, comparison.anterior])
+    return float(atual), float(anterior)
+
+
+def kpi_totals(cube, plan: FilterPlan, comparison: Optional[PeriodComparison]) -> Tuple[float, float]:
+    """
+    Valor dos cards de KPI e do período de comparação
+
+    O valor exibido é sempre o do período atual da comparação, o mesmo usado
+    no delta: no "Acumulado do ano", de Janeiro até o último mês selecionado.
+
+    Args:
+        cube: Cubo mensal da aba
+        plan: Plano dos filtros da sidebar (usado quando não há comparação)
+        comparison: Resultado de compare_periods, ou None
+
+    Returns:
+        (total atual, total do período de comparação; 0 sem comparação)
+    """
+    if comparison is None:
+        return float(cube.total(plan)), 0.0
+    return comparison_totals(cube, comparison)
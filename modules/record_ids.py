@@ -0,0 +1,206 @@
+"""
+Identificadores estáveis das linhas das abas transacionais
+
+Cada linha de Receitas, Despesas, Vendas, Investimentos e Div_CC recebe um
+'id' inteiro único, atribuído na inserção e nunca reutilizado. Edições e
+exclusões localizam a linha pelo id, e não pela posição, de modo que filtros
+diferentes ou inserções de outras sessões não fazem a operação atingir a
+linha errada.
+
+O maior id já atribuído a cada aba fica gravado em disco (IdCounter). Um id
+excluído, mesmo que ainda pendente no journal, nunca volta a ser usado: uma
+exclusão pendente ou uma sessão que ainda guarda o id antigo não atinge a
+linha inserida depois.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+import pandas as pd
+
+from config.settings import RECORD_ID_CONFIG
+
+ID_COLUMN = RECORD_ID_CONFIG["column"]
+
+
+class DuplicateRecordIdError(ValueError):
+    """O id informado aparece em mais de uma linha da aba"""
+
+
+def has_record_ids(sheet_name: str) -> bool:
+    """Indica se a aba usa ids estáveis"""
+    return sheet_name in RECORD_ID_CONFIG["sheets"]
+
+
+def next_id(df: pd.DataFrame, floor: int = 0) -> int:
+    """Próximo id livre da aba (maior entre o maior id existente e floor, + 1)"""
+    if ID_COLUMN not in df.columns:
+        return floor + 1
+    ids = pd.to_numeric(df[ID_COLUMN], errors="coerce")
+    return max(int(ids.max()) if ids.notna().any() else 0, floor) + 1
+
+
+def ensure_ids(df: pd.DataFrame, floor: int = 0) -> Tuple[pd.DataFrame, bool]:
+    """
+    Garante que todas as linhas tenham id
+
+    Linhas sem id (ou com id repetido) recebem novos ids a partir do maior
+    existente (ou de floor, se maior); os ids válidos são preservados.
+
+    Args:
+        df: DataFrame da aba
+        floor: Maior id já atribuído à aba (IdCounter.last)
+
+    Returns:
+        (DataFrame com a coluna de id, True se algum id foi atribuído)
+    """
+    df = df.copy()
+    if ID_COLUMN not in df.columns:
+        df[ID_COLUMN] = range(floor + 1, floor + len(df) + 1)
+        return df, True
+
+    ids = pd.to_numeric(df[ID_COLUMN], errors="coerce")
+    missing = ids.isna() | ids.duplicated()
+    if not missing.any():
+        if ids.dtype.kind != "i":
+            df[ID_COLUMN] = ids.astype("int64")
+            return df, True
+        return df, False
+
+    start = max(int(ids[~missing].max()) if (~missing).any() else 0, floor) + 1
+    ids[missing] = range(start, start + int(missing.sum()))
+    df[ID_COLUMN] = ids.astype("int64")
+    return df, True
+
+
+def assign_new_ids(df_new: pd.DataFrame, sheet_df: pd.DataFrame, floor: int = 0) -> pd.DataFrame:
+    """Atribui ids sequenciais às linhas que serão inseridas na aba (acima de floor)"""
+    df_new = df_new.copy()
+    start = next_id(sheet_df, floor)
+    df_new[ID_COLUMN] = range(start, start + len(df_new))
+    return df_new
+
+
+def max_id(df: pd.DataFrame) -> int:
+    """Maior id da aba (0 se não houver)"""
+    if ID_COLUMN not in df.columns:
+        return 0
+    ids = pd.to_numeric(df[ID_COLUMN], errors="coerce")
+    return int(ids.max()) if ids.notna().any() else 0
+
+
+def id_counter_path_for(excel_file: str, counter_dir: Optional[str] = None) -> Path:
+    """Arquivo padrão do contador: '.<planilha>.ids.json' no diretório da planilha"""
+    excel_path = Path(excel_file)
+    base_dir = Path(counter_dir) if counter_dir else excel_path.parent
+    return base_dir / f".{excel_path.name}.ids.json"
+
+
+class IdCounter:
+    """
+    Maior id já atribuído por aba, gravado em disco
+
+    Não tem lock próprio: leituras e avanços acontecem com o lock da
+    planilha retido, junto com a escrita que usa os ids.
+    """
+
+    def __init__(self, path: str):
+        """
+        Inicializa o contador
+
+        Args:
+            path: Caminho do arquivo JSON (id_counter_path_for)
+        """
+        self.path = Path(path)
+
+    def _read(self) -> Dict[str, int]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return {sheet: int(value) for sheet, value in json.load(f).items()}
+        except FileNotFoundError:
+            return {}
+
+    def last(self, sheet_name: str) -> int:
+        """Maior id já atribuído à aba (0 se nenhum foi registrado)"""
+        return self._read().get(sheet_name, 0)
+
+    def advance(self, sheet_name: str, record_id: int):
+        """Registra record_id como atribuído (o contador nunca diminui)"""
+        counters = self._read()
+        if int(record_id) <= counters.get(sheet_name, 0):
+            return
+        counters[sheet_name] = int(record_id)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(counters, f)
+            f.flush()
+            os.fsync(f.fileno())
+        tmp_path.replace(self.path)
+
+
+class RowIdIndex:
+    """Índice id -> rótulo da linha no DataFrame, com busca O(1)"""
+
+    def __init__(self, df: pd.DataFrame):
+        """
+        Constrói o índice
+
+        Args:
+            df: DataFrame da aba com a coluna de id
+        """
+        self._labels: Dict[int, Hashable] = {}
+        # Ids repetidos não identificam uma linha: as operações sobre eles são recusadas
+        self.duplicates: Set[int] = set()
+        if ID_COLUMN in df.columns:
+            ids = pd.to_numeric(df[ID_COLUMN], errors="coerce")
+            valid = ids.notna().to_numpy()
+            ids = ids[valid].astype("int64")
+            repeated = ids.duplicated(keep=False).to_numpy()
+            self.duplicates = set(ids[repeated].tolist())
+            self._labels = dict(zip(ids[~repeated].tolist(), df.index[valid][~repeated]))
+
+    def __contains__(self, record_id) -> bool:
+        key = self._key(record_id)
+        return key in self._labels or key in self.duplicates
+
+    def __len__(self) -> int:
+        return len(self._labels)
+
+    @staticmethod
+    def _key(record_id):
+        try:
+            return int(record_id)
+        except (TypeError, ValueError):
+            return None
+
+    def label(self, record_id) -> Hashable:
+        """
+        Rótulo da linha com o id informado
+
+        Raises:
+            KeyError: O id não existe
+            DuplicateRecordIdError: O id aparece em mais de uma linha
+        """
+        key = self._key(record_id)
+        if key in self.duplicates:
+            raise DuplicateRecordIdError(f"Id {record_id} repetido em mais de uma linha")
+        return self._labels[key]
+
+    def labels(self, record_ids: Iterable) -> List[Hashable]:
+        """Rótulos das linhas, na ordem dos ids informados"""
+        return [self.label(record_id) for record_id in record_ids]
+
+    def discard(self, record_id):
+        """Remove um id do índice (linha excluída)"""
+        self._labels.pop(self._key(record_id), None)
+
+    def duplicated(self, record_ids: Iterable) -> List:
+        """Ids informados que aparecem em mais de uma linha"""
+        return [record_id for record_id in record_ids if self._key(record_id) in self.duplicates]
+
+    def missing(self, record_ids: Iterable) -> List:
+        """Ids informados que não existem mais na aba"""
+        return [record_id for record_id in record_ids if record_id not in self]
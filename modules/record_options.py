@@ -0,0 +1,165 @@
+"""
+Rótulos das opções de seleção de registros (formulários de edição e exclusão)
+
+Os rótulos "data - descrição - valor" são montados com operações vetorizadas
+sobre as colunas, em vez de um f-string por linha com iterrows. O resultado é
+guardado pelo DataManager por versão da aba e traz o mapeamento rótulo -> id
+usado pelo CRUD.
+
+As opções também guardam as linhas como o usuário as viu (seen_rows): o CRUD
+confere a gravação contra esses valores e recusa a edição ou exclusão de uma
+linha que outra sessão alterou nesse meio tempo.
+"""
+
+from typing import Dict, Hashable, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from modules.record_ids import ID_COLUMN
+
+# Colunas (data, descrição, valor) de cada aba e se o valor é exibido em módulo
+LABEL_COLUMNS = {
+    "Receitas": ("DATA", "DESCRIÇÃO", "VALOR", False),
+    "Despesas": ("DATA", "DESCRIÇÃO", "VALOR", True),
+    "Vendas": ("DATA", "Cliente", "VALOR", False),
+    "Investimentos": ("DATA", "ATIVO", "VALOR_APORTE", False),
+    "Div_CC": ("Data", "Descrição", "valor total da compra", False),
+}
+
+
+def format_brl_series(values: pd.Series, absolute: bool = False) -> pd.Series:
+    """
+    Formata uma série numérica como moeda brasileira ("R$ 1.234,56")
+
+    Args:
+        values: Valores numéricos (não numéricos e NaN viram 0)
+        absolute: Se True, exibe o módulo do valor
+
+    Returns:
+        Série de strings com o mesmo índice
+    """
+    numbers = pd.to_numeric(values, errors="coerce").fillna(0.0).to_numpy(dtype=float)
+    cents = np.round(np.abs(numbers) * 100).astype(np.int64)
+    integer = cents // 100
+
+    def padded(array, width):
+        # Somar 10**width e descartar o primeiro dígito preenche com zeros sem formatar linha a linha
+        return pd.Series(array + 10 ** width, index=values.index).astype(str).str.slice(1)
+
+    # Grupos de milhar com zeros à esquerda; depois os zeros do grupo mais alto são removidos
+    text = padded(integer % 1000, 3)
+    scale = 1000
+    while (integer >= scale).any():
+        text = text.where(integer < scale, padded(integer // scale % 1000, 3) + "." + text)
+        scale *= 1000
+    text = text.str.lstrip("0").replace("", "0")
+
+    decimals = padded(cents % 100, 2)
+    sign = "" if absolute else pd.Series(np.where(numbers < 0, "-", ""), index=values.index)
+    return "R$ " + sign + text + "," + decimals
+
+
+def build_labels(df: pd.DataFrame, sheet_name: str) -> pd.Series:
+    """
+    Monta os rótulos das linhas de uma aba transacional
+
+    Rótulos repetidos (mesma data, descrição e valor) recebem o id ao final
+    para que cada opção identifique uma única linha.
+
+    Args:
+        df: DataFrame da aba (com a coluna de id)
+        sheet_name: Nome da aba (define as colunas usadas)
+
+    Returns:
+        Série de rótulos indexada pelo id da linha
+    """
+    date_col, text_col, value_col, absolute = LABEL_COLUMNS[sheet_name]
+    if df.empty or ID_COLUMN not in df.columns:
+        return pd.Series([], dtype=object)
+
+    def column(name):
+        return df[name] if name in df.columns else pd.Series(np.nan, index=df.index)
+
+    # strftime apenas nas datas distintas (muitas linhas compartilham o mesmo dia)
+    codes, unique_dates = pd.factorize(pd.to_datetime(column(date_col), errors="coerce").dt.normalize())
+    formatted = np.append(np.asarray(unique_dates.strftime("%d/%m/%Y"), dtype=object), "")
+    dates = pd.Series(formatted[codes], index=df.index).astype(str)
+    texts = column(text_col).astype(object).where(column(text_col).notna(), "").astype(str)
+    labels = dates + " - " + texts + " - " + format_brl_series(column(value_col), absolute)
+
+    ids = pd.to_numeric(df[ID_COLUMN], errors="coerce")
+    duplicated = labels.duplicated(keep=False)
+    if duplicated.any():
+        labels = labels.where(~duplicated, labels + " (#" + ids.astype("Int64").astype(str) + ")")
+
+    labels.index = ids.astype("Int64")
+    return labels[labels.index.notna()]
+
+
+class RecordOptions:
+    """Opções de um selectbox de registros: rótulos na ordem do DataFrame e rótulo -> id"""
+
+    def __init__(self, labels: pd.Series, df: pd.DataFrame, seen: Optional[Dict[int, Dict]] = None):
+        """
+        Inicializa as opções
+
+        Args:
+            labels: Rótulos da aba indexados pelo id (build_labels)
+            df: DataFrame (possivelmente filtrado) cujas linhas viram opções
+            seen: Valores das linhas já exibidos nesta sessão, por id (guardados
+                na primeira exibição e consumidos por seen_rows); se None, as
+                linhas vistas são as de df
+        """
+        ids = pd.to_numeric(df[ID_COLUMN], errors="coerce") if ID_COLUMN in df.columns else pd.Series(dtype=float)
+        valid = ids.notna().to_numpy() & ids.isin(labels.index).to_numpy()
+        self.ids: List[int] = ids[valid].astype("int64").tolist()
+        self.labels: List[str] = labels.reindex(self.ids).tolist()
+        self.label_to_id: Dict[str, int] = dict(zip(self.labels, self.ids))
+        self._rows: Dict[int, Hashable] = dict(zip(self.ids, df.index[valid]))
+        self._df = df
+        self._seen = seen
+        if seen is not None:
+            new_ids = [record_id for record_id in self.ids if record_id not in seen]
+            if new_ids:
+                rows = df.loc[[self._rows[record_id] for record_id in new_ids]].to_dict("records")
+                seen.update(zip(new_ids, rows))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def id_for(self, label: Optional[str]) -> Optional[int]:
+        """Id do registro de um rótulo selecionado (None se não houver)"""
+        return self.label_to_id.get(label)
+
+    def row_for(self, label: Optional[str]) -> Optional[Hashable]:
+        """Rótulo da linha no DataFrame de origem para o rótulo selecionado"""
+        record_id = self.id_for(label)
+        return self._rows.get(record_id) if record_id is not None else None
+
+    def ids_for(self, labels: List[str]) -> List[int]:
+        """Ids dos registros de vários rótulos selecionados"""
+        return [self.label_to_id[label] for label in labels if label in self.label_to_id]
+
+    def seen_rows(self, record_ids: Iterable) -> pd.DataFrame:
+        """
+        Linhas dos ids como o usuário as viu, para o 'expected' do CRUD
+
+        O Streamlit relê a planilha a cada interação, inclusive no clique que
+        grava; por isso os valores vêm da primeira exibição de cada linha na
+        sessão. Eles são consumidos aqui: depois da gravação (bem-sucedida ou
+        recusada), a próxima exibição guarda os valores atuais.
+
+        Args:
+            record_ids: Ids que serão gravados
+
+        Returns:
+            DataFrame com uma linha por id (coluna de id incluída)
+        """
+        record_ids = [int(record_id) for record_id in record_ids]
+        if self._seen is None:
+            return self._df.loc[[self._rows[record_id] for record_id in record_ids]]
+        rows = [self._seen.pop(record_id, None) for record_id in record_ids]
+        rows = [row if row is not None else self._df.loc[self._rows[record_id]].to_dict()
+                for record_id, row in zip(record_ids, rows)]
+        return pd.DataFrame(rows, columns=self._df.columns)
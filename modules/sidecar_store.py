@@ -0,0 +1,142 @@
+"""
+Armazenamento colunar auxiliar (sidecar) para as abas do Excel
+
+Cada aba é convertida uma única vez para um arquivo Arrow IPC, guardado em um
+diretório identificado pelo mtime e tamanho da planilha. Leituras posteriores
+usam memory mapping, evitando reprocessar o .xlsx com o openpyxl. A planilha
+continua sendo a fonte da verdade: quando ela muda, o sidecar antigo é
+descartado e reconstruído sob demanda.
+"""
+
+import hashlib
+import logging
+import re
+import shutil
+from pathlib import Path
+from typing import Optional, Tuple
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+except ImportError:  # pyarrow é opcional: sem ele o sidecar fica desativado
+    pa = None
+    pa_ipc = None
+
+logger = logging.getLogger(__name__)
+
+
+class SidecarStore:
+    """Cache colunar em disco para as abas de uma planilha Excel"""
+
+    def __init__(self, excel_file: str, cache_dir: Optional[str] = None):
+        """
+        Inicializa o armazenamento sidecar
+
+        Args:
+            excel_file: Caminho para o arquivo Excel de origem
+            cache_dir: Diretório base do sidecar (padrão: '.sidecar' ao lado da planilha)
+        """
+        self.excel_file = Path(excel_file)
+        self.cache_dir = Path(cache_dir) if cache_dir else self.excel_file.parent / ".sidecar"
+
+    @property
+    def available(self) -> bool:
+        """Indica se o pyarrow está instalado"""
+        return pa is not None
+
+    def signature(self) -> Optional[Tuple[int, int]]:
+        """Retorna a assinatura (mtime em ns, tamanho) da planilha ou None se não existir"""
+        try:
+            stat = self.excel_file.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _version_dir(self, signature: Tuple[int, int]) -> Path:
+        mtime_ns, size = signature
+        return self.cache_dir / f"{self.excel_file.stem}_{mtime_ns}_{size}"
+
+    @staticmethod
+    def _sheet_file(sheet_name: str) -> str:
+        # Nomes de abas têm espaços e acentos; o hash gera um nome de arquivo seguro
+        return hashlib.md5(sheet_name.encode("utf-8")).hexdigest()[:16] + ".arrow"
+
+    def read(self, sheet_name: str, signature: Tuple[int, int]) -> Optional[pd.DataFrame]:
+        """
+        Lê uma aba do sidecar, se existir para a assinatura informada
+
+        Args:
+            sheet_name: Nome da aba
+            signature: Assinatura da planilha obtida com signature()
+
+        Returns:
+            DataFrame ou None se o sidecar não estiver disponível
+        """
+        if not self.available or signature is None:
+            return None
+
+        path = self._version_dir(signature) / self._sheet_file(sheet_name)
+        if not path.exists():
+            return None
+
+        try:
+            with pa.memory_map(str(path), "r") as source:
+                table = pa_ipc.open_file(source).read_all()
+            return table.to_pandas()
+        except Exception as e:
+            logger.warning(f"Sidecar corrompido para a aba {sheet_name}, ignorando: {e}")
+            return None
+
+    def write(self, sheet_name: str, df: pd.DataFrame, signature: Tuple[int, int]) -> bool:
+        """
+        Grava uma aba no sidecar da assinatura informada
+
+        Args:
+            sheet_name: Nome da aba
+            df: DataFrame lido da planilha
+            signature: Assinatura da planilha no momento da leitura
+
+        Returns:
+            True se gravou com sucesso
+        """
+        if not self.available or signature is None:
+            return False
+        if self.signature() != signature:
+            # A planilha mudou durante a leitura; não associar dados antigos à nova versão
+            return False
+
+        version_dir = self._version_dir(signature)
+        try:
+            if not version_dir.exists():
+                self._purge_stale()
+                version_dir.mkdir(parents=True, exist_ok=True)
+
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            path = version_dir / self._sheet_file(sheet_name)
+            tmp_path = path.with_suffix(".tmp")
+            with pa.OSFile(str(tmp_path), "wb") as sink:
+                with pa_ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            tmp_path.replace(path)
+            return True
+        except Exception as e:
+            # Colunas com tipos mistos não convertem para Arrow; a aba segue vindo do Excel
+            logger.warning(f"Não foi possível gravar o sidecar da aba {sheet_name}: {e}")
+            return False
+
+    def _purge_stale(self):
+        """Remove sidecars gerados para versões anteriores da planilha"""
+        if not self.cache_dir.exists():
+            return
+        # Só os diretórios <stem>_<mtime>_<tamanho> desta planilha (não os de
+        # outra planilha cujo nome comece com o mesmo stem, ex.: base_2024.xlsx)
+        version_pattern = re.compile(rf"{re.escape(self.excel_file.stem)}_\d+_\d+")
+        for path in self.cache_dir.iterdir():
+            if path.is_dir() and version_pattern.fullmatch(path.name):
+                shutil.rmtree(path, ignore_errors=True)
+
+    def clear(self):
+        """Remove todos os sidecars desta planilha"""
+        self._purge_stale()
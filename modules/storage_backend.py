@@ -0,0 +1,415 @@
+"""
+Backends de armazenamento - Excel (padrão) ou SQLite
+
+O DataManager e o CRUDSystem acessam os dados por meio de um StorageBackend.
+O ExcelBackend mantém a planilha como fonte da verdade (com o sidecar colunar
+e a anexação direta no XML). O SQLiteBackend guarda cada aba em uma tabela
+indexada, permitindo aplicar filtros diretamente em SQL; a importação e a
+exportação para .xlsx continuam disponíveis para interoperabilidade.
+"""
+
+import logging
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from contextlib import closing
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import openpyxl
+import pandas as pd
+
+from backup_system import safe_backup, BackupSystem
+from config.settings import SIDECAR_CONFIG, STORAGE_CONFIG
+from modules import xlsx_appender
+from modules.sidecar_store import SidecarStore
+
+logger = logging.getLogger(__name__)
+
+_backends: Dict[Tuple[str, str], "StorageBackend"] = {}
+_backends_lock = threading.Lock()
+
+
+class StorageBackend(ABC):
+    """Interface comum dos backends de armazenamento (um backend incompleto não pode ser criado)"""
+
+    name = "base"
+    supports_pushdown = False
+
+    @abstractmethod
+    def exists(self) -> bool:
+        """Indica se o armazenamento existe"""
+
+    @abstractmethod
+    def signature(self) -> Optional[Tuple]:
+        """Assinatura que muda a cada escrita (None se não existir)"""
+
+    @abstractmethod
+    def read_sheet(self, sheet_name: str, signature: Optional[Tuple] = None) -> pd.DataFrame:
+        """Lê uma aba; levanta ValueError se ela não existir"""
+
+    @abstractmethod
+    def read_sheets(self, sheet_names: Optional[List[str]] = None,
+                    signature: Optional[Tuple] = None) -> Dict[str, pd.DataFrame]:
+        """Lê várias abas (todas, na ordem original, se sheet_names for None)"""
+
+    @abstractmethod
+    def write_sheet(self, df: pd.DataFrame, sheet_name: str):
+        """Substitui o conteúdo de uma aba"""
+
+    @abstractmethod
+    def append_rows(self, df_new: pd.DataFrame, sheet_name: str, columns: List[str]):
+        """Acrescenta linhas ao final de uma aba cujas colunas atuais são 'columns'"""
+
+    @abstractmethod
+    def backup(self, operation_type: str):
+        """Cria um backup antes de uma alteração"""
+
+    def query(self, sheet_name: str, filters: Dict[str, Any]) -> Optional[pd.DataFrame]:
+        """Aplica filtros de igualdade no próprio armazenamento (None se não suportado)"""
+        return None
+
+
+class ExcelBackend(StorageBackend):
+    """Planilha .xlsx como armazenamento, com sidecar colunar para leituras"""
+
+    name = "excel"
+
+    def __init__(self, excel_file: str):
+        """
+        Inicializa o backend Excel
+
+        Args:
+            excel_file: Caminho para o arquivo Excel
+        """
+        self.excel_file = excel_file
+        self.sidecar = SidecarStore(excel_file, SIDECAR_CONFIG.get("cache_dir")) if SIDECAR_CONFIG["enabled"] else None
+
+    def exists(self) -> bool:
+        return Path(self.excel_file).exists()
+
+    def signature(self) -> Optional[Tuple[int, int]]:
+        """Retorna a assinatura (mtime em ns, tamanho) do arquivo Excel"""
+        try:
+            stat = Path(self.excel_file).stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def read_sheet(self, sheet_name: str, signature: Optional[Tuple] = None) -> pd.DataFrame:
+        df = self.sidecar.read(sheet_name, signature) if self.sidecar else None
+        if df is None:
+            # Carregar dados, especificando a vírgula como separador decimal
+            df = pd.read_excel(self.excel_file, sheet_name=sheet_name, decimal=',')
+            if self.sidecar:
+                self.sidecar.write(sheet_name, df, signature)
+        return df
+
+    def read_sheets(self, sheet_names: Optional[List[str]] = None,
+                    signature: Optional[Tuple] = None) -> Dict[str, pd.DataFrame]:
+        """Lê as abas pedidas abrindo a planilha no máximo uma vez"""
+        sheets: Dict[str, pd.DataFrame] = {}
+        missing = []
+        for sheet in sheet_names or []:
+            df = self.sidecar.read(sheet, signature) if self.sidecar else None
+            if df is None:
+                missing.append(sheet)
+            else:
+                sheets[sheet] = df
+
+        if missing or sheet_names is None:
+            excel_data = pd.read_excel(self.excel_file, sheet_name=missing or None, decimal=',')
+            for sheet, df in excel_data.items():
+                if self.sidecar:
+                    self.sidecar.write(sheet, df, signature)
+                sheets[sheet] = df
+
+        if sheet_names is None:
+            return sheets
+        return {sheet: sheets[sheet] for sheet in sheet_names}
+
+    def write_sheet(self, df: pd.DataFrame, sheet_name: str):
+        with pd.ExcelWriter(self.excel_file, engine='openpyxl', mode='a', if_sheet_exists='replace') as writer:
+            df.to_excel(writer, sheet_name=sheet_name, index=False)
+
+    def append_rows(self, df_new: pd.DataFrame, sheet_name: str, columns: List[str]):
+        """Anexa direto no XML da aba; colunas novas exigem o caminho do openpyxl"""
+        new_columns = [col for col in df_new.columns if col not in columns]
+        rows = df_new.reindex(columns=columns).astype(object).values.tolist()
+        try:
+            if new_columns or not columns:
+                raise xlsx_appender.UnsupportedAppend(f"Novas colunas: {new_columns}")
+            xlsx_appender.append_rows(self.excel_file, sheet_name, rows)
+        except xlsx_appender.UnsupportedAppend as e:
+            logger.info(f"Anexação direta indisponível para {sheet_name} ({e}); usando openpyxl")
+            self._append_rows_openpyxl(df_new, sheet_name)
+
+    def _append_rows_openpyxl(self, df_new: pd.DataFrame, sheet_name: str):
+        """Acrescenta linhas com o openpyxl, criando colunas ou a aba se necessário"""
+        workbook = openpyxl.load_workbook(self.excel_file)
+        try:
+            if sheet_name in workbook.sheetnames:
+                worksheet = workbook[sheet_name]
+                header = [cell.value for cell in worksheet[1]]
+            else:
+                worksheet = workbook.create_sheet(sheet_name)
+                header = []
+            if not any(value is not None for value in header):
+                header = []
+
+            for col in df_new.columns:
+                if col not in header:
+                    header.append(col)
+                    worksheet.cell(row=1, column=len(header), value=col)
+
+            for values in df_new.reindex(columns=header).astype(object).values.tolist():
+                worksheet.append([None if pd.isna(value) else value for value in values])
+
+            workbook.save(self.excel_file)
+        finally:
+            workbook.close()
+
+    def backup(self, operation_type: str):
+        safe_backup(operation_type, self.excel_file)
+
+
+class SQLiteBackend(StorageBackend):
+    """
+    Banco SQLite como armazenamento: uma tabela indexada por aba
+
+    Os tipos de cada coluna ficam registrados na tabela '_schema' para que as
+    datas voltem como datetime na leitura; a ordem das linhas segue o rowid,
+    preservando os índices posicionais usados pelo CRUD.
+    """
+
+    name = "sqlite"
+    supports_pushdown = True
+
+    def __init__(self, db_path: str, indexed_columns: Optional[List[str]] = None):
+        """
+        Inicializa o backend SQLite
+
+        Args:
+            db_path: Caminho do arquivo .db
+            indexed_columns: Colunas que recebem índice quando existirem na aba
+        """
+        self.db_path = db_path
+        self.indexed_columns = indexed_columns or []
+        self._local = threading.local()
+
+    # --- Infraestrutura -------------------------------------------------
+
+    def _connect(self) -> sqlite3.Connection:
+        """Uma conexão por thread (o compactador do journal roda em outra thread)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(
+                'CREATE TABLE IF NOT EXISTS _sheets (name TEXT PRIMARY KEY, position INTEGER);'
+                'CREATE TABLE IF NOT EXISTS _schema (sheet TEXT, col TEXT, position INTEGER, kind TEXT,'
+                ' PRIMARY KEY (sheet, col));'
+                'CREATE TABLE IF NOT EXISTS _meta (key TEXT PRIMARY KEY, value INTEGER);'
+                "INSERT OR IGNORE INTO _meta VALUES ('version', 0);"
+            )
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _quote(identifier: str) -> str:
+        return '"' + str(identifier).replace('"', '""') + '"'
+
+    @staticmethod
+    def _column_kind(series: pd.Series) -> str:
+        if pd.api.types.is_datetime64_any_dtype(series):
+            return "datetime"
+        if pd.api.types.is_bool_dtype(series):
+            return "bool"
+        if pd.api.types.is_integer_dtype(series):
+            return "integer"
+        if pd.api.types.is_float_dtype(series):
+            return "real"
+        return "text"
+
+    @staticmethod
+    def _to_sql_value(value: Any) -> Any:
+        if value is None:
+            return None
+        try:
+            if pd.isna(value):
+                return None
+        except (TypeError, ValueError):
+            pass
+        if isinstance(value, (pd.Timestamp, datetime)):
+            return pd.Timestamp(value).isoformat()
+        if hasattr(value, "item"):
+            return value.item()
+        if not isinstance(value, (int, float, str, bytes)):
+            return str(value)
+        return value
+
+    def _bump_version(self, conn: sqlite3.Connection):
+        conn.execute("UPDATE _meta SET value = value + 1 WHERE key = 'version'")
+
+    def _schema(self, conn: sqlite3.Connection, sheet_name: str) -> List[Tuple[str, str]]:
+        return conn.execute(
+            "SELECT col, kind FROM _schema WHERE sheet = ? ORDER BY position", (sheet_name,)
+        ).fetchall()
+
+    def _restore_types(self, df: pd.DataFrame, schema: List[Tuple[str, str]]) -> pd.DataFrame:
+        for col, kind in schema:
+            if col not in df.columns:
+                continue
+            if kind == "datetime":
+                df[col] = pd.to_datetime(df[col], errors='coerce')
+            elif kind == "bool":
+                df[col] = df[col].astype("boolean")
+        return df
+
+    # --- Interface ------------------------------------------------------
+
+    def exists(self) -> bool:
+        return Path(self.db_path).exists()
+
+    def signature(self) -> Optional[Tuple]:
+        if not self.exists():
+            return None
+        row = self._connect().execute("SELECT value FROM _meta WHERE key = 'version'").fetchone()
+        return ("sqlite", row[0] if row else 0)
+
+    def sheet_names(self) -> List[str]:
+        rows = self._connect().execute("SELECT name FROM _sheets ORDER BY position").fetchall()
+        return [row[0] for row in rows]
+
+    def _select(self, sheet_name: str, where: str = "", params: Tuple = ()) -> pd.DataFrame:
+        conn = self._connect()
+        schema = self._schema(conn, sheet_name)
+        if not schema:
+            raise ValueError(f"Worksheet named '{sheet_name}' not found")
+        columns = ", ".join(self._quote(col) for col, _ in schema)
+        sql = f"SELECT {columns} FROM {self._quote(sheet_name)} {where} ORDER BY rowid"
+        df = pd.read_sql_query(sql, conn, params=params)
+        return self._restore_types(df, schema)
+
+    def read_sheet(self, sheet_name: str, signature: Optional[Tuple] = None) -> pd.DataFrame:
+        return self._select(sheet_name)
+
+    def read_sheets(self, sheet_names: Optional[List[str]] = None,
+                    signature: Optional[Tuple] = None) -> Dict[str, pd.DataFrame]:
+        names = sheet_names if sheet_names is not None else self.sheet_names()
+        return {sheet: self._select(sheet) for sheet in names}
+
+    def write_sheet(self, df: pd.DataFrame, sheet_name: str):
+        conn = self._connect()
+        table = self._quote(sheet_name)
+        columns = [str(col) for col in df.columns]
+        with conn:
+            conn.execute(f"DROP TABLE IF EXISTS {table}")
+            conn.execute(f"CREATE TABLE {table} ({', '.join(self._quote(col) for col in columns)})")
+            conn.execute("DELETE FROM _schema WHERE sheet = ?", (sheet_name,))
+            conn.executemany(
+                "INSERT INTO _schema VALUES (?, ?, ?, ?)",
+                [(sheet_name, col, position, self._column_kind(df[original]))
+                 for position, (col, original) in enumerate(zip(columns, df.columns))],
+            )
+            position = conn.execute(
+                "SELECT COALESCE((SELECT position FROM _sheets WHERE name = ?),"
+                " (SELECT COALESCE(MAX(position), -1) + 1 FROM _sheets))", (sheet_name,)
+            ).fetchone()[0]
+            conn.execute("INSERT OR REPLACE INTO _sheets VALUES (?, ?)", (sheet_name, position))
+            self._insert(conn, sheet_name, df, columns)
+            for col in self.indexed_columns:
+                if col in columns:
+                    index_name = self._quote(f"ix_{sheet_name}_{col}")
+                    conn.execute(f"CREATE INDEX {index_name} ON {table} ({self._quote(col)})")
+            self._bump_version(conn)
+
+    def _insert(self, conn: sqlite3.Connection, sheet_name: str, df: pd.DataFrame, columns: List[str]):
+        if df.empty:
+            return
+        placeholders = ", ".join("?" for _ in columns)
+        column_list = ", ".join(self._quote(col) for col in columns)
+        rows = [
+            tuple(self._to_sql_value(value) for value in values)
+            for values in df.astype(object).values.tolist()
+        ]
+        conn.executemany(f"INSERT INTO {self._quote(sheet_name)} ({column_list}) VALUES ({placeholders})", rows)
+
+    def append_rows(self, df_new: pd.DataFrame, sheet_name: str, columns: List[str]):
+        conn = self._connect()
+        if not self._schema(conn, sheet_name):
+            self.write_sheet(df_new, sheet_name)
+            return
+        with conn:
+            position = len(columns)
+            for col in df_new.columns:
+                if col not in columns:
+                    conn.execute(f"ALTER TABLE {self._quote(sheet_name)} ADD COLUMN {self._quote(col)}")
+                    conn.execute("INSERT INTO _schema VALUES (?, ?, ?, ?)",
+                                 (sheet_name, str(col), position, self._column_kind(df_new[col])))
+                    position += 1
+            present = [str(col) for col in df_new.columns]
+            self._insert(conn, sheet_name, df_new, present)
+            self._bump_version(conn)
+
+    def backup(self, operation_type: str):
+        """Copia o banco com a API de backup do SQLite para o diretório de backups"""
+        backup_dir = Path(BackupSystem(self.db_path).backup_dir)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        target = backup_dir / f"backup_{operation_type}_{timestamp}.db"
+        with closing(sqlite3.connect(str(target))) as destination:
+            self._connect().backup(destination)
+
+    def query(self, sheet_name: str, filters: Dict[str, Any]) -> Optional[pd.DataFrame]:
+        """Traduz filtros de igualdade/lista para uma cláusula WHERE"""
+        conn = self._connect()
+        kinds = dict(self._schema(conn, sheet_name))
+        clauses, params = [], []
+        for column, value in (filters or {}).items():
+            if column not in kinds or not value:
+                continue
+            values = list(value) if isinstance(value, (list, tuple)) else [value]
+            sql_values = [self._to_sql_value(v) for v in values]
+            clauses.append(f"{self._quote(column)} IN ({', '.join('?' for _ in sql_values)})")
+            params.extend(sql_values)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return self._select(sheet_name, where, tuple(params))
+
+    # --- Interoperabilidade com .xlsx ---------------------------------
+
+    def import_xlsx(self, excel_file: str):
+        """Importa todas as abas de uma planilha, substituindo as tabelas existentes"""
+        sheets = pd.read_excel(excel_file, sheet_name=None, decimal=',')
+        for sheet_name, df in sheets.items():
+            self.write_sheet(df, sheet_name)
+        logger.info(f"{len(sheets)} aba(s) importada(s) de {excel_file} para {self.db_path}")
+
+    def export_xlsx(self, excel_file: str):
+        """Exporta todas as tabelas para uma planilha .xlsx"""
+        with pd.ExcelWriter(excel_file, engine='openpyxl') as writer:
+            for sheet_name, df in self.read_sheets().items():
+                df.to_excel(writer, sheet_name=sheet_name, index=False)
+
+
+def get_storage(excel_file: str) -> StorageBackend:
+    """
+    Retorna o backend configurado em STORAGE_CONFIG para a planilha
+
+    Com o backend SQLite, o banco é criado a partir da planilha no primeiro uso.
+    """
+    backend_name = STORAGE_CONFIG.get("backend", "excel")
+    if backend_name == "excel":
+        return ExcelBackend(excel_file)
+    if backend_name != "sqlite":
+        raise ValueError(f"Backend de armazenamento desconhecido: {backend_name}")
+
+    db_path = STORAGE_CONFIG.get("sqlite_path") or str(Path(excel_file).with_suffix(".db"))
+    key = (backend_name, str(Path(db_path).resolve()))
+    with _backends_lock:
+        if key not in _backends:
+            backend = SQLiteBackend(db_path, STORAGE_CONFIG.get("indexed_columns"))
+            if not backend.exists() and Path(excel_file).exists():
+                backend.import_xlsx(excel_file)
+            _backends[key] = backend
+        return _backends[key]
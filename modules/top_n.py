@@ -0,0 +1,49 @@
+"""
+Seleção dos N maiores totais de grupos (top 5 de categorias, clientes, ativos...)
+
+Recebe os totais já agregados por grupo (consultas ao cubo mensal ou um
+groupby) e escolhe os N maiores por seleção parcial (np.partition), em tempo
+linear no número de grupos; só os N escolhidos são ordenados. Como os totais
+do cubo acompanham as escritas por deltas (ver monthly_cube), as páginas não
+reagrupam nem reordenam o histórico a cada rerun para mostrar cinco barras.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def top_n(totals: pd.Series, n: int = 5, absolute: bool = False) -> pd.Series:
+    """
+    Os n maiores totais, em ordem decrescente
+
+    Equivale a totals.sort_values(ascending=False, kind='stable').head(n):
+    empates ficam na ordem original e totais nulos são descartados.
+
+    Args:
+        totals: Série de totais indexada pelo grupo
+        n: Quantidade de grupos
+        absolute: Se True, compara e devolve os valores absolutos (despesas)
+
+    Returns:
+        Série com até n grupos
+    """
+    if absolute:
+        totals = totals.abs()
+    values = totals.to_numpy(dtype=float, na_value=np.nan)
+    valid = np.flatnonzero(~np.isnan(values))
+    if n <= 0 or not len(valid):
+        return totals.iloc[:0]
+
+    if len(valid) > n:
+        candidates = values[valid]
+        kth = np.partition(candidates, len(candidates) - n)[len(candidates) - n]
+        above = valid[candidates > kth]
+        ties = valid[candidates == kth][: n - len(above)]
+        valid = np.concatenate([above, ties])
+    order = valid[np.lexsort((valid, -values[valid]))]
+    return totals.iloc[order]
+
+
+def top_n_frame(totals: pd.Series, n: int = 5, absolute: bool = False) -> pd.DataFrame:
+    """Como top_n, no formato de groupby(...).sum().reset_index() usado pelos gráficos"""
+    return top_n(totals, n, absolute).reset_index()
@@ -0,0 +1,144 @@
+"""
+Vocabulário das colunas categóricas (opções dos selectbox)
+
+Para cada aba, guarda a contagem de cada valor distinto das colunas de
+vocabulário (CATEGORIA, DESCRIÇÃO, FAVORECIDO, CONTA, Cartão, TIPO, ATIVO e
+outras pedidas sob demanda) e a lista ordenada desses valores. O vocabulário é
+montado uma vez por versão da aba; inserções e exclusões feitas pelo
+DataManager apenas somam ou subtraem as linhas afetadas, e a lista ordenada só
+é refeita quando um valor aparece ou desaparece.
+"""
+
+import threading
+from collections import Counter
+from typing import Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+import pandas as pd
+
+VOCABULARY_COLUMNS = ("CATEGORIA", "DESCRIÇÃO", "FAVORECIDO", "CONTA", "Cartão", "TIPO", "ATIVO")
+
+
+def _sorted_values(values: Iterable[Hashable]) -> Tuple:
+    """Ordena os valores; tipos misturados são ordenados pelo texto"""
+    values = list(values)
+    try:
+        return tuple(sorted(values))
+    except TypeError:
+        return tuple(sorted(values, key=str))
+
+
+class SheetVocabulary:
+    """Contagem dos valores distintos das colunas de uma aba"""
+
+    def __init__(self, df: pd.DataFrame, columns: Iterable[str] = ()):
+        """
+        Conta os valores das colunas de vocabulário presentes na aba
+
+        Args:
+            df: DataFrame da aba
+            columns: Colunas adicionais a incluir
+        """
+        self._counts: Dict[str, Counter] = {}
+        self._sorted: Dict[str, Tuple] = {}
+        tracked = [col for col in dict.fromkeys((*VOCABULARY_COLUMNS, *columns)) if col in df.columns]
+        for column in tracked:
+            self._counts[column] = self._count(df[column])
+
+    @staticmethod
+    def _count(values: pd.Series) -> Counter:
+        return Counter(values.dropna().value_counts().to_dict())
+
+    def __contains__(self, column: str) -> bool:
+        return column in self._counts
+
+    def track(self, df: pd.DataFrame, column: str):
+        """Passa a acompanhar uma coluna pedida sob demanda"""
+        self._counts[column] = self._count(df[column]) if column in df.columns else Counter()
+        self._sorted.pop(column, None)
+
+    def values(self, column: str) -> Tuple:
+        """Valores distintos da coluna, em ordem (tupla compartilhada)"""
+        cached = self._sorted.get(column)
+        if cached is None:
+            cached = _sorted_values(self._counts.get(column, ()))
+            self._sorted[column] = cached
+        return cached
+
+    def apply(self, added: Optional[pd.DataFrame] = None, removed: Optional[pd.DataFrame] = None):
+        """
+        Atualiza as contagens com linhas inseridas e removidas
+
+        Uma edição é uma remoção da linha antiga seguida da inserção da nova.
+        """
+        for column, counts in self._counts.items():
+            changed = False
+            if removed is not None and column in removed.columns:
+                for value, count in self._count(removed[column]).items():
+                    remaining = counts[value] - count
+                    if remaining > 0:
+                        counts[value] = remaining
+                    else:
+                        counts.pop(value, None)
+                        changed = True
+            if added is not None and column in added.columns:
+                for value, count in self._count(added[column]).items():
+                    changed |= value not in counts
+                    counts[value] += count
+            if changed:
+                self._sorted.pop(column, None)
+
+
+class VocabularyService:
+    """Vocabulários por aba, válidos para uma versão de conteúdo"""
+
+    def __init__(self):
+        self._sheets: Dict[str, Tuple[Hashable, SheetVocabulary]] = {}
+        self._lock = threading.Lock()
+
+    def values(self, sheet_name: str, column: str, version: Hashable,
+               load: Callable[[], pd.DataFrame]) -> Tuple:
+        """
+        Valores distintos e ordenados de uma coluna
+
+        Args:
+            sheet_name: Nome da aba
+            column: Nome da coluna
+            version: Versão atual da aba
+            load: Função que devolve o DataFrame da aba (chamada só ao reconstruir)
+
+        Returns:
+            Tupla ordenada com os valores distintos (vazia se a coluna não existir)
+        """
+        with self._lock:
+            cached = self._sheets.get(sheet_name)
+            if cached is None or cached[0] != version:
+                df = load()
+                cached = (version, SheetVocabulary(df, [column]))
+                self._sheets[sheet_name] = cached
+            elif column not in cached[1]:
+                cached[1].track(load(), column)
+            return cached[1].values(column)
+
+    def advance(self, sheet_name: str, from_version: Hashable, to_version: Hashable,
+                added: Optional[pd.DataFrame] = None, removed: Optional[pd.DataFrame] = None) -> bool:
+        """
+        Leva o vocabulário de uma versão à seguinte aplicando só as linhas alteradas
+
+        Se o vocabulário guardado não é o de from_version, nada é feito e ele
+        será reconstruído na próxima consulta.
+
+        Returns:
+            True se o vocabulário foi atualizado incrementalmente
+        """
+        with self._lock:
+            cached = self._sheets.get(sheet_name)
+            if cached is None or cached[0] != from_version:
+                return False
+            cached[1].apply(added=added, removed=removed)
+            self._sheets[sheet_name] = (to_version, cached[1])
+            return True
+
+    def clear(self):
+        """Descarta todos os vocabulários"""
+        with self._lock:
+            self._sheets.clear()
@@ -0,0 +1,187 @@
+"""
+Snapshot da planilha - Todas as abas de uma versão do arquivo Excel
+"""
+
+import logging
+import pandas as pd
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config.settings import CUBE_CONFIG
+from modules.date_dimensions import add_date_dimensions
+from modules.date_index import DateSortedView
+from modules.filter_plan import CodedColumns
+from modules.first_purchase import FirstPurchaseIndex
+from modules.monthly_cube import MonthlyCube
+
+# Colunas de data presentes nas abas transacionais ('Div_CC' usa 'Data')
+DATE_COLUMNS = ("DATA", "Data")
+
+logger = logging.getLogger(__name__)
+
+
+class WorkbookSnapshot:
+    """
+    Conjunto imutável das abas de uma única versão da planilha
+
+    As abas são tipadas uma única vez na criação do snapshot: colunas de data
+    convertidas para datetime e colunas derivadas Ano, Mês, MÊS_ANO e PERÍODO
+    (ver modules.date_dimensions). Os consumidores recebem cópias, de modo que
+    alterações feitas pelas páginas não afetam o snapshot compartilhado.
+
+    Abas com a mesma versão do snapshot anterior reaproveitam o DataFrame
+    tipado e as estruturas derivadas dele; nas abas alteradas por escritas do
+    DataManager, o cubo mensal (e, só com inserções, o índice de primeira
+    compra) é derivado do anterior com as linhas alteradas.
+    """
+
+    def __init__(self, sheets: Dict[str, pd.DataFrame], signature: Optional[Tuple[int, int]],
+                 versions: Optional[Dict[str, int]] = None, previous: Optional["WorkbookSnapshot"] = None,
+                 deltas: Optional[Dict[str, List[Tuple]]] = None):
+        """
+        Inicializa o snapshot
+
+        Args:
+            sheets: Dicionário aba -> DataFrame lido da planilha
+            signature: Assinatura (mtime em ns, tamanho) do arquivo lido
+            versions: Versão de conteúdo de cada aba (DataManager.get_sheet_version)
+            previous: Snapshot anterior do mesmo DataManager
+            deltas: Por aba, passos (versão de origem, versão de destino, linhas
+                inseridas, linhas removidas) registrados desde o snapshot anterior
+        """
+        self.signature = signature
+        self._versions = dict(versions or {})
+        self._sheets: Dict[str, pd.DataFrame] = {}
+        # Estruturas derivadas das abas (visões, códigos), construídas sob demanda
+        self._derived: Dict[Tuple[str, str], Any] = {}
+        # Construções alternativas a partir do snapshot anterior (estruturas atualizadas por deltas)
+        self._seeds: Dict[Tuple[str, str], Callable[[pd.DataFrame], Any]] = {}
+        for name, df in sheets.items():
+            if previous is not None and name in self._versions and previous._versions.get(name) == self._versions[name]:
+                self._sheets[name] = previous._sheets[name]
+                self._derived.update({key: value for key, value in previous._derived.items() if key[1] == name})
+            else:
+                self._sheets[name] = self._typed(df)
+                if previous is not None:
+                    self._seed_incremental(previous, name, (deltas or {}).get(name, []))
+
+    def _seed_incremental(self, previous: "WorkbookSnapshot", sheet_name: str, steps: List[Tuple]):
+        """Prepara cubo e índice de clientes a partir dos anteriores, se os passos ligam as duas versões"""
+        if not steps:
+            return
+        version, added, removed = previous.version(sheet_name), [], []
+        for from_version, to_version, step_added, step_removed in steps:
+            if from_version == version:
+                added.extend(frame for frame in (step_added,) if frame is not None and len(frame))
+                removed.extend(frame for frame in (step_removed,) if frame is not None and len(frame))
+                version = to_version
+        if version != self.version(sheet_name):
+            return  # Houve alteração sem delta conhecido: as estruturas são reconstruídas
+
+        cube = previous._derived.get(("monthly_cube", sheet_name))
+        if cube is not None:
+            self._seeds[("monthly_cube", sheet_name)] = self._cube_seed(cube, sheet_name, added, removed)
+        # A primeira compra não se desfaz por subtração: remoções reconstroem o índice
+        index = previous._derived.get(("first_purchases", sheet_name))
+        if index is not None and not removed:
+            self._seeds[("first_purchases", sheet_name)] = (
+                lambda df: index.apply(pd.concat(added, ignore_index=True)) if added else index
+            )
+
+    def _cube_seed(self, cube: MonthlyCube, sheet_name: str, added: List[pd.DataFrame],
+                   removed: List[pd.DataFrame]) -> Callable[[pd.DataFrame], MonthlyCube]:
+        """Construção do cubo a partir do anterior, com a conferência periódica"""
+        def build(df: pd.DataFrame) -> MonthlyCube:
+            updated = cube.apply(
+                added=self._typed(pd.concat(added, ignore_index=True)) if added else None,
+                removed=self._typed(pd.concat(removed, ignore_index=True)) if removed else None,
+            )
+            if updated.generation < CUBE_CONFIG["verify_every"]:
+                return updated
+            # Reconstrução periódica: confere a manutenção incremental
+            rebuilt = MonthlyCube(df, sheet_name)
+            if not updated.matches(rebuilt):
+                logger.warning(f"Cubo mensal da aba {sheet_name} divergiu da reconstrução; usando o cubo reconstruído")
+            return rebuilt
+
+        return build
+
+    @staticmethod
+    def _typed(df: pd.DataFrame) -> pd.DataFrame:
+        """Converte as colunas de data para datetime e acrescenta as dimensões de data"""
+        df = df.copy()
+        date_cols = [col for col in DATE_COLUMNS if col in df.columns]
+        for col in date_cols:
+            if not pd.api.types.is_datetime64_any_dtype(df[col]):
+                df[col] = pd.to_datetime(df[col], errors='coerce')
+        if date_cols:
+            add_date_dimensions(df, date_cols[0])
+        return df
+
+    @property
+    def sheet_names(self) -> List[str]:
+        """Nomes das abas na ordem da planilha"""
+        return list(self._sheets.keys())
+
+    def __contains__(self, sheet_name: str) -> bool:
+        return sheet_name in self._sheets
+
+    def version(self, sheet_name: str):
+        """
+        Versão de conteúdo da aba neste snapshot, usada como chave de caches derivados
+
+        Sem as versões do DataManager, recorre à assinatura do snapshot inteiro.
+        """
+        return self._versions.get(sheet_name, self.signature)
+
+    def get(self, sheet_name: str, copy: bool = True) -> pd.DataFrame:
+        """
+        Retorna os dados de uma aba
+
+        Args:
+            sheet_name: Nome da aba
+            copy: Se False, retorna o DataFrame compartilhado (somente leitura)
+
+        Returns:
+            DataFrame da aba ou DataFrame vazio se a aba não existir
+        """
+        df = self._sheets.get(sheet_name)
+        if df is None:
+            return pd.DataFrame()
+        return df.copy() if copy else df
+
+    def date_view(self, sheet_name: str) -> DateSortedView:
+        """
+        Visão da aba ordenada por DATA, construída na primeira chamada
+
+        Como o snapshot é imutável, a visão vale enquanto a versão da planilha
+        não mudar e é compartilhada por todos os filtros.
+
+        Args:
+            sheet_name: Nome da aba
+
+        Returns:
+            DateSortedView da aba (vazia se a aba não existir)
+        """
+        return self._derive("date_view", sheet_name, DateSortedView)
+
+    def coded_columns(self, sheet_name: str) -> CodedColumns:
+        """Colunas de filtro da aba (Ano, Mês, CONTA, CATEGORIA) em códigos inteiros"""
+        return self._derive("coded_columns", sheet_name, CodedColumns)
+
+    def monthly_cube(self, sheet_name: str) -> MonthlyCube:
+        """Cubo mensal (somas e contagens por dimensões e mês) da aba"""
+        return self._derive("monthly_cube", sheet_name, lambda df: MonthlyCube(df, sheet_name))
+
+    def first_purchases(self, sheet_name: str = "Vendas") -> FirstPurchaseIndex:
+        """Índice da primeira compra de cada cliente da aba"""
+        return self._derive("first_purchases", sheet_name, FirstPurchaseIndex)
+
+    def _derive(self, kind: str, sheet_name: str, build: Callable[[pd.DataFrame], Any]) -> Any:
+        """Constrói uma estrutura derivada da aba uma única vez por snapshot"""
+        key = (kind, sheet_name)
+        derived = self._derived.get(key)
+        if derived is None:
+            build = self._seeds.pop(key, build)
+            derived = build(self.get(sheet_name, copy=False))
+            self._derived[key] = derived
+        return derived
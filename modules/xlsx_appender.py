@@ -0,0 +1,185 @@
+"""
+Anexação direta de linhas ao XML de uma aba do .xlsx
+
+Um arquivo .xlsx é um zip com um XML por aba. Para lançar uma transação basta
+acrescentar elementos <row> ao final do <sheetData> da aba de destino: as
+demais abas são copiadas byte a byte, sem serem interpretadas, e nem o
+openpyxl nem o pandas precisam carregar a pasta de trabalho inteira.
+
+Quando a aba tem uma forma que este caminho não cobre (aba inexistente,
+coluna de data sem estilo de referência, etc.) append_rows levanta
+UnsupportedAppend e o chamador deve usar o caminho completo do openpyxl.
+"""
+
+import os
+import posixpath
+import re
+import shutil
+import tempfile
+import zipfile
+from datetime import date, datetime, time
+from typing import Any, Dict, List, Optional, Sequence
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape
+
+import numpy as np
+import pandas as pd
+
+NS_MAIN = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+NS_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+NS_PKG_REL = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+EXCEL_EPOCH = datetime(1899, 12, 30)
+
+_ROW_RE = re.compile(r"<row\b[^>]*?(?:/>|>.*?</row>)", re.DOTALL)
+_ROW_NUMBER_RE = re.compile(r'\br="(\d+)"')
+_CELL_RE = re.compile(r'<c\b[^>]*?\br="([A-Z]+)\d+"([^>]*?)(/>|>)')
+_STYLE_RE = re.compile(r'\bs="(\d+)"')
+_DIMENSION_RE = re.compile(r'<dimension ref="([A-Z]+)\d+(?::([A-Z]+)\d+)?"\s*/>')
+
+
+class UnsupportedAppend(Exception):
+    """A aba não pode ser anexada diretamente; usar o caminho completo"""
+
+
+def column_letter(index: int) -> str:
+    """Converte um índice de coluna (1 = A) para a letra do Excel"""
+    letters = ""
+    while index > 0:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def _sheet_path(archive: zipfile.ZipFile, sheet_name: str) -> str:
+    """Localiza o XML da aba dentro do zip a partir do workbook.xml"""
+    workbook = ElementTree.fromstring(archive.read("xl/workbook.xml"))
+    rel_id = None
+    for sheet in workbook.iter(f"{{{NS_MAIN}}}sheet"):
+        if sheet.get("name") == sheet_name:
+            rel_id = sheet.get(f"{{{NS_REL}}}id")
+            break
+    if rel_id is None:
+        raise UnsupportedAppend(f"Aba '{sheet_name}' não encontrada")
+
+    rels = ElementTree.fromstring(archive.read("xl/_rels/workbook.xml.rels"))
+    for rel in rels.iter(f"{{{NS_PKG_REL}}}Relationship"):
+        if rel.get("Id") == rel_id:
+            target = rel.get("Target")
+            if target.startswith("/"):
+                return target.lstrip("/")
+            return posixpath.normpath(posixpath.join("xl", target))
+    raise UnsupportedAppend(f"Relacionamento da aba '{sheet_name}' não encontrado")
+
+
+def _is_missing(value: Any) -> bool:
+    if value is None:
+        return True
+    try:
+        return bool(pd.isna(value))
+    except (TypeError, ValueError):
+        return False
+
+
+def _cell_xml(ref: str, value: Any, style: Optional[str]) -> str:
+    """Gera o XML de uma célula; strings são gravadas inline (sem sharedStrings)"""
+    style_attr = f' s="{style}"' if style else ""
+
+    if isinstance(value, (bool, np.bool_)):
+        return f'<c r="{ref}" t="b"{style_attr}><v>{int(value)}</v></c>'
+    if isinstance(value, (pd.Timestamp, datetime, date)) and not isinstance(value, time):
+        if not style:
+            # Sem um estilo de data na coluna o valor apareceria como número
+            raise UnsupportedAppend(f"Coluna de data sem estilo de referência em {ref}")
+        moment = pd.Timestamp(value).tz_localize(None).to_pydatetime()
+        serial = (moment - EXCEL_EPOCH).total_seconds() / 86400
+        return f'<c r="{ref}"{style_attr}><v>{serial:.10g}</v></c>'
+    if isinstance(value, (int, np.integer)):
+        return f'<c r="{ref}"{style_attr}><v>{int(value)}</v></c>'
+    if isinstance(value, (float, np.floating)):
+        return f'<c r="{ref}"{style_attr}><v>{float(value)!r}</v></c>'
+
+    text = escape(str(value))
+    return f'<c r="{ref}" t="inlineStr"{style_attr}><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def append_rows(excel_file: str, sheet_name: str, rows: Sequence[Sequence[Any]]) -> int:
+    """
+    Acrescenta linhas ao final de uma aba sem reprocessar as demais
+
+    Args:
+        excel_file: Caminho do arquivo .xlsx
+        sheet_name: Nome da aba de destino
+        rows: Linhas já ordenadas pelas colunas da aba (A, B, C, ...)
+
+    Returns:
+        Número da última linha gravada
+    """
+    with zipfile.ZipFile(excel_file) as archive:
+        sheet_path = _sheet_path(archive, sheet_name)
+        sheet_xml = archive.read(sheet_path).decode("utf-8")
+
+        if "<sheetData/>" in sheet_xml:
+            raise UnsupportedAppend("Aba sem cabeçalho")
+        data_end = sheet_xml.find("</sheetData>")
+        data_start = sheet_xml.find("<sheetData")
+        if data_start < 0 or data_end < 0:
+            raise UnsupportedAppend("Estrutura <sheetData> não reconhecida")
+
+        # Última linha com conteúdo; linhas vazias apenas formatadas depois dela são descartadas
+        last_row_match = None
+        for match in _ROW_RE.finditer(sheet_xml, data_start, data_end):
+            if "<v>" in match.group(0) or "<is>" in match.group(0) or "<f" in match.group(0):
+                last_row_match = match
+        if last_row_match is None:
+            raise UnsupportedAppend("Aba sem linhas")
+
+        last_row_xml = last_row_match.group(0)
+        last_row = int(_ROW_NUMBER_RE.search(last_row_xml).group(1))
+        styles: Dict[str, str] = {}
+        for cell in _CELL_RE.finditer(last_row_xml):
+            style = _STYLE_RE.search(cell.group(2))
+            if style:
+                styles[cell.group(1)] = style.group(1)
+
+        new_rows: List[str] = []
+        row_number = last_row
+        max_col = 0
+        for values in rows:
+            row_number += 1
+            cells = []
+            for position, value in enumerate(values, start=1):
+                if _is_missing(value):
+                    continue
+                letter = column_letter(position)
+                cells.append(_cell_xml(f"{letter}{row_number}", value, styles.get(letter)))
+                max_col = max(max_col, position)
+            new_rows.append(f'<row r="{row_number}">{"".join(cells)}</row>')
+
+        new_xml = sheet_xml[:last_row_match.end()] + "".join(new_rows) + sheet_xml[data_end:]
+
+        def _update_dimension(match):
+            first_col, last_col = match.group(1), match.group(2) or match.group(1)
+            new_last_col = column_letter(max_col)
+            if (len(new_last_col), new_last_col) > (len(last_col), last_col):
+                last_col = new_last_col
+            return f'<dimension ref="{first_col}1:{last_col}{row_number}"/>'
+
+        new_xml = _DIMENSION_RE.sub(_update_dimension, new_xml, count=1)
+
+        # Regrava o zip copiando as outras entradas sem interpretá-las
+        directory = os.path.dirname(os.path.abspath(excel_file))
+        fd, tmp_path = tempfile.mkstemp(suffix=".xlsx", dir=directory)
+        os.close(fd)
+        shutil.copymode(excel_file, tmp_path)
+        try:
+            with zipfile.ZipFile(tmp_path, "w") as output:
+                for info in archive.infolist():
+                    data = new_xml.encode("utf-8") if info.filename == sheet_path else archive.read(info)
+                    output.writestr(info, data, compress_type=info.compress_type)
+        except Exception:
+            os.remove(tmp_path)
+            raise
+
+    os.replace(tmp_path, excel_file)
+    return row_number
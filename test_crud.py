@@ -49,7 +49,9 @@ def test_crud_system():
                 'DESCRIÇÃO': 'TESTE DE EDIÇÃO',
                 'VALOR': 100.00
             }
-            success, message = crud_system.update_record('Despesas', 0, updated_data)
+            # A primeira linha, como foi lida, é o 'expected' da verificação otimista
+            primeira = df.iloc[[0]]
+            success, message = crud_system.update_record_by_id('Despesas', primeira['id'].iloc[0], updated_data, primeira)
             if success:
                 st.success("Edição testada com sucesso!")
             else:
@@ -0,0 +1,62 @@
+"""
+Testes para a classificação ABC vetorizada
+"""
+
+import os
+import sys
+import unittest
+
+import numpy as np
+import pandas as pd
+
+# Adicionar o diretório raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.abc_analysis import ABC_COLUMNS, classify_abc, style_abc_page
+
+
+class TestClassifyAbc(unittest.TestCase):
+    """Testes para classify_abc e style_abc_page"""
+
+    def setUp(self):
+        rng = np.random.default_rng(4)
+        n = 2000
+        index = pd.Index([f"D{i}" for i in range(n)], name="DESCRIÇÃO")
+        self.atual = pd.Series(rng.integers(1, 500, n).astype(float), index=index)
+        self.anterior = pd.Series(rng.integers(0, 500, n // 2).astype(float), index=index[::2])
+
+    def test_matches_pandas_version(self):
+        """Ranking, acumulados, classes e MoM coincidem com a versão com apply"""
+        tabela = classify_abc(self.atual, self.anterior)
+        self.assertEqual(list(tabela.columns), ABC_COLUMNS)
+
+        esperado = self.atual.sort_values(ascending=False, kind="stable").rename("VALOR").reset_index()
+        esperado["%Acum"] = esperado["VALOR"].cumsum() / esperado["VALOR"].sum() * 100
+        esperado["Ranking"] = esperado["VALOR"].rank(ascending=False, method="min").astype(int)
+        esperado["Classe"] = "C"
+        esperado.loc[esperado["%Acum"] <= 80, "Classe"] = "A"
+        esperado.loc[(esperado["%Acum"] > 80) & (esperado["%Acum"] <= 90), "Classe"] = "B"
+        anterior = esperado["DESCRIÇÃO"].map(self.anterior).fillna(0)
+        mom = esperado["VALOR"] - anterior
+        mom_pct = [(m / a * 100) if a > 0 else 0 for m, a in zip(mom, anterior)]
+
+        self.assertEqual(tabela["Descrição"].tolist(), esperado["DESCRIÇÃO"].tolist())
+        self.assertEqual(tabela["Ranking"].tolist(), esperado["Ranking"].tolist())
+        self.assertEqual(tabela["Classe"].tolist(), esperado["Classe"].tolist())
+        np.testing.assert_allclose(tabela["%Acum"], esperado["%Acum"])
+        np.testing.assert_allclose(tabela["MoM%"], mom_pct)
+
+    def test_page_styles(self):
+        """A página é formatada em reais e colorida pela classe e pelo sinal do MoM%"""
+        tabela = classify_abc(pd.Series({"Aluguel": 800.0, "Mercado": 100.0, "Cinema": 100.0}),
+                              pd.Series({"Aluguel": 1000.0, "Cinema": 25.0}))
+        html = style_abc_page(tabela).to_html()
+        self.assertEqual(tabela["Classe"].tolist(), ["A", "B", "C"])
+        self.assertIn("R$ 800,00", html)
+        self.assertIn("-20.0% ▼", html)
+        self.assertIn("#ff6961", html)
+        self.assertEqual(classify_abc(pd.Series(dtype=float)).shape, (0, len(ABC_COLUMNS)))
+
+
+if __name__ == "__main__":
+    unittest.main()
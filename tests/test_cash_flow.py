@@ -0,0 +1,62 @@
+"""
+Testes para o fluxo de caixa reamostrado e o downsampling do gráfico
+"""
+
+import os
+import sys
+import unittest
+
+import numpy as np
+import pandas as pd
+
+# Adicionar o diretório raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.cash_flow import downsample_minmax, net_flow
+
+
+class TestNetFlow(unittest.TestCase):
+    """Testes para net_flow"""
+
+    def setUp(self):
+        self.receitas = pd.DataFrame({
+            "DATA": pd.to_datetime(["2024-01-01", "2024-01-03", "2024-02-10"]),
+            "VALOR": [1000.0, 200.0, 500.0],
+        })
+        self.despesas = pd.DataFrame({
+            "DATA": pd.to_datetime(["2024-01-01", "2024-01-20", None, "2024-01-20"]),
+            "VALOR": [-300.0, -50.0, -999.0, -50.0],
+        })
+
+    def test_daily_and_monthly(self):
+        """Fluxo líquido por período, dias sem lançamentos com zero e saldo acumulado"""
+        diario = net_flow(self.receitas, self.despesas, "D")
+        self.assertEqual(len(diario), 41)
+        self.assertEqual(diario.loc["2024-01-01", "Fluxo"], 700.0)
+        self.assertEqual(diario.loc["2024-01-02", "Fluxo"], 0.0)
+        self.assertEqual(diario["Saldo Acumulado"].iloc[-1], 1300.0)
+
+        mensal = net_flow(self.receitas, self.despesas, "ME")
+        self.assertEqual(mensal["Fluxo"].tolist(), [800.0, 500.0])
+        self.assertEqual(mensal["Saldo Acumulado"].tolist(), [800.0, 1300.0])
+        self.assertTrue(net_flow(pd.DataFrame(), self.despesas.iloc[:0]).empty)
+
+
+class TestDownsampleMinMax(unittest.TestCase):
+    """Testes para downsample_minmax"""
+
+    def test_keeps_extremes_within_cap(self):
+        """O número de pontos respeita o limite e os extremos da série são mantidos"""
+        rng = np.random.default_rng(6)
+        values = np.cumsum(rng.normal(size=20000))
+        pontos = downsample_minmax(values, 500)
+        self.assertLessEqual(len(pontos), 500)
+        self.assertTrue(np.all(np.diff(pontos) > 0))
+        self.assertIn(values.argmin(), pontos)
+        self.assertIn(values.argmax(), pontos)
+        self.assertEqual((pontos[0], pontos[-1]), (0, len(values) - 1))
+        np.testing.assert_array_equal(downsample_minmax(values[:100], 500), np.arange(100))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+"""
+Testes para a tabela mês × subcategoria da página Despesas por Categoria
+"""
+
+import os
+import sys
+import unittest
+
+import numpy as np
+import pandas as pd
+
+# Adicionar o diretório raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.category_evolution import period_labels, subcategory_evolution
+from modules.date_dimensions import add_date_dimensions
+
+
+class TestSubcategoryEvolution(unittest.TestCase):
+    """Testes para subcategory_evolution"""
+
+    def setUp(self):
+        despesas = pd.DataFrame({
+            "DATA": pd.to_datetime(["2023-11-05", "2023-11-20", "2024-02-01", "2024-02-10", None]),
+            "DESCRIÇÃO": ["Mercado", "Padaria", "Mercado", "Mercado", "Mercado"],
+            "VALOR": [-100.0, -20.0, -50.0, -30.0, -999.0],
+        })
+        self.despesas = add_date_dimensions(despesas, "DATA")
+
+    def test_complete_months(self):
+        """Todos os meses do intervalo aparecem, com zero onde não há lançamentos"""
+        evolucao = subcategory_evolution(self.despesas)
+        self.assertEqual(evolucao.rotulos, ["Nov/2023", "Dez/2023", "Jan/2024", "Fev/2024"])
+        self.assertEqual(list(evolucao.valores.columns), ["Mercado", "Padaria"])
+        np.testing.assert_allclose(evolucao.valores["Mercado"], [100.0, 0.0, 0.0, 80.0])
+        np.testing.assert_allclose(evolucao.valores["Padaria"], [20.0, 0.0, 0.0, 0.0])
+        # Média do total mensal nos meses com lançamentos: (120 + 80) / 2
+        self.assertAlmostEqual(evolucao.media, 100.0)
+
+    def test_selected_subcategories_and_empty(self):
+        """Colunas na ordem pedida (subcategoria sem lançamentos vira zero) e entrada vazia"""
+        evolucao = subcategory_evolution(self.despesas, ["Padaria", "Farmácia"])
+        self.assertEqual(list(evolucao.valores.columns), ["Padaria", "Farmácia"])
+        self.assertEqual(evolucao.valores["Farmácia"].sum(), 0.0)
+
+        vazia = subcategory_evolution(self.despesas.iloc[:0], ["Mercado"])
+        self.assertEqual(vazia.rotulos, [])
+        self.assertEqual(list(vazia.valores.columns), ["Mercado"])
+        self.assertEqual(period_labels(pd.period_range("2024-12", "2025-01", freq="M")), ["Dez/2024", "Jan/2025"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+"""
+Testes para a redução de pontos dos gráficos
+"""
+
+import os
+import sys
+import unittest
+
+import numpy as np
+import pandas as pd
+
+# Adicionar o diretório raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.chart_reduction import OUTROS, group_others, lttb_indices, reduce_line
+from modules.charts_manager import ChartsManager
+
+
+class TestChartReduction(unittest.TestCase):
+    """Testes para lttb_indices, reduce_line e group_others"""
+
+    def test_lttb_keeps_extremes(self):
+        """Mantém as pontas e os picos isolados, com o número de pontos pedido"""
+        y = np.sin(np.linspace(0, 20, 10000))
+        y[3333], y[7777] = 50.0, -50.0
+        idx = lttb_indices(np.arange(len(y), dtype=float), y, 200)
+        self.assertEqual(len(idx), 200)
+        self.assertTrue((np.diff(idx) > 0).all())
+        self.assertEqual((idx[0], idx[-1]), (0, len(y) - 1))
+        self.assertIn(3333, idx)
+        self.assertIn(7777, idx)
+        np.testing.assert_array_equal(lttb_indices(np.arange(5.0), np.ones(5), 10), np.arange(5))
+
+    def test_reduce_line_with_dates(self):
+        """Reduz séries datadas acima do limite e não mexe nas pequenas"""
+        data = pd.DataFrame({"DATA": pd.date_range("2024-01-01", periods=3000, freq="h"),
+                             "VALOR": np.random.default_rng(1).normal(size=3000)})
+        reduzido = reduce_line(data, "DATA", "VALOR", 300)
+        self.assertEqual(len(reduzido), 300)
+        self.assertTrue(reduzido["DATA"].is_monotonic_increasing)
+        self.assertIs(reduce_line(data, "DATA", "VALOR", 5000), data)
+
+    def test_group_others(self):
+        """Maiores grupos por valor absoluto e o restante somado em Outros"""
+        data = pd.DataFrame({"CATEGORIA": ["A", "B", "C", "D", "A", "E"],
+                             "VALOR": [-10.0, -50.0, -5.0, -1.0, -15.0, -2.0]})
+        agrupado = group_others(data, "CATEGORIA", "VALOR", 3)
+        self.assertEqual(agrupado["CATEGORIA"].tolist(), ["B", "A", OUTROS])
+        self.assertEqual(agrupado["VALOR"].tolist(), [-50.0, -25.0, -8.0])
+        em_ordem = group_others(data, "CATEGORIA", ["VALOR"], 3, keep_order=True)
+        self.assertEqual(em_ordem["CATEGORIA"].tolist(), ["A", "B", OUTROS])
+        self.assertIs(group_others(data, "CATEGORIA", "VALOR", 5), data)
+
+
+class TestChartsManagerLimits(unittest.TestCase):
+    """Testes dos limites aplicados pelo ChartsManager"""
+
+    def setUp(self):
+        self.charts = ChartsManager({"max_line_points": 500, "webgl_points": 100, "max_bars": 4, "max_slices": 3})
+
+    def test_line_chart_webgl(self):
+        """Séries longas viram scattergl com no máximo max_line_points pontos"""
+        data = pd.DataFrame({"DATA": pd.date_range("2024-01-01", periods=2000, freq="D"),
+                             "VALOR": np.arange(2000.0)})
+        fig = self.charts.create_line_chart(data, "DATA", "VALOR", "Evolução")
+        self.assertEqual(fig.data[0].type, "scattergl")
+        self.assertEqual(len(fig.data[0].x), 500)
+        curta = self.charts.create_line_chart(data.head(50), "DATA", "VALOR", "Evolução")
+        self.assertEqual(curta.data[0].type, "scatter")
+
+    def test_bar_pie_and_comparison_limits(self):
+        """Barras, fatias e grupos da comparação respeitam os limites com Outros"""
+        data = pd.DataFrame({"Mes": [f"M{i}" for i in range(10)], "VALOR": np.arange(10.0),
+                             "Receitas": np.arange(10.0), "Despesas": np.arange(10.0)})
+        barras = self.charts.create_bar_chart(data, "Mes", "VALOR", "Barras")
+        self.assertEqual(list(barras.data[0].x), ["M7", "M8", "M9", OUTROS])
+        pizza = self.charts.create_pie_chart(data, "VALOR", "Mes", "Pizza")
+        self.assertEqual(len(pizza.data[0].labels), 3)
+        comparacao = self.charts.create_comparison_chart(data, "Mes", ["Receitas", "Despesas"], "Comparação")
+        self.assertEqual(len(comparacao.data[0].x), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+"""
+Testes para o cache de figuras do ChartsManager
+"""
+
+import os
+import sys
+import unittest
+
+import numpy as np
+import pandas as pd
+
+# Adicionar o diretório raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import CHART_CONFIG
+from modules.charts_manager import ChartsManager, frame_fingerprint
+
+
+class TestFigureCache(unittest.TestCase):
+    """Figuras reaproveitadas pela impressão digital dos dados e pelos parâmetros"""
+
+    def setUp(self):
+        self.charts = ChartsManager(cache_config={"enabled": True, "max_entries": 10, "max_mb": 1})
+        self.data = pd.DataFrame({"CATEGORIA": ["Casa", "Lazer", "Saúde"], "VALOR": [100.0, 50.0, 25.0]})
+
+    def test_same_data_and_params_hit_cache(self):
+        """Mesmos dados (mesmo em outro objeto) e parâmetros devolvem a figura guardada"""
+        fig = self.charts.create_pie_chart(self.data, "VALOR", "CATEGORIA", "Categorias")
+        self.assertIs(self.charts.create_pie_chart(self.data.copy(), "VALOR", "CATEGORIA", "Categorias"), fig)
+        self.assertIsNot(self.charts.create_pie_chart(self.data, "VALOR", "CATEGORIA", "Outro título"), fig)
+        alterado = self.data.assign(VALOR=[100.0, 50.0, 26.0])
+        self.assertIsNot(self.charts.create_pie_chart(alterado, "VALOR", "CATEGORIA", "Categorias"), fig)
+        stats = self.charts.figure_cache_stats()
+        self.assertEqual((stats["hits"], stats["entries"]), (1, 3))
+        self.assertGreater(stats["bytes"], 0)
+
+    def test_fingerprint_and_disabled_cache(self):
+        """Colunas renomeadas mudam a impressão digital; sem cache, cada chamada monta a figura"""
+        self.assertEqual(frame_fingerprint(self.data), frame_fingerprint(self.data.copy()))
+        self.assertNotEqual(frame_fingerprint(self.data), frame_fingerprint(self.data.rename(columns={"VALOR": "Valor"})))
+        self.assertIsNone(frame_fingerprint(pd.DataFrame({"lista": [[1], [2]]})))
+
+        sem_cache = ChartsManager(CHART_CONFIG, {"enabled": False, "max_entries": 10, "max_mb": 1})
+        serie = pd.DataFrame({"Mes": ["Jan", "Fev"], "VALOR": np.array([1.0, 2.0])})
+        self.assertIsNot(sem_cache.create_line_chart(serie, "Mes", "VALOR", "Linha"),
+                         sem_cache.create_line_chart(serie, "Mes", "VALOR", "Linha"))
+        self.assertEqual(sem_cache.figure_cache_stats(), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
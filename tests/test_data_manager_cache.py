@@ -0,0 +1,80 @@
+"""
+Testes para o cache por aba do DataManager
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import pandas as pd
+
+# Adicionar o diretório raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.data_manager import DataManager
+
+
+class TestDataManagerCache(unittest.TestCase):
+    """Testes para a invalidação por aba"""
+
+    def setUp(self):
+        """Cria uma planilha temporária com duas abas"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.excel_file = os.path.join(self.tmp_dir.name, "base.xlsx")
+        receitas = pd.DataFrame({"DESCRIÇÃO": ["Salário"], "VALOR": [5000.0]})
+        despesas = pd.DataFrame({"DESCRIÇÃO": ["Aluguel"], "VALOR": [1500.0]})
+        with pd.ExcelWriter(self.excel_file, engine="openpyxl") as writer:
+            receitas.to_excel(writer, sheet_name="Receitas", index=False)
+            despesas.to_excel(writer, sheet_name="Despesas", index=False)
+        patcher = patch.dict("modules.storage_backend.SIDECAR_CONFIG", {"enabled": False})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.manager = DataManager(self.excel_file)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_hit_and_miss_counters(self):
+        """A segunda leitura da mesma aba é um acerto"""
+        self.manager.load_excel_data("Receitas")
+        self.manager.load_excel_data("Receitas")
+
+        stats = self.manager.get_cache_stats()
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["hits"], 1)
+
+    def test_write_invalidates_only_saved_sheet(self):
+        """Salvar uma aba não invalida as demais"""
+        self.manager.load_excel_data("Receitas")
+        self.manager.load_excel_data("Despesas")
+        receitas_version = self.manager.get_sheet_version("Receitas")
+        despesas_version = self.manager.get_sheet_version("Despesas")
+
+        novas = pd.DataFrame({"DESCRIÇÃO": ["Aluguel", "Luz"], "VALOR": [1500.0, 200.0]})
+        self.assertTrue(self.manager.save_data(novas, "Despesas", despesas_version))
+
+        with patch("modules.storage_backend.pd.read_excel", wraps=pd.read_excel) as mock_read_excel:
+            self.manager.load_excel_data("Receitas")
+            despesas = self.manager.load_excel_data("Despesas")
+            self.assertEqual(mock_read_excel.call_count, 1)
+
+        self.assertEqual(len(despesas), 2)
+        self.assertEqual(self.manager.get_sheet_version("Receitas"), receitas_version)
+        self.assertEqual(self.manager.get_sheet_version("Despesas"), despesas_version + 1)
+
+    def test_unchanged_content_keeps_version(self):
+        """Uma releitura com o mesmo conteúdo mantém a versão da aba"""
+        self.manager.load_excel_data("Receitas")
+        version = self.manager.get_sheet_version("Receitas")
+
+        self.manager.invalidate("Receitas")
+        self.manager.load_excel_data("Receitas")
+
+        self.assertEqual(self.manager.get_sheet_version("Receitas"), version)
+        self.assertEqual(self.manager.get_cache_stats()["unchanged_reloads"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+"""
+Testes para as colunas de dimensão de data calculadas no snapshot
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import pandas as pd
+
+# Adicionar o diretório raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.data_manager import DataManager
+from modules.date_dimensions import MONTH_DTYPE, add_date_dimensions, strip_date_dimensions
+
+
+class TestAddDateDimensions(unittest.TestCase):
+    """Testes para add_date_dimensions"""
+
+    def test_typed_columns(self):
+        """Ano é inteiro, Mês é categórico ordenado e datas inválidas ficam nulas"""
+        df = pd.DataFrame({"DATA": pd.to_datetime(["2024-02-10", None, "2023-12-31"])})
+        add_date_dimensions(df, "DATA")
+
+        self.assertEqual(df["Ano"].dtype, "Int16")
+        self.assertEqual(df["Ano"].tolist()[::2], [2024, 2023])
+        self.assertEqual(df["Mês"].dtype, MONTH_DTYPE)
+        self.assertEqual(df["Mês"].tolist()[::2], ["Fev", "Dez"])
+        self.assertEqual(df["MÊS_ANO"].tolist()[::2], ["Fev/2024", "Dez/2023"])
+        self.assertEqual(str(df["PERÍODO"].iloc[0]), "2024-02")
+        self.assertTrue(df.iloc[1][["Ano", "Mês", "MÊS_ANO", "PERÍODO"]].isna().all())
+
+        self.assertTrue(df["Mês"].isin(["Fev"]).iloc[0])
+        self.assertEqual(df.sort_values("Mês")["Mês"].tolist()[:2], ["Fev", "Dez"])
+        self.assertEqual(list(strip_date_dimensions(df).columns), ["DATA"])
+
+
+class TestSnapshotDateDimensions(unittest.TestCase):
+    """As dimensões existem no snapshot e nunca chegam à planilha"""
+
+    def setUp(self):
+        """Cria uma planilha temporária com Despesas e Div_CC"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.excel_file = os.path.join(self.tmp_dir.name, "base.xlsx")
+        with pd.ExcelWriter(self.excel_file, engine="openpyxl") as writer:
+            pd.DataFrame({"DATA": ["2024-01-10", "2024-03-02"], "VALOR": [-1500.0, -80.0]}).to_excel(
+                writer, sheet_name="Despesas", index=False)
+            pd.DataFrame({"Data": ["2024-05-20"], "valor total da compra": [300.0]}).to_excel(
+                writer, sheet_name="Div_CC", index=False)
+        for target, values in (("modules.storage_backend.SIDECAR_CONFIG", {"enabled": False}),
+                               ("modules.data_manager.BACKUP_CONFIG", {"backup_before_changes": False})):
+            patcher = patch.dict(target, values)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.manager = DataManager(self.excel_file)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_snapshot_has_dimensions(self):
+        """As abas com data (DATA ou Data) recebem as colunas derivadas"""
+        snapshot = self.manager.get_snapshot()
+        despesas = snapshot.get("Despesas")
+        self.assertEqual(despesas["Ano"].tolist(), [2024, 2024])
+        self.assertEqual(despesas["Mês"].tolist(), ["Jan", "Mar"])
+        self.assertEqual(snapshot.get("Div_CC")["MÊS_ANO"].tolist(), ["Mai/2024"])
+
+    def test_save_strips_dimensions(self):
+        """Salvar um DataFrame vindo do snapshot não grava as colunas derivadas"""
+        despesas = self.manager.get_snapshot().get("Despesas")
+        self.assertTrue(self.manager.save_data(despesas.iloc[:1], "Despesas", self.manager.get_sheet_version("Despesas")))
+
+        gravado = pd.read_excel(self.excel_file, sheet_name="Despesas")
+        self.assertEqual(list(gravado.columns), ["DATA", "VALOR"])
+        self.assertEqual(self.manager.get_snapshot().get("Despesas")["Mês"].tolist(), ["Jan"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+"""
+Testes para a visão ordenada por data e os filtros por intervalo
+"""
+
+import os
+import sys
+import unittest
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+# Adicionar o diretório raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.date_index import DateSortedView
+from modules.filters_manager import FiltersManager
+from modules.workbook_snapshot import WorkbookSnapshot
+
+
+def filtro_por_mascara(data, filters):
+    """Implementação de referência (máscaras booleanas sobre a aba inteira)"""
+    df = data.copy()
+    df["DATA"] = pd.to_datetime(df["DATA"], errors="coerce")
+    df = df.dropna(subset=["DATA"])
+    meses = FiltersManager.PERIODO_MESES
+    if filters["periodo"] in meses:
+        df = df[df["DATA"] >= df["DATA"].max() - pd.DateOffset(months=meses[filters["periodo"]])]
+    elif filters["periodo"] == "Personalizado":
+        inicio, fim = pd.to_datetime(filters["data_inicio"]), pd.to_datetime(filters["data_fim"])
+        df = df[(df["DATA"] >= inicio) & (df["DATA"] <= fim)]
+    if filters["categoria"] != "Todas":
+        df = df[df["CATEGORIA"] == filters["categoria"]]
+    return df
+
+
+class TestDateSortedView(unittest.TestCase):
+    """Testes para o DateSortedView"""
+
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        n = 500
+        datas = pd.Timestamp("2023-01-01") + pd.to_timedelta(rng.integers(0, 700, n), unit="D")
+        self.df = pd.DataFrame({
+            "DATA": datas.astype(object),
+            "CATEGORIA": rng.choice(["Casa", "Lazer", "Saúde"], n),
+            "VALOR": rng.normal(100, 30, n).round(2),
+        })
+        self.df.loc[[3, 40], "DATA"] = None
+        self.manager = FiltersManager()
+
+    def test_bounds_are_inclusive(self):
+        """Os limites do intervalo são inclusivos e linhas sem data são descartadas"""
+        view = DateSortedView(self.df)
+        self.assertEqual(len(view), len(self.df) - 2)
+        self.assertTrue(view.frame["DATA"].is_monotonic_increasing)
+
+        lo, hi = view.bounds("2023-06-01", "2023-06-30")
+        esperado = view.frame["DATA"].between("2023-06-01", "2023-06-30").sum()
+        self.assertEqual(hi - lo, esperado)
+
+    def test_matches_mask_filters(self):
+        """O resultado coincide com o filtro por máscara para todas as opções"""
+        view = DateSortedView(self.df)
+        for periodo in ["Todos", "Último mês", "Últimos 3 meses", "Últimos 6 meses", "Último ano", "Personalizado"]:
+            for categoria in ["Todas", "Lazer", "Inexistente"]:
+                filters = {"periodo": periodo, "categoria": categoria,
+                           "data_inicio": date(2023, 3, 1), "data_fim": date(2023, 9, 30)}
+                esperado = filtro_por_mascara(self.df, filters)
+                resultado = self.manager.apply_filters_to_data(view, filters)
+                self.assertEqual(sorted(resultado.index), sorted(esperado.index), (periodo, categoria))
+
+    def test_without_date_column(self):
+        """Abas sem DATA são devolvidas sem filtro, como cópia"""
+        df = pd.DataFrame({"Data": ["2024-01-01"], "valor total da compra": [10.0]})
+        filters = {"periodo": "Último mês", "categoria": "Todas"}
+        resultado = self.manager.apply_filters_to_data(df, filters)
+        self.assertEqual(len(resultado), 1)
+        self.assertIsNot(resultado, df)
+
+    def test_snapshot_reuses_view(self):
+        """O snapshot constrói a visão de cada aba uma única vez"""
+        snapshot = WorkbookSnapshot({"Despesas": self.df}, signature=None)
+        self.assertIs(snapshot.date_view("Despesas"), snapshot.date_view("Despesas"))
+        self.assertEqual(len(snapshot.date_view("Inexistente")), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
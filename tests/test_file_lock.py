@@ -0,0 +1,147 @@
+"""
+Testes para o lock da planilha e a concorrência otimista nas escritas
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import textwrap
+import unittest
+from unittest.mock import patch
+
+import pandas as pd
+
+# Adicionar o diretório raiz ao path
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+from crud_system import CRUDSystem
+from modules.data_manager import DataManager
+from modules.file_lock import LockTimeout, WorkbookLock, get_workbook_lock, lock_path_for
+
+
+class TestWorkbookLock(unittest.TestCase):
+    """Testes para o WorkbookLock"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.lock_path = os.path.join(self.tmp_dir.name, ".base.xlsx.lock")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_lock_is_reentrant(self):
+        """Aquisições aninhadas na mesma thread não bloqueiam"""
+        lock = WorkbookLock(self.lock_path, timeout=0.5)
+        with lock:
+            with lock:
+                self.assertEqual(lock._depth, 2)
+            self.assertIsNotNone(lock._fd)
+        self.assertIsNone(lock._fd)
+
+    def test_lock_blocks_other_process(self):
+        """Outro processo segurando o lock provoca LockTimeout"""
+        script = textwrap.dedent(f"""
+            import sys, time
+            sys.path.insert(0, {ROOT_DIR!r})
+            from modules.file_lock import WorkbookLock
+            with WorkbookLock({self.lock_path!r}):
+                print("locked", flush=True)
+                sys.stdin.readline()
+        """)
+        holder = subprocess.Popen([sys.executable, "-c", script],
+                                  stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+        try:
+            self.assertEqual(holder.stdout.readline().strip(), "locked")
+            with self.assertRaises(LockTimeout):
+                WorkbookLock(self.lock_path, timeout=0.2).acquire()
+        finally:
+            holder.communicate("\n", timeout=10)
+
+        with WorkbookLock(self.lock_path, timeout=1):
+            pass
+
+    def test_registry_shares_lock_per_workbook(self):
+        """A mesma planilha recebe sempre o mesmo lock"""
+        excel_file = os.path.join(self.tmp_dir.name, "base.xlsx")
+        self.assertIs(get_workbook_lock(excel_file), get_workbook_lock(excel_file))
+        self.assertEqual(lock_path_for(excel_file).name, ".base.xlsx.lock")
+
+
+class TestOptimisticConcurrency(unittest.TestCase):
+    """Escritas baseadas em uma leitura antiga são rejeitadas ou reposicionadas"""
+
+    def setUp(self):
+        """Cria uma planilha temporária e desativa o compactador automático"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.excel_file = os.path.join(self.tmp_dir.name, "base.xlsx")
+        despesas = pd.DataFrame({
+            "DATA": pd.to_datetime(["2024-01-10", "2024-01-12", "2024-01-15"]),
+            "DESCRIÇÃO": ["Aluguel", "Mercado", "Farmácia"],
+            "VALOR": [1500.0, 320.5, 45.0],
+        })
+        with pd.ExcelWriter(self.excel_file, engine="openpyxl") as writer:
+            despesas.to_excel(writer, sheet_name="Despesas", index=False)
+        for target, values in (("modules.storage_backend.SIDECAR_CONFIG", {"enabled": False}),
+                               ("modules.data_manager.BACKUP_CONFIG", {"backup_before_changes": False}),
+                               ("config.settings.JOURNAL_CONFIG", {"compact_interval_seconds": 3600})):
+            patcher = patch.dict(target, values)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        for target in ("modules.storage_backend.safe_backup", "modules.data_manager.st"):
+            patcher = patch(target)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.crud = CRUDSystem(self.excel_file)
+        self.manager = DataManager(self.excel_file)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_save_with_stale_version_is_rejected(self):
+        """save_data recusa gravar sobre uma versão que já mudou"""
+        df = self.manager.load_excel_data("Despesas")
+        version = self.manager.get_sheet_version("Despesas")
+        self.assertTrue(self.manager.save_data(df.iloc[:2], "Despesas", expected_version=version))
+
+        self.assertFalse(self.manager.save_data(df, "Despesas", expected_version=version))
+        self.assertEqual(len(self.manager.load_excel_data("Despesas")), 2)
+
+        # Sem versão não há gravação: quem relê e grava usa modify_sheet
+        with self.assertRaises(TypeError):
+            self.manager.save_data(df, "Despesas")
+
+    def test_modify_sheet_preserves_concurrent_changes(self):
+        """modify_sheet aplica a alteração sobre a versão mais recente"""
+        self.manager.ensure_record_ids()
+        seen = self.crud.load_sheet_data("Despesas")
+        self.crud.delete_records_by_id("Despesas", [1], seen.iloc[[0]])
+
+        def ajustar(df):
+            df.loc[df["DESCRIÇÃO"] == "Mercado", "VALOR"] = 300.0
+            return df
+
+        self.assertTrue(self.manager.modify_sheet("Despesas", ajustar))
+        df = self.manager.load_excel_data("Despesas")
+        self.assertEqual(df["DESCRIÇÃO"].tolist(), ["Mercado", "Farmácia"])
+        self.assertEqual(df["VALOR"].tolist(), [300.0, 45.0])
+
+    def test_stale_row_is_retargeted_or_rejected(self):
+        """Uma linha deslocada é localizada pelo id; uma linha alterada é recusada"""
+        self.manager.ensure_record_ids()
+        seen = self.crud.load_sheet_data("Despesas")
+        self.crud.delete_records_by_id("Despesas", [1], seen.iloc[[0]])
+
+        success, _ = self.crud.update_record_by_id("Despesas", 3, {"VALOR": 50.0}, seen.iloc[[2]])
+        self.assertTrue(success)
+        df = self.crud.load_sheet_data("Despesas")
+        self.assertEqual(df["VALOR"].tolist(), [320.5, 50.0])
+
+        success, message = self.crud.delete_records_by_id("Despesas", [3], seen.iloc[[2]])
+        self.assertFalse(success)
+        self.assertEqual(len(self.crud.load_sheet_data("Despesas")), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+"""
+Testes para o plano de filtros da sidebar e sua avaliação compilada
+"""
+
+import os
+import sys
+import unittest
+
+import pandas as pd
+
+# Adicionar o diretório raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.filter_plan import CompiledFilter, FilterPlan
+from modules.workbook_snapshot import WorkbookSnapshot
+
+
+class TestFilterPlan(unittest.TestCase):
+    """Testes para FilterPlan e CompiledFilter"""
+
+    def setUp(self):
+        despesas = pd.DataFrame({
+            "DATA": ["2023-12-05", "2024-01-10", "2024-01-20", "2024-02-03", None],
+            "CONTA": ["Nubank", "Nubank", "Itaú", "Nubank", "Nubank"],
+            "CATEGORIA": ["Casa", "Lazer", "Casa", "Casa", "Casa"],
+            "VALOR": [-10.0, -20.0, -30.0, -40.0, -50.0],
+        })
+        self.snapshot = WorkbookSnapshot({"Despesas": despesas}, signature=None)
+
+    def test_matches_string_masks(self):
+        """O resultado coincide com as comparações de strings originais"""
+        plan = FilterPlan.from_sidebar([2024], ["Jan"], "Nubank", "Lazer", ["Despesas"])
+        filtro = CompiledFilter(self.snapshot, plan)
+        self.assertEqual(filtro.frame("Despesas")["VALOR"].tolist(), [-20.0])
+
+        # Categoria só vale para as abas dos tipos de análise marcados
+        plan = FilterPlan.from_sidebar([], [], "Todas", "Lazer", ["Receitas"])
+        self.assertEqual(len(CompiledFilter(self.snapshot, plan).frame("Despesas")), 4)
+
+    def test_previous_period_wraps_year(self):
+        """Janeiro compara com Dezembro do ano anterior, mantendo a conta e sem categoria"""
+        plan = FilterPlan.from_sidebar([2024], ["Jan"], "Nubank", "Lazer", ["Despesas"])
+        self.assertEqual(plan.previous_period(), FilterPlan((2023,), ("Dez",), "Nubank", "Todas", frozenset(["Despesas"])))
+        self.assertEqual(CompiledFilter(self.snapshot, plan).previous("Despesas")["VALOR"].tolist(), [-10.0])
+        self.assertIsNone(FilterPlan.from_sidebar([2024], ["Jan", "Fev"]).previous_period())
+
+    def test_results_are_shared(self):
+        """Planos iguais devolvem o mesmo DataFrame, sem recalcular"""
+        filtro = CompiledFilter(self.snapshot, FilterPlan.from_sidebar([2024], ["Fev", "Jan"]))
+        first = filtro.frame("Despesas")
+        self.assertIs(first, filtro.frame("Despesas", FilterPlan.from_sidebar([2024], ["Jan", "Fev"])))
+        self.assertEqual(first["VALOR"].tolist(), [-20.0, -30.0, -40.0])
+        self.assertTrue(filtro.frame("Inexistente").empty)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+"""
+Testes para o índice de primeira compra e a contagem de novos clientes
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+# Adicionar o diretório raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.data_manager import DataManager
+from modules.first_purchase import FirstPurchaseIndex
+from utils.kpi_manager import calculate_new_customers
+
+
+def novos_clientes_laco(all_sales, filtered):
+    """Contagem original: laço sobre os clientes do período"""
+    first = all_sales.groupby("Cliente")["DATA"].min()
+    start, end = filtered["DATA"].min(), filtered["DATA"].max()
+    return sum(1 for client in filtered["Cliente"].unique()
+               if pd.notna(first.get(client)) and start <= first.get(client) <= end)
+
+
+class TestFirstPurchaseIndex(unittest.TestCase):
+    """Testes para FirstPurchaseIndex"""
+
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        n = 3000
+        self.vendas = pd.DataFrame({
+            "DATA": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 365, n), unit="D"),
+            "Cliente": rng.choice([f"C{i}" for i in range(400)] + [None], n),
+            "VALOR": rng.integers(10, 500, n).astype(float),
+        })
+        self.index = FirstPurchaseIndex(self.vendas)
+
+    def test_matches_loop(self):
+        """A contagem vetorizada coincide com o laço original em várias janelas"""
+        for start, end in (("2024-01-01", "2024-01-31"), ("2024-03-10", "2024-06-30"), ("2024-12-01", "2024-12-31")):
+            filtered = self.vendas[self.vendas["DATA"].between(start, end)]
+            expected = novos_clientes_laco(self.vendas, filtered)
+            self.assertEqual(calculate_new_customers(self.vendas, filtered, self.index), expected)
+            self.assertEqual(calculate_new_customers(self.vendas, filtered), expected)
+            self.assertEqual(self.index.count_between(filtered["DATA"].min(), filtered["DATA"].max()), expected)
+
+    def test_monthly_counts_and_apply(self):
+        """Novos clientes por mês somam o total de clientes; inserções só antecipam ou criam clientes"""
+        counts = self.index.monthly_counts()
+        self.assertEqual(counts.sum(), len(self.index))
+        self.assertTrue(counts.index.is_monotonic_increasing)
+
+        novas = pd.DataFrame({"DATA": pd.to_datetime(["2023-12-31", "2025-01-05"]), "Cliente": ["C1", "Novo"]})
+        updated = self.index.apply(novas)
+        self.assertEqual(len(updated), len(self.index) + 1)
+        self.assertEqual(updated.first["C1"], pd.Timestamp("2023-12-31"))
+        self.assertEqual(updated.count_between("2023-12-01", "2023-12-31"), 1)
+        self.assertNotEqual(self.index.first["C1"], pd.Timestamp("2023-12-31"))
+
+
+class TestSnapshotFirstPurchases(unittest.TestCase):
+    """Inserções de vendas chegam ao índice do snapshot seguinte sem reconstrução"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.excel_file = os.path.join(self.tmp_dir.name, "base.xlsx")
+        vendas = pd.DataFrame({
+            "DATA": pd.to_datetime(["2024-01-10", "2024-02-12", "2024-02-15"]),
+            "Cliente": ["Ana", "Bia", "Ana"],
+            "VALOR": [100.0, 50.0, 70.0],
+            "id": [1, 2, 3],
+        })
+        with pd.ExcelWriter(self.excel_file, engine="openpyxl") as writer:
+            vendas.to_excel(writer, sheet_name="Vendas", index=False)
+        for target, values in (("modules.storage_backend.SIDECAR_CONFIG", {"enabled": False}),
+                               ("modules.data_manager.BACKUP_CONFIG", {"backup_before_changes": False}),
+                               ("config.settings.JOURNAL_CONFIG", {"compact_interval_seconds": 3600})):
+            patcher = patch.dict(target, values)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.manager = DataManager(self.excel_file)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_append_updates_index(self):
+        """Uma venda para cliente novo entra no índice sem reagrupar a aba"""
+        self.assertEqual(len(self.manager.get_snapshot().first_purchases()), 2)
+
+        with patch("modules.first_purchase.FirstPurchaseIndex.__init__", side_effect=AssertionError("reconstruído")):
+            nova = pd.DataFrame([{"DATA": "2024-03-01", "Cliente": "Caio", "VALOR": 30.0}])
+            self.assertTrue(self.manager.append_rows(nova, "Vendas"))
+            index = self.manager.get_snapshot().first_purchases()
+
+        self.assertEqual(index.monthly_counts().tolist(), [1, 1, 1])
+        self.assertEqual(index.first.to_dict(), FirstPurchaseIndex(self.manager.get_snapshot().get("Vendas")).first.to_dict())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+"""
+Testes para o journal de alterações do CRUD
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import pandas as pd
+
+# Adicionar o diretório raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crud_system import CRUDSystem
+from modules.data_manager import DataManager
+from modules.journal import ChangeJournal
+
+
+class TestChangeJournal(unittest.TestCase):
+    """Testes para o ChangeJournal e o overlay nas leituras"""
+
+    def setUp(self):
+        """Cria uma planilha temporária e desativa o compactador automático"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.excel_file = os.path.join(self.tmp_dir.name, "base.xlsx")
+        despesas = pd.DataFrame({
+            "DATA": pd.to_datetime(["2024-01-10", "2024-01-12", "2024-01-15"]),
+            "DESCRIÇÃO": ["Aluguel", "Mercado", "Farmácia"],
+            "VALOR": [1500.0, 320.5, 45.0],
+        })
+        with pd.ExcelWriter(self.excel_file, engine="openpyxl") as writer:
+            despesas.to_excel(writer, sheet_name="Despesas", index=False)
+        for target, values in (("modules.storage_backend.SIDECAR_CONFIG", {"enabled": False}),
+                               ("config.settings.JOURNAL_CONFIG", {"compact_interval_seconds": 3600})):
+            patcher = patch.dict(target, values)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = patch("modules.storage_backend.safe_backup")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.crud = CRUDSystem(self.excel_file)
+        self.manager = DataManager(self.excel_file)
+        self.manager.ensure_record_ids()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def seen(self, record_ids):
+        """Linhas dos ids como a tela as mostra (o 'expected' do CRUD por id)"""
+        return self.manager.get_record_options("Despesas").seen_rows(record_ids)
+
+    def test_operations_go_to_journal_and_reads_overlay(self):
+        """A planilha não muda até a compactação, mas as leituras já veem a alteração"""
+        before = os.stat(self.excel_file).st_mtime_ns
+        self.crud.update_record_by_id("Despesas", 2, {"VALOR": 330.0}, self.seen([2]))
+        self.crud.delete_records_by_id("Despesas", [1], self.seen([1]))
+
+        self.assertEqual(os.stat(self.excel_file).st_mtime_ns, before)
+        df = self.manager.load_excel_data("Despesas")
+        self.assertEqual(df["DESCRIÇÃO"].tolist(), ["Mercado", "Farmácia"])
+        self.assertEqual(df["VALOR"].tolist(), [330.0, 45.0])
+        pd.testing.assert_frame_equal(self.crud.load_sheet_data("Despesas"), df, check_dtype=False)
+
+    def test_compaction_folds_entries_into_workbook(self):
+        """A compactação grava o estado final e esvazia o journal"""
+        self.crud.delete_records_by_id("Despesas", [1, 3], self.seen([1, 3]))
+        self.crud.update_record_by_id("Despesas", 2, {"DATA": pd.Timestamp("2024-02-01")}, self.seen([2]))
+        version = self.manager.get_sheet_version("Despesas")
+
+        self.assertEqual(self.crud.compact_journal(), 2)
+        self.assertEqual(self.crud.journal.pending(), [])
+
+        df = pd.read_excel(self.excel_file, sheet_name="Despesas")
+        self.assertEqual(df["DESCRIÇÃO"].tolist(), ["Mercado"])
+        self.assertEqual(df["DATA"].iloc[0], pd.Timestamp("2024-02-01"))
+        self.assertEqual(self.manager.load_excel_data("Despesas")["DESCRIÇÃO"].tolist(), ["Mercado"])
+        self.assertGreater(self.manager.get_sheet_version("Despesas"), version)
+
+    def test_torn_line_is_ignored_and_sequence_survives(self):
+        """Uma linha incompleta não é lida e a sequência continua após a compactação"""
+        self.crud.delete_records_by_id("Despesas", [1], self.seen([1]))
+        self.crud.compact_journal()
+        with open(self.crud.journal.path, "ab") as f:
+            f.write(b'{"seq": 99, "sheet": "Despesas"')
+
+        journal = ChangeJournal(str(self.crud.journal.path))
+        self.assertEqual(journal.pending(), [])
+        self.assertEqual(journal.append("Despesas", "delete", rows=[0]), 2)
+        self.assertEqual([entry["seq"] for entry in journal.pending()], [2])
+
+    def test_legacy_positional_entries_are_replayed(self):
+        """Entradas por posição, gravadas antes dos ids, ainda são aplicadas nas leituras e na compactação"""
+        self.crud.journal.append("Despesas", "update", row=1, data={"VALOR": 330.0})
+        self.crud.journal.append("Despesas", "delete", rows=[0])
+
+        df = self.manager.load_excel_data("Despesas")
+        self.assertEqual(df["DESCRIÇÃO"].tolist(), ["Mercado", "Farmácia"])
+        self.assertEqual(df["VALOR"].tolist(), [330.0, 45.0])
+
+        self.assertEqual(self.crud.compact_journal(), 2)
+        df = pd.read_excel(self.excel_file, sheet_name="Despesas")
+        self.assertEqual(df["id"].tolist(), [2, 3])
+        self.assertEqual(df["VALOR"].tolist(), [330.0, 45.0])
+
+
+if __name__ == "__main__":
+    unittest.main()
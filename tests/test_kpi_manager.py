@@ -0,0 +1,62 @@
+"""
+Testes para as agregações de vendas por dia da semana, hora e mês
+"""
+
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+# Adicionar o diretório raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import kpi_manager
+from utils.kpi_manager import (DIAS_SEMANA, calculate_sales_by_hour, calculate_sales_by_weekday,
+                               calculate_weekday_month_heatmap)
+
+
+class TestWeekdayAggregation(unittest.TestCase):
+    """Testes das agregações por códigos inteiros de dia da semana"""
+
+    def setUp(self):
+        rng = np.random.default_rng(8)
+        n = 1000
+        self.vendas = pd.DataFrame({
+            "DATA": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 90 * 24, n), unit="h"),
+            "VALOR": rng.integers(1, 1000, n).astype(float),
+        })
+        self.vendas.loc[[3, 4], "DATA"] = pd.NaT
+        kpi_manager._sales_cache.clear()
+
+    def test_matches_groupby(self):
+        """Somas por dia, hora e dia × mês coincidem com groupby sobre as datas"""
+        dates = self.vendas["DATA"]
+        por_dia = calculate_sales_by_weekday(self.vendas)
+        esperado = self.vendas.groupby(dates.dt.dayofweek)["VALOR"].sum()
+        self.assertEqual(por_dia["Dia_Semana"].tolist(), [DIAS_SEMANA[int(d)] for d in esperado.index])
+        np.testing.assert_allclose(por_dia["VALOR"], esperado.to_numpy())
+
+        por_hora = calculate_sales_by_hour(self.vendas)
+        np.testing.assert_allclose(por_hora["VALOR"], self.vendas.groupby(dates.dt.hour)["VALOR"].sum().to_numpy())
+
+        heatmap = calculate_weekday_month_heatmap(self.vendas)
+        self.assertEqual(list(heatmap.columns), ["Jan/2024", "Fev/2024", "Mar/2024"])
+        self.assertEqual(len(heatmap), 7)
+        self.assertAlmostEqual(heatmap.loc["segunda-feira", "Fev/2024"],
+                               self.vendas.loc[(dates.dt.dayofweek == 0) & (dates.dt.month == 2), "VALOR"].sum())
+
+    def test_memoized_by_key(self):
+        """Com cache_key, o cálculo é feito uma vez e o resultado devolvido é uma cópia"""
+        primeiro = calculate_sales_by_weekday(self.vendas, cache_key=(1, None))
+        primeiro.loc[0, "VALOR"] = -1
+        with patch("utils.kpi_manager._weekday_inputs", side_effect=AssertionError("recalculado")):
+            segundo = calculate_sales_by_weekday(self.vendas, cache_key=(1, None))
+        self.assertGreater(segundo.loc[0, "VALOR"], 0)
+        self.assertTrue(calculate_sales_by_weekday(pd.DataFrame()).empty)
+
+
+if __name__ == "__main__":
+    unittest.main()
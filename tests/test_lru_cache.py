@@ -0,0 +1,95 @@
+"""
+Testes para o cache LRU e o cache de resultados filtrados
+"""
+
+import os
+import sys
+import unittest
+from datetime import date
+from unittest.mock import patch
+
+import pandas as pd
+
+# Adicionar o diretório raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.filters_manager import FiltersManager
+from modules.lru_cache import LRUCache
+from modules.workbook_snapshot import WorkbookSnapshot
+
+
+class TestLRUCache(unittest.TestCase):
+    """Testes para o LRUCache"""
+
+    def test_evicts_least_recently_used(self):
+        """Acima do limite sai a entrada usada há mais tempo"""
+        cache = LRUCache(max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_ttl_expires_entries(self):
+        """Entradas mais antigas que o ttl não são devolvidas"""
+        cache = LRUCache(max_entries=10, ttl=60)
+        with patch("modules.lru_cache.time.monotonic", return_value=100.0):
+            cache.set("a", 1)
+        with patch("modules.lru_cache.time.monotonic", return_value=150.0):
+            self.assertEqual(cache.get("a"), 1)
+        with patch("modules.lru_cache.time.monotonic", return_value=161.0):
+            self.assertIsNone(cache.get("a"))
+        self.assertEqual(len(cache), 0)
+
+    def test_max_bytes_bounds_total_size(self):
+        """Com max_bytes, saem as entradas mais antigas até o total caber no limite"""
+        cache = LRUCache(max_entries=10, max_bytes=100)
+        cache.set("a", 1, size=40)
+        cache.set("b", 2, size=40)
+        cache.set("a", 3, size=30)
+        cache.set("c", 4, size=40)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 3)
+        self.assertEqual(cache.stats()["bytes"], 70)
+        cache.set("d", 5, size=500)
+        self.assertIsNone(cache.get("d"))
+        self.assertEqual(cache.stats()["bytes"], 0)
+
+
+class TestFilterSheetCache(unittest.TestCase):
+    """Resultados filtrados reaproveitados por versão da aba e filtros"""
+
+    def setUp(self):
+        self.despesas = pd.DataFrame({
+            "DATA": pd.to_datetime(["2024-01-10", "2024-02-15", "2024-03-20"]),
+            "CATEGORIA": ["Casa", "Lazer", "Casa"],
+            "VALOR": [-100.0, -50.0, -80.0],
+        })
+        self.manager = FiltersManager()
+        self.filters = {"periodo": "Todos", "categoria": "Casa", "data_inicio": date(2024, 1, 1),
+                        "data_fim": date(2024, 12, 31), "valor_min": 0.0, "valor_max": 10000.0}
+
+    def test_same_version_and_filters_hit_cache(self):
+        """Filtros equivalentes reutilizam o resultado; nova versão recalcula"""
+        snapshot = WorkbookSnapshot({"Despesas": self.despesas}, None, versions={"Despesas": 1})
+        with patch.object(self.manager, "apply_filters_to_data", wraps=self.manager.apply_filters_to_data) as apply:
+            first = self.manager.filter_sheet(snapshot, "Despesas", self.filters)
+            # Datas e faixa de valor não mudam o resultado fora do período "Personalizado"
+            outros = {**self.filters, "data_inicio": date(2020, 1, 1), "valor_max": 5.0}
+            second = self.manager.filter_sheet(snapshot, "Despesas", outros)
+            self.assertEqual(apply.call_count, 1)
+
+            second["VALOR"] = 0.0
+            self.assertEqual(self.manager.filter_sheet(snapshot, "Despesas", self.filters)["VALOR"].tolist(),
+                             [-100.0, -80.0])
+
+            novo = WorkbookSnapshot({"Despesas": self.despesas.iloc[:1]}, None, versions={"Despesas": 2})
+            self.assertEqual(len(self.manager.filter_sheet(novo, "Despesas", self.filters)), 1)
+            self.assertEqual(apply.call_count, 2)
+        self.assertEqual(len(first), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
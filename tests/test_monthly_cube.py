@@ -0,0 +1,151 @@
+"""
+Testes para o cubo mensal materializado
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+# Adicionar o diretório raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crud_system import CRUDSystem
+from modules.data_manager import DataManager
+from modules.filter_plan import CompiledFilter, FilterPlan
+from modules.monthly_cube import MonthlyCube
+from modules.workbook_snapshot import WorkbookSnapshot
+
+
+class TestMonthlyCube(unittest.TestCase):
+    """As consultas ao cubo coincidem com groupby sobre as transações filtradas"""
+
+    def setUp(self):
+        rng = np.random.default_rng(11)
+        n = 2000
+        datas = pd.Timestamp("2023-01-01") + pd.to_timedelta(rng.integers(0, 730, n), unit="D")
+        despesas = pd.DataFrame({
+            "DATA": datas,
+            "CONTA": rng.choice(["Nubank", "Itaú"], n),
+            "CATEGORIA": rng.choice(["Casa", "Lazer", "Saúde", None], n),
+            "DESCRIÇÃO": rng.choice(["Aluguel", "Cinema", "Farmácia", "Mercado"], n),
+            "FAVORECIDO": rng.choice(["A", "B", "C"], n),
+            "VALOR": -rng.integers(1, 50000, n) / 100,
+        })
+        despesas.loc[[5, 6], "DATA"] = pd.NaT
+        self.snapshot = WorkbookSnapshot({"Despesas": despesas}, signature=None)
+        self.cube = self.snapshot.monthly_cube("Despesas")
+
+    def test_queries_match_groupby(self):
+        """Totais, somas por dimensão e por mês batem com as transações filtradas"""
+        plans = [
+            FilterPlan(),
+            FilterPlan.from_sidebar([2024], ["Mar"], "Nubank", "Todas", ["Despesas"]),
+            FilterPlan.from_sidebar([2023, 2024], ["Jan", "Dez"], "Todas", "Lazer", ["Despesas"]),
+        ]
+        for plan in plans:
+            rows = CompiledFilter(self.snapshot, plan).frame("Despesas")
+            self.assertAlmostEqual(self.cube.total(plan), rows["VALOR"].sum(), places=6)
+            self.assertEqual(self.cube.count(plan), len(rows))
+            for dimension in ("CATEGORIA", "DESCRIÇÃO", "FAVORECIDO"):
+                pd.testing.assert_series_equal(self.cube.by(dimension, plan), rows.groupby(dimension)["VALOR"].sum(),
+                                               check_index_type=False)
+                pd.testing.assert_series_equal(self.cube.count_by(dimension, plan), rows.groupby(dimension).size(),
+                                               check_index_type=False, check_names=False)
+            pd.testing.assert_series_equal(self.cube.by_period(plan), rows.groupby("PERÍODO")["VALOR"].sum(),
+                                           check_index_type=False)
+
+    def test_cube_is_smaller_and_cached(self):
+        """O cubo tem menos células que transações e é montado uma vez por snapshot"""
+        self.assertLess(len(self.cube), 2000)
+        self.assertIs(self.snapshot.monthly_cube("Despesas"), self.cube)
+        self.assertEqual(self.snapshot.monthly_cube("Inexistente").total(), 0.0)
+
+    def test_apply_matches_rebuild(self):
+        """Somar inserções e subtrair remoções equivale a reconstruir o cubo"""
+        df = self.snapshot.get("Despesas")
+        removed, kept = df.iloc[:300], df.iloc[300:]
+        added = WorkbookSnapshot._typed(pd.DataFrame([{"DATA": "2025-02-01", "CONTA": "Nubank", "VALOR": -10.0}]))
+        updated = self.cube.apply(added=added, removed=removed)
+
+        self.assertEqual(updated.generation, 1)
+        self.assertTrue(updated.matches(MonthlyCube(pd.concat([kept, added], ignore_index=True), "Despesas")))
+        self.assertFalse(updated.matches(self.cube))
+        self.assertEqual(self.cube.count(), 1998)
+
+
+class TestCubeMaintenance(unittest.TestCase):
+    """Escritas do DataManager atualizam o cubo do snapshot seguinte sem reconstrução"""
+
+    def setUp(self):
+        """Cria uma planilha temporária com Despesas e ids"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.excel_file = os.path.join(self.tmp_dir.name, "base.xlsx")
+        despesas = pd.DataFrame({
+            "DATA": pd.to_datetime(["2024-01-10", "2024-01-12", "2024-02-15"]),
+            "CONTA": ["Nubank", "Nubank", "Itaú"],
+            "CATEGORIA": ["Casa", "Mercado", "Saúde"],
+            "DESCRIÇÃO": ["Aluguel", "Compras", "Farmácia"],
+            "FAVORECIDO": ["Imobiliária", "Extra", "Drogasil"],
+            "VALOR": [-1500.0, -320.5, -45.0],
+            "id": [1, 2, 3],
+        })
+        with pd.ExcelWriter(self.excel_file, engine="openpyxl") as writer:
+            despesas.to_excel(writer, sheet_name="Despesas", index=False)
+        for target, values in (("modules.storage_backend.SIDECAR_CONFIG", {"enabled": False}),
+                               ("modules.data_manager.BACKUP_CONFIG", {"backup_before_changes": False}),
+                               ("config.settings.JOURNAL_CONFIG", {"compact_interval_seconds": 3600})):
+            patcher = patch.dict(target, values)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = patch("modules.storage_backend.safe_backup")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.manager = DataManager(self.excel_file)
+        self.crud = CRUDSystem(self.excel_file)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_writes_apply_deltas(self):
+        """Inserções, edições e exclusões por id chegam ao cubo sem reagrupar a aba"""
+        self.manager.get_snapshot().monthly_cube("Despesas")
+
+        with patch("modules.monthly_cube.MonthlyCube.__init__", side_effect=AssertionError("reconstruído")):
+            nova = pd.DataFrame([{"DATA": "2024-02-01", "CATEGORIA": "Lazer", "VALOR": -40.0}])
+            self.assertTrue(self.manager.append_rows(nova, "Despesas"))
+            cube = self.manager.get_snapshot().monthly_cube("Despesas")
+            self.assertAlmostEqual(cube.total(), -1905.5)
+
+            opcoes = self.manager.get_record_options("Despesas")
+            self.crud.delete_records_by_id("Despesas", [3], opcoes.seen_rows([3]))
+            self.crud.update_record_by_id("Despesas", 2, {"VALOR": -300.0, "CATEGORIA": "Casa"}, opcoes.seen_rows([2]))
+            cube = self.manager.get_snapshot().monthly_cube("Despesas")
+
+        self.assertEqual(cube.generation, 2)
+        self.assertEqual(cube.by("CATEGORIA").to_dict(), {"Casa": -1800.0, "Lazer": -40.0})
+        snapshot = self.manager.get_snapshot()
+        self.assertTrue(cube.matches(MonthlyCube(snapshot.get("Despesas"), "Despesas")))
+
+    def test_periodic_rebuild_and_external_change(self):
+        """A reconstrução periódica confere o cubo; alterações externas reconstroem"""
+        self.manager.get_snapshot().monthly_cube("Despesas")
+        with patch.dict("modules.workbook_snapshot.CUBE_CONFIG", {"verify_every": 1}):
+            self.manager.append_rows(pd.DataFrame([{"DATA": "2024-03-01", "VALOR": -5.0}]), "Despesas")
+            self.assertEqual(self.manager.get_snapshot().monthly_cube("Despesas").generation, 0)
+
+        df = pd.read_excel(self.excel_file, sheet_name="Despesas")
+        df.loc[0, "VALOR"] = -1000.0
+        with pd.ExcelWriter(self.excel_file, engine="openpyxl") as writer:
+            df.to_excel(writer, sheet_name="Despesas", index=False)
+        cube = self.manager.get_snapshot().monthly_cube("Despesas")
+        self.assertEqual(cube.generation, 0)
+        self.assertAlmostEqual(cube.total(), -1370.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
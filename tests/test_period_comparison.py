@@ -0,0 +1,99 @@
+"""
+Testes para a comparação com período anterior
+"""
+
+import os
+import sys
+import unittest
+
+import numpy as np
+import pandas as pd
+
+# Adicionar o diretório raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.date_dimensions import MESES_ORDEM
+from modules.filter_plan import CompiledFilter, FilterPlan
+from modules.period_comparison import compare_periods, comparison_totals, kpi_totals, selected_periods
+from modules.workbook_snapshot import WorkbookSnapshot
+
+
+def meses(plan):
+    """Períodos do plano como 'Mês/Ano'"""
+    return [f"{MESES_ORDEM[p % 12]}/{p // 12}" for p in selected_periods(plan)]
+
+
+class TestPeriodComparison(unittest.TestCase):
+    """Testes para compare_periods"""
+
+    def test_previous_range(self):
+        """Janeiro, trimestres e seleções com lacunas têm período anterior"""
+        plan = FilterPlan.from_sidebar([2024], ["Jan"], "Nubank", "Lazer", ["Despesas"])
+        comparison = compare_periods(plan)
+        self.assertIs(comparison.atual, plan)
+        self.assertEqual(meses(comparison.anterior), ["Dez/2023"])
+        self.assertEqual((comparison.anterior.conta, comparison.anterior.categoria), ("Nubank", "Todas"))
+        self.assertEqual(comparison.rotulo, "mês anterior")
+
+        comparison = compare_periods(FilterPlan.from_sidebar([2024], ["Fev", "Jan", "Mar"]))
+        self.assertEqual(meses(comparison.anterior), ["Out/2023", "Nov/2023", "Dez/2023"])
+        self.assertEqual(comparison.rotulo, "trimestre anterior")
+
+        comparison = compare_periods(FilterPlan.from_sidebar([2023, 2024], ["Jan", "Mar"]))
+        self.assertEqual(meses(comparison.anterior), ["Out/2021", "Dez/2021", "Out/2022", "Dez/2022"])
+        self.assertEqual(compare_periods(FilterPlan.from_sidebar([2024], [])).rotulo, "ano anterior")
+        self.assertIsNone(compare_periods(FilterPlan.from_sidebar([], ["Jan"])))
+
+    def test_year_over_year_and_ytd(self):
+        """Mesmo período do ano anterior e acumulado do ano"""
+        plan = FilterPlan.from_sidebar([2024], ["Mar", "Mai"])
+        comparison = compare_periods(plan, "Mesmo período do ano anterior")
+        self.assertEqual(meses(comparison.anterior), ["Mar/2023", "Mai/2023"])
+
+        comparison = compare_periods(plan, "Acumulado do ano")
+        self.assertEqual(meses(comparison.atual), ["Jan/2024", "Fev/2024", "Mar/2024", "Abr/2024", "Mai/2024"])
+        self.assertEqual(meses(comparison.anterior), ["Jan/2023", "Fev/2023", "Mar/2023", "Abr/2023", "Mai/2023"])
+        self.assertEqual(comparison.rotulo, "acumulado de 2023")
+        with self.assertRaises(ValueError):
+            compare_periods(plan, "Semana anterior")
+
+    def test_totals_match_filtered_rows(self):
+        """Os totais do cubo coincidem com as linhas filtradas de cada período"""
+        rng = np.random.default_rng(5)
+        n = 500
+        despesas = pd.DataFrame({
+            "DATA": pd.Timestamp("2022-06-01") + pd.to_timedelta(rng.integers(0, 900, n), unit="D"),
+            "CONTA": rng.choice(["Nubank", "Itaú"], n),
+            "CATEGORIA": rng.choice(["Casa", "Lazer"], n),
+            "VALOR": -rng.integers(1, 10000, n) / 100,
+        })
+        snapshot = WorkbookSnapshot({"Despesas": despesas}, signature=None)
+        cube = snapshot.monthly_cube("Despesas")
+        plan = FilterPlan.from_sidebar([2023, 2024], ["Jan", "Fev"], "Itaú", "Lazer", ["Despesas"])
+        for mode in ("Período anterior", "Mesmo período do ano anterior", "Acumulado do ano"):
+            comparison = compare_periods(plan, mode)
+            filtro = CompiledFilter(snapshot, comparison.atual)
+            atual, anterior = comparison_totals(cube, comparison)
+            self.assertAlmostEqual(atual, filtro.frame("Despesas")["VALOR"].sum(), places=6)
+            self.assertAlmostEqual(anterior, filtro.frame("Despesas", comparison.anterior)["VALOR"].sum(), places=6)
+
+    def test_kpi_totals_follow_comparison_period(self):
+        """Os cards usam o período atual da comparação: no acumulado do ano, Janeiro até o mês selecionado"""
+        despesas = pd.DataFrame({
+            "DATA": pd.to_datetime(["2023-01-10", "2023-03-05", "2024-01-15", "2024-02-20", "2024-03-10"]),
+            "CONTA": ["Itaú"] * 5,
+            "CATEGORIA": ["Casa"] * 5,
+            "VALOR": [-10.0, -20.0, -100.0, -200.0, -300.0],
+        })
+        cube = WorkbookSnapshot({"Despesas": despesas}, signature=None).monthly_cube("Despesas")
+        plan = FilterPlan.from_sidebar([2024], ["Mar"])
+
+        atual, anterior = kpi_totals(cube, plan, compare_periods(plan, "Acumulado do ano"))
+        self.assertEqual((atual, anterior), (-600.0, -30.0))
+        atual, anterior = kpi_totals(cube, plan, compare_periods(plan, "Mesmo período do ano anterior"))
+        self.assertEqual((atual, anterior), (-300.0, -20.0))
+        self.assertEqual(kpi_totals(cube, FilterPlan.from_sidebar([], []), None), (-630.0, 0.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
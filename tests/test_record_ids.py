@@ -0,0 +1,179 @@
+"""
+Testes para os ids estáveis das linhas e o CRUD por id
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import pandas as pd
+
+# Adicionar o diretório raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crud_system import CRUDSystem
+from modules.data_manager import DataManager
+from modules.journal import apply_entries
+from modules.record_ids import DuplicateRecordIdError, RowIdIndex, ensure_ids
+
+
+class TestEnsureIds(unittest.TestCase):
+    """Testes para a atribuição de ids"""
+
+    def test_missing_and_duplicated_ids_are_filled(self):
+        """Ids válidos são preservados; ausentes e repetidos recebem novos ids"""
+        df = pd.DataFrame({"VALOR": [1, 2, 3, 4], "id": [5, None, 5, 2]})
+        df_ids, changed = ensure_ids(df)
+        self.assertTrue(changed)
+        self.assertEqual(df_ids["id"].tolist(), [5, 6, 7, 2])
+
+        _, changed = ensure_ids(df_ids)
+        self.assertFalse(changed)
+
+    def test_index_lookup(self):
+        """O índice devolve o rótulo da linha a partir do id"""
+        df = pd.DataFrame({"id": [10, 20, 30]}, index=[4, 7, 9])
+        id_index = RowIdIndex(df)
+        self.assertEqual(id_index.label(20), 7)
+        self.assertEqual(id_index.missing([30, 40]), [40])
+
+    def test_duplicated_ids_are_refused(self):
+        """Um id repetido não identifica uma linha: busca e entradas do journal são recusadas"""
+        df = pd.DataFrame({"id": [1, 2, 2], "VALOR": [10.0, 20.0, 30.0]})
+        id_index = RowIdIndex(df)
+        self.assertEqual(id_index.label(1), 0)
+        self.assertEqual(id_index.duplicated([1, 2]), [2])
+        with self.assertRaises(DuplicateRecordIdError):
+            id_index.label(2)
+        with self.assertRaises(DuplicateRecordIdError):
+            apply_entries(df, [{"seq": 1, "op": "delete", "ids": [2]}])
+
+
+class TestCrudById(unittest.TestCase):
+    """Inserção com id e edição/exclusão por id, com e sem journal"""
+
+    def setUp(self):
+        """Cria uma planilha temporária sem a coluna de id"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.excel_file = os.path.join(self.tmp_dir.name, "base.xlsx")
+        despesas = pd.DataFrame({
+            "DATA": pd.to_datetime(["2024-01-10", "2024-01-12", "2024-01-15"]),
+            "DESCRIÇÃO": ["Aluguel", "Mercado", "Farmácia"],
+            "VALOR": [1500.0, 320.5, 45.0],
+        })
+        with pd.ExcelWriter(self.excel_file, engine="openpyxl") as writer:
+            despesas.to_excel(writer, sheet_name="Despesas", index=False)
+            pd.DataFrame({"Contas": ["Nubank"]}).to_excel(writer, sheet_name="Conta", index=False)
+        for target, values in (("modules.storage_backend.SIDECAR_CONFIG", {"enabled": False}),
+                               ("modules.data_manager.BACKUP_CONFIG", {"backup_before_changes": False}),
+                               ("config.settings.JOURNAL_CONFIG", {"compact_interval_seconds": 3600})):
+            patcher = patch.dict(target, values)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = patch("modules.storage_backend.safe_backup")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.manager = DataManager(self.excel_file)
+        self.crud = CRUDSystem(self.excel_file)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def seen(self, record_ids):
+        """Linhas dos ids como a tela as mostra (o 'expected' do CRUD por id)"""
+        return self.manager.get_record_options("Despesas").seen_rows(record_ids)
+
+    def test_migration_and_insert_assign_ids(self):
+        """A migração numera as linhas e as inserções continuam a sequência"""
+        self.assertEqual(self.manager.ensure_record_ids(), ["Despesas"])
+        self.assertEqual(self.manager.ensure_record_ids(), [])
+        self.assertNotIn("id", pd.read_excel(self.excel_file, sheet_name="Conta").columns)
+
+        nova = pd.DataFrame([{"DATA": "2024-02-01", "DESCRIÇÃO": "Luz", "VALOR": 99.0}])
+        self.assertTrue(self.manager.append_rows(nova, "Despesas"))
+        df = pd.read_excel(self.excel_file, sheet_name="Despesas")
+        self.assertEqual(df["id"].tolist(), [1, 2, 3, 4])
+
+    def test_update_and_delete_by_id_follow_the_row(self):
+        """As operações atingem a linha do id mesmo depois que as posições mudam"""
+        self.manager.ensure_record_ids()
+        visto = self.seen([1])
+        self.crud.delete_records_by_id("Despesas", [1], visto)
+
+        success, _ = self.crud.update_record_by_id("Despesas", 3, {"VALOR": 50.0}, self.seen([3]))
+        self.assertTrue(success)
+        df = self.manager.load_excel_data("Despesas")
+        self.assertEqual(df["DESCRIÇÃO"].tolist(), ["Mercado", "Farmácia"])
+        self.assertEqual(df["VALOR"].tolist(), [320.5, 50.0])
+        self.assertEqual(self.manager.get_id_index("Despesas").label(3), 1)
+
+        success, _ = self.crud.update_record_by_id("Despesas", 1, {"VALOR": 1.0}, visto)
+        self.assertFalse(success)
+
+        self.crud.compact_journal()
+        df = pd.read_excel(self.excel_file, sheet_name="Despesas")
+        self.assertEqual(df["id"].tolist(), [2, 3])
+        self.assertEqual(df["VALOR"].tolist(), [320.5, 50.0])
+
+    def test_deleted_max_id_is_never_reused(self):
+        """Excluir o maior id (pendente no journal), inserir e compactar não ressuscita a linha excluída"""
+        self.manager.ensure_record_ids()
+        visto = self.seen([3])
+        self.assertTrue(self.crud.delete_records_by_id("Despesas", [3], visto)[0])
+        nova = pd.DataFrame([{"DATA": "2024-02-01", "DESCRIÇÃO": "Luz", "VALOR": 99.0}])
+        self.assertTrue(self.manager.append_rows(nova, "Despesas"))
+
+        df = self.manager.load_excel_data("Despesas")
+        self.assertEqual(df["id"].tolist(), [1, 2, 4])
+        # Uma sessão que ainda guarda o id 3 não atinge a linha nova
+        self.assertFalse(self.crud.update_record_by_id("Despesas", 3, {"VALOR": 1.0}, visto)[0])
+
+        self.crud.compact_journal()
+        df = pd.read_excel(self.excel_file, sheet_name="Despesas")
+        self.assertEqual(df["DESCRIÇÃO"].tolist(), ["Aluguel", "Mercado", "Luz"])
+        self.assertEqual(df["id"].tolist(), [1, 2, 4])
+
+        # Depois da compactação (e sem journal) a sequência continua acima do id excluído
+        with patch.object(self.crud, "journal", None):
+            self.assertTrue(self.crud.delete_records_by_id("Despesas", [4], self.seen([4]))[0])
+        self.assertTrue(self.manager.append_rows(nova, "Despesas"))
+        df = pd.read_excel(self.excel_file, sheet_name="Despesas")
+        self.assertEqual(df["id"].tolist(), [1, 2, 5])
+
+    def test_by_id_without_journal(self):
+        """Sem journal a aba é regravada com a linha do id alterada"""
+        self.manager.ensure_record_ids()
+        with patch.object(self.crud, "journal", None):
+            self.assertTrue(self.crud.delete_records_by_id("Despesas", [2], self.seen([2]))[0])
+            self.assertTrue(self.crud.update_record_by_id("Despesas", 3, {"DESCRIÇÃO": "Remédio"}, self.seen([3]))[0])
+        df = pd.read_excel(self.excel_file, sheet_name="Despesas")
+        self.assertEqual(df["DESCRIÇÃO"].tolist(), ["Aluguel", "Remédio"])
+        self.assertEqual(df["id"].tolist(), [1, 3])
+
+    def test_interleaved_edits_of_the_same_id(self):
+        """A edição de quem viu a linha antes de outra sessão alterá-la é recusada"""
+        self.manager.ensure_record_ids()
+        # As duas sessões abrem a tela com a mesma linha
+        visto_a = self.seen([2])
+        visto_b = self.seen([2])
+
+        self.assertTrue(self.crud.update_record_by_id("Despesas", 2, {"VALOR": 400.0}, visto_b)[0])
+        success, message = self.crud.update_record_by_id("Despesas", 2, {"DESCRIÇÃO": "Feira"}, visto_a)
+        self.assertFalse(success)
+        self.assertIn("alterado por outra sessão", message)
+        # Na exclusão em lote, uma linha alterada impede a exclusão de todas
+        self.assertFalse(self.crud.delete_records_by_id("Despesas", [1, 2], pd.concat([self.seen([1]), visto_a]))[0])
+
+        df = self.manager.load_excel_data("Despesas")
+        self.assertEqual(df["DESCRIÇÃO"].tolist(), ["Aluguel", "Mercado", "Farmácia"])
+        self.assertEqual(df["VALOR"].tolist(), [1500.0, 400.0, 45.0])
+
+        # Recarregada a tela, a sessão A vê o valor novo e consegue gravar
+        self.assertTrue(self.crud.update_record_by_id("Despesas", 2, {"DESCRIÇÃO": "Feira"}, self.seen([2]))[0])
+        self.assertEqual(self.manager.load_excel_data("Despesas").at[1, "DESCRIÇÃO"], "Feira")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+"""
+Testes para os rótulos vetorizados das opções de seleção de registros
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+# Adicionar o diretório raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.data_manager import DataManager
+from modules.record_options import RecordOptions, build_labels, format_brl_series
+
+
+class TestLabels(unittest.TestCase):
+    """Testes para a montagem dos rótulos"""
+
+    def test_format_brl_series(self):
+        """Separador de milhar, centavos arredondados e sinal"""
+        values = pd.Series([0, 5.5, -1234.567, 1234567.891, np.nan])
+        self.assertEqual(format_brl_series(values).tolist(),
+                         ["R$ 0,00", "R$ 5,50", "R$ -1.234,57", "R$ 1.234.567,89", "R$ 0,00"])
+        self.assertEqual(format_brl_series(values, absolute=True).iloc[2], "R$ 1.234,57")
+
+    def test_duplicated_labels_are_disambiguated(self):
+        """Linhas iguais recebem o id no rótulo e o mapeamento continua um para um"""
+        df = pd.DataFrame({
+            "DATA": pd.to_datetime(["2024-01-10", "2024-01-10", "2024-01-12"]),
+            "DESCRIÇÃO": ["Mercado", "Mercado", "Aluguel"],
+            "VALOR": [-50.0, -50.0, -1500.0],
+            "id": [7, 8, 9],
+        }, index=[10, 11, 12])
+        labels = build_labels(df, "Despesas")
+        self.assertEqual(labels[9], "12/01/2024 - Aluguel - R$ 1.500,00")
+        self.assertEqual(labels[8], "10/01/2024 - Mercado - R$ 50,00 (#8)")
+
+        options = RecordOptions(labels, df.iloc[[2, 0]])
+        self.assertEqual(options.ids, [9, 7])
+        self.assertEqual(options.id_for(options.labels[1]), 7)
+        self.assertEqual(options.row_for(options.labels[0]), 12)
+
+
+class TestDataManagerOptions(unittest.TestCase):
+    """Os rótulos ficam em cache até a aba mudar"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.excel_file = os.path.join(self.tmp_dir.name, "base.xlsx")
+        vendas = pd.DataFrame({
+            "DATA": pd.to_datetime(["2024-03-01", "2024-03-02"]),
+            "Cliente": ["Ana", "Bruno"],
+            "VALOR": [120.0, 80.0],
+            "id": [1, 2],
+        })
+        with pd.ExcelWriter(self.excel_file, engine="openpyxl") as writer:
+            vendas.to_excel(writer, sheet_name="Vendas", index=False)
+        for target, values in (("modules.storage_backend.SIDECAR_CONFIG", {"enabled": False}),
+                               ("modules.data_manager.BACKUP_CONFIG", {"backup_before_changes": False})):
+            patcher = patch.dict(target, values)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.manager = DataManager(self.excel_file)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_labels_are_cached_per_sheet_version(self):
+        """Os rótulos não são refeitos em uma releitura; uma inserção gera novos rótulos"""
+        with patch("modules.data_manager.build_labels", wraps=build_labels) as mock_build:
+            first = self.manager.get_record_options("Vendas")
+            self.manager.get_record_options("Vendas")
+            self.assertEqual(mock_build.call_count, 1)
+            self.assertEqual(first.labels[0], "01/03/2024 - Ana - R$ 120,00")
+
+            nova = pd.DataFrame([{"DATA": "2024-03-05", "Cliente": "Carla", "VALOR": 60.0}])
+            self.assertTrue(self.manager.append_rows(nova, "Vendas"))
+            options = self.manager.get_record_options("Vendas")
+            self.assertEqual(mock_build.call_count, 2)
+            self.assertEqual(options.id_for("05/03/2024 - Carla - R$ 60,00"), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+"""
+Testes para o armazenamento colunar (sidecar) das abas do Excel
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import pandas as pd
+
+# Adicionar o diretório raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.data_manager import DataManager
+from modules.sidecar_store import SidecarStore
+
+
+class TestSidecarStore(unittest.TestCase):
+    """Testes para o SidecarStore"""
+
+    def setUp(self):
+        """Cria uma planilha temporária"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.excel_file = os.path.join(self.tmp_dir.name, "base.xlsx")
+        self.receitas = pd.DataFrame({
+            "DATA": pd.to_datetime(["2024-01-01", "2024-01-15"]),
+            "DESCRIÇÃO": ["Salário", "Freelance"],
+            "VALOR": [5000.0, 1000.0],
+        })
+        with pd.ExcelWriter(self.excel_file, engine="openpyxl") as writer:
+            self.receitas.to_excel(writer, sheet_name="Receitas", index=False)
+        self.store = SidecarStore(self.excel_file)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_write_and_read(self):
+        """Grava e lê uma aba usando a mesma assinatura"""
+        signature = self.store.signature()
+        self.assertTrue(self.store.write("Receitas", self.receitas, signature))
+
+        result = self.store.read("Receitas", signature)
+        self.assertIsNotNone(result)
+        self.assertEqual(result["VALOR"].tolist(), [5000.0, 1000.0])
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(result["DATA"]))
+
+    def test_stale_signature_is_ignored(self):
+        """Uma assinatura diferente não reaproveita o sidecar antigo"""
+        signature = self.store.signature()
+        self.store.write("Receitas", self.receitas, signature)
+
+        stale = (signature[0] + 1, signature[1])
+        self.assertIsNone(self.store.read("Receitas", stale))
+
+    def test_purge_keeps_other_workbooks(self):
+        """Ao mudar de versão, só os sidecars desta planilha são removidos"""
+        signature = self.store.signature()
+        self.store.write("Receitas", self.receitas, signature)
+        outra_excel = os.path.join(self.tmp_dir.name, "base_financas.xlsx")
+        with pd.ExcelWriter(outra_excel, engine="openpyxl") as writer:
+            self.receitas.to_excel(writer, sheet_name="Receitas", index=False)
+        outra = SidecarStore(outra_excel)
+        outra_signature = outra.signature()
+        self.assertTrue(outra.write("Receitas", self.receitas, outra_signature))
+
+        self.store.clear()
+        self.assertIsNone(self.store.read("Receitas", signature))
+        self.assertIsNotNone(outra.read("Receitas", outra_signature))
+
+    def test_data_manager_reads_sidecar_on_cold_miss(self):
+        """Após a primeira conversão o DataManager não reprocessa o xlsx"""
+        manager = DataManager(self.excel_file)
+        first = manager.load_excel_data("Receitas")
+
+        cold_manager = DataManager(self.excel_file)
+        with patch("modules.storage_backend.pd.read_excel") as mock_read_excel:
+            second = cold_manager.load_excel_data("Receitas")
+            mock_read_excel.assert_not_called()
+
+        pd.testing.assert_frame_equal(first, second, check_dtype=False)
+
+
+if __name__ == "__main__":
+    unittest.main()
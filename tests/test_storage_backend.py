@@ -0,0 +1,120 @@
+"""
+Testes para o backend de armazenamento SQLite
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import pandas as pd
+
+# Adicionar o diretório raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crud_system import CRUDSystem
+from modules.data_manager import DataManager
+from modules.storage_backend import SQLiteBackend, StorageBackend
+
+
+class TestSQLiteBackend(unittest.TestCase):
+    """Testes para o SQLiteBackend via DataManager e CRUDSystem"""
+
+    def setUp(self):
+        """Cria uma planilha temporária e seleciona o backend SQLite"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.excel_file = os.path.join(self.tmp_dir.name, "base.xlsx")
+        self.db_path = os.path.join(self.tmp_dir.name, "base.db")
+        despesas = pd.DataFrame({
+            "DATA": pd.to_datetime(["2024-01-10", "2024-01-12", "2024-02-15"]),
+            "CATEGORIA": ["Moradia", "Alimentação", "Saúde"],
+            "CONTA": ["Nubank", "Itaú", "Nubank"],
+            "VALOR": [1500.0, 320.5, 45.0],
+        })
+        with pd.ExcelWriter(self.excel_file, engine="openpyxl") as writer:
+            despesas.to_excel(writer, sheet_name="Despesas", index=False)
+            pd.DataFrame({"Contas": ["Nubank", "Itaú"]}).to_excel(writer, sheet_name="Conta", index=False)
+        for target, values in (("modules.storage_backend.STORAGE_CONFIG", {"backend": "sqlite", "sqlite_path": self.db_path}),
+                               ("modules.data_manager.BACKUP_CONFIG", {"backup_before_changes": False}),
+                               ("config.settings.JOURNAL_CONFIG", {"compact_interval_seconds": 3600})):
+            patcher = patch.dict(target, values)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = patch.object(SQLiteBackend, "backup")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.manager = DataManager(self.excel_file)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_import_keeps_sheets_types_and_indexes(self):
+        """A planilha é importada no primeiro uso com tipos e índices"""
+        snapshot = self.manager.get_snapshot()
+        self.assertEqual(snapshot.sheet_names, ["Despesas", "Conta"])
+
+        despesas = self.manager.load_excel_data("Despesas")
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(despesas["DATA"]))
+        self.assertEqual(despesas["VALOR"].tolist(), [1500.0, 320.5, 45.0])
+
+        with sqlite3.connect(self.db_path) as conn:
+            indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        self.assertIn("ix_Despesas_DATA", indexes)
+        self.assertIn("ix_Despesas_CONTA", indexes)
+
+    def test_filters_are_pushed_down(self):
+        """get_filtered_data consulta o banco sem carregar a aba inteira"""
+        with patch.object(DataManager, "load_excel_data") as mock_load:
+            df = self.manager.get_filtered_data("Despesas", {"CONTA": "Nubank", "CATEGORIA": ["Saúde", "Lazer"]})
+            mock_load.assert_not_called()
+        self.assertEqual(df["VALOR"].tolist(), [45.0])
+
+    def test_append_and_crud_use_database(self):
+        """Append, edição e exclusão chegam ao banco; a planilha não é alterada"""
+        mtime = os.stat(self.excel_file).st_mtime_ns
+        self.manager.ensure_record_ids()
+        nova = pd.DataFrame([{"DATA": "2024-03-01", "CATEGORIA": "Lazer", "CONTA": "Itaú", "VALOR": 80.0}])
+        self.assertTrue(self.manager.append_rows(nova, "Despesas"))
+
+        crud = CRUDSystem(self.excel_file)
+        seen = crud.load_sheet_data("Despesas")
+        crud.delete_records_by_id("Despesas", [seen["id"].iloc[0]], seen.iloc[[0]])
+        crud.compact_journal()
+
+        df = self.manager.load_excel_data("Despesas")
+        self.assertEqual(df["CATEGORIA"].tolist(), ["Alimentação", "Saúde", "Lazer"])
+        self.assertEqual(df["DATA"].iloc[-1], pd.Timestamp("2024-03-01"))
+        self.assertEqual(os.stat(self.excel_file).st_mtime_ns, mtime)
+
+    def test_export_roundtrip(self):
+        """A exportação gera um .xlsx com as mesmas abas"""
+        backend = SQLiteBackend(self.db_path)
+        backend.import_xlsx(self.excel_file)
+        exported = os.path.join(self.tmp_dir.name, "export.xlsx")
+        backend.export_xlsx(exported)
+
+        sheets = pd.read_excel(exported, sheet_name=None)
+        self.assertEqual(list(sheets), ["Despesas", "Conta"])
+        self.assertEqual(sheets["Despesas"]["CONTA"].tolist(), ["Nubank", "Itaú", "Nubank"])
+
+
+class TestStorageBackendInterface(unittest.TestCase):
+    """Testes para a interface StorageBackend"""
+
+    def test_incomplete_backend_cannot_be_created(self):
+        """Um backend sem todos os métodos da interface falha na criação, não no primeiro uso"""
+        class SomenteLeitura(StorageBackend):
+            def exists(self):
+                return True
+
+            def read_sheet(self, sheet_name, signature=None):
+                return pd.DataFrame()
+
+        with self.assertRaises(TypeError):
+            SomenteLeitura()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+"""
+Testes para a seleção dos N maiores totais
+"""
+
+import os
+import sys
+import unittest
+
+import numpy as np
+import pandas as pd
+
+# Adicionar o diretório raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.top_n import top_n, top_n_frame
+from utils.kpi_manager import get_top_five
+
+
+class TestTopN(unittest.TestCase):
+    """Testes para top_n"""
+
+    def test_matches_stable_sort(self):
+        """Coincide com sort_values estável + head, inclusive com empates e nulos"""
+        rng = np.random.default_rng(2)
+        totals = pd.Series(rng.integers(-20, 20, 300).astype(float), index=[f"G{i}" for i in range(300)])
+        totals.iloc[[7, 9]] = np.nan
+        for n in (1, 5, 10, 299, 400):
+            for absolute in (False, True):
+                base = totals.abs() if absolute else totals
+                expected = base.dropna().sort_values(ascending=False, kind="stable").head(n)
+                pd.testing.assert_series_equal(top_n(totals, n, absolute), expected)
+        self.assertTrue(top_n(totals, 0).empty)
+        self.assertTrue(top_n(pd.Series(dtype=float)).empty)
+
+    def test_frame_and_get_top_five(self):
+        """Formato de DataFrame usado pelos gráficos e o get_top_five do kpi_manager"""
+        vendas = pd.DataFrame({"Cliente": ["A", "B", "A", "C", "D"], "VALOR": [10.0, 30.0, 25.0, 5.0, 1.0]})
+        frame = top_n_frame(vendas.groupby("Cliente")["VALOR"].sum(), 2)
+        self.assertEqual(frame.to_dict("list"), {"Cliente": ["A", "B"], "VALOR": [35.0, 30.0]})
+        self.assertEqual(get_top_five(vendas, ["CLIENTE", "Cliente"], ["VALOR"], n=3)["Cliente"].tolist(), ["A", "B", "C"])
+        self.assertTrue(get_top_five(vendas, ["PRODUTO"], ["VALOR"]).empty)
+
+
+if __name__ == "__main__":
+    unittest.main()
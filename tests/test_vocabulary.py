@@ -0,0 +1,98 @@
+"""
+Testes para o vocabulário das colunas categóricas
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import pandas as pd
+
+# Adicionar o diretório raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crud_system import CRUDSystem
+from modules.data_manager import DataManager
+from modules.vocabulary import SheetVocabulary
+
+
+class TestSheetVocabulary(unittest.TestCase):
+    """Testes para o SheetVocabulary"""
+
+    def test_counts_follow_inserts_and_removals(self):
+        """Um valor só sai do vocabulário quando a última linha com ele é removida"""
+        df = pd.DataFrame({"CATEGORIA": ["Casa", "Lazer", "Casa", None], "VALOR": [1, 2, 3, 4]})
+        vocab = SheetVocabulary(df)
+        self.assertEqual(vocab.values("CATEGORIA"), ("Casa", "Lazer"))
+        self.assertNotIn("VALOR", vocab)
+
+        vocab.apply(removed=df.iloc[[0]])
+        self.assertEqual(vocab.values("CATEGORIA"), ("Casa", "Lazer"))
+        vocab.apply(added=pd.DataFrame({"CATEGORIA": ["Saúde"]}), removed=df.iloc[[2]])
+        self.assertEqual(vocab.values("CATEGORIA"), ("Lazer", "Saúde"))
+
+
+class TestDataManagerVocabulary(unittest.TestCase):
+    """Vocabulário por versão da aba, atualizado sem reconstrução nas escritas"""
+
+    def setUp(self):
+        """Cria uma planilha temporária com Despesas e ids"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.excel_file = os.path.join(self.tmp_dir.name, "base.xlsx")
+        despesas = pd.DataFrame({
+            "DATA": pd.to_datetime(["2024-01-10", "2024-01-12", "2024-01-15"]),
+            "CATEGORIA": ["Casa", "Mercado", "Saúde"],
+            "FAVORECIDO": ["Imobiliária", "Extra", "Drogasil"],
+            "VALOR": [-1500.0, -320.5, -45.0],
+            "id": [1, 2, 3],
+        })
+        with pd.ExcelWriter(self.excel_file, engine="openpyxl") as writer:
+            despesas.to_excel(writer, sheet_name="Despesas", index=False)
+        for target, values in (("modules.storage_backend.SIDECAR_CONFIG", {"enabled": False}),
+                               ("modules.data_manager.BACKUP_CONFIG", {"backup_before_changes": False}),
+                               ("config.settings.JOURNAL_CONFIG", {"compact_interval_seconds": 3600})):
+            patcher = patch.dict(target, values)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = patch("modules.storage_backend.safe_backup")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.manager = DataManager(self.excel_file)
+        self.crud = CRUDSystem(self.excel_file)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_writes_update_without_rebuild(self):
+        """Inserções e operações do journal por id não reconstroem o vocabulário"""
+        self.assertEqual(self.manager.get_vocabulary("Despesas", "CATEGORIA"), ("Casa", "Mercado", "Saúde"))
+
+        with patch("modules.vocabulary.SheetVocabulary.__init__", side_effect=AssertionError("reconstruído")):
+            nova = pd.DataFrame([{"DATA": "2024-02-01", "CATEGORIA": "Lazer", "FAVORECIDO": "Cinema", "VALOR": -40.0}])
+            self.assertTrue(self.manager.append_rows(nova, "Despesas"))
+            self.assertEqual(self.manager.get_vocabulary("Despesas", "CATEGORIA"),
+                             ("Casa", "Lazer", "Mercado", "Saúde"))
+
+            opcoes = self.manager.get_record_options("Despesas")
+            self.crud.delete_records_by_id("Despesas", [3], opcoes.seen_rows([3]))
+            self.crud.update_record_by_id("Despesas", 2, {"FAVORECIDO": "Carrefour"}, opcoes.seen_rows([2]))
+            self.assertEqual(self.manager.get_vocabulary("Despesas", "CATEGORIA"), ("Casa", "Lazer", "Mercado"))
+            self.assertEqual(self.manager.get_vocabulary("Despesas", "FAVORECIDO"),
+                             ("Carrefour", "Cinema", "Imobiliária"))
+
+    def test_external_change_rebuilds(self):
+        """Uma alteração que não passou pelo DataManager reconstrói o vocabulário"""
+        self.manager.get_vocabulary("Despesas", "CATEGORIA")
+        df = pd.read_excel(self.excel_file, sheet_name="Despesas")
+        df.loc[0, "CATEGORIA"] = "Moradia"
+        with pd.ExcelWriter(self.excel_file, engine="openpyxl") as writer:
+            df.to_excel(writer, sheet_name="Despesas", index=False)
+
+        self.assertEqual(self.manager.get_unique_values("Despesas", "CATEGORIA"), ["Mercado", "Moradia", "Saúde"])
+        self.assertEqual(self.manager.get_vocabulary("Despesas", "Inexistente"), ())
+
+
+if __name__ == "__main__":
+    unittest.main()
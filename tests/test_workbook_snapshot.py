@@ -0,0 +1,74 @@
+"""
+Testes para o snapshot único da planilha
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import pandas as pd
+
+# Adicionar o diretório raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.data_manager import DataManager
+
+
+class TestWorkbookSnapshot(unittest.TestCase):
+    """Testes para o WorkbookSnapshot"""
+
+    def setUp(self):
+        """Cria uma planilha temporária com três abas"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.excel_file = os.path.join(self.tmp_dir.name, "base.xlsx")
+        with pd.ExcelWriter(self.excel_file, engine="openpyxl") as writer:
+            pd.DataFrame({"DATA": ["2024-01-05"], "VALOR": [5000.0]}).to_excel(writer, sheet_name="Receitas", index=False)
+            pd.DataFrame({"DATA": ["2024-01-10"], "VALOR": [1500.0]}).to_excel(writer, sheet_name="Despesas", index=False)
+            pd.DataFrame({"Contas": ["Nubank"]}).to_excel(writer, sheet_name="Conta", index=False)
+        patcher = patch.dict("modules.storage_backend.SIDECAR_CONFIG", {"enabled": False})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.manager = DataManager(self.excel_file)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_single_parse_per_version(self):
+        """Várias chamadas na mesma versão abrem a planilha uma única vez"""
+        with patch("modules.storage_backend.pd.read_excel", wraps=pd.read_excel) as mock_read_excel:
+            first = self.manager.get_snapshot()
+            second = self.manager.get_snapshot()
+            self.assertEqual(mock_read_excel.call_count, 1)
+
+        self.assertIs(first, second)
+        self.assertEqual(first.sheet_names, ["Receitas", "Despesas", "Conta"])
+
+    def test_typed_copies(self):
+        """As abas chegam tipadas e cada consumidor recebe uma cópia"""
+        snapshot = self.manager.get_snapshot()
+        receitas = snapshot.get("Receitas")
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(receitas["DATA"]))
+
+        receitas["VALOR"] = 0.0
+        self.assertEqual(snapshot.get("Receitas")["VALOR"].iloc[0], 5000.0)
+        self.assertTrue(snapshot.get("Inexistente").empty)
+
+    def test_rebuild_reads_only_changed_sheet(self):
+        """Após salvar uma aba, o novo snapshot relê apenas essa aba"""
+        self.manager.get_snapshot()
+        novas = pd.DataFrame({"DATA": ["2024-01-10", "2024-01-11"], "VALOR": [1500.0, 80.0]})
+        self.manager.save_data(novas, "Despesas", self.manager.get_sheet_version("Despesas"))
+
+        with patch("modules.storage_backend.pd.read_excel", wraps=pd.read_excel) as mock_read_excel:
+            snapshot = self.manager.get_snapshot()
+            self.assertEqual(mock_read_excel.call_count, 1)
+            self.assertEqual(mock_read_excel.call_args.kwargs["sheet_name"], ["Despesas"])
+
+        self.assertEqual(len(snapshot.get("Despesas")), 2)
+        self.assertIn("Conta", snapshot)
+
+
+if __name__ == "__main__":
+    unittest.main()
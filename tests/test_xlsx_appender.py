@@ -0,0 +1,86 @@
+"""
+Testes para a anexação de linhas direto no XML da aba
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+import zipfile
+from unittest.mock import patch
+
+import openpyxl
+import pandas as pd
+
+# Adicionar o diretório raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.data_manager import DataManager
+from modules.storage_backend import ExcelBackend
+
+
+class TestXlsxAppender(unittest.TestCase):
+    """Testes para DataManager.append_rows"""
+
+    def setUp(self):
+        """Cria uma planilha temporária com duas abas"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.excel_file = os.path.join(self.tmp_dir.name, "base.xlsx")
+        despesas = pd.DataFrame({
+            "DATA": pd.to_datetime(["2024-01-10", "2024-01-12"]),
+            "DESCRIÇÃO": ["Aluguel", "Mercado"],
+            "VALOR": [1500.0, 320.5],
+        })
+        with pd.ExcelWriter(self.excel_file, engine="openpyxl") as writer:
+            pd.DataFrame({"Contas": ["Nubank"]}).to_excel(writer, sheet_name="Conta", index=False)
+            despesas.to_excel(writer, sheet_name="Despesas", index=False)
+        for target, values in (("modules.storage_backend.SIDECAR_CONFIG", {"enabled": False}),
+                               ("modules.data_manager.BACKUP_CONFIG", {"backup_before_changes": False})):
+            patcher = patch.dict(target, values)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.manager = DataManager(self.excel_file)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _entry(self, name):
+        with zipfile.ZipFile(self.excel_file) as archive:
+            return archive.read(name)
+
+    def test_append_keeps_types_and_other_sheets(self):
+        """A nova linha chega tipada e as outras abas ficam intactas"""
+        conta_xml = self._entry("xl/worksheets/sheet1.xml")
+        nova = pd.DataFrame([{"DATA": "2024-02-01", "DESCRIÇÃO": "Luz & gás <casa>", "VALOR": 99.9}])
+
+        with patch.object(ExcelBackend, "_append_rows_openpyxl") as mock_openpyxl:
+            self.assertTrue(self.manager.append_rows(nova, "Despesas"))
+            mock_openpyxl.assert_not_called()
+
+        self.assertEqual(self._entry("xl/worksheets/sheet1.xml"), conta_xml)
+        df = pd.read_excel(self.excel_file, sheet_name="Despesas")
+        self.assertEqual(len(df), 3)
+        self.assertEqual(df["DATA"].iloc[-1], pd.Timestamp("2024-02-01"))
+        self.assertEqual(df["DESCRIÇÃO"].iloc[-1], "Luz & gás <casa>")
+        self.assertAlmostEqual(df["VALOR"].iloc[-1], 99.9)
+        self.assertEqual(openpyxl.load_workbook(self.excel_file)["Despesas"].max_row, 4)
+
+    def test_cache_sees_appended_rows(self):
+        """O cache da aba é invalidado após o append"""
+        self.manager.load_excel_data("Despesas")
+        self.manager.add_row("Despesas", {"DATA": "2024-02-02", "DESCRIÇÃO": "Água", "VALOR": 50.0})
+        self.assertEqual(len(self.manager.load_excel_data("Despesas")), 3)
+
+    def test_new_column_falls_back_to_openpyxl(self):
+        """Colunas novas são criadas no cabeçalho pelo caminho do openpyxl"""
+        nova = pd.DataFrame([{"DATA": "2024-02-03", "DESCRIÇÃO": "Internet", "VALOR": 120.0, "PAGO": "Sim"}])
+        self.assertTrue(self.manager.append_rows(nova, "Despesas"))
+
+        df = pd.read_excel(self.excel_file, sheet_name="Despesas")
+        self.assertIn("PAGO", df.columns)
+        self.assertEqual(df["PAGO"].iloc[-1], "Sim")
+        self.assertTrue(df["PAGO"].iloc[:2].isna().all())
+
+
+if __name__ == "__main__":
+    unittest.main()
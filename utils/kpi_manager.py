@@ -1,9 +1,27 @@
 """
 Módulo para calcular KPIs (Key Performance Indicators)
 """
+from typing import Callable, Hashable, Optional
+
+import numpy as np
 import pandas as pd
+
+from config.settings import CACHE_CONFIG
+from modules.date_dimensions import month_name
+from modules.first_purchase import FirstPurchaseIndex
+from modules.lru_cache import LRUCache
+from modules.top_n import top_n_frame
 from utils.formatters import safe_divide
 
+# Rótulos fixos dos dias da semana, na ordem de dt.dayofweek (0 = segunda):
+# não dependem do locale instalado no servidor
+DIAS_SEMANA = ('segunda-feira', 'terça-feira', 'quarta-feira', 'quinta-feira', 'sexta-feira', 'sábado', 'domingo')
+DIAS_SEMANA_DTYPE = pd.CategoricalDtype(DIAS_SEMANA, ordered=True)
+
+# Agregações de vendas memorizadas por versão da aba Vendas e filtros (cache_key)
+_sales_cache = LRUCache(CACHE_CONFIG["max_entries"], CACHE_CONFIG["ttl"])
+
+
 def _get_col_name(df, *potential_names):
     """Retorna o primeiro nome de coluna encontrado no DataFrame a partir de uma lista de nomes potenciais."""
     for name in potential_names:
@@ -39,17 +57,18 @@ def calculate_sales_kpis(df_vendas: pd.DataFrame) -> dict:
         'avg_ticket': average_ticket
     }
 
-def get_top_five(df: pd.DataFrame, category_col_options: list, value_col_options: list) -> pd.DataFrame:
+def get_top_five(df: pd.DataFrame, category_col_options: list, value_col_options: list, n: int = 5) -> pd.DataFrame:
     """
-    Calcula o top 5 para uma determinada categoria com base em uma coluna de valor.
+    Calcula o top 5 (ou top n) para uma determinada categoria com base em uma coluna de valor.
 
     Args:
         df: DataFrame de entrada.
         category_col_options: Lista de nomes de coluna possíveis para a categoria.
         value_col_options: Lista de nomes de coluna possíveis para o valor.
+        n: Quantidade de grupos.
 
     Returns:
-        Um DataFrame com o top 5 ou um DataFrame vazio se as colunas não existirem.
+        Um DataFrame com o top n ou um DataFrame vazio se as colunas não existirem.
     """
     category_col = _get_col_name(df, *category_col_options)
     value_col = _get_col_name(df, *value_col_options)
@@ -57,81 +76,139 @@ def get_top_five(df: pd.DataFrame, category_col_options: list, value_col_options
     if not category_col or not value_col or df.empty:
         return pd.DataFrame()
 
-    top_five_df = df.groupby(category_col)[value_col].sum().nlargest(5).reset_index()
-    return top_five_df
+    return top_n_frame(df.groupby(category_col)[value_col].sum(), n)
+
+def _weekday_inputs(df: pd.DataFrame):
+    """Códigos do dia da semana (0 = segunda), horas e valores das vendas com data e valor válidos"""
+    data_col = _get_col_name(df, 'DATA', 'Data')
+    valor_col = _get_col_name(df, 'VALOR', 'Valor')
+    if not data_col or not valor_col or df.empty:
+        return None, valor_col
+
+    dates = df[data_col]
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = pd.to_datetime(dates, errors='coerce')
+    values = pd.to_numeric(df[valor_col], errors='coerce')
+    valid = dates.notna() & values.notna()
+    if not valid.any():
+        return None, valor_col
+    dates = dates[valid]
+    return (dates, dates.dt.dayofweek.to_numpy(), values[valid].to_numpy(dtype=float)), valor_col
+
+
+def _memoized(kind: str, cache_key: Optional[Hashable], compute: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+    """Calcula uma agregação de vendas ou a reaproveita para a mesma versão da aba e filtros"""
+    if cache_key is None:
+        return compute()
+    return _sales_cache.get_or_compute((kind, cache_key), compute).copy()
 
-def calculate_sales_by_weekday(df: pd.DataFrame) -> pd.DataFrame:
+
+def calculate_sales_by_weekday(df: pd.DataFrame, cache_key: Optional[Hashable] = None) -> pd.DataFrame:
     """
     Calcula o total de vendas para cada dia da semana.
 
     Args:
         df: DataFrame de vendas com as colunas 'DATA' e 'VALOR'.
+        cache_key: Identifica o conteúdo de df (ex.: versão da aba Vendas e filtros);
+            se informado, o resultado é memorizado.
 
     Returns:
-        DataFrame com 'Dia da Semana', 'Soma_Valor' e 'Ordem'.
+        DataFrame com 'Dia_Semana' (categórico ordenado) e a soma dos valores,
+        apenas para os dias com vendas.
     """
-    data_col = _get_col_name(df, 'DATA', 'Data')
-    valor_col = _get_col_name(df, 'VALOR', 'Valor')
+    def compute():
+        inputs, valor_col = _weekday_inputs(df)
+        if inputs is None:
+            return pd.DataFrame(columns=['Dia_Semana', valor_col])
+        _, codes, values = inputs
+        sums = np.bincount(codes, weights=values, minlength=7)
+        present = np.flatnonzero(np.bincount(codes, minlength=7))
+        return pd.DataFrame({
+            'Dia_Semana': pd.Categorical.from_codes(present, dtype=DIAS_SEMANA_DTYPE),
+            valor_col: sums[present],
+        })
+
+    return _memoized('weekday', cache_key, compute)
+
+
+def calculate_sales_by_hour(df: pd.DataFrame, cache_key: Optional[Hashable] = None) -> pd.DataFrame:
+    """
+    Calcula o total de vendas para cada hora do dia.
 
-    if not data_col or not valor_col or df.empty:
-        return pd.DataFrame(columns=['Dia_Semana', valor_col])
+    Args:
+        df: DataFrame de vendas com as colunas 'DATA' e 'VALOR'.
+        cache_key: Ver calculate_sales_by_weekday.
 
-    df_copy = df.copy()
-    df_copy[data_col] = pd.to_datetime(df_copy[data_col], errors='coerce')
-    df_copy.dropna(subset=[data_col, valor_col], inplace=True)
+    Returns:
+        DataFrame com 'Hora' (0 a 23) e a soma dos valores, apenas para as horas com vendas.
+    """
+    def compute():
+        inputs, valor_col = _weekday_inputs(df)
+        if inputs is None:
+            return pd.DataFrame(columns=['Hora', valor_col])
+        dates, _, values = inputs
+        hours = dates.dt.hour.to_numpy()
+        sums = np.bincount(hours, weights=values, minlength=24)
+        present = np.flatnonzero(np.bincount(hours, minlength=24))
+        return pd.DataFrame({'Hora': present, valor_col: sums[present]})
 
-    if df_copy.empty:
-        return pd.DataFrame(columns=['Dia_Semana', valor_col])
-        
-    df_copy['Dia_Semana'] = df_copy[data_col].dt.day_name(locale='pt_BR.utf8')
-    
-    # Ordenar os dias da semana corretamente
-    dias_ordenados = ['segunda-feira', 'terça-feira', 'quarta-feira', 'quinta-feira', 'sexta-feira', 'sábado', 'domingo']
-    df_copy['Dia_Semana'] = pd.Categorical(df_copy['Dia_Semana'].str.lower(), categories=dias_ordenados, ordered=True)
+    return _memoized('hour', cache_key, compute)
 
-    sales_by_day = df_copy.groupby('Dia_Semana')[valor_col].sum().reset_index()
-    
-    return sales_by_day.sort_values('Dia_Semana')
 
-def calculate_new_customers(all_sales_df: pd.DataFrame, filtered_sales_df: pd.DataFrame) -> int:
+def calculate_weekday_month_heatmap(df: pd.DataFrame, cache_key: Optional[Hashable] = None) -> pd.DataFrame:
+    """
+    Calcula o total de vendas por dia da semana e mês (mapa de calor).
+
+    Args:
+        df: DataFrame de vendas com as colunas 'DATA' e 'VALOR'.
+        cache_key: Ver calculate_sales_by_weekday.
+
+    Returns:
+        DataFrame com os sete dias da semana nas linhas e os meses ('Jan/2024')
+        nas colunas, em ordem cronológica; vazio se não houver vendas.
+    """
+    def compute():
+        inputs, _ = _weekday_inputs(df)
+        if inputs is None:
+            return pd.DataFrame()
+        dates, codes, values = inputs
+        periods = dates.dt.to_period('M').to_numpy()
+        heatmap = (
+            pd.Series(values).groupby([codes, periods]).sum()
+            .unstack(fill_value=0.0)
+            .reindex(range(7), fill_value=0.0)
+        )
+        heatmap.index = pd.CategoricalIndex(DIAS_SEMANA, dtype=DIAS_SEMANA_DTYPE, name='Dia_Semana')
+        heatmap.columns = [f"{month_name(period.month)}/{period.year}" for period in heatmap.columns]
+        return heatmap
+
+    return _memoized('weekday_month', cache_key, compute)
+
+def calculate_new_customers(all_sales_df: pd.DataFrame, filtered_sales_df: pd.DataFrame,
+                            index: Optional[FirstPurchaseIndex] = None) -> int:
     """
     Calcula o número de novos clientes dentro de um período filtrado.
 
     Args:
         all_sales_df: DataFrame com todas as vendas (histórico completo).
         filtered_sales_df: DataFrame com as vendas do período selecionado.
+        index: Índice de primeira compra já montado (ex.: snapshot.first_purchases()).
+            Se omitido, é montado a partir de all_sales_df.
 
     Returns:
         O número de novos clientes no período.
     """
-    client_col = _get_col_name(all_sales_df, 'CLIENTE', 'Cliente')
-    date_col = _get_col_name(all_sales_df, 'DATA', 'Data')
+    client_col = _get_col_name(filtered_sales_df, 'CLIENTE', 'Cliente')
+    date_col = _get_col_name(filtered_sales_df, 'DATA', 'Data')
 
     if not client_col or not date_col or all_sales_df.empty or filtered_sales_df.empty:
         return 0
 
-    # Copia para evitar SettingWithCopyWarning
-    all_sales = all_sales_df.copy()
-    filtered_sales = filtered_sales_df.copy()
+    if index is None:
+        index = FirstPurchaseIndex(all_sales_df)
 
-    # Certifica que as datas são do tipo datetime
-    all_sales[date_col] = pd.to_datetime(all_sales[date_col], errors='coerce')
-    filtered_sales[date_col] = pd.to_datetime(filtered_sales[date_col], errors='coerce')
-    
-    # Encontra a data da primeira compra para cada cliente no histórico completo
-    first_purchase_dates = all_sales.groupby(client_col)[date_col].min()
-    
-    # Pega os clientes únicos do período filtrado
-    clients_in_period = filtered_sales[client_col].unique()
-    
-    # Determina o intervalo de datas do filtro
-    start_date_period = filtered_sales[date_col].min()
-    end_date_period = filtered_sales[date_col].max()
-    
-    new_customer_count = 0
-    for client in clients_in_period:
-        first_purchase = first_purchase_dates.get(client)
-        if pd.notna(first_purchase) and start_date_period <= first_purchase <= end_date_period:
-            new_customer_count += 1
-            
-    return new_customer_count 
\ No newline at end of file
+    # O intervalo de datas do filtro; clientes do período com primeira compra nele
+    dates = pd.to_datetime(filtered_sales_df[date_col], errors='coerce')
+    if dates.isna().all():
+        return 0
+    return index.new_customers(filtered_sales_df[client_col], dates.min(), dates.max())